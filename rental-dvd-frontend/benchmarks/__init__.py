@@ -0,0 +1,3 @@
+"""
+Scripts de medición de rendimiento (se ejecutan con python -m benchmarks.<nombre>)
+"""
@@ -0,0 +1,182 @@
+"""
+Mide la conversión de respuestas a modelos y el formateo de tablas
+
+Casos: Renta/Cliente/DVD/Staff.from_dict, ReportesController.formatear_datos_tabla_*
+y Renta.calcular_dias_retraso, con respuestas sintéticas (benchmarks.datos_sinteticos)
+de 1k, 100k y 1M filas. Por caso informa el mejor tiempo de varias repeticiones,
+las filas por segundo y el pico de memoria asignada (tracemalloc, en una corrida
+aparte para no distorsionar el tiempo).
+
+Para detectar regresiones se guarda una línea base y se compara con ella; el
+comando termina con código 1 si algún caso pierde más de la tolerancia:
+
+Uso (desde rental-dvd-frontend/):
+    python -m benchmarks.conversion
+    python -m benchmarks.conversion --filas 1000 100000 --guardar base.json
+    python -m benchmarks.conversion --filas 1000 100000 --comparar base.json --tolerancia 0.15
+"""
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from controllers.reportes_controller import ReportesController
+from models.cliente import Cliente
+from models.dvd import DVD
+from models.renta import Renta
+from models.staff import Staff
+from benchmarks import datos_sinteticos
+
+TAMANOS = (1000, 100000, 1000000)
+
+
+def _convertir(modelo):
+    def caso(datos):
+        return [modelo.from_dict(d) for d in datos]
+    return caso
+
+
+def _dias_retraso(rentas):
+    return [renta.calcular_dias_retraso() for renta in rentas]
+
+
+def crear_casos(controller):
+    """
+    Returns:
+        dict: nombre -> (generador de la entrada, función medida, preparar)
+
+        'preparar' convierte la respuesta cruda antes de medir (por ejemplo,
+        el formateo de rentas recibe objetos Renta, no diccionarios).
+    """
+    a_rentas = _convertir(Renta)
+    return {
+        'Renta.from_dict (no devueltos)': (datos_sinteticos.no_devueltos, a_rentas, None),
+        'Renta.from_dict (rentas cliente)': (datos_sinteticos.rentas_cliente, a_rentas, None),
+        'Cliente.from_dict': (datos_sinteticos.clientes, _convertir(Cliente), None),
+        'DVD.from_dict': (datos_sinteticos.peliculas, _convertir(DVD), None),
+        'Staff.from_dict': (datos_sinteticos.empleados, _convertir(Staff), None),
+        'formatear_datos_tabla_rentas': (
+            datos_sinteticos.rentas_cliente, controller.formatear_datos_tabla_rentas, a_rentas
+        ),
+        'formatear_datos_tabla_ranking': (
+            datos_sinteticos.mas_rentados, controller.formatear_datos_tabla_ranking, None
+        ),
+        'formatear_datos_tabla_ganancias': (
+            datos_sinteticos.ganancias_staff, controller.formatear_datos_tabla_ganancias, None
+        ),
+        'calcular_dias_retraso': (datos_sinteticos.no_devueltos, _dias_retraso, a_rentas)
+    }
+
+
+def medir(funcion, entrada, repeticiones):
+    """
+    Returns:
+        tuple: (mejor tiempo en segundos, pico de memoria en bytes)
+    """
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = funcion(entrada)
+        mejor = min(mejor, time.perf_counter() - inicio)
+        del resultado
+
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion(entrada)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return mejor, pico
+
+
+def ejecutar(tamanos, repeticiones, filtro=None):
+    """
+    Returns:
+        dict: "caso @ filas" -> {'segundos', 'filas_por_segundo', 'pico_mb'}
+    """
+    controller = ReportesController()
+    resultados = {}
+    print(f"{'Caso':<36}{'Filas':>10}{'Segundos':>10}{'Filas/s':>14}{'Pico (MB)':>11}")
+
+    for filas in tamanos:
+        for nombre, (generar, funcion, preparar) in crear_casos(controller).items():
+            if filtro and filtro.lower() not in nombre.lower():
+                continue
+            entrada = list(generar(filas))
+            if preparar:
+                entrada = preparar(entrada)
+
+            segundos, pico = medir(funcion, entrada, repeticiones)
+            del entrada
+
+            clave = f"{nombre} @ {filas}"
+            resultados[clave] = {
+                'segundos': round(segundos, 4),
+                'filas_por_segundo': round(filas / max(segundos, 1e-9)),
+                'pico_mb': round(pico / (1024 * 1024), 2)
+            }
+            r = resultados[clave]
+            print(f"{nombre:<36}{filas:>10,}{segundos:>10.3f}{r['filas_por_segundo']:>14,}{r['pico_mb']:>11.2f}")
+    return resultados
+
+
+def comparar(resultados, ruta_base, tolerancia):
+    """
+    Compara las filas por segundo con la línea base
+
+    Returns:
+        list: Claves de los casos que empeoraron más que la tolerancia
+    """
+    with open(ruta_base, encoding='utf-8') as archivo:
+        base = json.load(archivo)['resultados']
+
+    regresiones = []
+    print(f"\n{'Caso':<48}{'Base':>14}{'Actual':>14}{'Cambio':>9}")
+    for clave, actual in resultados.items():
+        anterior = base.get(clave)
+        if not anterior:
+            continue
+        cambio = actual['filas_por_segundo'] / anterior['filas_por_segundo'] - 1
+        marca = "  <-- regresión" if cambio < -tolerancia else ""
+        print(f"{clave:<48}{anterior['filas_por_segundo']:>14,}{actual['filas_por_segundo']:>14,}{cambio:>+9.1%}{marca}")
+        if marca:
+            regresiones.append(clave)
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de conversión de modelos y formateo de tablas")
+    parser.add_argument('--filas', type=int, nargs='+', default=list(TAMANOS),
+                        help="Tamaños de las respuestas sintéticas")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Se informa el mejor tiempo")
+    parser.add_argument('--caso', help="Ejecutar solo los casos cuyo nombre contenga este texto")
+    parser.add_argument('--guardar', help="Guardar los resultados como línea base (JSON)")
+    parser.add_argument('--comparar', help="Línea base con la que comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Pérdida de filas/s permitida antes de marcar regresión (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.filas, args.repeticiones, args.caso)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as archivo:
+            json.dump({
+                'python': platform.python_version(),
+                'maquina': platform.machine(),
+                'resultados': resultados
+            }, archivo, indent=2, ensure_ascii=False)
+        print(f"\nLínea base guardada en {args.guardar}")
+
+    if args.comparar:
+        regresiones = comparar(resultados, args.comparar, args.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} caso(s) con regresión", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
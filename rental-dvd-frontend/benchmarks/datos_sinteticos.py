@@ -0,0 +1,191 @@
+"""
+Respuestas sintéticas con la forma de los endpoints del API
+
+Reproducen los campos (y los tipos: node-postgres entrega NUMERIC y COUNT
+como texto) de las consultas de api/src/controllers, con una semilla fija
+para que cada corrida genere exactamente los mismos datos.
+"""
+import random
+from datetime import datetime, timedelta
+
+NOMBRES = ('MARY', 'PATRICIA', 'LINDA', 'BARBARA', 'ELIZABETH', 'JENNIFER', 'MARIA', 'SUSAN')
+APELLIDOS = ('SMITH', 'JOHNSON', 'WILLIAMS', 'JONES', 'BROWN', 'DAVIS', 'MILLER', 'WILSON')
+CATEGORIAS = ('Action', 'Animation', 'Children', 'Classics', 'Comedy', 'Documentary',
+              'Drama', 'Family', 'Foreign', 'Games', 'Horror', 'Music', 'New',
+              'Sci-Fi', 'Sports', 'Travel')
+RATINGS = ('G', 'PG', 'PG-13', 'R', 'NC-17')
+TARIFAS = ('0.99', '2.99', '4.99')
+STAFF = ((1, 'Mike', 'Hillyer'), (2, 'Jon', 'Stephens'))
+
+INICIO = datetime(2005, 5, 24, 22, 53, 30)
+
+
+def fecha_api(valor):
+    """
+    Fecha como la serializa Express (ISO 8601 en UTC con milisegundos)
+    """
+    return valor.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def _nombre(aleatorio):
+    return aleatorio.choice(NOMBRES), aleatorio.choice(APELLIDOS)
+
+
+def clientes(n, semilla=1):
+    """
+    GET /customers
+    """
+    aleatorio = random.Random(semilla)
+    for customer_id in range(1, n + 1):
+        nombre, apellido = _nombre(aleatorio)
+        yield {
+            'customer_id': customer_id,
+            'store_id': aleatorio.randint(1, 2),
+            'first_name': nombre,
+            'last_name': apellido,
+            'email': f"{nombre}.{apellido}{customer_id}@sakilacustomer.org",
+            'active': 1,
+            'create_date': '2006-02-14T00:00:00.000Z'
+        }
+
+
+def peliculas(n, semilla=2):
+    """
+    GET /films
+    """
+    aleatorio = random.Random(semilla)
+    for film_id in range(1, n + 1):
+        yield {
+            'film_id': film_id,
+            'title': f"PELICULA {film_id}",
+            'description': "A Epic Drama of a Feminist And a Mad Scientist",
+            'release_year': 2006,
+            'rental_duration': aleatorio.randint(3, 7),
+            'rental_rate': aleatorio.choice(TARIFAS),
+            'length': aleatorio.randint(46, 185),
+            'rating': aleatorio.choice(RATINGS),
+            'category': aleatorio.choice(CATEGORIAS)
+        }
+
+
+def empleados(n, semilla=3):
+    """
+    GET /staff
+    """
+    aleatorio = random.Random(semilla)
+    for staff_id in range(1, n + 1):
+        nombre, apellido = _nombre(aleatorio)
+        yield {
+            'staff_id': staff_id,
+            'first_name': nombre,
+            'last_name': apellido,
+            'email': f"{nombre}.{apellido}@sakilastaff.com",
+            'store_id': aleatorio.randint(1, 2),
+            'active': True,
+            'username': nombre.lower()
+        }
+
+
+def no_devueltos(n, semilla=4):
+    """
+    GET /reports/unreturned-dvds (campo 'data')
+    """
+    aleatorio = random.Random(semilla)
+    for rental_id in range(1, n + 1):
+        fecha = INICIO + timedelta(minutes=rental_id)
+        duracion = aleatorio.randint(3, 7)
+        nombre, apellido = _nombre(aleatorio)
+        staff_id, staff_nombre, staff_apellido = aleatorio.choice(STAFF)
+        yield {
+            'rental_id': rental_id,
+            'rental_date': fecha_api(fecha),
+            'expected_return_date': fecha_api(fecha + timedelta(days=duracion)),
+            'days_rented': str(aleatorio.randint(1, 7000)),
+            'film_id': aleatorio.randint(1, 1000),
+            'title': f"PELICULA {rental_id % 1000}",
+            'rental_rate': aleatorio.choice(TARIFAS),
+            'expected_duration': duracion,
+            'customer_id': aleatorio.randint(1, 599),
+            'customer_name': f"{nombre} {apellido}",
+            'email': f"{nombre}.{apellido}@sakilacustomer.org",
+            'staff_id': staff_id,
+            'staff_name': f"{staff_nombre} {staff_apellido}",
+            'staff_email': f"{staff_nombre}.{staff_apellido}@sakilastaff.com",
+            'status': 'Atrasado'
+        }
+
+
+def rentas_cliente(n, semilla=5):
+    """
+    GET /reports/customer-rentals/{id} (campo 'rentals')
+    """
+    aleatorio = random.Random(semilla)
+    for rental_id in range(1, n + 1):
+        fecha = INICIO + timedelta(minutes=rental_id)
+        duracion = aleatorio.randint(3, 7)
+        devuelta = aleatorio.random() < 0.95
+        dias = aleatorio.randint(1, 9)
+        staff_id, staff_nombre, staff_apellido = aleatorio.choice(STAFF)
+        yield {
+            'rental_id': rental_id,
+            'rental_date': fecha_api(fecha),
+            'return_date': fecha_api(fecha + timedelta(days=dias)) if devuelta else None,
+            'film_id': aleatorio.randint(1, 1000),
+            'title': f"PELICULA {rental_id % 1000}",
+            'rental_rate': aleatorio.choice(TARIFAS),
+            'rental_duration': duracion,
+            'expected_return_date': fecha_api(fecha + timedelta(days=duracion)),
+            'category': aleatorio.choice(CATEGORIAS),
+            'staff_id': staff_id,
+            'staff_name': f"{staff_nombre} {staff_apellido}",
+            'status': 'Devuelta' if devuelta else 'Activa',
+            'days_rented': str(dias if devuelta else aleatorio.randint(1, 7000))
+        }
+
+
+def mas_rentados(n, semilla=6):
+    """
+    GET /reports/most-rented (campo 'data'), ordenado por total_rentals
+    """
+    aleatorio = random.Random(semilla)
+    for posicion in range(n):
+        total = max(1, 34 - posicion * 34 // max(n, 1))
+        devueltas = aleatorio.randint(0, total)
+        yield {
+            'film_id': posicion + 1,
+            'title': f"PELICULA {posicion + 1}",
+            'rental_rate': aleatorio.choice(TARIFAS),
+            'release_year': 2006,
+            'rating': aleatorio.choice(RATINGS),
+            'category': aleatorio.choice(CATEGORIAS),
+            'total_rentals': str(total),
+            'completed_rentals': str(devueltas),
+            'active_rentals': str(total - devueltas),
+            'total_revenue': f"{total * 2.99:.2f}",
+            'last_rental_date': fecha_api(INICIO + timedelta(days=aleatorio.randint(0, 270)))
+        }
+
+
+def ganancias_staff(n, semilla=7):
+    """
+    GET /reports/staff-revenue (campo 'data')
+    """
+    aleatorio = random.Random(semilla)
+    for staff_id in range(1, n + 1):
+        nombre, apellido = _nombre(aleatorio)
+        pagos = aleatorio.randint(7000, 8100)
+        ingresos = pagos * aleatorio.uniform(3.9, 4.4)
+        yield {
+            'staff_id': staff_id,
+            'first_name': nombre,
+            'last_name': apellido,
+            'staff_name': f"{nombre} {apellido}",
+            'email': f"{nombre}.{apellido}@sakilastaff.com",
+            'store_id': aleatorio.randint(1, 2),
+            'total_rentals': str(pagos),
+            'total_payments': str(pagos),
+            'total_revenue': f"{ingresos:.2f}",
+            'average_payment': f"{ingresos / pagos:.2f}",
+            'first_payment_date': fecha_api(INICIO),
+            'last_payment_date': fecha_api(INICIO + timedelta(days=270))
+        }
@@ -0,0 +1,133 @@
+"""
+Compara los analizadores JSON disponibles con respuestas del tamaño real
+
+Arma los cuerpos de /customers, /films, /staff, /reports/unreturned-dvds y
+/reports/customer-rentals/:id tal como los serializa Express (mismos sobres y
+campos, con los tamaños de Sakila multiplicados por --escala) y mide, para
+cada analizador instalado (y msgspec tipado si está msgspec):
+
+- decodificar: bytes -> dicts/structs (lo que hace APIService)
+- + modelo: además from_dict al modelo (lo que hace el controlador)
+
+Uso (desde rental-dvd-frontend/):
+    python -m benchmarks.decodificacion
+    python -m benchmarks.decodificacion --escala 1 10 100 --repeticiones 5
+"""
+import argparse
+import json
+import sys
+from models.cliente import Cliente
+from models.dvd import DVD
+from models.renta import Renta
+from models.staff import Staff
+from services.decodificador import ANALIZADORES, ESQUEMAS_TIPADOS, Decodificador
+from benchmarks import datos_sinteticos
+from benchmarks.conversion import medir
+
+# endpoint -> (generador de filas, filas en Sakila, campo de la lista, modelo)
+RESPUESTAS = {
+    'clientes': (datos_sinteticos.clientes, 599, 'data', Cliente),
+    'dvds': (datos_sinteticos.peliculas, 1000, 'data', DVD),
+    'staff': (datos_sinteticos.empleados, 2, 'data', Staff),
+    'no_devueltos': (datos_sinteticos.no_devueltos, 183, 'data', Renta),
+    'rentas_cliente': (datos_sinteticos.rentas_cliente, 46, 'rentals', Renta)
+}
+
+
+def cuerpo(endpoint, filas):
+    """
+    Cuerpo de la respuesta (bytes, sin espacios como JSON.stringify)
+    """
+    generar, _, campo, _ = RESPUESTAS[endpoint]
+    lista = list(generar(filas))
+    if endpoint == 'rentas_cliente':
+        sobre = {
+            'success': True,
+            'customer': {'customer_id': 1, 'first_name': 'MARY', 'last_name': 'SMITH',
+                         'email': 'MARY.SMITH@sakilacustomer.org'},
+            'total_rentals': len(lista)
+        }
+    elif endpoint == 'no_devueltos':
+        sobre = {
+            'success': True,
+            'summary': {'total_unreturned': len(lista), 'late_returns': len(lista), 'on_time': 0}
+        }
+    else:
+        sobre = {'success': True, 'total': len(lista), 'count': len(lista), 'limit': 1000, 'offset': 0}
+    sobre[campo] = lista
+    return json.dumps(sobre, separators=(',', ':')).encode('utf-8')
+
+
+def variantes():
+    """
+    Returns:
+        dict: nombre -> Decodificador
+    """
+    resultado = {nombre: Decodificador(nombre, tipado=False) for nombre in ANALIZADORES}
+    if ESQUEMAS_TIPADOS:
+        resultado['msgspec tipado'] = Decodificador('msgspec', tipado=True)
+    return resultado
+
+
+def ejecutar(escalas, repeticiones, filtro=None):
+    """
+    Returns:
+        dict: "endpoint @ filas / variante" -> {'decodificar_ms', 'mb_por_segundo', 'modelo_ms', 'pico_mb'}
+    """
+    resultados = {}
+    print(f"{'Endpoint':<16}{'Filas':>9}{'KB':>9}  {'Variante':<16}"
+          f"{'Decodificar ms':>15}{'MB/s':>9}{'+ modelo ms':>13}{'Pico (MB)':>11}")
+
+    for escala in escalas:
+        for endpoint, (_, base, campo, modelo) in RESPUESTAS.items():
+            if filtro and filtro.lower() not in endpoint.lower():
+                continue
+            filas = max(1, round(base * escala))
+            contenido = cuerpo(endpoint, filas)
+            kb = len(contenido) / 1024
+
+            for nombre, decodificador in variantes().items():
+                def decodificar(datos):
+                    return decodificador.decodificar(datos, endpoint)
+
+                def con_modelo(datos):
+                    respuesta = decodificador.decodificar(datos, endpoint)
+                    return [modelo.from_dict(fila) for fila in respuesta.get(campo, [])]
+
+                segundos, pico = medir(decodificar, contenido, repeticiones)
+                segundos_modelo, _ = medir(con_modelo, contenido, repeticiones)
+
+                clave = f"{endpoint} @ {filas} / {nombre}"
+                resultados[clave] = {
+                    'decodificar_ms': round(segundos * 1000, 3),
+                    'mb_por_segundo': round(kb / 1024 / max(segundos, 1e-9), 1),
+                    'modelo_ms': round(segundos_modelo * 1000, 3),
+                    'pico_mb': round(pico / (1024 * 1024), 2)
+                }
+                r = resultados[clave]
+                print(f"{endpoint:<16}{filas:>9,}{kb:>9.1f}  {nombre:<16}{r['decodificar_ms']:>15.3f}"
+                      f"{r['mb_por_segundo']:>9.1f}{r['modelo_ms']:>13.3f}{r['pico_mb']:>11.2f}")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de analizadores JSON con respuestas del API")
+    parser.add_argument('--escala', type=float, nargs='+', default=[1, 100],
+                        help="Multiplicadores de los tamaños de Sakila")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Se informa el mejor tiempo")
+    parser.add_argument('--endpoint', help="Medir solo los endpoints cuyo nombre contenga este texto")
+    parser.add_argument('--guardar', help="Guardar los resultados (JSON)")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.escala, args.repeticiones, args.endpoint)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as archivo:
+            json.dump({'analizadores': list(ANALIZADORES), 'resultados': resultados},
+                      archivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.guardar}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Mide tiempo de escritura y tamaño de archivo de cada formato de exportación
+
+Carga un historial sintético en el motor de reportes y exporta el historial
+completo (una fila por renta) en cada formato disponible.
+
+Uso (desde rental-dvd-frontend/):
+    python -m benchmarks.exportacion --rentas 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from controllers.reportes_controller import ReportesController
+from services.exportador import exportar, formatos_disponibles
+
+
+def historial_sintetico(rentas, clientes=600, peliculas=1000, semilla=7):
+    """
+    Genera filas con la forma de GET /rentals (una por renta, con su pago)
+    """
+    aleatorio = random.Random(semilla)
+    inicio = datetime(2005, 5, 24)
+    for rental_id in range(1, rentas + 1):
+        fecha = inicio + timedelta(minutes=rental_id * 3)
+        devuelta = aleatorio.random() < 0.95
+        yield {
+            'rental_id': rental_id,
+            'customer_id': aleatorio.randint(1, clientes),
+            'film_id': aleatorio.randint(1, peliculas),
+            'staff_id': aleatorio.randint(1, 2),
+            'title': f"PELICULA {rental_id % peliculas}",
+            'rental_date': fecha.isoformat(),
+            'return_date': (fecha + timedelta(days=aleatorio.randint(1, 9))).isoformat() if devuelta else None,
+            'payment_id': rental_id,
+            'amount': round(aleatorio.choice((0.99, 2.99, 4.99)), 2),
+            'payment_date': fecha.isoformat()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de formatos de exportación")
+    parser.add_argument('--rentas', type=int, default=200000, help="Rentas del historial sintético")
+    parser.add_argument('--directorio', default=None, help="Dónde escribir los archivos (temporal por defecto)")
+    args = parser.parse_args()
+
+    controller = ReportesController()
+    t0 = time.perf_counter()
+    controller.motor.limpiar()
+    controller.motor.cargar_filas(historial_sintetico(args.rentas))
+    print(f"Historial cargado: {len(controller.motor.rentas)} rentas en {time.perf_counter() - t0:.2f}s\n")
+
+    directorio = args.directorio or tempfile.mkdtemp(prefix='exportacion_')
+    print(f"{'Formato':<10}{'Segundos':>10}{'Filas/s':>12}{'Tamaño (MB)':>14}")
+
+    for formato in formatos_disponibles():
+        ruta = os.path.join(directorio, f"historial.{formato}")
+        columnas, filas, total = controller.datos_exportacion_historial()
+        t0 = time.perf_counter()
+        escritas = exportar(ruta, columnas, filas, formato=formato, total=total)
+        segundos = time.perf_counter() - t0
+        tamano = os.path.getsize(ruta) / (1024 * 1024)
+        print(f"{formato:<10}{segundos:>10.2f}{escritas / segundos:>12,.0f}{tamano:>14.2f}")
+
+    print(f"\nArchivos en {directorio}")
+
+
+if __name__ == '__main__':
+    main()
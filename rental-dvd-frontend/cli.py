@@ -0,0 +1,322 @@
+"""
+Sistema de Renta de DVDs - Reportes por línea de comandos
+Ejecuta los reportes sin interfaz gráfica (no importa PyQt6), para
+programarlos en servidores.
+
+Ejemplos:
+    python cli.py no-devueltos
+    python cli.py mas-rentados --limite 50 --salida ranking.parquet
+    python cli.py ganancias --local --desde 2005-06-01 --hasta 2005-06-30 --salida ganancias.csv
+    python cli.py cliente 1 2 3 --formato csv
+    python cli.py cliente --todos --concurrencia 8 --salida rentas_clientes.csv.gz
+    python cli.py historial --salida historial.parquet
+    python cli.py historial-clientes --salida auditoria.csv --concurrencia 8 --tasa 20
+"""
+import argparse
+import itertools
+import json
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from controllers.reportes_controller import ReportesController
+from services.balanceador import Balanceador
+from services.exportador import Columna, exportar, formato_de_ruta
+from services.historial_masivo import HistorialMasivo
+from services.ranking import RankingTopK
+from utils.config import (
+    CONCURRENCIA_CLIENTES_CLI,
+    CONCURRENCIA_HISTORIAL_MASIVO,
+    TASA_HISTORIAL_MASIVO,
+    TAMANO_PAGINA_CATALOGOS,
+    LIMITE_RANKING_COMPLETO
+)
+
+
+def error(mensaje):
+    print(f"Error: {mensaje}", file=sys.stderr)
+
+
+def reporte_no_devueltos(args, controller):
+    exito, resultado = controller.obtener_dvds_no_devueltos()
+    if not exito:
+        return False, resultado
+    columnas, filas = controller.datos_exportacion_no_devueltos(resultado)
+    return True, (columnas, filas, len(resultado))
+
+
+def reporte_mas_rentados(args, controller):
+    if args.local:
+        exito, resultado = controller.obtener_dvds_mas_rentados_local(
+            limite=args.limite, categoria=args.categoria, rating=args.rating,
+            desde=args.desde, hasta=args.hasta
+        )
+    else:
+        exito, resultado = controller.obtener_dvds_mas_rentados(
+            limite=LIMITE_RANKING_COMPLETO if (args.categoria or args.rating) else args.limite
+        )
+    if not exito:
+        return False, resultado
+
+    ranking = RankingTopK(k=args.limite)
+    ranking.cargar(resultado)
+    ranking.filtrar(categoria=args.categoria, rating=args.rating)
+    entradas = ranking.top()
+    columnas, filas = controller.datos_exportacion_ranking(entradas)
+    return True, (columnas, filas, len(entradas))
+
+
+def reporte_ganancias(args, controller):
+    if args.local:
+        exito, resultado = controller.obtener_ganancias_staff_local(
+            desde=args.desde, hasta=args.hasta, staff_id=args.staff
+        )
+    else:
+        exito, resultado = controller.obtener_ganancias_staff()
+    if not exito:
+        return False, resultado
+    columnas, filas = controller.datos_exportacion_ganancias(resultado)
+    return True, (columnas, filas, len(resultado))
+
+
+def _rentas_por_cliente(controller, ids, concurrencia, fallidos):
+    """
+    Consulta las rentas de varios clientes con concurrencia acotada
+
+    Mantiene como máximo 'concurrencia' * 2 consultas pendientes y entrega
+    los resultados en el orden de los IDs, así la memoria no crece con el
+    número de clientes.
+    """
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        pendientes = deque()
+        ids = iter(ids)
+
+        def lanzar():
+            for customer_id in ids:
+                pendientes.append((customer_id, pool.submit(controller.obtener_rentas_cliente, customer_id)))
+                return True
+            return False
+
+        for _ in range(concurrencia * 2):
+            if not lanzar():
+                break
+
+        while pendientes:
+            customer_id, futuro = pendientes.popleft()
+            lanzar()
+            exito, resultado = futuro.result()
+            if exito:
+                yield customer_id, resultado
+            else:
+                fallidos.append(customer_id)
+                error(f"Cliente {customer_id}: {resultado}")
+
+
+def _ids_clientes(args, controller):
+    """
+    IDs de cliente a recorrer: los indicados o, con --todos, los de todo el
+    catálogo, que se piden a /customers por páginas a medida que se consumen
+
+    Returns:
+        tuple: (exito, (ids, total)/mensaje_error)
+    """
+    if not args.todos:
+        return True, (args.ids, len(args.ids))
+    api_service = controller.api_service
+    sobre = {}
+    ids = (
+        fila.get('customer_id')
+        for fila in api_service.recorrer_paginas(api_service.obtener_clientes, TAMANO_PAGINA_CATALOGOS, sobre)
+        if fila.get('customer_id')
+    )
+    # La primera página se pide ya: así un error de conexión se informa antes de empezar
+    try:
+        primero = next(ids, None)
+    except Exception as e:
+        return False, f"Error al obtener clientes: {str(e)}"
+    if primero is None:
+        return True, ([], 0)
+    return True, (itertools.chain([primero], ids), sobre.get('total'))
+
+
+def reporte_cliente(args, controller):
+    exito, resultado = _ids_clientes(args, controller)
+    if not exito:
+        return False, resultado
+    ids, total = resultado
+    if not total:
+        return False, "Indica uno o más IDs de cliente o --todos"
+
+    columnas, _ = controller.datos_exportacion_rentas_cliente([])
+    columnas = [Columna("ID Cliente", 'entero')] + columnas
+    fallidos = args.fallidos
+
+    def filas():
+        for customer_id, rentas in _rentas_por_cliente(controller, ids, args.concurrencia, fallidos):
+            _, filas_cliente = controller.datos_exportacion_rentas_cliente(rentas)
+            for fila in filas_cliente:
+                yield [customer_id] + fila
+
+    return True, (columnas, filas(), None)
+
+
+def reporte_historial(args, controller):
+    exito, resultado = controller.sincronizar_datos_locales()
+    if not exito:
+        return False, resultado
+    return True, controller.datos_exportacion_historial()
+
+
+def historial_clientes(args, controller):
+    """
+    Exporta el historial de todos los clientes con checkpoint (se reanuda solo)
+
+    Returns:
+        int: Código de salida
+    """
+    exito, resultado = _ids_clientes(args, controller)
+    if not exito:
+        error(resultado)
+        return 1
+    ids, total = resultado
+
+    trabajo = HistorialMasivo(
+        controller, args.salida, ruta_checkpoint=args.checkpoint,
+        concurrencia=args.concurrencia, peticiones_por_segundo=args.tasa
+    )
+
+    def progreso(estadisticas):
+        if estadisticas.clientes % 100 == 0:
+            resumen = estadisticas.resumen()
+            print(
+                f"{resumen['clientes']} clientes, {resumen['filas']} filas, "
+                f"{resumen['clientes_por_segundo']} clientes/s",
+                file=sys.stderr
+            )
+
+    try:
+        estadisticas = trabajo.ejecutar(ids, progreso=progreso, total=total)
+    except KeyboardInterrupt:
+        print("Interrumpido: vuelve a ejecutar el comando para reanudar", file=sys.stderr)
+        return 130
+    except (ValueError, OSError) as e:
+        # Falló una página de clientes: lo escrito queda en el checkpoint
+        error(f"{e} (vuelve a ejecutar el comando para reanudar)")
+        return 1
+
+    for customer_id, mensaje in estadisticas.fallidos:
+        error(f"Cliente {customer_id}: {mensaje}")
+    print(json.dumps(estadisticas.resumen(), indent=2), file=sys.stderr)
+    return 1 if estadisticas.fallidos else 0
+
+
+REPORTES = {
+    'no-devueltos': reporte_no_devueltos,
+    'mas-rentados': reporte_mas_rentados,
+    'ganancias': reporte_ganancias,
+    'cliente': reporte_cliente,
+    'historial': reporte_historial
+}
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Ejecuta los reportes del sistema de rentas sin interfaz gráfica"
+    )
+    parser.add_argument('--api', help="URL base del API, o varias réplicas separadas por comas "
+                             "(por defecto API_BACKENDS de utils/config.py)")
+
+    salida = argparse.ArgumentParser(add_help=False)
+    salida.add_argument('--salida', default='-',
+                        help="Archivo de salida ('-' para la salida estándar)")
+    salida.add_argument('--formato', choices=['json', 'csv', 'csv.gz', 'csv.zst', 'parquet', 'arrow'],
+                        help="Formato (por defecto según la extensión; JSON en la salida estándar)")
+
+    periodo = argparse.ArgumentParser(add_help=False)
+    periodo.add_argument('--local', action='store_true',
+                         help="Calcular con el historial completo descargado (permite periodos)")
+    periodo.add_argument('--desde', help="Inicio del periodo (YYYY-MM-DD, requiere --local)")
+    periodo.add_argument('--hasta', help="Fin del periodo (YYYY-MM-DD, requiere --local)")
+
+    subparsers = parser.add_subparsers(dest='reporte', required=True)
+
+    subparsers.add_parser('no-devueltos', parents=[salida], help="DVDs no devueltos")
+
+    mas_rentados = subparsers.add_parser('mas-rentados', parents=[salida, periodo],
+                                         help="DVDs más rentados")
+    mas_rentados.add_argument('--limite', type=int, default=10, help="Número de DVDs")
+    mas_rentados.add_argument('--categoria', help="Filtrar por categoría")
+    mas_rentados.add_argument('--rating', help="Filtrar por clasificación")
+
+    ganancias = subparsers.add_parser('ganancias', parents=[salida, periodo],
+                                      help="Ganancias por staff")
+    ganancias.add_argument('--staff', type=int, help="Limitar a un empleado (requiere --local)")
+
+    cliente = subparsers.add_parser('cliente', parents=[salida], help="Rentas por cliente")
+    cliente.add_argument('ids', nargs='*', type=int, help="IDs de cliente")
+    cliente.add_argument('--todos', action='store_true', help="Recorrer todos los clientes")
+    cliente.add_argument('--concurrencia', type=int, default=CONCURRENCIA_CLIENTES_CLI,
+                         help="Consultas simultáneas")
+
+    subparsers.add_parser('historial', parents=[salida],
+                          help="Historial completo de rentas (una fila por renta)")
+
+    masivo = subparsers.add_parser(
+        'historial-clientes',
+        help="Historial de rentas de todos los clientes en un archivo, reanudable"
+    )
+    masivo.add_argument('--salida', required=True, help="Archivo de salida (.csv o .jsonl)")
+    masivo.add_argument('--checkpoint', help="Archivo de checkpoint (por defecto <salida>.checkpoint)")
+    masivo.add_argument('ids', nargs='*', type=int, help="IDs de cliente (por defecto todos)")
+    masivo.add_argument('--concurrencia', type=int, default=CONCURRENCIA_HISTORIAL_MASIVO,
+                        help="Consultas simultáneas")
+    masivo.add_argument('--tasa', type=float, default=TASA_HISTORIAL_MASIVO,
+                        help="Peticiones por segundo como máximo (0 = sin límite)")
+    return parser
+
+
+def main(argv=None):
+    """
+    Función principal de la línea de comandos
+
+    Returns:
+        int: Código de salida (0 si todo salió bien)
+    """
+    args = crear_parser().parse_args(argv)
+    args.fallidos = []
+
+    if getattr(args, 'local', False) is False and (getattr(args, 'desde', None) or getattr(args, 'hasta', None)):
+        error("--desde y --hasta requieren --local")
+        return 2
+    if getattr(args, 'local', False) is False and getattr(args, 'staff', None) is not None:
+        error("--staff requiere --local")
+        return 2
+
+    controller = ReportesController()
+    if args.api:
+        controller.api_service.balanceador = Balanceador(args.api.split(','))
+
+    if args.reporte == 'historial-clientes':
+        args.todos = not args.ids
+        return historial_clientes(args, controller)
+
+    formato = args.formato or ('json' if args.salida == '-' else formato_de_ruta(args.salida))
+
+    exito, resultado = REPORTES[args.reporte](args, controller)
+    if not exito:
+        error(resultado)
+        return 1
+
+    columnas, filas, total = resultado
+    try:
+        escritas = exportar(args.salida, columnas, filas, formato=formato, total=total)
+    except (ValueError, OSError) as e:
+        error(e)
+        return 1
+
+    if args.salida != '-':
+        print(f"{escritas} filas escritas en {args.salida}", file=sys.stderr)
+    return 1 if args.fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
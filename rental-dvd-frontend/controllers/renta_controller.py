@@ -2,6 +2,8 @@
 Controlador para gestión de rentas
 """
 from services.api_service import APIService
+from services.motor_reportes import obtener_motor
+from services.cache import invalidar_cache
 from utils.validators import (
     validar_campo_vacio, 
     validar_numero_positivo, 
@@ -15,6 +17,15 @@ import requests
 class RentaController:
     def __init__(self):
         self.api_service = APIService()
+        self.motor = obtener_motor()
+    
+    def _invalidar_caches(self):
+        """
+        Las consultas en caché dejan de ser válidas tras cualquier cambio de rentas
+        """
+        invalidar_cache('no_devueltos')
+        invalidar_cache('rentas_cliente')
+        invalidar_cache('ganancias_staff')
     
     def validar_datos_renta(self, cliente_id, dvd_id, staff_id, fecha_devolucion, monto):
         """
@@ -83,6 +94,11 @@ class RentaController:
             # Convertir respuesta a modelo
             renta = Renta.from_dict(renta_data)
             
+            # Mantener al día los reportes locales (si ya se sincronizaron)
+            if self.motor.tiene_datos:
+                self.motor.aplicar_creacion(renta_data)
+            self._invalidar_caches()
+            
             mensaje_exito = f"Renta creada exitosamente\n"
             mensaje_exito += f"ID: {renta_data.get('rental_id')}\n"
             mensaje_exito += f"Película: {renta_data.get('film_title')}\n"
@@ -116,6 +132,10 @@ class RentaController:
             renta_data = response_data.get('data', {})
             renta = Renta.from_dict(renta_data)
             
+            if self.motor.tiene_datos:
+                self.motor.aplicar_devolucion(renta_data)
+            self._invalidar_caches()
+            
             mensaje = "Devolución procesada exitosamente\n"
             mensaje += f"Días rentados: {renta_data.get('days_rented', 'N/A')}\n"
             mensaje += f"Monto total: ${renta_data.get('total_amount', 0):.2f}"
@@ -147,6 +167,10 @@ class RentaController:
             # ✅ AHORA EL BACKEND ENVÍA INFO COMPLETA
             cancel_data = response_data.get('data', {})
             
+            if self.motor.tiene_datos:
+                self.motor.aplicar_cancelacion(cancel_data)
+            self._invalidar_caches()
+            
             mensaje = "Renta cancelada exitosamente\n\n"
             mensaje += f"ID Renta: {cancel_data.get('rental_id', 'N/A')}\n"
             
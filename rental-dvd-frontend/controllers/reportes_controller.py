@@ -2,20 +2,132 @@
 Controlador para reportes
 """
 from services.api_service import APIService
+from services.motor_reportes import MotorReportes, obtener_motor
+from services.ranking import EntradaRanking
+from services.cache import obtener_cache, caches_registradas
+from services.exportador import Columna
 from utils.validators import validar_id
+from utils.trazas import span, trazar
+from utils.ajustes import obtener_ajustes
+from utils.config import (
+    TAMANO_PAGINA_SINCRONIZACION,
+    TAMANO_PAGINA_CATALOGOS,
+    FILAS_POR_LOTE_FLUJO
+)
 from models.renta import Renta
 import requests
 
+
+def _ajustar_caches(ajustes):
+    """
+    Aplica los TTL y tamaños recargados a las cachés de reportes (las
+    entradas ya guardadas conservan su expiración)
+    """
+    caches = caches_registradas()
+    if 'no_devueltos' in caches:
+        caches['no_devueltos'].ttl = ajustes.CACHE_TTL_NO_DEVUELTOS
+    if 'rentas_cliente' in caches:
+        caches['rentas_cliente'].ttl = ajustes.CACHE_TTL_RENTAS_CLIENTE
+        caches['rentas_cliente'].max_elementos = ajustes.CACHE_MAX_CLIENTES
+    if 'ganancias_staff' in caches:
+        caches['ganancias_staff'].ttl = ajustes.CACHE_TTL_GANANCIAS
+
+
 class ReportesController:
     def __init__(self):
         self.api_service = APIService()
+        self.motor = obtener_motor()
+        ajustes = obtener_ajustes()
+        self.cache_no_devueltos = obtener_cache('no_devueltos', ajustes.CACHE_TTL_NO_DEVUELTOS, 1)
+        self.cache_rentas_cliente = obtener_cache(
+            'rentas_cliente', ajustes.CACHE_TTL_RENTAS_CLIENTE, ajustes.CACHE_MAX_CLIENTES
+        )
+        self.cache_ganancias = obtener_cache('ganancias_staff', ajustes.CACHE_TTL_GANANCIAS, 1)
+        ajustes.suscribir(
+            ['CACHE_TTL_NO_DEVUELTOS', 'CACHE_TTL_RENTAS_CLIENTE', 'CACHE_MAX_CLIENTES', 'CACHE_TTL_GANANCIAS'],
+            _ajustar_caches
+        )
+    
+    def _procesar_ranking(self, ranking_data):
+        """
+        Convierte las filas de /reports/most-rented al formato de la vista
+        """
+        ranking_procesado = []
+        for item in ranking_data:
+            ranking_procesado.append({
+                'titulo': item.get('title', 'N/A'),
+                'genero': item.get('category', 'N/A'),
+                'rating': item.get('rating'),
+                'total_rentas': item.get('total_rentals', 0),
+                'film_id': item.get('film_id'),
+                'rental_rate': item.get('rental_rate'),
+                'total_revenue': item.get('total_revenue', 0)
+            })
+        return ranking_procesado
+    
+    def _procesar_ganancias(self, ganancias_data):
+        """
+        Convierte las filas de /reports/staff-revenue al formato de la vista
+        """
+        ganancias_procesadas = []
+        for item in ganancias_data:
+            ganancias_procesadas.append({
+                'nombre': item.get('staff_name', 'N/A'),
+                'staff_id': item.get('staff_id'),
+                'email': item.get('email', ''),
+                'total_rentas': item.get('total_rentals', 0),
+                'total_pagos': item.get('total_payments', 0),
+                'ganancia_total': float(item.get('total_revenue', 0)),
+                'promedio_pago': float(item.get('average_payment', 0))
+            })
+        return ganancias_procesadas
+    
+    def _rentas_en_flujo(self, filas, sobre, al_lote):
+        """
+        Convierte a Renta las filas que llegan en flujo y las entrega por lotes
+        
+        Los lotes crecen (25, 50, 100...) hasta FILAS_POR_LOTE_FLUJO para que
+        la primera fila se muestre pronto sin pagar un lote por fila después.
+        
+        Args:
+            filas: Generador de filas de APIService (*_flujo)
+            sobre: dict que el generador llena con el resto de la respuesta
+            al_lote: Callback al_lote(lista_rentas) por cada lote convertido
+        
+        Returns:
+            list: Todas las rentas recibidas
+        
+        Raises:
+            Exception: Si la respuesta indica success = false
+        """
+        rentas = []
+        lote = []
+        tamano = 25
+        for fila in filas:
+            lote.append(Renta.from_dict(fila))
+            if len(lote) >= tamano:
+                rentas.extend(lote)
+                al_lote(lote)
+                lote = []
+                tamano = min(tamano * 2, FILAS_POR_LOTE_FLUJO)
+        if lote:
+            rentas.extend(lote)
+            al_lote(lote)
+        
+        if sobre.get('success') is False:
+            raise Exception(sobre.get('message', 'El servidor no pudo generar el reporte'))
+        return rentas
     
-    def obtener_rentas_cliente(self, customer_id):
+    def obtener_rentas_cliente(self, customer_id, usar_cache=False, al_lote=None):
         """
         Obtiene todas las rentas de un cliente específico
         
         Args:
             customer_id: ID del cliente
+            usar_cache: Si es True, responde desde la caché cuando está fresca
+            al_lote: Si se indica, la respuesta se lee en flujo y cada lote de
+                     rentas se entrega a al_lote(lista) en cuanto se convierte
+                     (con la caché fresca no se llama: todo llega en el resultado)
         
         Returns:
             tuple: (exito, lista_rentas/mensaje_error)
@@ -26,6 +138,19 @@ class ReportesController:
             if not valido:
                 return False, msg_error
             
+            if usar_cache:
+                rentas = self.cache_rentas_cliente.obtener(int(customer_id))
+                if rentas is not None:
+                    return True, rentas
+            
+            if al_lote is not None:
+                sobre = {}
+                rentas = self._rentas_en_flujo(
+                    self.api_service.obtener_rentas_cliente_flujo(customer_id, sobre), sobre, al_lote
+                )
+                self.cache_rentas_cliente.guardar(int(customer_id), rentas)
+                return True, rentas
+            
             # Llamar al API
             response_data = self.api_service.obtener_rentas_cliente(customer_id)
             
@@ -49,6 +174,7 @@ class ReportesController:
                         print(f"Error al convertir renta: {e}")
                         continue
                 
+                self.cache_rentas_cliente.guardar(int(customer_id), rentas)
                 return True, rentas
             
             # Fallback si viene como lista directamente
@@ -65,14 +191,106 @@ class ReportesController:
         except Exception as e:
             return False, f"Error al obtener las rentas: {str(e)}"
     
-    def obtener_dvds_no_devueltos(self):
+    def obtener_rentas_cliente_local(self, customer_id):
+        """
+        Consulta las rentas de un cliente solo en la caché (sin red)
+        
+        Returns:
+            list: Rentas del cliente, o None si no están en caché
+        """
+        try:
+            return self.cache_rentas_cliente.obtener(int(customer_id))
+        except (ValueError, TypeError):
+            return None
+    
+    def _guardar_no_devueltos(self, rentas):
+        indice = {renta.id: renta for renta in rentas if renta}
+        self.cache_no_devueltos.guardar('todas', (rentas, indice))
+    
+    def ultimo_no_devueltos(self):
+        """
+        Última lista de rentas activas guardada, aunque ya no esté fresca
+        (para mostrarla mientras se pide una nueva)
+        
+        Returns:
+            tuple: (lista_rentas, edad_en_segundos), o (None, None) si no hay
+        """
+        entrada, edad = self.cache_no_devueltos.obtener_con_edad('todas')
+        if entrada is None:
+            return None, None
+        return entrada[0], edad
+    
+    def buscar_renta_activa_local(self, renta_id):
+        """
+        Busca una renta activa solo en la caché (sin red)
+        
+        Args:
+            renta_id: ID de la renta
+        
+        Returns:
+            tuple: (respondido, renta). respondido es False si no hay una
+                   lista fresca en caché; si es True, renta puede ser None
+                   (la renta no está activa)
+        """
+        entrada = self.cache_no_devueltos.obtener('todas')
+        if entrada is None:
+            return False, None
+        try:
+            return True, entrada[1].get(int(renta_id))
+        except (ValueError, TypeError):
+            return True, None
+    
+    def buscar_renta_activa(self, renta_id):
+        """
+        Busca una renta activa, usando la caché y descargando la lista solo si expiró
+        
+        Args:
+            renta_id: ID de la renta
+        
+        Returns:
+            tuple: (exito, renta o None/mensaje_error)
+        """
+        valido, msg_error = validar_id(renta_id, "ID de Renta")
+        if not valido:
+            return False, msg_error
+        
+        respondido, renta = self.buscar_renta_activa_local(renta_id)
+        if respondido:
+            return True, renta
+        
+        exito, resultado = self.obtener_dvds_no_devueltos()
+        if not exito:
+            return False, resultado
+        return True, self.buscar_renta_activa_local(renta_id)[1]
+    
+    @trazar('controlador.no_devueltos', 'controlador')
+    def obtener_dvds_no_devueltos(self, usar_cache=False, al_lote=None):
         """
         Obtiene la lista de DVDs que no se han devuelto (rentas activas)
         
+        Args:
+            usar_cache: Si es True, responde desde la caché cuando está fresca
+            al_lote: Si se indica, la respuesta se lee en flujo y cada lote de
+                     rentas se entrega a al_lote(lista) en cuanto se convierte
+                     (con la caché fresca no se llama: todo llega en el resultado)
+        
         Returns:
             tuple: (exito, lista_rentas_activas/mensaje_error)
         """
+        if usar_cache:
+            entrada = self.cache_no_devueltos.obtener('todas')
+            if entrada is not None:
+                return True, entrada[0]
+        
         try:
+            if al_lote is not None:
+                sobre = {}
+                rentas = self._rentas_en_flujo(
+                    self.api_service.obtener_dvds_no_devueltos_flujo(sobre), sobre, al_lote
+                )
+                self._guardar_no_devueltos(rentas)
+                return True, rentas
+            
             # Llamar al API
             response_data = self.api_service.obtener_dvds_no_devueltos()
             
@@ -81,13 +299,12 @@ class ReportesController:
                 if not response_data.get('success', False):
                     error_msg = response_data.get('message', 'Error al obtener DVDs no devueltos')
                     return False, error_msg
-                
-                rentas_data = response_data.get('data', [])
-                rentas = [Renta.from_dict(r) for r in rentas_data]
-                return True, rentas
+                response_data = response_data.get('data', [])
             
             if isinstance(response_data, list):
-                rentas = [Renta.from_dict(r) for r in response_data]
+                with span('modelo.Renta.from_dict', 'modelo', filas=len(response_data)):
+                    rentas = [Renta.from_dict(r) for r in response_data]
+                self._guardar_no_devueltos(rentas)
                 return True, rentas
             
             return True, []
@@ -99,16 +316,19 @@ class ReportesController:
         except Exception as e:
             return False, f"Error al obtener DVDs no devueltos: {str(e)}"
     
-    def obtener_dvds_mas_rentados(self):
+    def obtener_dvds_mas_rentados(self, limite=10):
         """
         Obtiene el ranking de DVDs más rentados
         
+        Args:
+            limite: Número máximo de películas a pedir al servidor
+        
         Returns:
             tuple: (exito, lista_ranking/mensaje_error)
         """
         try:
             # ✅ MEJORADO: Llamar con parámetro limit
-            response_data = self.api_service.obtener_dvds_mas_rentados(limit=10)
+            response_data = self.api_service.obtener_dvds_mas_rentados(limit=limite)
             
             # Procesar respuesta
             if isinstance(response_data, dict):
@@ -119,19 +339,7 @@ class ReportesController:
                 # El backend devuelve: {success, count, generated_at, data}
                 ranking_data = response_data.get('data', [])
                 
-                # ✅ Procesar los datos correctamente
-                ranking_procesado = []
-                for item in ranking_data:
-                    ranking_procesado.append({
-                        'titulo': item.get('title', 'N/A'),
-                        'genero': item.get('category', 'N/A'),
-                        'total_rentas': item.get('total_rentals', 0),
-                        'film_id': item.get('film_id'),
-                        'rental_rate': item.get('rental_rate'),
-                        'total_revenue': item.get('total_revenue', 0)
-                    })
-                
-                return True, ranking_procesado
+                return True, self._procesar_ranking(ranking_data)
             
             if isinstance(response_data, list):
                 return True, response_data
@@ -145,13 +353,21 @@ class ReportesController:
         except Exception as e:
             return False, f"Error al obtener DVDs más rentados: {str(e)}"
     
-    def obtener_ganancias_staff(self):
+    def obtener_ganancias_staff(self, usar_cache=False):
         """
         Obtiene las ganancias generadas por cada miembro del staff
         
+        Args:
+            usar_cache: Si es True, responde desde la caché cuando está fresca
+        
         Returns:
             tuple: (exito, lista_ganancias/mensaje_error)
         """
+        if usar_cache:
+            ganancias = self.cache_ganancias.obtener('todas')
+            if ganancias is not None:
+                return True, ganancias
+        
         try:
             # Llamar al API
             response_data = self.api_service.obtener_ganancias_staff()
@@ -165,20 +381,9 @@ class ReportesController:
                 # El backend devuelve: {success, count, total_revenue_all_staff, data}
                 ganancias_data = response_data.get('data', [])
                 
-                # ✅ Procesar los datos correctamente
-                ganancias_procesadas = []
-                for item in ganancias_data:
-                    ganancias_procesadas.append({
-                        'nombre': item.get('staff_name', 'N/A'),
-                        'staff_id': item.get('staff_id'),
-                        'email': item.get('email', ''),
-                        'total_rentas': item.get('total_rentals', 0),
-                        'total_pagos': item.get('total_payments', 0),
-                        'ganancia_total': float(item.get('total_revenue', 0)),
-                        'promedio_pago': float(item.get('average_payment', 0))
-                    })
-                
-                return True, ganancias_procesadas
+                ganancias = self._procesar_ganancias(ganancias_data)
+                self.cache_ganancias.guardar('todas', ganancias)
+                return True, ganancias
             
             if isinstance(response_data, list):
                 return True, response_data
@@ -192,6 +397,152 @@ class ReportesController:
         except Exception as e:
             return False, f"Error al obtener ganancias del staff: {str(e)}"
     
+    def ultimas_ganancias_staff(self):
+        """
+        Últimas ganancias del servidor guardadas, aunque ya no estén frescas
+        
+        Returns:
+            tuple: (lista_ganancias, edad_en_segundos), o (None, None) si no hay
+        """
+        return self.cache_ganancias.obtener_con_edad('todas')
+
+    # ==================== EVENTOS ====================
+
+    def aplicar_evento(self, evento):
+        """
+        Lleva a las cachés y a los reportes locales un cambio de rentas hecho
+        en otra caja (evento de services/eventos.py)
+
+        La lista de rentas activas en caché se corrige en el lugar (sin
+        cambiar su edad); las rentas del cliente afectado y las ganancias se
+        invalidan. Un 'reinicio' descarta todo, incluidos los datos locales.
+
+        Args:
+            evento: Dict con 'tipo' y 'datos'
+
+        Returns:
+            Renta: La renta creada para el tipo 'creada', None para los demás
+        """
+        tipo, datos = evento['tipo'], evento['datos']
+        if tipo == 'reinicio':
+            self.cache_no_devueltos.invalidar()
+            self.cache_rentas_cliente.invalidar()
+            self.cache_ganancias.invalidar()
+            self.motor.limpiar()
+            return None
+
+        renta = None
+        rental_id = datos.get('rental_id')
+        if tipo == 'creada':
+            renta = Renta.from_dict(datos)
+            if self.motor.tiene_datos:
+                self.motor.aplicar_creacion(datos)
+        elif self.motor.tiene_datos:
+            if tipo == 'devuelta':
+                self.motor.aplicar_devolucion(datos)
+            else:
+                self.motor.aplicar_cancelacion(datos)
+
+        def corregir(entrada):
+            # Listas nuevas: las vistas pueden estar mostrando la anterior
+            rentas = [r for r in entrada[0] if r.id != rental_id]
+            if renta is not None:
+                rentas.append(renta)
+            return rentas, {r.id: r for r in rentas}
+        self.cache_no_devueltos.actualizar('todas', corregir)
+
+        if datos.get('customer_id') is not None:
+            self.cache_rentas_cliente.invalidar(int(datos['customer_id']))
+        self.cache_ganancias.invalidar()
+        return renta
+
+    # ==================== REPORTES LOCALES ====================
+    
+    def sincronizar_datos_locales(self):
+        """
+        Descarga rentas, pagos y catálogos para calcular reportes localmente
+        
+        Se cargan en un motor nuevo que reemplaza al actual solo si todas las
+        páginas llegaron: si algo falla, los datos anteriores siguen intactos.
+        
+        Returns:
+            tuple: (exito, numero_rentas/mensaje_error)
+        """
+        try:
+            motor = MotorReportes()
+            motor.cargar_peliculas(self.api_service.recorrer_paginas(
+                self.api_service.obtener_dvds, TAMANO_PAGINA_CATALOGOS
+            ))
+            staff = self.api_service.obtener_staff()
+            motor.cargar_staff(
+                staff.get('data', []) if isinstance(staff, dict) else staff
+            )
+            
+            motor.cargar_filas(self.api_service.recorrer_paginas(
+                self.api_service.obtener_rentas, TAMANO_PAGINA_SINCRONIZACION
+            ))
+            
+            self.motor.reemplazar(motor)
+            return True, len(self.motor.rentas)
+            
+        except requests.exceptions.ConnectionError:
+            return False, "No se pudo conectar con el servidor."
+        except requests.exceptions.Timeout:
+            return False, "La petición tardó demasiado tiempo."
+        except Exception as e:
+            return False, f"Error al sincronizar datos locales: {str(e)}"
+    
+    def obtener_dvds_mas_rentados_local(self, limite=10, categoria=None, rating=None,
+                                        desde=None, hasta=None):
+        """
+        Calcula el ranking de DVDs más rentados con los datos locales
+        
+        Args:
+            limite: Número de resultados (None para todos)
+            categoria: Filtrar por categoría (opcional)
+            rating: Filtrar por clasificación (opcional)
+            desde: Inicio del periodo, YYYY-MM-DD (opcional)
+            hasta: Fin del periodo, YYYY-MM-DD (opcional)
+        
+        Returns:
+            tuple: (exito, lista_ranking/mensaje_error)
+        """
+        if not self.motor.tiene_datos:
+            exito, resultado = self.sincronizar_datos_locales()
+            if not exito:
+                return False, resultado
+        
+        try:
+            ranking = self.motor.top_peliculas(
+                n=limite, categoria=categoria, rating=rating, desde=desde, hasta=hasta
+            )
+            return True, self._procesar_ranking(ranking)
+        except ValueError as e:
+            return False, str(e)
+    
+    def obtener_ganancias_staff_local(self, desde=None, hasta=None, staff_id=None):
+        """
+        Calcula las ganancias por staff con los datos locales para cualquier periodo
+        
+        Args:
+            desde: Inicio del periodo, YYYY-MM-DD (opcional)
+            hasta: Fin del periodo, YYYY-MM-DD (opcional)
+            staff_id: Limitar a un empleado (opcional)
+        
+        Returns:
+            tuple: (exito, lista_ganancias/mensaje_error)
+        """
+        if not self.motor.tiene_datos:
+            exito, resultado = self.sincronizar_datos_locales()
+            if not exito:
+                return False, resultado
+        
+        try:
+            ganancias = self.motor.ganancias_staff(desde=desde, hasta=hasta, staff_id=staff_id)
+            return True, self._procesar_ganancias(ganancias)
+        except ValueError as e:
+            return False, str(e)
+    
     def formatear_datos_tabla_rentas(self, rentals):
         """
         Formatea una lista de rentas para mostrar en una tabla
@@ -247,6 +598,11 @@ class ReportesController:
         datos_tabla = []
         
         for item in ranking_data:
+            # Las entradas del RankingTopK ya vienen tipadas
+            if isinstance(item, EntradaRanking):
+                datos_tabla.append([item.titulo, item.genero, item.total_rentas])
+                continue
+            
             # ✅ MEJORADO: Usar los campos correctos del backend
             if isinstance(item, dict):
                 titulo = item.get('titulo', item.get('title', 'N/A'))
@@ -304,4 +660,187 @@ class ReportesController:
                     f"${ganancia_total:.2f}"
                 ])
         
-        return datos_tabla
\ No newline at end of file
+        return datos_tabla
+    
+    def datos_exportacion_no_devueltos(self, rentas):
+        """
+        Prepara la exportación del reporte de DVDs no devueltos
+        
+        Args:
+            rentas: Lista de objetos Renta activas
+        
+        Returns:
+            tuple: (columnas, generador_filas)
+        """
+        columnas = [
+            Columna("ID Renta", 'entero'),
+            Columna("Cliente", 'texto'),
+            Columna("DVD", 'texto'),
+            Columna("Staff", 'texto'),
+            Columna("Fecha Renta", 'fecha'),
+            Columna("Fecha Dev. Esperada", 'fecha'),
+            Columna("Días de Retraso", 'entero')
+        ]
+        
+        def filas():
+            for renta in rentas:
+                yield [
+                    renta.id,
+                    renta.cliente.nombre if renta.cliente else f"ID: {renta.customer_id}",
+                    renta.dvd.titulo if renta.dvd else f"ID: {renta.dvd_id}",
+                    renta.staff.nombre if renta.staff else f"ID: {renta.staff_id}",
+                    renta.rental_date,
+                    renta.expected_return_date,
+                    renta.calcular_dias_retraso()
+                ]
+        
+        return columnas, filas()
+    
+    def datos_exportacion_rentas_cliente(self, rentas):
+        """
+        Prepara la exportación de las rentas de un cliente
+        
+        Args:
+            rentas: Lista de objetos Renta del cliente
+        
+        Returns:
+            tuple: (columnas, generador_filas)
+        """
+        columnas = [
+            Columna("ID", 'entero'),
+            Columna("DVD", 'texto'),
+            Columna("Staff", 'texto'),
+            Columna("Fecha Renta", 'fecha'),
+            Columna("Fecha Dev. Esperada", 'fecha'),
+            Columna("Fecha Dev. Real", 'fecha'),
+            Columna("Monto", 'decimal'),
+            Columna("Estado", 'texto'),
+            Columna("Días de Retraso", 'entero')
+        ]
+        
+        def filas():
+            for renta in rentas:
+                if renta.staff:
+                    staff_nombre = renta.staff.nombre
+                elif renta.staff_name:
+                    staff_nombre = renta.staff_name
+                else:
+                    staff_nombre = f"ID: {renta.staff_id}" if renta.staff_id else "N/A"
+                
+                yield [
+                    renta.id,
+                    renta.dvd.titulo if renta.dvd else (renta.title or f"ID: {renta.film_id}"),
+                    staff_nombre,
+                    renta.rental_date,
+                    renta.expected_return_date,
+                    renta.return_date,
+                    renta.monto,
+                    renta.estado,
+                    renta.calcular_dias_retraso() if renta.estado == 'activa' else None
+                ]
+        
+        return columnas, filas()
+    
+    def datos_exportacion_ranking(self, entradas):
+        """
+        Prepara la exportación del ranking de DVDs más rentados
+        
+        Args:
+            entradas: Lista ordenada de EntradaRanking
+        
+        Returns:
+            tuple: (columnas, generador_filas)
+        """
+        columnas = [
+            Columna("Posición", 'entero'),
+            Columna("ID DVD", 'entero'),
+            Columna("Título del DVD", 'texto'),
+            Columna("Género", 'texto'),
+            Columna("Clasificación", 'texto'),
+            Columna("Total de Rentas", 'entero'),
+            Columna("Ingresos", 'decimal')
+        ]
+        
+        def filas():
+            for posicion, entrada in enumerate(entradas, start=1):
+                yield [
+                    posicion,
+                    entrada.film_id,
+                    entrada.titulo,
+                    entrada.genero,
+                    entrada.rating,
+                    entrada.total_rentas,
+                    entrada.total_revenue
+                ]
+        
+        return columnas, filas()
+    
+    def datos_exportacion_ganancias(self, ganancias):
+        """
+        Prepara la exportación del reporte de ganancias por staff
+        
+        Args:
+            ganancias: Lista de diccionarios procesados (nombre, total_rentas, ganancia_total)
+        
+        Returns:
+            tuple: (columnas, generador_filas)
+        """
+        columnas = [
+            Columna("Nombre del Staff", 'texto'),
+            Columna("Total de Rentas Gestionadas", 'entero'),
+            Columna("Ganancia Total", 'decimal')
+        ]
+        
+        def filas():
+            for item in ganancias:
+                yield [
+                    item.get('nombre', item.get('staff_name', 'N/A')),
+                    item.get('total_rentas', item.get('total_rentals', 0)),
+                    item.get('ganancia_total', item.get('total_revenue', 0))
+                ]
+        
+        return columnas, filas()
+    
+    def datos_exportacion_historial(self):
+        """
+        Prepara la exportación del historial completo de rentas (datos locales)
+        
+        Una fila por renta con el total pagado; requiere haber sincronizado
+        los datos locales.
+        
+        Returns:
+            tuple: (columnas, generador_filas, total_filas)
+        """
+        columnas = [
+            Columna("ID Renta", 'entero'),
+            Columna("ID Cliente", 'entero'),
+            Columna("ID DVD", 'entero'),
+            Columna("Título del DVD", 'texto'),
+            Columna("ID Staff", 'entero'),
+            Columna("Fecha Renta", 'fecha'),
+            Columna("Fecha Devolución", 'fecha'),
+            Columna("Pagos", 'entero'),
+            Columna("Monto Pagado", 'decimal')
+        ]
+        motor = self.motor
+        
+        def filas():
+            # Copia de las claves: la interfaz puede registrar rentas mientras se exporta
+            for rental_id in list(motor.rentas):
+                registro = motor.rentas.get(rental_id)
+                if registro is None:
+                    continue
+                pelicula = motor.peliculas.get(registro.film_id) or {}
+                yield [
+                    registro.rental_id,
+                    registro.customer_id,
+                    registro.film_id,
+                    pelicula.get('title'),
+                    registro.staff_id,
+                    registro.rental_date,
+                    registro.return_date,
+                    len(registro.pagos),
+                    sum(monto for monto, _ in registro.pagos.values())
+                ]
+        
+        return columnas, filas(), len(motor.rentas)
@@ -0,0 +1,3 @@
+"""
+Herramientas de desarrollo (se ejecutan con python -m herramientas.<nombre>)
+"""
@@ -0,0 +1,964 @@
+"""
+Base de datos dvdrental simulada, escalable y en memoria
+
+Las rentas no se guardan: cada renta se calcula a partir de su rental_id con
+un hash determinista (cliente, copia, empleado, fechas y pago), así que una
+escala de 1000× (16 millones de rentas) no ocupa más memoria que la de 1×.
+Solo se guardan en memoria:
+
+- las rentas activas (no devueltas), para saber qué copias están prestadas
+- los cambios hechos a través del API (rentas nuevas, devoluciones, cancelaciones)
+- los agregados por película y empleado de los reportes, que se calculan una
+  vez al crear los datos y se actualizan con cada cambio (ese recorrido tarda
+  unos 0.1 s por cada 1× de escala)
+- los últimos EVENTOS_HISTORIAL cambios de rentas, numerados, para el feed
+  de eventos (/events/rentals)
+
+Las respuestas reproducen los campos y tipos de api/src/controllers
+(node-postgres entrega NUMERIC, COUNT y EXTRACT como texto).
+"""
+import bisect
+import heapq
+import math
+import threading
+from collections import deque
+from itertools import islice
+from datetime import datetime, time, timedelta, timezone
+from benchmarks.datos_sinteticos import (
+    NOMBRES, APELLIDOS, CATEGORIAS, RATINGS, TARIFAS, INICIO, fecha_api
+)
+
+# Tamaño de la base de ejemplo (postgres-dvdrental) a escala 1
+CLIENTES_BASE = 599
+PELICULAS_BASE = 1000
+INVENTARIO_BASE = 4581
+RENTAS_BASE = 16044
+EMPLEADOS = 2
+
+# Una de cada 88 rentas sigue sin devolverse (183 de 16044 en la base real)
+PERIODO_NO_DEVUELTA = 88
+
+# Las fechas de renta van de mayo de 2005 a febrero de 2006
+DURACION_HISTORIAL = timedelta(days=266)
+
+PALABRAS = (
+    'ACADEMY', 'AFRICAN', 'AGENT', 'AIRPLANE', 'ALABAMA', 'ALIEN', 'AMADEUS', 'ANACONDA',
+    'ANGELS', 'ANTHEM', 'APOLLO', 'ARMAGEDDON', 'BAKED', 'BALLOON', 'BANG', 'BEAST',
+    'BIRDS', 'BLADE', 'BOUND', 'BRIDE', 'CHAMBER', 'CHICAGO', 'CLUE', 'DINOSAUR',
+    'DRAGON', 'EGG', 'FLASH', 'GOLDFINGER', 'HUNTER', 'JUNGLE', 'MOON', 'WIZARD'
+)
+
+# Cambios que se conservan para que un cliente que se reconecta los recupere
+EVENTOS_HISTORIAL = 10000
+
+_MASCARA = (1 << 64) - 1
+
+
+def _mezclar(valor, semilla):
+    """
+    Hash entero de 64 bits (splitmix64): mismo valor y semilla, mismo resultado
+    """
+    z = (valor * 0x9E3779B97F4A7C15 + semilla) & _MASCARA
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASCARA
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASCARA
+    return z ^ (z >> 31)
+
+
+def _ahora():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _fecha_dia(valor):
+    return valor.strftime('%Y-%m-%dT00:00:00.000Z')
+
+
+class RegistroEventos:
+    """
+    Cambios de rentas numerados, para el feed de eventos
+
+    Cada cambio recibe el id siguiente. Un cliente que se reconecta pide los
+    posteriores al último que vio; si ese id ya salió del historial (o es de
+    otra ejecución del servidor) se le indica que recargue todo.
+    """
+
+    def __init__(self, maximo=EVENTOS_HISTORIAL):
+        self._eventos = deque(maxlen=maximo)
+        self._ultimo = 0
+        self._despertares = 0
+        self._condicion = threading.Condition()
+
+    @property
+    def ultimo_id(self):
+        with self._condicion:
+            return self._ultimo
+
+    def publicar(self, tipo, datos):
+        """
+        Args:
+            tipo: 'rental.created', 'rental.returned' o 'rental.cancelled'
+            datos: Dict con la renta afectada
+
+        Returns:
+            int: Id del evento
+        """
+        with self._condicion:
+            self._ultimo += 1
+            self._eventos.append({'id': self._ultimo, 'type': tipo, 'data': datos})
+            self._condicion.notify_all()
+            return self._ultimo
+
+    def _desde(self, ultimo_id):
+        if ultimo_id > self._ultimo:
+            return [], True
+        primero = self._eventos[0]['id'] if self._eventos else self._ultimo + 1
+        if ultimo_id < primero - 1:
+            return [], True
+        return list(islice(self._eventos, ultimo_id - primero + 1, None)), False
+
+    def desde(self, ultimo_id):
+        """
+        Returns:
+            tuple: (eventos posteriores a ultimo_id, reinicio). reinicio es
+                   True si ya no se pueden recuperar todos los posteriores
+        """
+        with self._condicion:
+            return self._desde(ultimo_id)
+
+    def esperar(self, ultimo_id, timeout):
+        """
+        Como desde(), pero espera hasta timeout segundos a que haya eventos nuevos
+        """
+        with self._condicion:
+            despertares = self._despertares
+            self._condicion.wait_for(
+                lambda: self._ultimo != ultimo_id or self._despertares != despertares, timeout
+            )
+            return self._desde(ultimo_id)
+
+    def despertar(self):
+        """
+        Libera a los que están esperando (para cerrar sus conexiones)
+        """
+        with self._condicion:
+            self._despertares += 1
+            self._condicion.notify_all()
+
+    def sondear(self, ultimo_id, espera):
+        """
+        GET /events/rentals/poll?after=&timeout= (long-poll)
+        """
+        if ultimo_id is None:
+            eventos, reinicio = [], False
+        else:
+            eventos, reinicio = self.esperar(ultimo_id, min(max(espera, 0), 60))
+        ultimo = eventos[-1]['id'] if eventos else self.ultimo_id
+        return 200, {'success': True, 'reset': reinicio, 'last_id': ultimo, 'data': eventos}
+
+
+class DatosSimulados:
+    def __init__(self, escala=1, semilla=1, empleados=EMPLEADOS):
+        """
+        Args:
+            escala: Multiplica clientes, películas, inventario y rentas de la base de ejemplo
+            semilla: Misma semilla, mismos datos
+            empleados: Número de empleados (la base real tiene 2)
+        """
+        self.escala = escala
+        self.semilla = semilla
+        self.clientes = max(1, round(CLIENTES_BASE * escala))
+        self.peliculas = max(1, round(PELICULAS_BASE * escala))
+        self.inventario = max(self.peliculas, round(INVENTARIO_BASE * escala))
+        self.rentas = max(1, round(RENTAS_BASE * escala))
+        self.empleados = max(1, empleados)
+        self._paso_segundos = DURACION_HISTORIAL.total_seconds() / self.rentas
+
+        self._lock = threading.RLock()
+        self._nuevas = {}           # rental_id -> [fecha, inventario, cliente, empleado]
+        self._nuevas_cliente = {}   # customer_id -> [rental_id, ...]
+        self._devoluciones = {}     # rental_id -> (fecha, monto, payment_id)
+        self._canceladas = []       # rental_ids base cancelados, ordenados
+        self._siguiente_renta = self.rentas + 1
+        self._siguiente_pago = self.rentas + 1
+        self._orden_titulos = None
+        self.eventos = RegistroEventos()
+
+        self.activas = {
+            rental_id: self._base(rental_id)[1]
+            for rental_id in range(PERIODO_NO_DEVUELTA, self.rentas + 1, PERIODO_NO_DEVUELTA)
+        }
+        self._copias_prestadas = set(self.activas.values())
+        self._calcular_agregados()
+
+    # ==================== ENTIDADES ====================
+
+    def pelicula(self, film_id):
+        h = _mezclar(film_id, self.semilla + 1)
+        numero = film_id - 1
+        titulo = f"{PALABRAS[numero % len(PALABRAS)]} {PALABRAS[(numero // len(PALABRAS)) % len(PALABRAS)]}"
+        if numero >= len(PALABRAS) ** 2:
+            titulo = f"{titulo} {numero // len(PALABRAS) ** 2}"
+        return {
+            'film_id': film_id,
+            'title': titulo,
+            'description': "A Epic Drama of a Feminist And a Mad Scientist who must Battle a Teacher",
+            'release_year': 2006,
+            'length': 46 + h % 140,
+            'rating': RATINGS[(h >> 8) % len(RATINGS)],
+            'rental_rate': TARIFAS[(h >> 16) % len(TARIFAS)],
+            'rental_duration': 3 + (h >> 24) % 5,
+            'replacement_cost': f"{9.99 + (h >> 32) % 21:.2f}",
+            'category': CATEGORIAS[(h >> 40) % len(CATEGORIAS)],
+            'language': 'English'
+        }
+
+    def cliente(self, customer_id):
+        h = _mezclar(customer_id, self.semilla + 2)
+        nombre = NOMBRES[h % len(NOMBRES)]
+        apellido = APELLIDOS[(h >> 8) % len(APELLIDOS)]
+        return {
+            'customer_id': customer_id,
+            'first_name': nombre,
+            'last_name': apellido,
+            'email': f"{nombre}.{apellido}{customer_id}@sakilacustomer.org",
+            'active': 0 if (h >> 16) % 40 == 0 else 1,
+            'create_date': '2006-02-14T00:00:00.000Z',
+            'address': f"{(h >> 20) % 2000} Sakila Drive",
+            'district': 'Alberta',
+            'city': 'Lethbridge',
+            'country': 'Canada',
+            'store_id': 1 + (h >> 32) % 2
+        }
+
+    def empleado(self, staff_id):
+        h = _mezclar(staff_id, self.semilla + 3)
+        nombre = NOMBRES[h % len(NOMBRES)].capitalize()
+        apellido = APELLIDOS[(h >> 8) % len(APELLIDOS)].capitalize()
+        return {
+            'staff_id': staff_id,
+            'first_name': nombre,
+            'last_name': apellido,
+            'email': f"{nombre}.{apellido}@sakilastaff.com",
+            'active': True,
+            'username': nombre,
+            'store_id': 1 + (staff_id - 1) % 2,
+            'address': f"{23 + staff_id} Workhaven Lane",
+            'district': 'Alberta',
+            'phone': '14033335568',
+            'city': 'Lethbridge',
+            'country': 'Canada'
+        }
+
+    def _nombre_cliente(self, customer_id):
+        c = self.cliente(customer_id)
+        return f"{c['first_name']} {c['last_name']}", c['email']
+
+    def _nombre_empleado(self, staff_id):
+        s = self.empleado(staff_id)
+        return f"{s['first_name']} {s['last_name']}", s['email']
+
+    def pelicula_de_inventario(self, inventory_id):
+        return (inventory_id - 1) % self.peliculas + 1
+
+    def copias(self, film_id):
+        """
+        Returns:
+            range: inventory_id de las copias de la película
+        """
+        return range(film_id, self.inventario + 1, self.peliculas)
+
+    # ==================== RENTAS ====================
+
+    def _generar(self, rental_id):
+        """
+        Componentes de una renta de la base generada
+
+        Returns:
+            tuple: (segundos desde INICIO, film_id, inventario, empleado, dias hasta la devolución)
+        """
+        h = _mezclar(rental_id, self.semilla)
+        # Popularidad sesgada: las películas de ID bajo se rentan más
+        u = (h & 0xFFFFFF) / 0x1000000
+        film_id = 1 + int(self.peliculas * u ** 1.1)
+        copias = (self.inventario - film_id) // self.peliculas + 1
+        inventory_id = film_id + ((h >> 24) % copias) * self.peliculas
+        staff_id = (h >> 40) % self.empleados + 1
+        dias = 1 + (h >> 48) % 9 + ((h >> 56) % 24) / 24
+        return self._paso_segundos * rental_id, film_id, inventory_id, staff_id, dias
+
+    def _base(self, rental_id):
+        """
+        Renta de la base generada: (fecha, inventario, cliente, empleado, dias_devolucion)
+        """
+        segundos, _, inventory_id, staff_id, dias = self._generar(rental_id)
+        customer_id = (rental_id - 1) % self.clientes + 1
+        return INICIO + timedelta(seconds=segundos), inventory_id, customer_id, staff_id, dias
+
+    def existe(self, rental_id):
+        if rental_id in self._nuevas:
+            return True
+        if not 1 <= rental_id <= self.rentas:
+            return False
+        i = bisect.bisect_left(self._canceladas, rental_id)
+        return not (i < len(self._canceladas) and self._canceladas[i] == rental_id)
+
+    def renta(self, rental_id):
+        """
+        Estado actual de una renta
+
+        Returns:
+            tuple: (rental_id, fecha, inventario, cliente, empleado, devolucion, monto, payment_id)
+                   o None si no existe
+        """
+        if not self.existe(rental_id):
+            return None
+        if rental_id in self._nuevas:
+            fecha, inventory_id, customer_id, staff_id = self._nuevas[rental_id]
+            devolucion = monto = pago = None
+        else:
+            fecha, inventory_id, customer_id, staff_id, dias = self._base(rental_id)
+            devolucion = monto = pago = None
+            if rental_id % PERIODO_NO_DEVUELTA:
+                devolucion = fecha + timedelta(days=dias)
+                pelicula = self.pelicula(self.pelicula_de_inventario(inventory_id))
+                tarifa = float(pelicula['rental_rate'])
+                retraso = max(0, math.ceil(dias) - pelicula['rental_duration'])
+                monto = tarifa + retraso
+                pago = rental_id
+        if rental_id in self._devoluciones:
+            devolucion, monto, pago = self._devoluciones[rental_id]
+        return rental_id, fecha, inventory_id, customer_id, staff_id, devolucion, monto, pago
+
+    def _ids_descendentes(self, saltar=0):
+        """
+        IDs de renta existentes del más reciente al más antiguo, omitiendo los primeros 'saltar'
+        """
+        nuevas = sorted(self._nuevas, reverse=True)
+        if saltar < len(nuevas):
+            yield from nuevas[saltar:]
+            saltar = 0
+        else:
+            saltar -= len(nuevas)
+
+        # Punto de partida en la base descontando las cancelaciones posteriores
+        x = self.rentas - saltar
+        while True:
+            canceladas = len(self._canceladas) - bisect.bisect_left(self._canceladas, x + 1)
+            nuevo = self.rentas - saltar - canceladas
+            if nuevo == x:
+                break
+            x = nuevo
+        for rental_id in range(x, 0, -1):
+            if self.existe(rental_id):
+                yield rental_id
+
+    def _ids_cliente(self, customer_id):
+        ids = list(range(customer_id, self.rentas + 1, self.clientes)) if customer_id <= self.clientes else []
+        ids.extend(self._nuevas_cliente.get(customer_id, ()))
+        return [rental_id for rental_id in ids if self.existe(rental_id)]
+
+    def total_rentas(self):
+        return self.rentas - len(self._canceladas) + len(self._nuevas)
+
+    # ==================== AGREGADOS ====================
+
+    def _calcular_agregados(self):
+        """
+        Recorre todas las rentas una vez para los reportes de películas y empleados
+        """
+        n = self.peliculas + 1
+        self._rentas_pelicula = [0] * n
+        self._devueltas_pelicula = [0] * n
+        self._ingresos_pelicula = [0.0] * n
+        self._ultima_pelicula = [0] * n
+        self._staff = {
+            staff_id: {'rentas': 0, 'pagos': 0, 'ingresos': 0.0, 'primero': None, 'ultimo': None}
+            for staff_id in range(1, self.empleados + 1)
+        }
+
+        tarifas = [0.0] + [float(self.pelicula(f)['rental_rate']) for f in range(1, n)]
+        duraciones = [0] + [self.pelicula(f)['rental_duration'] for f in range(1, n)]
+        # Este recorrido domina el arranque a escalas grandes: los pagos se
+        # acumulan por día en segundos y se convierten a fechas al final
+        diario = {}
+        extremos = {}
+        medianoche = (INICIO - datetime.combine(INICIO.date(), time())).total_seconds()
+        for rental_id in range(1, self.rentas + 1):
+            segundos, film_id, _, staff_id, dias = self._generar(rental_id)
+            self._rentas_pelicula[film_id] += 1
+            self._ultima_pelicula[film_id] = rental_id
+            staff = self._staff[staff_id]
+            staff['rentas'] += 1
+            if rental_id % PERIODO_NO_DEVUELTA:
+                monto = tarifas[film_id] + max(0, math.ceil(dias) - duraciones[film_id])
+                pago = segundos + dias * 86400
+                self._devueltas_pelicula[film_id] += 1
+                self._ingresos_pelicula[film_id] += monto
+                staff['pagos'] += 1
+                staff['ingresos'] += monto
+                primero, ultimo = extremos.get(staff_id, (pago, pago))
+                extremos[staff_id] = (min(primero, pago), max(ultimo, pago))
+                clave = (staff_id, int((pago + medianoche) // 86400))
+                dia = diario.get(clave)
+                if dia is None:
+                    diario[clave] = [1, monto]
+                else:
+                    dia[0] += 1
+                    dia[1] += monto
+
+        for staff_id, (primero, ultimo) in extremos.items():
+            self._staff[staff_id]['primero'] = INICIO + timedelta(seconds=primero)
+            self._staff[staff_id]['ultimo'] = INICIO + timedelta(seconds=ultimo)
+        # (staff_id, fecha) -> [pagos, ingresos] para los reportes por periodo
+        self._diario = {
+            (staff_id, INICIO.date() + timedelta(days=dia)): valores
+            for (staff_id, dia), valores in diario.items()
+        }
+
+    def _registrar_pago(self, film_id, staff_id, fecha, monto):
+        self._devueltas_pelicula[film_id] += 1
+        self._ingresos_pelicula[film_id] += monto
+        staff = self._staff[staff_id]
+        staff['pagos'] += 1
+        staff['ingresos'] += monto
+        if staff['primero'] is None or fecha < staff['primero']:
+            staff['primero'] = fecha
+        if staff['ultimo'] is None or fecha > staff['ultimo']:
+            staff['ultimo'] = fecha
+        dia = self._diario.setdefault((staff_id, fecha.date()), [0, 0.0])
+        dia[0] += 1
+        dia[1] += monto
+
+    # ==================== RESPUESTAS DEL API ====================
+
+    def _fila_renta(self, datos, ahora):
+        rental_id, fecha, inventory_id, customer_id, staff_id, devolucion, monto, pago = datos
+        pelicula = self.pelicula(self.pelicula_de_inventario(inventory_id))
+        cliente, email_cliente = self._nombre_cliente(customer_id)
+        empleado, _ = self._nombre_empleado(staff_id)
+        dias = (devolucion or ahora) - fecha
+        return {
+            'rental_id': rental_id,
+            'rental_date': fecha_api(fecha),
+            'return_date': fecha_api(devolucion) if devolucion else None,
+            'film_id': pelicula['film_id'],
+            'title': pelicula['title'],
+            'rental_rate': pelicula['rental_rate'],
+            'customer_id': customer_id,
+            'customer_name': cliente,
+            'customer_email': email_cliente,
+            'staff_id': staff_id,
+            'staff_name': empleado,
+            'status': 'Devuelta' if devolucion else 'Activa',
+            'days_rented': str(dias.days),
+            'payment_id': pago,
+            'payment_amount': f"{monto:.2f}" if monto is not None else None
+        }
+
+    def listar_rentas(self, limit=50, offset=0, status=None, customer_id=None, staff_id=None):
+        """
+        GET /rentals (ordenadas de la más reciente a la más antigua)
+        """
+        ahora = _ahora()
+        with self._lock:
+            if customer_id:
+                ids = sorted(self._ids_cliente(customer_id), reverse=True)
+            elif status == 'active':
+                ids = sorted(self.activas, reverse=True)
+            else:
+                ids = None
+
+            filas = []
+            if ids is None and not status and not staff_id:
+                total = self.total_rentas()
+                for rental_id in self._ids_descendentes(offset):
+                    if len(filas) >= limit:
+                        break
+                    filas.append(self._fila_renta(self.renta(rental_id), ahora))
+            else:
+                # Filtros sin índice: se recorre todo el historial
+                total = 0
+                for rental_id in (ids if ids is not None else self._ids_descendentes()):
+                    datos = self.renta(rental_id)
+                    if status == 'returned' and datos[5] is None:
+                        continue
+                    if status == 'active' and datos[5] is not None:
+                        continue
+                    if staff_id and datos[4] != staff_id:
+                        continue
+                    if offset <= total < offset + limit:
+                        filas.append(self._fila_renta(datos, ahora))
+                    total += 1
+
+        return 200, {
+            'success': True,
+            'total': total,
+            'count': len(filas),
+            'limit': limit,
+            'offset': offset,
+            'data': filas
+        }
+
+    def rentas_cliente(self, customer_id, status=None):
+        """
+        GET /reports/customer-rentals/:customer_id
+        """
+        if not 1 <= customer_id <= self.clientes:
+            return 404, {'success': False, 'message': 'Cliente no encontrado'}
+
+        ahora = _ahora()
+        filas = []
+        with self._lock:
+            for rental_id in self._ids_cliente(customer_id):
+                _, fecha, inventory_id, _, staff_id, devolucion, _, _ = self.renta(rental_id)
+                if status == 'active' and devolucion:
+                    continue
+                if status == 'returned' and not devolucion:
+                    continue
+                pelicula = self.pelicula(self.pelicula_de_inventario(inventory_id))
+                empleado, _ = self._nombre_empleado(staff_id)
+                filas.append({
+                    'rental_id': rental_id,
+                    'rental_date': fecha_api(fecha),
+                    'return_date': fecha_api(devolucion) if devolucion else None,
+                    'film_id': pelicula['film_id'],
+                    'title': pelicula['title'],
+                    'rental_rate': pelicula['rental_rate'],
+                    'rental_duration': pelicula['rental_duration'],
+                    'expected_return_date': fecha_api(fecha + timedelta(days=pelicula['rental_duration'])),
+                    'category': pelicula['category'],
+                    'staff_id': staff_id,
+                    'staff_name': empleado,
+                    'status': 'Devuelta' if devolucion else 'Activa',
+                    'days_rented': str(((devolucion or ahora) - fecha).days)
+                })
+
+        filas.sort(key=lambda fila: fila['rental_date'], reverse=True)
+        cliente = self.cliente(customer_id)
+        return 200, {
+            'success': True,
+            'customer': {campo: cliente[campo] for campo in ('customer_id', 'first_name', 'last_name', 'email')},
+            'total_rentals': len(filas),
+            'rentals': filas
+        }
+
+    def _fila_no_devuelta(self, rental_id, ahora):
+        _, fecha, inventory_id, customer_id, staff_id, _, _, _ = self.renta(rental_id)
+        pelicula = self.pelicula(self.pelicula_de_inventario(inventory_id))
+        cliente, email_cliente = self._nombre_cliente(customer_id)
+        empleado, email_empleado = self._nombre_empleado(staff_id)
+        dias = (ahora - fecha).days
+        return {
+            'rental_id': rental_id,
+            'rental_date': fecha_api(fecha),
+            'expected_return_date': fecha_api(fecha + timedelta(days=pelicula['rental_duration'])),
+            'days_rented': str(dias),
+            'film_id': pelicula['film_id'],
+            'title': pelicula['title'],
+            'rental_rate': pelicula['rental_rate'],
+            'expected_duration': pelicula['rental_duration'],
+            'customer_id': customer_id,
+            'customer_name': cliente,
+            'email': email_cliente,
+            'staff_id': staff_id,
+            'staff_name': empleado,
+            'staff_email': email_empleado,
+            'status': 'Atrasado' if dias > pelicula['rental_duration'] else 'En tiempo'
+        }
+
+    def no_devueltos(self):
+        """
+        GET /reports/unreturned-dvds (de la renta más antigua a la más reciente)
+        """
+        ahora = _ahora()
+        with self._lock:
+            filas = [self._fila_no_devuelta(rental_id, ahora) for rental_id in sorted(self.activas)]
+
+        atrasadas = sum(1 for fila in filas if fila['status'] == 'Atrasado')
+        return 200, {
+            'success': True,
+            'summary': {
+                'total_unreturned': len(filas),
+                'late_returns': atrasadas,
+                'on_time': len(filas) - atrasadas
+            },
+            'data': filas
+        }
+
+    def mas_rentados(self, limit=10):
+        """
+        GET /reports/most-rented
+        """
+        with self._lock:
+            mejores = heapq.nlargest(
+                limit, range(1, self.peliculas + 1),
+                key=lambda f: (self._rentas_pelicula[f], self._ingresos_pelicula[f])
+            )
+            filas = []
+            for film_id in mejores:
+                total = self._rentas_pelicula[film_id]
+                if not total:
+                    break
+                devueltas = self._devueltas_pelicula[film_id]
+                pelicula = self.pelicula(film_id)
+                ultima = self.renta(self._ultima_pelicula[film_id])
+                filas.append({
+                    'film_id': film_id,
+                    'title': pelicula['title'],
+                    'rental_rate': pelicula['rental_rate'],
+                    'release_year': pelicula['release_year'],
+                    'rating': pelicula['rating'],
+                    'category': pelicula['category'],
+                    'total_rentals': str(total),
+                    'completed_rentals': str(devueltas),
+                    'active_rentals': str(total - devueltas),
+                    'total_revenue': f"{self._ingresos_pelicula[film_id]:.2f}",
+                    'last_rental_date': fecha_api(ultima[1]) if ultima else None
+                })
+
+        return 200, {
+            'success': True,
+            'count': len(filas),
+            'generated_at': fecha_api(_ahora()),
+            'data': filas
+        }
+
+    def _fila_ganancias(self, staff_id, desde=None, hasta=None):
+        empleado = self.empleado(staff_id)
+        staff = self._staff[staff_id]
+        if desde or hasta:
+            dias = [
+                (dia, pagos, ingresos) for (sid, dia), (pagos, ingresos) in self._diario.items()
+                if sid == staff_id and (not desde or dia >= desde) and (not hasta or dia <= hasta)
+            ]
+            pagos = sum(d[1] for d in dias)
+            ingresos = sum(d[2] for d in dias)
+            rentas = pagos
+            primero = min((datetime.combine(d[0], time()) for d in dias), default=None)
+            ultimo = max((datetime.combine(d[0], time()) for d in dias), default=None)
+        else:
+            pagos, ingresos, rentas = staff['pagos'], staff['ingresos'], staff['rentas']
+            primero, ultimo = staff['primero'], staff['ultimo']
+
+        return {
+            'staff_id': staff_id,
+            'first_name': empleado['first_name'],
+            'last_name': empleado['last_name'],
+            'staff_name': f"{empleado['first_name']} {empleado['last_name']}",
+            'email': empleado['email'],
+            'store_id': empleado['store_id'],
+            'total_rentals': str(rentas),
+            'total_payments': str(pagos),
+            'total_revenue': f"{ingresos:.2f}",
+            'average_payment': f"{ingresos / pagos if pagos else 0:.2f}",
+            'first_payment_date': fecha_api(primero) if primero else None,
+            'last_payment_date': fecha_api(ultimo) if ultimo else None
+        }
+
+    def ganancias_staff(self, staff_id=None, start_date=None, end_date=None):
+        """
+        GET /reports/staff-revenue y /reports/staff-revenue/:staff_id
+        """
+        desde = datetime.fromisoformat(start_date[:10]).date() if start_date else None
+        hasta = datetime.fromisoformat(end_date[:10]).date() if end_date else None
+
+        with self._lock:
+            if staff_id is not None:
+                if staff_id not in self._staff:
+                    return 404, {'success': False, 'message': 'Staff no encontrado'}
+                dias = sorted(
+                    ((dia, valores) for (sid, dia), valores in self._diario.items()
+                     if sid == staff_id and (not desde or dia >= desde) and (not hasta or dia <= hasta)),
+                    reverse=True
+                )[:30]
+                return 200, {
+                    'success': True,
+                    'staff_info': self._fila_ganancias(staff_id, desde, hasta),
+                    'daily_breakdown': [
+                        {'payment_date': _fecha_dia(dia), 'payments_count': str(pagos),
+                         'daily_revenue': f"{ingresos:.2f}"}
+                        for dia, (pagos, ingresos) in dias
+                    ],
+                    'period': {'start_date': start_date or 'all time', 'end_date': end_date or 'now'}
+                }
+
+            filas = [self._fila_ganancias(sid, desde, hasta) for sid in self._staff]
+
+        filas.sort(key=lambda fila: float(fila['total_revenue']), reverse=True)
+        total = sum(float(fila['total_revenue']) for fila in filas)
+        return 200, {
+            'success': True,
+            'count': len(filas),
+            'total_revenue_all_staff': f"{total:.2f}",
+            'data': filas
+        }
+
+    # ==================== CATÁLOGOS ====================
+
+    def _fila_cliente(self, customer_id):
+        fila = self.cliente(customer_id)
+        ids = self._ids_cliente(customer_id)
+        fila['total_rentals'] = str(len(ids))
+        fila['active_rentals'] = str(sum(1 for rental_id in ids if rental_id in self.activas))
+        return fila
+
+    def listar_clientes(self, limit=50, offset=0):
+        """
+        GET /customers (por customer_id)
+        """
+        with self._lock:
+            ids = range(offset + 1, min(self.clientes, offset + limit) + 1)
+            filas = [self._fila_cliente(customer_id) for customer_id in ids]
+        return 200, {
+            'success': True, 'total': self.clientes, 'count': len(filas),
+            'limit': limit, 'offset': offset, 'data': filas
+        }
+
+    def obtener_cliente(self, customer_id):
+        if not 1 <= customer_id <= self.clientes:
+            return 404, {'success': False, 'message': 'Cliente no encontrado'}
+        with self._lock:
+            return 200, {'success': True, 'data': self._fila_cliente(customer_id)}
+
+    def _fila_pelicula(self, film_id):
+        fila = self.pelicula(film_id)
+        copias = self.copias(film_id)
+        prestadas = sum(1 for inventory_id in copias if inventory_id in self._copias_prestadas)
+        fila['total_copies'] = str(len(copias))
+        fila['rented_copies'] = str(prestadas)
+        fila['available_copies'] = str(len(copias) - prestadas)
+        return fila
+
+    def listar_peliculas(self, limit=20, offset=0):
+        """
+        GET /films (por título)
+        """
+        with self._lock:
+            if self._orden_titulos is None:
+                self._orden_titulos = sorted(
+                    range(1, self.peliculas + 1), key=lambda f: self.pelicula(f)['title']
+                )
+            filas = [self._fila_pelicula(f) for f in self._orden_titulos[offset:offset + limit]]
+        return 200, {
+            'success': True, 'total': self.peliculas, 'count': len(filas),
+            'limit': limit, 'offset': offset, 'data': filas
+        }
+
+    def obtener_pelicula(self, film_id):
+        if not 1 <= film_id <= self.peliculas:
+            return 404, {'success': False, 'message': 'Película no encontrada'}
+        with self._lock:
+            fila = self._fila_pelicula(film_id)
+        fila['actors'] = []
+        return 200, {'success': True, 'data': fila}
+
+    def _fila_empleado(self, staff_id):
+        fila = self.empleado(staff_id)
+        staff = self._staff[staff_id]
+        fila['total_rentals'] = str(staff['rentas'])
+        fila['total_revenue'] = f"{staff['ingresos']:.2f}"
+        return fila
+
+    def listar_empleados(self):
+        """
+        GET /staff
+        """
+        with self._lock:
+            filas = [self._fila_empleado(staff_id) for staff_id in self._staff]
+        return 200, {'success': True, 'count': len(filas), 'data': filas}
+
+    def obtener_empleado(self, staff_id):
+        if staff_id not in self._staff:
+            return 404, {'success': False, 'message': 'Staff no encontrado'}
+        with self._lock:
+            return 200, {'success': True, 'data': self._fila_empleado(staff_id)}
+
+    # ==================== MUTACIONES ====================
+
+    def crear_renta(self, datos):
+        """
+        POST /rentals
+        """
+        customer_id = datos.get('customer_id')
+        staff_id = datos.get('staff_id')
+        film_id = datos.get('film_id')
+        inventory_id = datos.get('inventory_id')
+
+        if not customer_id or not staff_id:
+            return 400, {'success': False, 'message': 'customer_id y staff_id son requeridos'}
+        if not film_id and not inventory_id:
+            return 400, {'success': False, 'message': 'Debes proporcionar film_id o inventory_id'}
+
+        try:
+            customer_id, staff_id = int(customer_id), int(staff_id)
+            film_id = int(film_id) if film_id else None
+            inventory_id = int(inventory_id) if inventory_id else None
+        except (TypeError, ValueError):
+            return 500, {'success': False, 'message': 'Error al crear la renta', 'error': 'invalid input syntax'}
+
+        with self._lock:
+            if film_id and not inventory_id:
+                libres = [i for i in self.copias(film_id) if i not in self._copias_prestadas] \
+                    if 1 <= film_id <= self.peliculas else []
+                if not libres:
+                    return 404, {'success': False, 'message': 'No hay copias disponibles de esta película para rentar'}
+                inventory_id = libres[0]
+
+            if not 1 <= inventory_id <= self.inventario:
+                return 404, {'success': False, 'message': 'Inventario no encontrado'}
+            if inventory_id in self._copias_prestadas:
+                return 400, {'success': False, 'message': 'Este DVD ya está rentado y no ha sido devuelto'}
+            if not 1 <= customer_id <= self.clientes:
+                return 404, {'success': False, 'message': 'Cliente no encontrado'}
+            if staff_id not in self._staff:
+                return 404, {'success': False, 'message': 'Staff no encontrado'}
+
+            rental_id = self._siguiente_renta
+            self._siguiente_renta += 1
+            fecha = _ahora()
+            self._nuevas[rental_id] = [fecha, inventory_id, customer_id, staff_id]
+            self._nuevas_cliente.setdefault(customer_id, []).append(rental_id)
+            self.activas[rental_id] = inventory_id
+            self._copias_prestadas.add(inventory_id)
+
+            film_id = self.pelicula_de_inventario(inventory_id)
+            self._rentas_pelicula[film_id] += 1
+            self._ultima_pelicula[film_id] = rental_id
+            self._staff[staff_id]['rentas'] += 1
+            # El evento lleva la fila como en /reports/unreturned-dvds
+            self.eventos.publicar('rental.created', self._fila_no_devuelta(rental_id, fecha))
+
+        pelicula = self.pelicula(film_id)
+        cliente = self.cliente(customer_id)
+        empleado = self.empleado(staff_id)
+        return 201, {
+            'success': True,
+            'message': 'Renta creada exitosamente',
+            'data': {
+                'rental_id': rental_id,
+                'rental_date': fecha_api(fecha),
+                'expected_return_date': fecha_api(fecha + timedelta(days=pelicula['rental_duration'])),
+                'rental_duration_days': pelicula['rental_duration'],
+                'film_id': film_id,
+                'film_title': pelicula['title'],
+                'rental_rate': pelicula['rental_rate'],
+                'rental_duration': pelicula['rental_duration'],
+                'inventory_id': inventory_id,
+                'customer': {
+                    'customer_id': customer_id,
+                    'name': f"{cliente['first_name']} {cliente['last_name']}"
+                },
+                'staff': {
+                    'staff_id': staff_id,
+                    'name': f"{empleado['first_name']} {empleado['last_name']}"
+                }
+            }
+        }
+
+    def devolver_renta(self, rental_id):
+        """
+        PUT /rentals/:rental_id/return
+        """
+        with self._lock:
+            datos = self.renta(rental_id)
+            if datos is None:
+                return 404, {'success': False, 'message': 'Renta no encontrada'}
+            _, fecha, inventory_id, customer_id, staff_id, devolucion, _, _ = datos
+            if devolucion is not None:
+                return 400, {
+                    'success': False,
+                    'message': 'Esta renta ya fue devuelta',
+                    'return_date': fecha_api(devolucion)
+                }
+
+            ahora = _ahora()
+            film_id = self.pelicula_de_inventario(inventory_id)
+            pelicula = self.pelicula(film_id)
+            dias = max(1, math.ceil((ahora - fecha).total_seconds() / 86400))
+            monto = round(float(pelicula['rental_rate']) * dias, 2)
+            pago = self._siguiente_pago
+            self._siguiente_pago += 1
+
+            self._devoluciones[rental_id] = (ahora, monto, pago)
+            del self.activas[rental_id]
+            self._copias_prestadas.discard(inventory_id)
+            self._registrar_pago(film_id, staff_id, ahora, monto)
+            self.eventos.publicar('rental.returned', {
+                'rental_id': rental_id,
+                'customer_id': customer_id,
+                'staff_id': staff_id,
+                'film_id': film_id,
+                'return_date': fecha_api(ahora),
+                'days_rented': dias,
+                'total_amount': monto,
+                'payment_id': pago
+            })
+
+        return 200, {
+            'success': True,
+            'message': 'Devolución procesada exitosamente',
+            'data': {
+                'rental_id': rental_id,
+                'film_title': pelicula['title'],
+                'rental_date': fecha_api(fecha),
+                'return_date': fecha_api(ahora),
+                'days_rented': dias,
+                'rental_rate': pelicula['rental_rate'],
+                'total_amount': monto,
+                'payment_id': pago
+            }
+        }
+
+    def cancelar_renta(self, rental_id):
+        """
+        DELETE /rentals/:rental_id
+        """
+        with self._lock:
+            datos = self.renta(rental_id)
+            if datos is None:
+                return 404, {'success': False, 'message': 'Renta no encontrada'}
+            _, fecha, inventory_id, customer_id, staff_id, devolucion, _, _ = datos
+            if devolucion is not None:
+                return 400, {'success': False, 'message': 'No se puede cancelar una renta que ya fue devuelta'}
+
+            if rental_id in self._nuevas:
+                del self._nuevas[rental_id]
+                self._nuevas_cliente[customer_id].remove(rental_id)
+            else:
+                bisect.insort(self._canceladas, rental_id)
+            del self.activas[rental_id]
+            self._copias_prestadas.discard(inventory_id)
+
+            film_id = self.pelicula_de_inventario(inventory_id)
+            self._rentas_pelicula[film_id] -= 1
+            self._staff[staff_id]['rentas'] -= 1
+            self.eventos.publicar('rental.cancelled', {
+                'rental_id': rental_id,
+                'customer_id': customer_id,
+                'staff_id': staff_id,
+                'film_id': film_id
+            })
+
+        pelicula = self.pelicula(film_id)
+        cliente, email_cliente = self._nombre_cliente(customer_id)
+        empleado, email_empleado = self._nombre_empleado(staff_id)
+        dias = math.ceil((_ahora() - fecha).total_seconds() / 86400)
+        tarifa = float(pelicula['rental_rate'])
+        return 200, {
+            'success': True,
+            'message': 'Renta cancelada exitosamente',
+            'data': {
+                'rental_id': rental_id,
+                'rental_date': fecha_api(fecha),
+                'days_rented': dias,
+                'rental_rate': tarifa,
+                'estimated_amount': round(tarifa * dias, 2),
+                'film': {
+                    'film_id': film_id,
+                    'title': pelicula['title'],
+                    'rental_rate': tarifa,
+                    'rental_duration': pelicula['rental_duration']
+                },
+                'customer': {'customer_id': customer_id, 'name': cliente, 'email': email_cliente},
+                'staff': {'staff_id': staff_id, 'name': empleado, 'email': email_empleado}
+            }
+        }
@@ -0,0 +1,449 @@
+"""
+Generador de carga: simula muchos dependientes usando la aplicación a la vez
+
+Cada dependiente ejecuta una mezcla de operaciones de mostrador (crear renta,
+devolver, cancelar, consultar cliente y reportes) a través de RentaController
+y ReportesController, es decir, por el mismo camino que la aplicación de
+escritorio (APIService, caché, instrumentación).
+
+Dos modelos de llegada:
+- cerrado (por defecto): N dependientes; cada uno hace una operación, piensa
+  un tiempo aleatorio (exponencial) y sigue
+- abierto (--tasa): las operaciones llegan a ritmo fijo (Poisson) y las
+  atienden N dependientes; la latencia se mide desde la llegada, así que la
+  espera en cola cuenta (sin omisión coordinada)
+
+Uso (desde rental-dvd-frontend/):
+    python -m herramientas.generador_carga --simulado 10 --dependientes 50 --duracion 60
+    python -m herramientas.generador_carga --api http://servidor:3000 --tasa 40 --dependientes 64
+    python -m herramientas.generador_carga --mezcla crear=40,devolver=30,cliente=30 --json resultado.json
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from controllers.renta_controller import RentaController
+from controllers.reportes_controller import ReportesController
+from services.limitador import obtener_gobernador
+from utils.config import LIMITES_PETICIONES
+
+# Peso relativo de cada operación en la mezcla por defecto
+MEZCLA_MOSTRADOR = {
+    'crear': 30,
+    'devolver': 25,
+    'cancelar': 5,
+    'cliente': 25,
+    'no_devueltos': 7,
+    'mas_rentados': 5,
+    'ganancias': 3
+}
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+class EstadisticasCarga:
+    """
+    Latencias y errores por operación (seguro entre hilos)
+    """
+
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self.inicio = time.monotonic()
+        self.fin = None
+        self._lock = threading.Lock()
+
+    def registrar(self, operacion, segundos, error=None):
+        with self._lock:
+            if error is None:
+                self.latencias.setdefault(operacion, []).append(segundos)
+            else:
+                self.errores.setdefault(operacion, Counter())[error] += 1
+
+    def reiniciar(self):
+        """
+        Descarta lo medido hasta ahora (fin del calentamiento)
+        """
+        with self._lock:
+            self.latencias.clear()
+            self.errores.clear()
+            self.inicio = time.monotonic()
+
+    def resumen(self):
+        """
+        Returns:
+            dict: operación -> llamadas, errores, tasa de error, ops/s y latencias p50/p95/p99/max (ms)
+        """
+        with self._lock:
+            segundos = max((self.fin or time.monotonic()) - self.inicio, 1e-9)
+            resumen = {}
+            for operacion in sorted(set(self.latencias) | set(self.errores)):
+                latencias = sorted(self.latencias.get(operacion, ()))
+                errores = self.errores.get(operacion, Counter())
+                llamadas = len(latencias) + sum(errores.values())
+                resumen[operacion] = {
+                    'llamadas': llamadas,
+                    'errores': sum(errores.values()),
+                    'tasa_error': round(sum(errores.values()) / llamadas, 4) if llamadas else 0.0,
+                    'por_segundo': round(llamadas / segundos, 2),
+                    'p50_ms': round(_percentil(latencias, 0.50) * 1000, 1),
+                    'p95_ms': round(_percentil(latencias, 0.95) * 1000, 1),
+                    'p99_ms': round(_percentil(latencias, 0.99) * 1000, 1),
+                    'max_ms': round(latencias[-1] * 1000, 1) if latencias else 0.0,
+                    'detalle_errores': dict(errores.most_common(5))
+                }
+            return resumen
+
+
+class Mostrador:
+    """
+    Datos compartidos por los dependientes: catálogos y rentas activas
+    """
+
+    def __init__(self, clientes, peliculas, empleados, rentas_activas, semilla=None):
+        self.clientes = clientes
+        self.peliculas = peliculas
+        self.empleados = empleados
+        self._activas = list(rentas_activas)
+        self._lock = threading.Lock()
+        self.azar = random.Random(semilla)
+
+    def agregar_activa(self, renta_id):
+        with self._lock:
+            self._activas.append(renta_id)
+
+    def tomar_activa(self):
+        """
+        Saca una renta activa al azar (None si no quedan)
+        """
+        with self._lock:
+            if not self._activas:
+                return None
+            i = self.azar.randrange(len(self._activas))
+            self._activas[i], self._activas[-1] = self._activas[-1], self._activas[i]
+            return self._activas.pop()
+
+    def elegir(self, lista):
+        with self._lock:
+            return self.azar.choice(lista)
+
+
+class GeneradorCarga:
+    def __init__(self, url_api=None, mezcla=None, semilla=None):
+        """
+        Args:
+            url_api: URL base del API (por defecto la de utils/config.py)
+            mezcla: dict operación -> peso (por defecto MEZCLA_MOSTRADOR)
+            semilla: Semilla para repetir la misma secuencia de operaciones
+        """
+        self.url_api = url_api
+        self.mezcla = dict(mezcla or MEZCLA_MOSTRADOR)
+        desconocidas = set(self.mezcla) - set(MEZCLA_MOSTRADOR)
+        if desconocidas:
+            raise ValueError(f"Operaciones desconocidas: {', '.join(sorted(desconocidas))}")
+        self.semilla = semilla
+        self.estadisticas = EstadisticasCarga()
+        self.mostrador = None
+        self._detener = threading.Event()
+        self._local = threading.local()
+
+    def _controladores(self):
+        """
+        Controladores propios de cada hilo, como cada vista de la aplicación
+        """
+        if not hasattr(self._local, 'renta'):
+            self._local.renta = RentaController()
+            self._local.reportes = ReportesController()
+            if self.url_api:
+                self._local.renta.api_service.base_url = self.url_api
+                self._local.reportes.api_service.base_url = self.url_api
+        return self._local.renta, self._local.reportes
+
+    def preparar(self):
+        """
+        Descarga catálogos y rentas activas para elegir datos válidos
+
+        Returns:
+            tuple: (exito, mensaje_error)
+        """
+        renta, reportes = self._controladores()
+        exito, clientes = renta.obtener_clientes()
+        if not exito:
+            return False, f"Clientes: {clientes}"
+        exito, peliculas = renta.obtener_dvds()
+        if not exito:
+            return False, f"Películas: {peliculas}"
+        exito, empleados = renta.obtener_staff()
+        if not exito:
+            return False, f"Staff: {empleados}"
+        exito, activas = reportes.obtener_dvds_no_devueltos()
+        if not exito:
+            return False, f"Rentas activas: {activas}"
+
+        self.mostrador = Mostrador(
+            [c.id for c in clientes if c and c.id],
+            [p.id for p in peliculas if p and p.id],
+            [s.id for s in empleados if s and s.id],
+            [r.id for r in activas if r and r.id],
+            semilla=self.semilla
+        )
+        if not (self.mostrador.clientes and self.mostrador.peliculas and self.mostrador.empleados):
+            return False, "El API no devolvió clientes, películas o staff"
+        return True, None
+
+    # ==================== OPERACIONES ====================
+
+    def _crear(self, renta, reportes):
+        m = self.mostrador
+        exito, mensaje, datos = renta.crear_renta(
+            m.elegir(m.clientes), m.elegir(m.peliculas), m.elegir(m.empleados), None, None
+        )
+        if exito and datos is not None and datos.id:
+            m.agregar_activa(datos.id)
+        return exito, mensaje
+
+    def _devolver(self, renta, reportes):
+        renta_id = self.mostrador.tomar_activa()
+        if renta_id is None:
+            return self._crear(renta, reportes)
+        exito, mensaje, _ = renta.devolver_renta(renta_id)
+        return exito, mensaje
+
+    def _cancelar(self, renta, reportes):
+        renta_id = self.mostrador.tomar_activa()
+        if renta_id is None:
+            return self._crear(renta, reportes)
+        return renta.cancelar_renta(renta_id)
+
+    def _cliente(self, renta, reportes):
+        return reportes.obtener_rentas_cliente(self.mostrador.elegir(self.mostrador.clientes))
+
+    def _no_devueltos(self, renta, reportes):
+        return reportes.obtener_dvds_no_devueltos()
+
+    def _mas_rentados(self, renta, reportes):
+        return reportes.obtener_dvds_mas_rentados()
+
+    def _ganancias(self, renta, reportes):
+        return reportes.obtener_ganancias_staff()
+
+    def ejecutar_operacion(self, operacion, llegada=None):
+        """
+        Ejecuta una operación y registra su latencia (desde 'llegada' si se indica)
+        """
+        renta, reportes = self._controladores()
+        inicio = llegada if llegada is not None else time.perf_counter()
+        try:
+            exito, resultado = getattr(self, f"_{operacion}")(renta, reportes)
+        except Exception as e:
+            exito, resultado = False, f"{type(e).__name__}: {e}"
+        segundos = time.perf_counter() - inicio
+        # Los mensajes largos llevan datos propios de cada renta; basta la primera línea
+        error = None if exito else str(resultado).split('\n')[0][:80]
+        self.estadisticas.registrar(operacion, segundos, error)
+
+    def _sortear(self, azar):
+        operaciones = list(self.mezcla)
+        return azar.choices(operaciones, weights=[self.mezcla[o] for o in operaciones])[0]
+
+    # ==================== MODELOS DE LLEGADA ====================
+
+    def _dependiente(self, numero, pensar_ms):
+        azar = random.Random(None if self.semilla is None else self.semilla + numero)
+        # Arranque escalonado para no sincronizar a todos los dependientes
+        self._detener.wait(azar.uniform(0, pensar_ms / 1000))
+        while not self._detener.is_set():
+            self.ejecutar_operacion(self._sortear(azar))
+            if pensar_ms:
+                self._detener.wait(azar.expovariate(1000 / pensar_ms))
+
+    def _cerrado(self, dependientes, pensar_ms):
+        hilos = [
+            threading.Thread(target=self._dependiente, args=(i, pensar_ms), name=f"dependiente-{i}", daemon=True)
+            for i in range(dependientes)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        return hilos
+
+    def _abierto(self, dependientes, tasa):
+        azar = random.Random(self.semilla)
+        pool = ThreadPoolExecutor(max_workers=dependientes, thread_name_prefix='dependiente')
+
+        def despachar():
+            siguiente = time.perf_counter()
+            while not self._detener.is_set():
+                siguiente += azar.expovariate(tasa)
+                espera = siguiente - time.perf_counter()
+                if espera > 0 and self._detener.wait(espera):
+                    break
+                pool.submit(self.ejecutar_operacion, self._sortear(azar), siguiente)
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        hilo = threading.Thread(target=despachar, name='despachador', daemon=True)
+        hilo.start()
+        return [hilo]
+
+    def correr(self, dependientes=10, duracion=60, pensar_ms=2000, tasa=None,
+               calentamiento=0, progreso=None):
+        """
+        Genera carga durante 'duracion' segundos
+
+        Args:
+            dependientes: Dependientes simultáneos (hilos)
+            duracion: Segundos medidos (sin contar el calentamiento)
+            pensar_ms: Pausa media entre operaciones de un dependiente (modelo cerrado)
+            tasa: Operaciones por segundo (modelo abierto); None = modelo cerrado
+            calentamiento: Segundos iniciales que no cuentan en las estadísticas
+            progreso: Callback progreso(estadisticas) cada segundo
+
+        Returns:
+            EstadisticasCarga: Estadísticas finales
+        """
+        self._detener.clear()
+        if tasa:
+            hilos = self._abierto(dependientes, tasa)
+        else:
+            hilos = self._cerrado(dependientes, pensar_ms)
+
+        if calentamiento:
+            time.sleep(calentamiento)
+            self.estadisticas.reiniciar()
+
+        fin = time.monotonic() + duracion
+        try:
+            while time.monotonic() < fin:
+                time.sleep(min(1.0, max(0.0, fin - time.monotonic())))
+                if progreso:
+                    progreso(self.estadisticas)
+        finally:
+            self.estadisticas.fin = time.monotonic()
+            self._detener.set()
+            for hilo in hilos:
+                hilo.join()
+        return self.estadisticas
+
+
+def quitar_limites():
+    """
+    Quita los límites del gobernador de peticiones
+
+    Cada dependiente real usa su propia aplicación (su propio gobernador);
+    compartir uno solo entre todos los hilos limitaría la carga generada.
+    """
+    gobernador = obtener_gobernador()
+    for grupo in LIMITES_PETICIONES:
+        gobernador.configurar(grupo, None, None)
+
+
+def leer_mezcla(texto):
+    """
+    Interpreta 'crear=40,devolver=30,cliente=30'
+    """
+    mezcla = {}
+    for parte in texto.split(','):
+        operacion, _, peso = parte.partition('=')
+        mezcla[operacion.strip()] = float(peso or 1)
+    return mezcla
+
+
+def imprimir_resumen(resumen, archivo=sys.stdout):
+    print(
+        f"\n{'Operación':<14}{'Llamadas':>9}{'Errores':>8}{'Error %':>8}{'Ops/s':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Máx ms':>9}",
+        file=archivo
+    )
+    total = errores = 0
+    por_segundo = 0.0
+    for operacion, datos in resumen.items():
+        total += datos['llamadas']
+        errores += datos['errores']
+        por_segundo += datos['por_segundo']
+        print(
+            f"{operacion:<14}{datos['llamadas']:>9}{datos['errores']:>8}{datos['tasa_error']:>8.1%}"
+            f"{datos['por_segundo']:>8.1f}{datos['p50_ms']:>9}{datos['p95_ms']:>9}"
+            f"{datos['p99_ms']:>9}{datos['max_ms']:>9}",
+            file=archivo
+        )
+    print(
+        f"{'TOTAL':<14}{total:>9}{errores:>8}{(errores / total if total else 0):>8.1%}{por_segundo:>8.1f}",
+        file=archivo
+    )
+    for operacion, datos in resumen.items():
+        for mensaje, veces in datos['detalle_errores'].items():
+            print(f"  {operacion}: {veces} × {mensaje}", file=archivo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula dependientes concurrentes contra el API")
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument('--api', help="URL base del API (por defecto la de utils/config.py)")
+    destino.add_argument('--simulado', type=float, metavar='ESCALA',
+                         help="Levantar un servidor simulado en proceso con esa escala de datos")
+    parser.add_argument('--dependientes', type=int, default=10, help="Dependientes simultáneos")
+    parser.add_argument('--duracion', type=float, default=60, help="Segundos de medición")
+    parser.add_argument('--calentamiento', type=float, default=5, help="Segundos iniciales sin medir")
+    parser.add_argument('--pensar', type=float, default=2000,
+                        help="Pausa media en ms entre operaciones (modelo cerrado)")
+    parser.add_argument('--tasa', type=float, help="Operaciones por segundo (modelo abierto)")
+    parser.add_argument('--mezcla', type=leer_mezcla, help="Pesos, ej. crear=40,devolver=30,cliente=30")
+    parser.add_argument('--semilla', type=int, help="Repetir la misma secuencia de operaciones")
+    parser.add_argument('--con-limites', action='store_true',
+                        help="Mantener los límites del gobernador (un solo cliente compartido)")
+    parser.add_argument('--json', help="Guardar el resumen en este archivo")
+    args = parser.parse_args()
+
+    servidor = None
+    url = args.api
+    if args.simulado:
+        from herramientas.servidor_simulado import ServidorSimulado
+        servidor = ServidorSimulado(escala=args.simulado)
+        url = servidor.iniciar()
+        print(f"Servidor simulado en {url}", file=sys.stderr)
+
+    if not args.con_limites:
+        quitar_limites()
+
+    try:
+        generador = GeneradorCarga(url, mezcla=args.mezcla, semilla=args.semilla)
+        exito, mensaje = generador.preparar()
+        if not exito:
+            print(f"Error: {mensaje}", file=sys.stderr)
+            return 1
+
+        modelo = f"abierto a {args.tasa} ops/s" if args.tasa else f"cerrado, {args.pensar:.0f} ms de pausa"
+        print(f"{args.dependientes} dependientes ({modelo}) durante {args.duracion:.0f}s", file=sys.stderr)
+
+        def progreso(estadisticas):
+            llamadas = sum(d['llamadas'] for d in estadisticas.resumen().values())
+            print(f"\r{llamadas} operaciones", end='', file=sys.stderr)
+
+        estadisticas = generador.correr(
+            dependientes=args.dependientes, duracion=args.duracion, pensar_ms=args.pensar,
+            tasa=args.tasa, calentamiento=args.calentamiento, progreso=progreso
+        )
+        print(file=sys.stderr)
+    finally:
+        if servidor:
+            servidor.detener()
+
+    resumen = estadisticas.resumen()
+    imprimir_resumen(resumen)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as archivo:
+            json.dump({'parametros': {k: v for k, v in vars(args).items() if k != 'mezcla'},
+                       'mezcla': generador.mezcla, 'resumen': resumen},
+                      archivo, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,564 @@
+"""
+Servidor local que sustituye al API de Express para pruebas sin backend
+
+Implementa los endpoints de utils/config.ENDPOINTS (rentas, reportes y
+catálogos) sobre DatosSimulados, sin PostgreSQL ni dependencias externas, y
+permite inyectar latencia, errores 500, conexiones cortadas y ancho de banda
+limitado para probar el cliente en condiciones degradadas.
+
+Como el middleware compression de Express, comprime las respuestas de más
+de 1 KB con la mejor codificación que acepte el cliente (zstd y br solo si
+están instalados zstandard/brotli); --sin-compresion lo desactiva.
+
+Uso (desde rental-dvd-frontend/):
+    python -m herramientas.servidor_simulado --escala 100 --puerto 3000
+    python -m herramientas.servidor_simulado --latencia 80 --variacion 40 --errores 0.02
+    python -m herramientas.servidor_simulado --regla /reports=400:0.05 --kb-por-segundo 512
+
+Los cambios de rentas (crear, devolver, cancelar) se publican en un feed de
+eventos, en flujo (Server-Sent Events) o por long-poll:
+    GET  /events/rentals               text/event-stream; reanuda desde
+                                       Last-Event-ID (o ?after=)
+    GET  /events/rentals/poll?after=N&timeout=25
+                                       eventos posteriores a N (espera hasta
+                                       que haya alguno o pase el timeout)
+Si el id pedido ya no está en el historial llega un evento 'reset' (o
+"reset": true) y el cliente debe recargar lo que tenga.
+
+La simulación se puede cambiar en caliente:
+    GET  /_simulacion            configuración actual y contadores
+    PUT  /_simulacion            {"latencia_ms": 200, "tasa_errores": 0.1, ...}
+
+Desde código (por ejemplo, en un benchmark):
+    servidor = ServidorSimulado(escala=10)
+    url = servidor.iniciar()        # http://127.0.0.1:<puerto libre>
+    ...
+    servidor.cortar_eventos()       # corta los flujos de eventos abiertos
+    servidor.detener()
+"""
+import argparse
+import gzip
+import json
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from herramientas.datos_simulados import DatosSimulados
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BIENVENIDA = {
+    'message': 'Bienvenido a la API de DVD Rental (servidor simulado)',
+    'version': '2.0.0'
+}
+
+
+# Codificación -> compresor, en orden de preferencia del servidor (niveles por
+# defecto del middleware compression de Express para gzip y br)
+COMPRESORES = {}
+if zstandard is not None:
+    COMPRESORES['zstd'] = lambda datos: zstandard.ZstdCompressor(level=3).compress(datos)
+if brotli is not None:
+    COMPRESORES['br'] = lambda datos: brotli.compress(datos, quality=4)
+COMPRESORES['gzip'] = lambda datos: gzip.compress(datos, compresslevel=6)
+
+# No vale la pena comprimir respuestas más chicas
+UMBRAL_COMPRESION = 1024
+
+# Segundos entre latidos del flujo de eventos sin cambios, y espera sugerida
+# al cliente para reconectarse (campo retry de SSE, milisegundos)
+LATIDO_EVENTOS_S = 15
+REINTENTO_EVENTOS_MS = 1000
+
+
+def elegir_codificacion(accept_encoding):
+    """
+    Elige la codificación de la respuesta según Accept-Encoding (con valores q)
+
+    Returns:
+        str: Clave de COMPRESORES, o None para enviar sin comprimir
+    """
+    calidades = {}
+    for parte in (accept_encoding or '').split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        if nombre:
+            calidades[nombre.lower()] = calidad
+    candidatas = [c for c in COMPRESORES if calidades.get(c, calidades.get('*', 0)) > 0]
+    if not candidatas:
+        return None
+    return max(candidatas, key=lambda c: calidades.get(c, calidades.get('*', 0)))
+
+
+class ReglaRuta:
+    """
+    Latencia y errores propios de las rutas que empiezan con un prefijo
+    """
+
+    def __init__(self, prefijo, latencia_ms=None, tasa_errores=None):
+        self.prefijo = prefijo
+        self.latencia_ms = latencia_ms
+        self.tasa_errores = tasa_errores
+
+    @classmethod
+    def desde_texto(cls, texto):
+        """
+        Interpreta 'PREFIJO=LATENCIA_MS[:TASA_ERRORES]' (ej. '/reports=400:0.05')
+        """
+        prefijo, _, valores = texto.partition('=')
+        latencia, _, errores = valores.partition(':')
+        return cls(
+            prefijo,
+            float(latencia) if latencia else None,
+            float(errores) if errores else None
+        )
+
+    def a_dict(self):
+        return {'prefijo': self.prefijo, 'latencia_ms': self.latencia_ms, 'tasa_errores': self.tasa_errores}
+
+
+class Simulacion:
+    """
+    Fallas inyectadas en las respuestas (modificable mientras el servidor corre)
+    """
+
+    CAMPOS = ('latencia_ms', 'variacion_ms', 'tasa_errores', 'tasa_cortes', 'kb_por_segundo')
+
+    def __init__(self, latencia_ms=0, variacion_ms=0, tasa_errores=0.0, tasa_cortes=0.0,
+                 kb_por_segundo=0, reglas=(), semilla=None):
+        """
+        Args:
+            latencia_ms: Retardo antes de responder
+            variacion_ms: Variación uniforme ± sobre la latencia
+            tasa_errores: Fracción de peticiones que responden 500
+            tasa_cortes: Fracción de peticiones a las que se cierra la conexión sin responder
+            kb_por_segundo: Ancho de banda de la respuesta (0 = sin límite)
+            reglas: ReglaRuta con latencia/errores por prefijo de ruta
+            semilla: Semilla del azar de las fallas (None = no determinista)
+        """
+        self.latencia_ms = latencia_ms
+        self.variacion_ms = variacion_ms
+        self.tasa_errores = tasa_errores
+        self.tasa_cortes = tasa_cortes
+        self.kb_por_segundo = kb_por_segundo
+        self.reglas = list(reglas)
+        self.contadores = Counter()
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+
+    def actualizar(self, cambios):
+        """
+        Aplica un dict con algunos de CAMPOS y, opcionalmente, 'reglas'
+        """
+        with self._lock:
+            for campo in self.CAMPOS:
+                if campo in cambios:
+                    setattr(self, campo, float(cambios[campo]))
+            if 'reglas' in cambios:
+                self.reglas = [
+                    ReglaRuta(r['prefijo'], r.get('latencia_ms'), r.get('tasa_errores'))
+                    for r in cambios['reglas']
+                ]
+
+    def a_dict(self):
+        with self._lock:
+            datos = {campo: getattr(self, campo) for campo in self.CAMPOS}
+            datos['reglas'] = [regla.a_dict() for regla in self.reglas]
+            datos['contadores'] = dict(self.contadores)
+        return datos
+
+    def decidir(self, ruta):
+        """
+        Returns:
+            tuple: (segundos de espera, 'corte' / 'error' / None)
+        """
+        with self._lock:
+            latencia, errores = self.latencia_ms, self.tasa_errores
+            for regla in self.reglas:
+                if ruta.startswith(regla.prefijo):
+                    if regla.latencia_ms is not None:
+                        latencia = regla.latencia_ms
+                    if regla.tasa_errores is not None:
+                        errores = regla.tasa_errores
+            espera = max(0.0, latencia + self._azar.uniform(-self.variacion_ms, self.variacion_ms)) / 1000
+
+            falla = None
+            sorteo = self._azar.random()
+            if sorteo < self.tasa_cortes:
+                falla = 'corte'
+            elif sorteo < self.tasa_cortes + errores:
+                falla = 'error'
+            self.contadores['peticiones'] += 1
+            if falla:
+                self.contadores[falla] += 1
+        return espera, falla
+
+
+def _entero(params, nombre, defecto=None):
+    valores = params.get(nombre)
+    if not valores:
+        return defecto
+    try:
+        return int(valores[0])
+    except ValueError:
+        return defecto
+
+
+def _texto(params, nombre):
+    valores = params.get(nombre)
+    return valores[0] if valores else None
+
+
+class Enrutador:
+    """
+    Asocia método y ruta con la consulta correspondiente de DatosSimulados
+    """
+
+    def __init__(self, datos):
+        self.datos = d = datos
+        self.rutas = [
+            ('GET', r'/', lambda m, p, c: (200, BIENVENIDA)),
+            ('GET', r'/rentals', lambda m, p, c: d.listar_rentas(
+                limit=_entero(p, 'limit', 50), offset=_entero(p, 'offset', 0),
+                status=_texto(p, 'status'), customer_id=_entero(p, 'customer_id'),
+                staff_id=_entero(p, 'staff_id'))),
+            ('POST', r'/rentals', lambda m, p, c: d.crear_renta(c)),
+            ('PUT', r'/rentals/(\d+)/return', lambda m, p, c: d.devolver_renta(int(m[1]))),
+            ('DELETE', r'/rentals/(\d+)', lambda m, p, c: d.cancelar_renta(int(m[1]))),
+            ('GET', r'/rentals/customer/(\d+)', lambda m, p, c: d.rentas_cliente(int(m[1]), _texto(p, 'status'))),
+            ('GET', r'/reports/customer-rentals/(\d+)',
+             lambda m, p, c: d.rentas_cliente(int(m[1]), _texto(p, 'status'))),
+            ('GET', r'/reports/unreturned-dvds', lambda m, p, c: d.no_devueltos()),
+            ('GET', r'/reports/most-rented', lambda m, p, c: d.mas_rentados(_entero(p, 'limit', 10))),
+            ('GET', r'/reports/staff-revenue(?:/(\d+))?', lambda m, p, c: d.ganancias_staff(
+                int(m[1]) if m[1] else None, _texto(p, 'start_date'), _texto(p, 'end_date'))),
+            ('GET', r'/customers', lambda m, p, c: d.listar_clientes(
+                _entero(p, 'limit', 50), _entero(p, 'offset', 0))),
+            ('GET', r'/customers/(\d+)', lambda m, p, c: d.obtener_cliente(int(m[1]))),
+            ('GET', r'/films', lambda m, p, c: d.listar_peliculas(
+                _entero(p, 'limit', 20), _entero(p, 'offset', 0))),
+            ('GET', r'/films/(\d+)', lambda m, p, c: d.obtener_pelicula(int(m[1]))),
+            ('GET', r'/staff', lambda m, p, c: d.listar_empleados()),
+            ('GET', r'/staff/(\d+)', lambda m, p, c: d.obtener_empleado(int(m[1]))),
+            ('GET', r'/events/rentals/poll', lambda m, p, c: d.eventos.sondear(
+                _entero(p, 'after'), _entero(p, 'timeout', 25))),
+        ]
+        self.rutas = [(metodo, re.compile(patron + r'/?$'), accion) for metodo, patron, accion in self.rutas]
+
+    def resolver(self, metodo, ruta, params, cuerpo):
+        """
+        Returns:
+            tuple: (código HTTP, cuerpo JSON)
+        """
+        for metodo_ruta, patron, accion in self.rutas:
+            if metodo_ruta != metodo:
+                continue
+            coincidencia = patron.match(ruta)
+            if coincidencia:
+                return accion(coincidencia, params, cuerpo)
+        return 404, {'success': False, 'message': 'Ruta no encontrada'}
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ServidorSimulado/1.0'
+    # Cabeceras y cuerpo salen en escrituras separadas: con Nagle activo cada
+    # petición keep-alive esperaría el ACK retrasado del cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.conexiones_lock:
+            self.server.conexiones.add(self.connection)
+
+    def finish(self):
+        with self.server.conexiones_lock:
+            self.server.conexiones.discard(self.connection)
+        super().finish()
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_peticiones:
+            super().log_message(formato, *args)
+
+    def _leer_cuerpo(self):
+        longitud = int(self.headers.get('Content-Length') or 0)
+        if not longitud:
+            return {}
+        try:
+            return json.loads(self.rfile.read(longitud))
+        except ValueError:
+            return {}
+
+    def _responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        codificacion = None
+        if self.server.compresion and len(datos) > UMBRAL_COMPRESION:
+            codificacion = elegir_codificacion(self.headers.get('Accept-Encoding'))
+        if codificacion:
+            datos = COMPRESORES[codificacion](datos)
+
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Vary', 'Accept-Encoding')
+        if codificacion:
+            self.send_header('Content-Encoding', codificacion)
+        self.send_header('Content-Length', str(len(datos)))
+        self.end_headers()
+
+        kb_por_segundo = self.server.simulacion.kb_por_segundo
+        if not kb_por_segundo:
+            self.wfile.write(datos)
+            return
+        # Ancho de banda limitado: bloques de 16 KB espaciados en el tiempo
+        bloque = 16384
+        pausa = bloque / (kb_por_segundo * 1024)
+        for inicio in range(0, len(datos), bloque):
+            self.wfile.write(datos[inicio:inicio + bloque])
+            self.wfile.flush()
+            time.sleep(pausa)
+
+    def _escribir_bloque(self, texto):
+        datos = texto.encode('utf-8')
+        self.wfile.write(f"{len(datos):x}\r\n".encode('ascii') + datos + b"\r\n")
+        self.wfile.flush()
+
+    def _escribir_evento(self, evento):
+        self._escribir_bloque(
+            f"id: {evento['id']}\nevent: {evento['type']}\n"
+            f"data: {json.dumps(evento['data'], ensure_ascii=False)}\n\n"
+        )
+
+    def _flujo_eventos(self, params):
+        """
+        GET /events/rentals como Server-Sent Events (hasta que el cliente o
+        cortar_eventos() cierren la conexión)
+        """
+        registro = self.server.enrutador.datos.eventos
+        corte = self.server.cortes_eventos
+        token = self.headers.get('Last-Event-ID') or _texto(params, 'after')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            self._escribir_bloque(f"retry: {REINTENTO_EVENTOS_MS}\n\n")
+            ultimo = registro.ultimo_id
+            if token is None:
+                # Sin token: solo lo que pase desde ahora, con el id para reanudar
+                self._escribir_evento({'id': ultimo, 'type': 'ready', 'data': {'last_id': ultimo}})
+            else:
+                try:
+                    ultimo = int(token)
+                except ValueError:
+                    ultimo = -1
+            while True:
+                eventos, reinicio = registro.esperar(ultimo, self.server.latido_eventos)
+                if self.server.cortes_eventos != corte:
+                    return
+                if reinicio:
+                    ultimo = registro.ultimo_id
+                    self._escribir_evento({'id': ultimo, 'type': 'reset', 'data': {'last_id': ultimo}})
+                    continue
+                if not eventos:
+                    self._escribir_bloque(": ping\n\n")
+                    continue
+                for evento in eventos:
+                    self._escribir_evento(evento)
+                ultimo = eventos[-1]['id']
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _atender(self, metodo):
+        partes = urlsplit(self.path)
+        ruta = partes.path.rstrip('/') or '/'
+        params = parse_qs(partes.query)
+        cuerpo = self._leer_cuerpo() if metodo in ('POST', 'PUT') else {}
+
+        if ruta == '/_simulacion':
+            if metodo == 'PUT':
+                self.server.simulacion.actualizar(cuerpo)
+            self._responder(200, self.server.simulacion.a_dict())
+            return
+
+        espera, falla = self.server.simulacion.decidir(ruta)
+        if espera:
+            time.sleep(espera)
+        if falla == 'corte':
+            self.close_connection = True
+            return
+        if falla == 'error':
+            self._responder(500, {
+                'success': False,
+                'message': 'Error simulado del servidor',
+                'error': 'falla inyectada'
+            })
+            return
+
+        if metodo == 'GET' and ruta == '/events/rentals':
+            self._flujo_eventos(params)
+            return
+
+        try:
+            estado, respuesta = self.server.enrutador.resolver(metodo, ruta, params, cuerpo)
+        except Exception as e:
+            estado, respuesta = 500, {'success': False, 'message': 'Error interno', 'error': str(e)}
+        self._responder(estado, respuesta)
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def do_PUT(self):
+        self._atender('PUT')
+
+    def do_DELETE(self):
+        self._atender('DELETE')
+
+
+class ServidorSimulado:
+    def __init__(self, host='127.0.0.1', puerto=0, escala=1, semilla=1, simulacion=None,
+                 datos=None, registrar_peticiones=False, compresion=True,
+                 latido_eventos=LATIDO_EVENTOS_S):
+        """
+        Args:
+            host: Interfaz donde escuchar
+            puerto: Puerto (0 = uno libre elegido por el sistema)
+            escala: Tamaño de los datos respecto a la base de ejemplo
+            semilla: Semilla de los datos generados
+            simulacion: Simulacion con las fallas a inyectar
+            datos: DatosSimulados ya creados (para compartirlos entre servidores)
+            registrar_peticiones: Escribir cada petición en stderr
+            compresion: Comprimir las respuestas según Accept-Encoding
+            latido_eventos: Segundos entre latidos del flujo de eventos
+        """
+        self.datos = datos or DatosSimulados(escala=escala, semilla=semilla)
+        self.simulacion = simulacion or Simulacion()
+        self.http = ThreadingHTTPServer((host, puerto), _Manejador)
+        self.http.daemon_threads = True
+        self.http.enrutador = Enrutador(self.datos)
+        self.http.simulacion = self.simulacion
+        self.http.registrar_peticiones = registrar_peticiones
+        self.http.compresion = compresion
+        self.http.latido_eventos = latido_eventos
+        self.http.cortes_eventos = 0
+        self.http.conexiones = set()
+        self.http.conexiones_lock = threading.Lock()
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self.http.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        """
+        Atiende peticiones en un hilo de fondo
+
+        Returns:
+            str: URL base del servidor
+        """
+        self._hilo = threading.Thread(target=self.http.serve_forever, name='servidor-simulado', daemon=True)
+        self._hilo.start()
+        return self.url
+
+    def cortar_eventos(self):
+        """
+        Cierra los flujos de eventos abiertos (los clientes deben reconectarse)
+        """
+        self.http.cortes_eventos += 1
+        self.datos.eventos.despertar()
+
+    def detener(self):
+        self.cortar_eventos()
+        self.http.shutdown()
+        # Como un servidor que se apaga: también se cierran las conexiones
+        # keep-alive abiertas, no solo se deja de aceptar nuevas
+        with self.http.conexiones_lock:
+            conexiones = list(self.http.conexiones)
+        for conexion in conexiones:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.http.server_close()
+        if self._hilo:
+            self._hilo.join()
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API de DVD Rental simulada para pruebas sin backend")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=3000)
+    parser.add_argument('--escala', type=float, default=1,
+                        help="Tamaño respecto a la base de ejemplo (10 = 160 mil rentas)")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--latencia', type=float, default=0, help="Latencia en ms")
+    parser.add_argument('--variacion', type=float, default=0, help="Variación ± de la latencia en ms")
+    parser.add_argument('--errores', type=float, default=0, help="Fracción de respuestas 500")
+    parser.add_argument('--cortes', type=float, default=0, help="Fracción de conexiones cortadas")
+    parser.add_argument('--kb-por-segundo', type=float, default=0, help="Ancho de banda de las respuestas")
+    parser.add_argument('--regla', action='append', default=[], metavar='PREFIJO=MS[:ERRORES]',
+                        help="Latencia y errores para las rutas con ese prefijo (repetible)")
+    parser.add_argument('--sin-compresion', action='store_true', help="Responder siempre sin comprimir")
+    parser.add_argument('--registrar', action='store_true', help="Escribir cada petición en stderr")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    datos = DatosSimulados(escala=args.escala, semilla=args.semilla)
+    print(
+        f"Datos generados en {time.perf_counter() - inicio:.1f}s: {datos.rentas:,} rentas, "
+        f"{datos.clientes:,} clientes, {datos.peliculas:,} películas, {len(datos.activas):,} sin devolver"
+    )
+
+    simulacion = Simulacion(
+        latencia_ms=args.latencia, variacion_ms=args.variacion, tasa_errores=args.errores,
+        tasa_cortes=args.cortes, kb_por_segundo=args.kb_por_segundo,
+        reglas=[ReglaRuta.desde_texto(texto) for texto in args.regla]
+    )
+    servidor = ServidorSimulado(
+        args.host, args.puerto, datos=datos, simulacion=simulacion,
+        registrar_peticiones=args.registrar, compresion=not args.sin_compresion
+    )
+    print(f"Escuchando en {servidor.url} (Ctrl+C para terminar)")
+    try:
+        servidor.http.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.http.server_close()
+
+
+if __name__ == '__main__':
+    main()
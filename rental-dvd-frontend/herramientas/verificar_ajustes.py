@@ -0,0 +1,27 @@
+"""
+Comprueba que cada ajuste de utils/config.py se pueda sobrescribir desde el
+entorno (DVD_<NOMBRE>) y leerse con el mismo valor
+
+Uso (desde rental-dvd-frontend/):
+    python -m herramientas.verificar_ajustes
+"""
+import sys
+from utils import config
+from utils.ajustes import verificar_entorno
+
+
+def main():
+    fabrica = {nombre: getattr(config, nombre) for nombre in dir(config)
+               if nombre.isupper() and not nombre.startswith('_')}
+    problemas = verificar_entorno(fabrica)
+    for problema in problemas:
+        print(problema, file=sys.stderr)
+    if problemas:
+        print(f"{len(problemas)} ajustes no se leen bien desde el entorno", file=sys.stderr)
+        return 1
+    print(f"{len(fabrica)} ajustes se pueden sobrescribir desde el entorno")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,5 +2,12 @@
 Paquete de servicios
 """
 from .api_service import APIService
+from .motor_reportes import MotorReportes, obtener_motor
+from .exportador import (
+    Columna, exportar, escribir_csv, formatos_disponibles, ExportacionCancelada
+)
 
-__all__ = ['APIService']
\ No newline at end of file
+__all__ = [
+    'APIService', 'MotorReportes', 'obtener_motor',
+    'Columna', 'exportar', 'escribir_csv', 'formatos_disponibles', 'ExportacionCancelada'
+]
\ No newline at end of file
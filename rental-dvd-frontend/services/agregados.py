@@ -0,0 +1,138 @@
+"""
+Agregados incrementales de rentas
+
+Mantiene contadores por película, por staff y por cliente que se actualizan
+con cada renta creada, devuelta o cancelada, o con cada delta de
+sincronización, sin volver a recorrer el historial completo.
+"""
+from collections import deque
+
+# Cantidad de cambios recientes que se recuerdan para refrescos parciales
+MAX_CAMBIOS_REGISTRADOS = 5000
+
+
+class AgregadosRentas:
+    def __init__(self):
+        # film_id -> [total_rentas, completadas, activas, ingresos]
+        self.por_pelicula = {}
+        # staff_id -> [rentas, pagos, ingresos]
+        self.por_staff = {}
+        # customer_id -> [rentas, activas, total_gastado]
+        self.por_cliente = {}
+
+        self.version = 0
+        self._cambios = deque(maxlen=MAX_CAMBIOS_REGISTRADOS)
+
+    def limpiar(self):
+        """
+        Reinicia todos los contadores
+        """
+        self.por_pelicula.clear()
+        self.por_staff.clear()
+        self.por_cliente.clear()
+        self._cambios.clear()
+        self.version += 1
+
+    def _ajustar(self, registro, signo):
+        """
+        Suma (signo=1) o resta (signo=-1) la contribución de una renta
+
+        Args:
+            registro: Renta del motor local (con sus pagos)
+            signo: 1 para agregar, -1 para quitar
+        """
+        montos = [monto for monto, _ in registro.pagos.values()]
+        filas = len(montos) or 1
+        ingresos = sum(montos)
+        devuelta = registro.return_date is not None
+
+        pelicula = self.por_pelicula.get(registro.film_id)
+        if pelicula is None:
+            pelicula = [0, 0, 0, 0.0]
+            self.por_pelicula[registro.film_id] = pelicula
+        pelicula[0] += signo * filas
+        if devuelta:
+            pelicula[1] += signo * filas
+        else:
+            pelicula[2] += signo * filas
+        pelicula[3] += signo * ingresos
+
+        staff = self.por_staff.get(registro.staff_id)
+        if staff is None:
+            staff = [0, 0, 0.0]
+            self.por_staff[registro.staff_id] = staff
+        staff[0] += signo
+        staff[1] += signo * len(montos)
+        staff[2] += signo * ingresos
+
+        cliente = self.por_cliente.get(registro.customer_id)
+        if cliente is None:
+            cliente = [0, 0, 0.0]
+            self.por_cliente[registro.customer_id] = cliente
+        cliente[0] += signo
+        if not devuelta:
+            cliente[1] += signo
+        cliente[2] += signo * ingresos
+
+        self.version += 1
+        self._cambios.append(
+            (self.version, registro.film_id, registro.staff_id, registro.customer_id)
+        )
+
+    def agregar(self, registro):
+        """
+        Incorpora una renta nueva
+        """
+        self._ajustar(registro, 1)
+
+    def quitar(self, registro):
+        """
+        Retira la contribución de una renta (cancelada o por actualizar)
+        """
+        self._ajustar(registro, -1)
+
+    def cambios_desde(self, version):
+        """
+        Indica qué claves cambiaron después de una versión dada
+
+        Args:
+            version: Versión que la vista tenía mostrada
+
+        Returns:
+            dict: {'peliculas', 'staff', 'clientes'} con conjuntos de IDs, o
+                  None si la versión es demasiado antigua y hay que recargar todo
+        """
+        cambios = {'peliculas': set(), 'staff': set(), 'clientes': set()}
+        if version >= self.version:
+            return cambios
+        if not self._cambios or self._cambios[0][0] > version + 1:
+            return None
+
+        for version_cambio, film_id, staff_id, customer_id in reversed(self._cambios):
+            if version_cambio <= version:
+                break
+            cambios['peliculas'].add(film_id)
+            cambios['staff'].add(staff_id)
+            cambios['clientes'].add(customer_id)
+        return cambios
+
+    def totales_pelicula(self, film_id):
+        """
+        Returns:
+            tuple: (total_rentas, completadas, activas, ingresos)
+        """
+        return tuple(self.por_pelicula.get(film_id, (0, 0, 0, 0.0)))
+
+    def totales_staff(self, staff_id):
+        """
+        Returns:
+            tuple: (rentas, pagos, ingresos)
+        """
+        return tuple(self.por_staff.get(staff_id, (0, 0, 0.0)))
+
+    def totales_cliente(self, customer_id):
+        """
+        Returns:
+            tuple: (rentas, activas, total_gastado)
+        """
+        return tuple(self.por_cliente.get(customer_id, (0, 0, 0.0)))
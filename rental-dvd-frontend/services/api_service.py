@@ -2,14 +2,91 @@
 Servicio para comunicación con el API REST del backend
 """
 import requests
-import json
+import threading
+import time
 from typing import List, Dict, Optional
-from utils.config import API_BASE_URL, ENDPOINTS, REQUEST_TIMEOUT
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from utils.ajustes import obtener_ajustes
+from utils.config import TAMANO_BLOQUE_FLUJO
+from services.limitador import obtener_gobernador, LimiteExcedido
+from services.balanceador import Balanceador, obtener_balanceador
+from services.instrumentacion import obtener_instrumentacion, Medicion
+from services.decodificador import obtener_decodificador
+from services.flujo_json import LectorArreglo
+from services.compresion import cabecera_accept_encoding
+from utils.trazas import span
+
+# Respuestas de una réplica caída o saturada: la lectura se repite en otra
+ESTADOS_OTRA_REPLICA = (502, 503, 504)
+
+
+def _sin_enviar(error):
+    """
+    True si la petición falló antes de conectar (la réplica no recibió nada)
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    causa = error.args[0] if error.args else None
+    return isinstance(getattr(causa, 'reason', None), ConnectTimeoutError)
+
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def _montar_pool(ajustes):
+    adaptador = HTTPAdapter(
+        pool_connections=ajustes.POOL_REPLICAS, pool_maxsize=ajustes.POOL_CONEXIONES_POR_REPLICA
+    )
+    # Las conexiones en uso del adaptador anterior terminan normalmente
+    _sesion.mount('http://', adaptador)
+    _sesion.mount('https://', adaptador)
+
+
+def obtener_sesion():
+    """
+    Sesión HTTP compartida por todos los APIService
+    
+    Reutiliza las conexiones (keep-alive) en vez de abrir una por petición;
+    el tamaño del pool sigue a POOL_REPLICAS y POOL_CONEXIONES_POR_REPLICA
+    cuando se recargan los ajustes.
+    
+    Returns:
+        requests.Session: Sesión única
+    """
+    global _sesion
+    with _sesion_lock:
+        if _sesion is None:
+            ajustes = obtener_ajustes()
+            _sesion = requests.Session()
+            _montar_pool(ajustes)
+            ajustes.suscribir(['POOL_REPLICAS', 'POOL_CONEXIONES_POR_REPLICA'], _montar_pool)
+        return _sesion
+
 
 class APIService:
     def __init__(self):
-        self.base_url = API_BASE_URL
-        self.timeout = REQUEST_TIMEOUT
+        self.balanceador = obtener_balanceador()
+        self.ajustes = obtener_ajustes()
+        self.sesion = obtener_sesion()
+        self.gobernador = obtener_gobernador()
+        self.instrumentacion = obtener_instrumentacion()
+        self.decodificador = obtener_decodificador()
+        self.cabeceras = {'Accept-Encoding': cabecera_accept_encoding()}
+    
+    @property
+    def base_url(self):
+        """
+        URL de la réplica primaria; las URLs se arman con ella y _pedir las
+        lleva a la réplica elegida
+        """
+        return self.balanceador.primario.url
+    
+    @base_url.setter
+    def base_url(self, url):
+        # Apuntar a una URL fija (línea de comandos, herramientas) deja una sola réplica
+        self.balanceador = Balanceador([url])
     
     def _build_url(self, endpoint_key, **kwargs):
         """
@@ -22,16 +99,17 @@ class APIService:
         Returns:
             str: URL completa
         """
-        endpoint = ENDPOINTS.get(endpoint_key, '')
+        endpoint = self.ajustes.ENDPOINTS.get(endpoint_key, '')
         url = self.base_url + endpoint.format(**kwargs)
         return url
     
-    def _handle_response(self, response):
+    def _handle_response(self, response, endpoint=None):
         """
         Maneja la respuesta del API
         
         Args:
             response: Objeto Response de requests
+            endpoint: Clave de ENDPOINTS (elige el esquema de decodificación tipada)
         
         Returns:
             dict: Datos de la respuesta
@@ -41,18 +119,226 @@ class APIService:
         """
         if response.status_code >= 200 and response.status_code < 300:
             try:
-                return response.json()
-            except json.JSONDecodeError:
+                return self.decodificador.decodificar(response.content, endpoint)
+            except ValueError:
                 return {'success': True}
         else:
             error_msg = f"Error {response.status_code}"
             try:
-                error_data = response.json()
+                error_data = self.decodificador.decodificar(response.content)
                 error_msg = error_data.get('message', error_msg)
             except:
                 pass
             raise Exception(error_msg)
     
+    def _pedir(self, metodo, url, timeout, **kwargs):
+        """
+        Hace la petición en una réplica del API, pasando a otra si falla
+        
+        Las lecturas se repiten en otra réplica ante errores de conexión,
+        timeouts y 502/503/504; las mutaciones solo si la conexión no llegó
+        a establecerse, para no aplicarlas dos veces.
+        
+        Args:
+            metodo: 'GET', 'POST', 'PUT' o 'DELETE'
+            url: URL armada con base_url
+            timeout: Segundos de espera por la réplica
+            **kwargs: Argumentos adicionales para requests (json, params, stream...)
+        
+        Returns:
+            requests.Response: Respuesta de la réplica que atendió
+        """
+        if not url.startswith(self.base_url):
+            return self.sesion.request(metodo, url, timeout=timeout, **kwargs)
+        
+        ruta = url[len(self.base_url):]
+        mutacion = metodo != 'GET'
+        intentadas = []
+        while True:
+            backend = self.balanceador.elegir(mutacion, intentadas)
+            intentadas.append(backend)
+            ultima = len(intentadas) == len(self.balanceador.backends)
+            inicio = self.balanceador.iniciar(backend)
+            try:
+                response = self.sesion.request(metodo, backend.url + ruta, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self.balanceador.terminar(backend, inicio, fallo=True)
+                if ultima or (mutacion and not _sin_enviar(e)):
+                    raise
+                continue
+            
+            self.balanceador.terminar(backend, inicio, fallo=response.status_code >= 500)
+            if response.status_code in ESTADOS_OTRA_REPLICA and not mutacion and not ultima:
+                response.close()
+                continue
+            return response
+    
+    def _solicitar(self, metodo, grupo, endpoint, url, **kwargs):
+        """
+        Hace una petición respetando los límites de tasa y concurrencia del grupo
+        
+        Con las trazas activas, la petición queda como un span 'api.<endpoint>'.
+        
+        Args:
+            metodo: 'GET', 'POST', 'PUT' o 'DELETE'
+            grupo: 'catalogos', 'reportes' o 'mutaciones'
+            endpoint: Nombre del endpoint para las métricas (clave de ENDPOINTS)
+            url: URL completa
+            **kwargs: Argumentos adicionales para requests (json, params...)
+        
+        Returns:
+            dict: Datos de la respuesta
+        
+        Raises:
+            requests.exceptions.Timeout: Si no hubo permiso dentro del timeout
+        """
+        kwargs['headers'] = {**self.cabeceras, **kwargs.get('headers', {})}
+        with span(f"api.{endpoint}", 'servicio', metodo=metodo) as traza:
+            return self._enviar(metodo, grupo, endpoint, url, traza, **kwargs)
+    
+    def _enviar(self, metodo, grupo, endpoint, url, traza, **kwargs):
+        """
+        Envía la petición con permiso del gobernador
+        
+        Mide cada fase de la llamada (espera de permiso, servidor, descarga
+        y decodificación) para la instrumentación.
+        
+        Args:
+            metodo: 'GET', 'POST', 'PUT' o 'DELETE'
+            grupo: 'catalogos', 'reportes' o 'mutaciones'
+            endpoint: Nombre del endpoint para las métricas (clave de ENDPOINTS)
+            url: URL completa
+            traza: Span de la petición (recibe estado y bytes)
+            **kwargs: Argumentos adicionales para requests (json, params...)
+        
+        Returns:
+            dict: Datos de la respuesta
+        
+        Raises:
+            requests.exceptions.Timeout: Si no hubo permiso dentro del timeout
+        """
+        timeout = self.ajustes.timeout(endpoint)
+        if not self.instrumentacion.activa:
+            try:
+                with self.gobernador.permiso(grupo, timeout=timeout):
+                    response = self._pedir(metodo, url, timeout, **kwargs)
+            except LimiteExcedido as e:
+                raise requests.exceptions.Timeout(str(e))
+            traza.agregar(estado=response.status_code)
+            return self._handle_response(response, endpoint)
+        
+        medicion = Medicion(endpoint, metodo)
+        inicio = time.perf_counter()
+        try:
+            with self.gobernador.permiso(grupo, timeout=timeout):
+                t_permiso = time.perf_counter()
+                response = self._pedir(metodo, url, timeout, stream=True, **kwargs)
+                t_cabeceras = time.perf_counter()
+                medicion.bytes = len(response.content)
+                t_descarga = time.perf_counter()
+            medicion.bytes_red = response.raw.tell()
+            medicion.codificacion = response.headers.get('Content-Encoding', 'identity')
+            medicion.estado = response.status_code
+            medicion.fases['espera'] = (t_permiso - inicio) * 1000
+            medicion.fases['servidor'] = (t_cabeceras - t_permiso) * 1000
+            medicion.fases['descarga'] = (t_descarga - t_cabeceras) * 1000
+            traza.agregar(estado=medicion.estado, bytes=medicion.bytes, bytes_red=medicion.bytes_red)
+            
+            try:
+                return self._handle_response(response, endpoint)
+            except Exception:
+                medicion.error = f"http_{response.status_code}"
+                raise
+            finally:
+                fin = time.perf_counter()
+                medicion.fases['decodificacion'] = (fin - t_descarga) * 1000
+                medicion.fases['total'] = (fin - inicio) * 1000
+        except LimiteExcedido as e:
+            medicion.error = 'limite'
+            raise requests.exceptions.Timeout(str(e))
+        except requests.exceptions.RequestException as e:
+            medicion.error = type(e).__name__
+            raise
+        finally:
+            medicion.fases.setdefault('total', (time.perf_counter() - inicio) * 1000)
+            self.instrumentacion.registrar(medicion)
+    
+    def _solicitar_flujo(self, grupo, endpoint, url, campo, sobre):
+        """
+        Hace un GET y entrega las filas de la lista 'campo' a medida que llegan
+        
+        El cuerpo se lee por bloques (LectorArreglo), así que la primera fila
+        está disponible sin esperar a que termine la descarga y nunca se
+        guarda el cuerpo completo. El permiso del gobernador se mantiene hasta
+        terminar de leer (o hasta que el consumidor abandone el generador).
+        
+        Args:
+            grupo: 'catalogos', 'reportes' o 'mutaciones'
+            endpoint: Nombre del endpoint para las métricas (clave de ENDPOINTS)
+            url: URL completa
+            campo: Clave de la lista de filas en la respuesta ('data', 'rentals')
+            sobre: dict que recibe el resto de la respuesta (success, summary...)
+        
+        Yields:
+            dict: Cada fila de la lista
+        
+        Raises:
+            requests.exceptions.Timeout: Si no hubo permiso dentro del timeout
+            ValueError: Si el cuerpo no es JSON válido
+        """
+        with span(f"api.{endpoint}", 'servicio', metodo='GET', flujo=True) as traza:
+            medicion = Medicion(endpoint, 'GET')
+            medicion.bytes = 0
+            filas = 0
+            timeout = self.ajustes.timeout(endpoint)
+            inicio = time.perf_counter()
+            try:
+                with self.gobernador.permiso(grupo, timeout=timeout):
+                    t_permiso = time.perf_counter()
+                    with self._pedir('GET', url, timeout, stream=True, headers=self.cabeceras) as response:
+                        t_cabeceras = time.perf_counter()
+                        medicion.estado = response.status_code
+                        medicion.codificacion = response.headers.get('Content-Encoding', 'identity')
+                        medicion.fases['espera'] = (t_permiso - inicio) * 1000
+                        medicion.fases['servidor'] = (t_cabeceras - t_permiso) * 1000
+                        
+                        if not 200 <= response.status_code < 300:
+                            medicion.bytes = len(response.content)
+                            medicion.bytes_red = response.raw.tell()
+                            medicion.error = f"http_{response.status_code}"
+                            self._handle_response(response, endpoint)
+                        
+                        def bloques():
+                            for bloque in response.iter_content(TAMANO_BLOQUE_FLUJO):
+                                medicion.bytes += len(bloque)
+                                yield bloque
+                        
+                        lector = LectorArreglo(campo)
+                        for fila in lector.filas(bloques()):
+                            if not filas:
+                                medicion.fases['primera_fila'] = (time.perf_counter() - inicio) * 1000
+                            filas += 1
+                            yield fila
+                        sobre.update(lector.sobre)
+                        medicion.bytes_red = response.raw.tell()
+                        medicion.fases['descarga'] = (time.perf_counter() - t_cabeceras) * 1000
+            except LimiteExcedido as e:
+                medicion.error = 'limite'
+                raise requests.exceptions.Timeout(str(e))
+            except requests.exceptions.RequestException as e:
+                medicion.error = type(e).__name__
+                raise
+            except ValueError:
+                medicion.error = medicion.error or 'json'
+                raise
+            finally:
+                medicion.fases['total'] = (time.perf_counter() - inicio) * 1000
+                traza.agregar(
+                    estado=medicion.estado, bytes=medicion.bytes, bytes_red=medicion.bytes_red, filas=filas
+                )
+                if self.instrumentacion.activa:
+                    self.instrumentacion.registrar(medicion)
+    
     # ==================== GESTIÓN DE RENTAS ====================
     
     def crear_renta(self, cliente_id, film_id, staff_id):
@@ -74,8 +360,7 @@ class APIService:
             'staff_id': staff_id        # ✅ CORRECTO
         }
         
-        response = requests.post(url, json=data, timeout=self.timeout)
-        return self._handle_response(response)
+        return self._solicitar('POST', 'mutaciones', 'crear_renta', url, json=data)
     
     def devolver_renta(self, renta_id):
         """
@@ -88,8 +373,7 @@ class APIService:
             dict: Datos actualizados de la renta
         """
         url = self._build_url('devolver_renta', id=renta_id)
-        response = requests.put(url, timeout=self.timeout)
-        return self._handle_response(response)
+        return self._solicitar('PUT', 'mutaciones', 'devolver_renta', url)
     
     def cancelar_renta(self, renta_id):
         """
@@ -102,8 +386,47 @@ class APIService:
             dict: Confirmación de cancelación
         """
         url = self._build_url('cancelar_renta', id=renta_id)
-        response = requests.delete(url, timeout=self.timeout)
-        return self._handle_response(response)
+        return self._solicitar('DELETE', 'mutaciones', 'cancelar_renta', url)
+    
+    def obtener_rentas(self, limit=50, offset=0):
+        """
+        Obtiene una página del listado general de rentas (con sus pagos)
+        
+        Args:
+            limit: Número máximo de filas
+            offset: Desplazamiento dentro del listado
+        
+        Returns:
+            dict: Respuesta con {total, count, limit, offset, data}
+        """
+        url = self._build_url('rentas')
+        params = {'limit': limit, 'offset': offset}
+        return self._solicitar('GET', 'reportes', 'rentas', url, params=params)
+    
+    def recorrer_paginas(self, obtener, limite, sobre=None):
+        """
+        Recorre un listado paginado con limit/offset, página por página
+        
+        Args:
+            obtener: Método que recibe limit y offset (p. ej. obtener_dvds)
+            limite: Filas por página
+            sobre: dict que recibe el resto de la primera respuesta (total, ...)
+        
+        Yields:
+            dict: Cada fila del listado
+        """
+        offset = 0
+        while True:
+            pagina = obtener(limit=limite, offset=offset)
+            filas = pagina.get('data', []) if isinstance(pagina, dict) else pagina
+            if sobre is not None and offset == 0 and isinstance(pagina, dict):
+                sobre.update((k, v) for k, v in pagina.items() if k != 'data')
+            yield from filas
+            # Una página incompleta es la última ('total' no sirve de tope: en
+            # /rentals cuenta rentas y las filas son rentas por pago)
+            if len(filas) < limite:
+                return
+            offset += len(filas)
     
     # ==================== REPORTES ====================
     
@@ -118,9 +441,22 @@ class APIService:
             dict: Respuesta con rentas del cliente
         """
         # ✅ CAMBIO CRÍTICO: Usar /reports/customer-rentals en lugar de /rentals/customer
-        url = f"{self.base_url}/reports/customer-rentals/{cliente_id}"
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
+        url = self._build_url('rentas_cliente', id=cliente_id)
+        return self._solicitar('GET', 'reportes', 'rentas_cliente', url)
+    
+    def obtener_rentas_cliente_flujo(self, cliente_id, sobre):
+        """
+        Como obtener_rentas_cliente, pero entrega las filas a medida que llegan
+        
+        Args:
+            cliente_id: ID del cliente
+            sobre: dict que recibe el resto de la respuesta (success, customer, total_rentals)
+        
+        Yields:
+            dict: Cada renta del cliente
+        """
+        url = self._build_url('rentas_cliente', id=cliente_id)
+        return self._solicitar_flujo('reportes', 'rentas_cliente', url, 'rentals', sobre)
     
     def obtener_dvds_no_devueltos(self):
         """
@@ -130,8 +466,20 @@ class APIService:
             dict: Respuesta con rentas activas
         """
         url = self._build_url('no_devueltos')
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
+        return self._solicitar('GET', 'reportes', 'no_devueltos', url)
+    
+    def obtener_dvds_no_devueltos_flujo(self, sobre):
+        """
+        Como obtener_dvds_no_devueltos, pero entrega las filas a medida que llegan
+        
+        Args:
+            sobre: dict que recibe el resto de la respuesta (success, summary)
+        
+        Yields:
+            dict: Cada renta activa
+        """
+        url = self._build_url('no_devueltos')
+        return self._solicitar_flujo('reportes', 'no_devueltos', url, 'data', sobre)
     
     def obtener_dvds_mas_rentados(self, limit=10):
         """
@@ -144,9 +492,8 @@ class APIService:
             dict: Respuesta con DVDs más rentados
         """
         # ✅ AGREGAR parámetro limit
-        url = f"{self.base_url}/reports/most-rented?limit={limit}"
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
+        url = self._build_url('mas_rentados')
+        return self._solicitar('GET', 'reportes', 'mas_rentados', url, params={'limit': limit})
     
     def obtener_ganancias_staff(self, staff_id=None):
         """
@@ -159,38 +506,50 @@ class APIService:
             dict: Respuesta con ganancias del staff
         """
         if staff_id:
-            url = f"{self.base_url}/reports/staff-revenue/{staff_id}"
+            url = self._build_url('ganancias_empleado', id=staff_id)
         else:
-            url = f"{self.base_url}/reports/staff-revenue"
+            url = self._build_url('ganancias_staff')
         
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
+        return self._solicitar('GET', 'reportes', 'ganancias_staff', url)
     
     # ==================== CATÁLOGOS (OPCIONAL) ====================
     
-    def obtener_clientes(self):
+    def obtener_clientes(self, limit=1000, offset=0):
         """
         Obtiene la lista de todos los clientes
+        
+        Args:
+            limit: Número máximo de filas
+            offset: Desplazamiento dentro del catálogo
+        
+        Returns:
+            dict: Respuesta con {total, count, limit, offset, data}
         """
         # ✅ Solicitar límite alto para obtener todos
-        url = f"{self.base_url}/customers?limit=1000"
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
+        url = self._build_url('clientes')
+        params = {'limit': limit, 'offset': offset}
+        return self._solicitar('GET', 'catalogos', 'clientes', url, params=params)
 
-    def obtener_dvds(self):
+    def obtener_dvds(self, limit=1000, offset=0):
         """
         Obtiene la lista de todos los DVDs
+        
+        Args:
+            limit: Número máximo de filas
+            offset: Desplazamiento dentro del catálogo
+        
+        Returns:
+            dict: Respuesta con {total, count, limit, offset, data}
         """
         # ✅ Solicitar límite alto para obtener todos
-        url = f"{self.base_url}/films?limit=1000"
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
+        url = self._build_url('dvds')
+        params = {'limit': limit, 'offset': offset}
+        return self._solicitar('GET', 'catalogos', 'dvds', url, params=params)
 
     def obtener_staff(self):
         """
         Obtiene la lista de todos los empleados
         """
         # ✅ Solicitar límite alto
-        url = f"{self.base_url}/staff?limit=100"
-        response = requests.get(url, timeout=self.timeout)
-        return self._handle_response(response)
\ No newline at end of file
+        url = self._build_url('staff')
+        return self._solicitar('GET', 'catalogos', 'staff', url, params={'limit': 100})
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""
+Reparto de peticiones entre réplicas del API
+
+Las lecturas van a la réplica sana con menos costo esperado entre dos
+tomadas al azar (con más de dos réplicas, así la más lenta no se queda sin
+mediciones nuevas): latencia promedio (EWMA) multiplicada por las peticiones
+que ya tiene en vuelo más una, o solo las peticiones en vuelo con
+BALANCEO_ESTRATEGIA = 'menos_pendientes'. Las mutaciones van siempre a la primaria (la primera
+réplica sana en el orden de API_BACKENDS), así una secuencia crear ->
+devolver no se reparte entre réplicas.
+
+Una réplica queda fuera después de BALANCEO_FALLOS_PARA_EXCLUIR fallos
+seguidos (conexión, timeout o 5xx) y vuelve cuando responde al chequeo de
+salud, que corre en un hilo en segundo plano cada SALUD_INTERVALO_S
+segundos mientras haya más de una réplica; su latencia también alimenta el
+promedio, para que una réplica que mejoró vuelva a recibir lecturas.
+
+El balanceador compartido sigue los ajustes: al recargarlos con otras
+réplicas o parámetros de balanceo se reconfigura sin perder lo medido de
+las réplicas que siguen.
+"""
+import random
+import threading
+import time
+import requests
+from utils.ajustes import obtener_ajustes
+from utils.config import (
+    BALANCEO_ESTRATEGIA, BALANCEO_EWMA_ALFA, BALANCEO_FALLOS_PARA_EXCLUIR, SALUD_INTERVALO_S
+)
+
+# Ajustes que reconfiguran el balanceador compartido al recargarse
+AJUSTES_BALANCEO = (
+    'API_BASE_URL', 'API_BACKENDS', 'BALANCEO_ESTRATEGIA', 'BALANCEO_EWMA_ALFA',
+    'BALANCEO_FALLOS_PARA_EXCLUIR', 'SALUD_INTERVALO_S'
+)
+
+ESTRATEGIAS = ('ewma', 'menos_pendientes')
+
+
+class Backend:
+    """
+    Una réplica del API y lo que se sabe de ella
+    """
+
+    def __init__(self, url):
+        self.url = url.strip().rstrip('/')
+        self.pendientes = 0
+        self.ewma_ms = None
+        self.sano = True
+        self.fallos_consecutivos = 0
+        self.peticiones = 0
+        self.fallos = 0
+
+    def costo(self, estrategia):
+        """
+        Costo esperado de mandarle una petición más (menor es mejor)
+        """
+        if estrategia == 'menos_pendientes':
+            return self.pendientes
+        # Sin mediciones todavía se le da prioridad para conocerla
+        return (self.ewma_ms or 0.0) * (self.pendientes + 1)
+
+    def resumen(self):
+        return {
+            'url': self.url,
+            'sano': self.sano,
+            'pendientes': self.pendientes,
+            'ewma_ms': round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            'peticiones': self.peticiones,
+            'fallos': self.fallos
+        }
+
+
+class Balanceador:
+    def __init__(self, urls, estrategia=BALANCEO_ESTRATEGIA, alfa=BALANCEO_EWMA_ALFA,
+                 fallos_para_excluir=BALANCEO_FALLOS_PARA_EXCLUIR, intervalo_salud=SALUD_INTERVALO_S):
+        """
+        Args:
+            urls: URLs base de las réplicas; la primera es la primaria
+            estrategia: 'ewma' o 'menos_pendientes'
+            alfa: Peso de la última latencia en el promedio (0-1)
+            fallos_para_excluir: Fallos seguidos para sacar una réplica
+            intervalo_salud: Segundos entre chequeos de salud (None = sin chequeo)
+
+        Raises:
+            ValueError: Si no hay réplicas o la estrategia no existe
+        """
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+        self.backends = []
+        self.configurar(urls, estrategia, alfa, fallos_para_excluir, intervalo_salud)
+
+    def configurar(self, urls, estrategia=BALANCEO_ESTRATEGIA, alfa=BALANCEO_EWMA_ALFA,
+                   fallos_para_excluir=BALANCEO_FALLOS_PARA_EXCLUIR, intervalo_salud=SALUD_INTERVALO_S):
+        """
+        Cambia réplicas y parámetros (mismos argumentos que el constructor)
+
+        Las réplicas que ya estaban conservan su estado y sus mediciones.
+        """
+        if not urls:
+            raise ValueError("Se necesita al menos una URL del API")
+        if estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estrategia de balanceo desconocida: {estrategia}")
+        with self._lock:
+            actuales = {backend.url: backend for backend in self.backends}
+            backends = []
+            for url in urls:
+                nuevo = Backend(url)
+                backends.append(actuales.get(nuevo.url, nuevo))
+            self.backends = backends
+            self.estrategia = estrategia
+            self.alfa = alfa
+            self.fallos_para_excluir = fallos_para_excluir
+            self.intervalo_salud = intervalo_salud
+
+    @property
+    def primario(self):
+        return self.backends[0]
+
+    def elegir(self, mutacion=False, excluir=()):
+        """
+        Réplica para la siguiente petición
+
+        Args:
+            mutacion: True para crear/devolver/cancelar (va a la primaria)
+            excluir: Réplicas ya intentadas en esta petición
+
+        Returns:
+            Backend: Réplica elegida, o None si ya se intentaron todas
+        """
+        self._iniciar_salud()
+        with self._lock:
+            candidatos = [backend for backend in self.backends if backend not in excluir]
+            if not candidatos:
+                return None
+            # Si ninguna está sana se intenta igual: el chequeo puede ir atrasado
+            sanos = [backend for backend in candidatos if backend.sano] or candidatos
+            if mutacion:
+                return sanos[0]
+            if len(sanos) > 2:
+                sanos = random.sample(sanos, 2)
+            return min(sanos, key=lambda backend: backend.costo(self.estrategia))
+
+    def iniciar(self, backend):
+        """
+        Anota una petición en vuelo hacia la réplica
+
+        Returns:
+            float: Instante de inicio (para terminar)
+        """
+        with self._lock:
+            backend.pendientes += 1
+            backend.peticiones += 1
+        return time.perf_counter()
+
+    def terminar(self, backend, inicio, fallo=False):
+        """
+        Cierra una petición iniciada con iniciar
+
+        Args:
+            backend: Réplica que la atendió
+            inicio: Valor devuelto por iniciar
+            fallo: True si la réplica no respondió o respondió 5xx
+        """
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            backend.pendientes -= 1
+            if fallo:
+                backend.fallos += 1
+                backend.fallos_consecutivos += 1
+                if backend.fallos_consecutivos >= self.fallos_para_excluir:
+                    backend.sano = False
+                return
+            backend.fallos_consecutivos = 0
+            backend.sano = True
+            self._promediar(backend, duracion_ms)
+
+    def _promediar(self, backend, duracion_ms):
+        if backend.ewma_ms is None:
+            backend.ewma_ms = duracion_ms
+        else:
+            backend.ewma_ms += self.alfa * (duracion_ms - backend.ewma_ms)
+
+    def chequear(self, backend):
+        """
+        Chequeo de salud de una réplica (GET SALUD_RUTA)
+
+        Returns:
+            bool: True si respondió sin error de servidor
+        """
+        ajustes = obtener_ajustes()
+        inicio = time.perf_counter()
+        try:
+            response = requests.get(backend.url + ajustes.SALUD_RUTA, timeout=ajustes.SALUD_TIMEOUT)
+            sana = response.status_code < 500
+        except requests.exceptions.RequestException:
+            sana = False
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            if sana:
+                backend.sano = True
+                backend.fallos_consecutivos = 0
+                self._promediar(backend, duracion_ms)
+            else:
+                backend.fallos_consecutivos += 1
+                if backend.fallos_consecutivos >= self.fallos_para_excluir:
+                    backend.sano = False
+        return sana
+
+    def _iniciar_salud(self):
+        if self._hilo is not None or len(self.backends) < 2 or not self.intervalo_salud:
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._vigilar, name='salud-api', daemon=True)
+                self._hilo.start()
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo_salud or 1):
+            if not self.intervalo_salud:
+                continue
+            for backend in list(self.backends):
+                self.chequear(backend)
+
+    def detener(self):
+        """
+        Termina el hilo de chequeo de salud
+        """
+        self._detener.set()
+
+    def estado(self):
+        """
+        Returns:
+            list: Resumen de cada réplica en el orden configurado
+        """
+        with self._lock:
+            return [backend.resumen() for backend in self.backends]
+
+
+_balanceador = None
+_balanceador_lock = threading.Lock()
+
+
+def obtener_balanceador():
+    """
+    Devuelve el balanceador compartido por todos los APIService
+
+    Returns:
+        Balanceador: Instancia única configurada con API_BACKENDS
+    """
+    global _balanceador
+    with _balanceador_lock:
+        if _balanceador is None:
+            _balanceador = Balanceador(_replicas(obtener_ajustes()))
+            obtener_ajustes().suscribir(AJUSTES_BALANCEO, _reconfigurar)
+        return _balanceador
+
+
+def _replicas(ajustes):
+    return ajustes.API_BACKENDS or [ajustes.API_BASE_URL]
+
+
+def _reconfigurar(ajustes):
+    _balanceador.configurar(
+        _replicas(ajustes), ajustes.BALANCEO_ESTRATEGIA, ajustes.BALANCEO_EWMA_ALFA,
+        ajustes.BALANCEO_FALLOS_PARA_EXCLUIR, ajustes.SALUD_INTERVALO_S
+    )
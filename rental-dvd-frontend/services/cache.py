@@ -0,0 +1,150 @@
+"""
+Caché en memoria con expiración (TTL) y desalojo LRU
+
+Las cachés con nombre son compartidas por todos los controladores, ya que
+cada vista crea sus propias instancias de controlador. Las entradas vencidas
+no se borran al leerlas (solo al reemplazarlas, invalidarlas o desalojarlas),
+así una vista puede mostrar el último valor mientras pide uno nuevo.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_SIN_VALOR = object()
+
+
+class CacheTTL:
+    def __init__(self, ttl, max_elementos=1000):
+        """
+        Args:
+            ttl: Segundos que una entrada se considera fresca
+            max_elementos: Entradas máximas antes de desalojar la menos usada
+        """
+        self.ttl = ttl
+        self.max_elementos = max_elementos
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, defecto=None):
+        """
+        Devuelve el valor fresco de una clave
+
+        Args:
+            clave: Clave buscada
+            defecto: Valor si no existe o ya expiró
+
+        Returns:
+            El valor guardado o el defecto
+        """
+        with self._lock:
+            entrada = self._datos.get(clave, _SIN_VALOR)
+            if entrada is not _SIN_VALOR:
+                valor, expira, _ = entrada
+                if time.monotonic() < expira:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+            self.fallos += 1
+            return defecto
+
+    def obtener_con_edad(self, clave):
+        """
+        Devuelve el valor de una clave aunque ya haya vencido (no cuenta como
+        acierto ni como fallo)
+
+        Returns:
+            tuple: (valor, segundos desde que se guardó), o (None, None) si no existe
+        """
+        with self._lock:
+            entrada = self._datos.get(clave, _SIN_VALOR)
+            if entrada is _SIN_VALOR:
+                return None, None
+            valor, _, guardado = entrada
+            return valor, time.monotonic() - guardado
+
+    def guardar(self, clave, valor):
+        """
+        Guarda un valor con la expiración configurada
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            self._datos[clave] = (valor, ahora + self.ttl, ahora)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_elementos:
+                self._datos.popitem(last=False)
+
+    def actualizar(self, clave, funcion):
+        """
+        Reemplaza el valor de una clave por funcion(valor), sin cambiar su
+        expiración ni su edad (no hace nada si la clave no existe)
+
+        Returns:
+            bool: True si la clave existía
+        """
+        with self._lock:
+            entrada = self._datos.get(clave, _SIN_VALOR)
+            if entrada is _SIN_VALOR:
+                return False
+            valor, expira, guardado = entrada
+            self._datos[clave] = (funcion(valor), expira, guardado)
+            return True
+
+    def invalidar(self, clave=None):
+        """
+        Elimina una clave, o todas si no se indica
+        """
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+
+    @property
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def obtener_cache(nombre, ttl, max_elementos=1000):
+    """
+    Devuelve la caché compartida con ese nombre (creándola si no existe)
+
+    Args:
+        nombre: Identificador de la caché
+        ttl: Segundos de validez de cada entrada
+        max_elementos: Tamaño máximo
+
+    Returns:
+        CacheTTL: Caché compartida
+    """
+    with _caches_lock:
+        cache = _caches.get(nombre)
+        if cache is None:
+            cache = CacheTTL(ttl, max_elementos)
+            _caches[nombre] = cache
+        return cache
+
+
+def invalidar_cache(nombre):
+    """
+    Vacía la caché compartida con ese nombre, si existe
+    """
+    with _caches_lock:
+        cache = _caches.get(nombre)
+    if cache is not None:
+        cache.invalidar()
+
+
+def caches_registradas():
+    """
+    Returns:
+        dict: Nombre -> CacheTTL de todas las cachés compartidas
+    """
+    with _caches_lock:
+        return dict(_caches)
@@ -0,0 +1,50 @@
+"""
+Negociación de compresión de las respuestas del API
+
+urllib3 descomprime el cuerpo por flujo mientras se lee: gzip y deflate
+siempre, br si está instalado brotli (o brotlicffi) y zstd si está instalado
+zstandard. Aquí se arma la cabecera Accept-Encoding con las codificaciones que
+pueden decodificarse en este equipo, en orden de preferencia (con valores q
+para que el servidor elija la mejor que tenga).
+"""
+from urllib3.util.request import ACCEPT_ENCODING
+from utils.config import COMPRESION_RESPUESTAS
+
+# De mejor a peor relación compresión/velocidad para JSON repetitivo
+PREFERENCIA = ('zstd', 'br', 'gzip', 'deflate')
+
+
+def codificaciones_soportadas():
+    """
+    Returns:
+        list: Codificaciones que urllib3 puede descomprimir, en orden de preferencia
+    """
+    disponibles = set(ACCEPT_ENCODING.split(','))
+    return [codificacion for codificacion in PREFERENCIA if codificacion in disponibles]
+
+
+def cabecera_accept_encoding(preferidas=COMPRESION_RESPUESTAS):
+    """
+    Arma el valor de Accept-Encoding
+
+    Args:
+        preferidas: 'auto' (todas las soportadas), el nombre de una o lista
+                    en orden de preferencia; las no soportadas se ignoran
+
+    Returns:
+        str: Valor de la cabecera ('identity' si no queda ninguna)
+    """
+    soportadas = codificaciones_soportadas()
+    if preferidas == 'auto':
+        elegidas = soportadas
+    else:
+        if isinstance(preferidas, str):
+            preferidas = [preferidas]
+        elegidas = [codificacion for codificacion in preferidas if codificacion in soportadas]
+    if not elegidas:
+        return 'identity'
+
+    partes = [elegidas[0]]
+    for posicion, codificacion in enumerate(elegidas[1:], start=1):
+        partes.append(f"{codificacion};q={1 - posicion / 10:.1f}")
+    return ', '.join(partes)
@@ -0,0 +1,222 @@
+"""
+Decodificación de las respuestas JSON del API con el analizador más rápido
+
+orjson, msgspec y ujson son opcionales: con DECODIFICADOR_JSON = 'auto' se usa
+el primero instalado en ese orden y, si no hay ninguno, el módulo json de la
+biblioteca estándar. Todos entregan los mismos dicts y listas.
+
+Con msgspec instalado y DECODIFICACION_TIPADA activa, las respuestas de los
+endpoints de listas (ESQUEMAS_TIPADOS) se decodifican directamente a structs:
+cada fila se valida y se crea sin pasar por un dict intermedio, y los campos
+que node-postgres entrega como texto (NUMERIC, COUNT) llegan ya como números.
+Los structs se leen como un dict (get, in, []), así que los from_dict de los
+modelos y el motor de reportes los aceptan sin cambios.
+"""
+import json
+from typing import Any, Dict, List, Union
+from utils.config import DECODIFICADOR_JSON, DECODIFICACION_TIPADA
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _decodificar_msgspec(contenido):
+    try:
+        return msgspec.json.decode(contenido)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e
+
+
+# Nombre -> función contenido(bytes) -> objeto, en orden de preferencia.
+# Todas lanzan ValueError (o una subclase) si el contenido no es JSON válido.
+ANALIZADORES = {}
+if orjson is not None:
+    ANALIZADORES['orjson'] = orjson.loads
+if msgspec is not None:
+    ANALIZADORES['msgspec'] = _decodificar_msgspec
+if ujson is not None:
+    ANALIZADORES['ujson'] = ujson.loads
+ANALIZADORES['json'] = json.loads
+
+
+ESQUEMAS_TIPADOS = {}
+
+if msgspec is not None:
+    _Sin = msgspec.UnsetType
+    Entero = Union[int, None, _Sin]
+    Numero = Union[float, None, _Sin]
+    Texto = Union[str, None, _Sin]
+
+    class FilaAPI(msgspec.Struct, kw_only=True):
+        """
+        Fila decodificada con la interfaz de lectura de un dict
+
+        Los campos que no vinieron en la respuesta quedan en UNSET y se
+        comportan como claves ausentes.
+        """
+
+        def get(self, clave, defecto=None):
+            valor = getattr(self, clave, msgspec.UNSET)
+            return defecto if valor is msgspec.UNSET else valor
+
+        def __contains__(self, clave):
+            return getattr(self, clave, msgspec.UNSET) is not msgspec.UNSET
+
+        def __getitem__(self, clave):
+            valor = getattr(self, clave, msgspec.UNSET)
+            if valor is msgspec.UNSET:
+                raise KeyError(clave)
+            return valor
+
+    class FilaRenta(FilaAPI):
+        """/reports/unreturned-dvds y /reports/customer-rentals/:id"""
+        rental_id: Entero = msgspec.UNSET
+        rental_date: Texto = msgspec.UNSET
+        return_date: Texto = msgspec.UNSET
+        expected_return_date: Texto = msgspec.UNSET
+        days_rented: Numero = msgspec.UNSET
+        film_id: Entero = msgspec.UNSET
+        title: Texto = msgspec.UNSET
+        rental_rate: Numero = msgspec.UNSET
+        rental_duration: Entero = msgspec.UNSET
+        expected_duration: Entero = msgspec.UNSET
+        category: Texto = msgspec.UNSET
+        customer_id: Entero = msgspec.UNSET
+        customer_name: Texto = msgspec.UNSET
+        email: Texto = msgspec.UNSET
+        staff_id: Entero = msgspec.UNSET
+        staff_name: Texto = msgspec.UNSET
+        staff_email: Texto = msgspec.UNSET
+        status: Texto = msgspec.UNSET
+
+    class FilaCliente(FilaAPI):
+        """/customers"""
+        customer_id: Entero = msgspec.UNSET
+        first_name: Texto = msgspec.UNSET
+        last_name: Texto = msgspec.UNSET
+        email: Texto = msgspec.UNSET
+        active: Any = msgspec.UNSET
+        create_date: Texto = msgspec.UNSET
+        address: Texto = msgspec.UNSET
+        district: Texto = msgspec.UNSET
+        city: Texto = msgspec.UNSET
+        country: Texto = msgspec.UNSET
+        store_id: Entero = msgspec.UNSET
+        total_rentals: Entero = msgspec.UNSET
+        active_rentals: Entero = msgspec.UNSET
+
+    class FilaPelicula(FilaAPI):
+        """/films"""
+        film_id: Entero = msgspec.UNSET
+        title: Texto = msgspec.UNSET
+        description: Texto = msgspec.UNSET
+        release_year: Entero = msgspec.UNSET
+        length: Entero = msgspec.UNSET
+        rating: Texto = msgspec.UNSET
+        rental_rate: Numero = msgspec.UNSET
+        rental_duration: Entero = msgspec.UNSET
+        replacement_cost: Numero = msgspec.UNSET
+        category: Texto = msgspec.UNSET
+        language: Texto = msgspec.UNSET
+        total_copies: Entero = msgspec.UNSET
+        rented_copies: Entero = msgspec.UNSET
+        available_copies: Entero = msgspec.UNSET
+
+    class FilaStaff(FilaAPI):
+        """/staff"""
+        staff_id: Entero = msgspec.UNSET
+        first_name: Texto = msgspec.UNSET
+        last_name: Texto = msgspec.UNSET
+        staff_name: Texto = msgspec.UNSET
+        email: Texto = msgspec.UNSET
+        store_id: Entero = msgspec.UNSET
+        active: Any = msgspec.UNSET
+        username: Texto = msgspec.UNSET
+        address: Texto = msgspec.UNSET
+
+    def _esquema(fila):
+        # Cada respuesta de lista trae una sola lista de filas ('data' o
+        # 'rentals'); el resto del sobre (success, count, summary, customer...)
+        # se decodifica como JSON genérico
+        valor = Union[List[fila], Dict[str, Any], str, int, float, bool, None]
+        return msgspec.json.Decoder(Union[Dict[str, valor], List[fila]], strict=False)
+
+    ESQUEMAS_TIPADOS = {
+        'no_devueltos': _esquema(FilaRenta),
+        'rentas_cliente': _esquema(FilaRenta),
+        'clientes': _esquema(FilaCliente),
+        'dvds': _esquema(FilaPelicula),
+        'staff': _esquema(FilaStaff)
+    }
+
+
+class Decodificador:
+    def __init__(self, analizador=DECODIFICADOR_JSON, tipado=DECODIFICACION_TIPADA):
+        """
+        Args:
+            analizador: 'auto' o un nombre de ANALIZADORES
+            tipado: Decodificar los endpoints de ESQUEMAS_TIPADOS a structs (requiere msgspec)
+
+        Raises:
+            ValueError: Si el analizador pedido no está instalado
+        """
+        if analizador == 'auto':
+            analizador = next(iter(ANALIZADORES))
+        if analizador not in ANALIZADORES:
+            raise ValueError(
+                f"Analizador JSON no disponible: {analizador} "
+                f"(instalados: {', '.join(ANALIZADORES)})"
+            )
+        self.nombre = analizador
+        self._decodificar = ANALIZADORES[analizador]
+        self.esquemas = ESQUEMAS_TIPADOS if tipado else {}
+
+    def decodificar(self, contenido, endpoint=None):
+        """
+        Decodifica el cuerpo de una respuesta
+
+        Args:
+            contenido: Cuerpo de la respuesta (bytes)
+            endpoint: Clave de ENDPOINTS, para elegir el esquema tipado
+
+        Returns:
+            dict | list: Respuesta decodificada
+
+        Raises:
+            ValueError: Si el contenido no es JSON válido
+        """
+        esquema = self.esquemas.get(endpoint)
+        if esquema is not None:
+            try:
+                return esquema.decode(contenido)
+            except msgspec.ValidationError:
+                # El API cambió la forma de las filas: mejor genérico que nada
+                pass
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+        return self._decodificar(contenido)
+
+
+_decodificador = None
+
+
+def obtener_decodificador():
+    """
+    Decodificador compartido por todos los APIService (según utils/config.py)
+    """
+    global _decodificador
+    if _decodificador is None:
+        _decodificador = Decodificador()
+    return _decodificador
@@ -0,0 +1,349 @@
+"""
+Suscripción a los cambios de rentas publicados por el API
+
+Cada caja ve de inmediato las rentas que se crean, devuelven o cancelan en
+las demás. Un hilo en segundo plano escucha GET /events/rentals en flujo
+(Server-Sent Events); si el servidor no lo ofrece pasa a long-poll
+(GET /events/rentals/poll), y con EVENTOS_MODO se puede fijar uno u otro.
+
+Cada evento trae un id creciente que sirve de token de reanudación: al
+reconectarse (con espera creciente entre intentos) se piden solo los
+posteriores al último recibido, así que un corte no pierde cambios. Si el
+servidor ya no los tiene llega un evento 'reinicio' y quien mantenga
+cachés o copias locales debe descartarlas.
+
+Los suscriptores reciben cada evento en el hilo de la suscripción:
+
+    {'id': 57, 'tipo': 'creada' | 'devuelta' | 'cancelada' | 'reinicio',
+     'datos': {...}}
+
+Los datos de 'creada' tienen la forma de una fila de
+/reports/unreturned-dvds; los de 'devuelta' y 'cancelada' traen rental_id,
+customer_id, staff_id y film_id (y la devolución, su pago).
+"""
+import logging
+import random
+import threading
+import requests
+from utils.ajustes import obtener_ajustes
+from services.balanceador import obtener_balanceador
+from services.api_service import obtener_sesion
+from services.decodificador import obtener_decodificador
+
+# Tipos de evento del API -> tipo que reciben los suscriptores
+TIPOS = {
+    'rental.created': 'creada',
+    'rental.returned': 'devuelta',
+    'rental.cancelled': 'cancelada',
+    'reset': 'reinicio'
+}
+
+MODOS = ('auto', 'sse', 'long_poll', 'desactivado')
+
+logger = logging.getLogger(__name__)
+
+# Respuestas de un servidor que no tiene el feed (o no en ese modo)
+ESTADOS_SIN_SOPORTE = (404, 405, 406, 501)
+
+
+class SinSoporte(Exception):
+    """
+    El servidor no publica eventos en el modo intentado
+    """
+
+
+class SuscripcionEventos:
+    def __init__(self, modo=None, balanceador=None, sesion=None):
+        """
+        Args:
+            modo: Uno de MODOS (por defecto EVENTOS_MODO)
+            balanceador: Réplicas del API (por defecto el compartido)
+            sesion: Sesión HTTP (por defecto la compartida)
+        """
+        self.ajustes = obtener_ajustes()
+        self.modo = modo or self.ajustes.EVENTOS_MODO
+        if self.modo not in MODOS:
+            raise ValueError(f"Modo de eventos desconocido: {self.modo} (opciones: {', '.join(MODOS)})")
+        self.balanceador = balanceador or obtener_balanceador()
+        self.sesion = sesion or obtener_sesion()
+        self.decodificador = obtener_decodificador()
+
+        # Token de reanudación: id del último evento recibido
+        self.ultimo_id = None
+        self.modo_activo = None
+        self.conectado = False
+        self.error = None
+        self.recibidos = 0
+        self.reconexiones = 0
+        self.reinicios = 0
+
+        self._suscriptores = []
+        self._lock = threading.Lock()
+        # Cada hilo tiene su propio aviso de detención: uno que quedó
+        # bloqueado en un long-poll termina solo, sin entregar nada, aunque
+        # ya se haya iniciado otro
+        self._detener = None
+        self._hilo = None
+        self._respuesta = None
+        self._espera_servidor = None
+
+    # ==================== SUSCRIPTORES ====================
+
+    def suscribir(self, funcion):
+        """
+        Registra funcion(evento), que se llama con cada evento recibido
+        """
+        with self._lock:
+            if funcion not in self._suscriptores:
+                self._suscriptores.append(funcion)
+
+    def cancelar_suscripcion(self, funcion):
+        with self._lock:
+            if funcion in self._suscriptores:
+                self._suscriptores.remove(funcion)
+
+    def _entregar(self, detener, id_evento, tipo_api, datos):
+        if detener.is_set():
+            return
+        if id_evento is not None:
+            self.ultimo_id = id_evento
+        tipo = TIPOS.get(tipo_api)
+        if tipo is None:
+            # 'ready' solo trae el token inicial; los tipos nuevos se ignoran
+            return
+        if tipo == 'reinicio':
+            self.reinicios += 1
+        self.recibidos += 1
+        evento = {'id': id_evento, 'tipo': tipo, 'datos': datos or {}}
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for funcion in suscriptores:
+            try:
+                funcion(evento)
+            except Exception:
+                logger.exception("Error al entregar el evento %s a %s", id_evento,
+                                 getattr(funcion, '__qualname__', funcion))
+
+    # ==================== CICLO DE VIDA ====================
+
+    @property
+    def activa(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """
+        Empieza a escuchar en segundo plano (no hace nada con el modo 'desactivado')
+        """
+        if self.modo == 'desactivado' or self.activa:
+            return
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(
+            target=self._correr, args=(self._detener,), name='eventos-rentas', daemon=True
+        )
+        self._hilo.start()
+
+    def detener(self, timeout=0.5):
+        """
+        Cierra la conexión y termina el hilo (el token se conserva para reanudar)
+
+        Args:
+            timeout: Segundos que se espera al hilo; uno bloqueado en un
+                     long-poll termina por su cuenta al recibir la respuesta
+        """
+        if self._detener is None:
+            return
+        self._detener.set()
+        respuesta = self._respuesta
+        if respuesta is not None:
+            respuesta.close()
+        self._hilo.join(timeout)
+        self._detener = None
+        self._hilo = None
+        self.conectado = False
+
+    def estado(self):
+        """
+        Returns:
+            dict: Modo en uso, conexión, token y contadores
+        """
+        return {
+            'modo': self.modo_activo or self.modo,
+            'conectado': self.conectado,
+            'ultimo_id': self.ultimo_id,
+            'recibidos': self.recibidos,
+            'reconexiones': self.reconexiones,
+            'reinicios': self.reinicios,
+            'error': self.error
+        }
+
+    def _correr(self, detener):
+        self.modo_activo = 'long_poll' if self.modo == 'long_poll' else 'sse'
+        espera = self.ajustes.EVENTOS_REINTENTO_MIN_S
+        while not detener.is_set():
+            recibidos = self.recibidos
+            try:
+                if self.modo_activo == 'sse':
+                    self._escuchar(detener)
+                else:
+                    self._sondear(detener)
+            except SinSoporte as e:
+                if self.modo == 'auto' and self.modo_activo == 'sse':
+                    self.modo_activo = 'long_poll'
+                    continue
+                self.error = str(e)
+                # No tiene sentido insistir seguido: se revisa de vez en cuando
+                espera = self.ajustes.EVENTOS_REINTENTO_MAX_S
+            except Exception as e:
+                if detener.is_set():
+                    # Al cerrar la respuesta desde otro hilo la lectura falla de cualquier forma
+                    return
+                if not isinstance(e, (requests.exceptions.RequestException, ValueError)):
+                    logger.exception("Error inesperado en la suscripción a eventos")
+                self.error = str(e)
+            if detener.is_set():
+                return
+            self.conectado = False
+            self._respuesta = None
+
+            if self.recibidos != recibidos:
+                espera = self._espera_servidor or self.ajustes.EVENTOS_REINTENTO_MIN_S
+            self.reconexiones += 1
+            # Con variación, para que las cajas no se reconecten todas a la vez
+            detener.wait(espera * random.uniform(0.5, 1.0))
+            espera = min(espera * 2, self.ajustes.EVENTOS_REINTENTO_MAX_S)
+
+    def _conectar(self, endpoint, **kwargs):
+        """
+        Abre la petición al feed en una réplica del API
+
+        Returns:
+            requests.Response: Respuesta con estado 2xx
+
+        Raises:
+            SinSoporte: Si la réplica no publica eventos en ese endpoint
+        """
+        backend = self.balanceador.elegir()
+        url = backend.url + self.ajustes.ENDPOINTS[endpoint]
+        inicio = self.balanceador.iniciar(backend)
+        try:
+            respuesta = self.sesion.get(url, stream=True, **kwargs)
+        except requests.exceptions.RequestException:
+            self.balanceador.terminar(backend, inicio, fallo=True)
+            raise
+        self.balanceador.terminar(backend, inicio, fallo=respuesta.status_code >= 500)
+        if respuesta.status_code in ESTADOS_SIN_SOPORTE:
+            respuesta.close()
+            raise SinSoporte(f"{url} no publica eventos (HTTP {respuesta.status_code})")
+        respuesta.raise_for_status()
+        return respuesta
+
+    # ==================== SSE ====================
+
+    def _escuchar(self, detener):
+        """
+        Lee el flujo text/event-stream hasta que se corte o se detenga la suscripción
+        """
+        cabeceras = {'Accept': 'text/event-stream', 'Cache-Control': 'no-cache'}
+        if self.ultimo_id is not None:
+            cabeceras['Last-Event-ID'] = str(self.ultimo_id)
+        respuesta = self._conectar(
+            'eventos_rentas', headers=cabeceras,
+            timeout=(self.ajustes.REQUEST_TIMEOUT, self.ajustes.EVENTOS_TIMEOUT_LECTURA_S)
+        )
+        self._respuesta = respuesta
+        with respuesta:
+            if detener.is_set():
+                return
+            if not respuesta.headers.get('Content-Type', '').startswith('text/event-stream'):
+                raise SinSoporte(f"{respuesta.url} no responde text/event-stream")
+            self.conectado = True
+            self.error = None
+
+            id_evento, tipo, datos = None, 'message', []
+            for linea in respuesta.iter_lines(chunk_size=None, decode_unicode=True):
+                if detener.is_set():
+                    return
+                if not linea:
+                    # Línea vacía: fin del evento
+                    if datos:
+                        self._entregar(detener, id_evento, tipo, self.decodificador.decodificar('\n'.join(datos)))
+                    elif id_evento is not None and tipo != 'message':
+                        self._entregar(detener, id_evento, tipo, None)
+                    id_evento, tipo, datos = None, 'message', []
+                    continue
+                if linea.startswith(':'):
+                    # Comentario (latido)
+                    continue
+                campo, _, valor = linea.partition(':')
+                if valor.startswith(' '):
+                    valor = valor[1:]
+                if campo == 'data':
+                    datos.append(valor)
+                elif campo == 'event':
+                    tipo = valor
+                elif campo == 'id' and valor.isdigit():
+                    id_evento = int(valor)
+                elif campo == 'retry' and valor.isdigit():
+                    self._espera_servidor = int(valor) / 1000
+
+    # ==================== LONG-POLL ====================
+
+    def _sondear(self, detener):
+        """
+        Pide los eventos nuevos en un ciclo de long-poll hasta que falle o se
+        detenga la suscripción
+        """
+        espera = self.ajustes.EVENTOS_ESPERA_LONG_POLL_S
+        while not detener.is_set():
+            params = {'timeout': espera}
+            if self.ultimo_id is not None:
+                params['after'] = self.ultimo_id
+            respuesta = self._conectar(
+                'eventos_rentas_poll', params=params,
+                timeout=(self.ajustes.REQUEST_TIMEOUT, espera + self.ajustes.REQUEST_TIMEOUT)
+            )
+            self._respuesta = respuesta
+            with respuesta:
+                cuerpo = self.decodificador.decodificar(respuesta.content)
+            if detener.is_set():
+                return
+            self.conectado = True
+            self.error = None
+
+            if cuerpo.get('reset'):
+                self._entregar(detener, cuerpo.get('last_id'), 'reset', {'last_id': cuerpo.get('last_id')})
+                continue
+            for evento in cuerpo.get('data', []):
+                self._entregar(detener, evento.get('id'), evento.get('type'), evento.get('data'))
+            if self.ultimo_id is None:
+                self.ultimo_id = cuerpo.get('last_id')
+
+
+_suscripcion = None
+_suscripcion_lock = threading.Lock()
+
+
+def obtener_suscripcion():
+    """
+    Suscripción compartida a los eventos de rentas (sin iniciar)
+
+    Returns:
+        SuscripcionEventos: Instancia única
+    """
+    global _suscripcion
+    with _suscripcion_lock:
+        if _suscripcion is None:
+            _suscripcion = SuscripcionEventos()
+            obtener_ajustes().suscribir(['EVENTOS_MODO'], _cambiar_modo)
+        return _suscripcion
+
+
+def _cambiar_modo(ajustes):
+    if ajustes.EVENTOS_MODO not in MODOS:
+        raise ValueError(f"Modo de eventos desconocido: {ajustes.EVENTOS_MODO}")
+    activa = _suscripcion.activa
+    _suscripcion.detener()
+    _suscripcion.modo = ajustes.EVENTOS_MODO
+    _suscripcion.modo_activo = None
+    if activa:
+        _suscripcion.iniciar()
@@ -0,0 +1,354 @@
+"""
+Exportación de reportes a archivo por flujo (streaming)
+
+Las filas llegan de un generador construido con los datos del controlador,
+no con las celdas de la tabla, y se escriben por bloques, así que exportar no
+depende de lo que la vista tenga pintado ni carga todo el archivo en memoria.
+
+Cada reporte declara sus columnas con un tipo (entero, decimal, fecha,
+texto); los valores se convierten una sola vez aquí, de modo que un CSV lleva
+números y fechas ISO sin formato de pantalla, y Parquet/Arrow guardan tipos
+nativos. Parquet, Arrow IPC y CSV zstd requieren pyarrow/zstandard; si no
+están instalados esos formatos simplemente no se ofrecen.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from collections import namedtuple
+from utils.config import TAMANO_BLOQUE_EXPORTACION
+from utils.fechas import parsear_fecha
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+Columna = namedtuple('Columna', ['nombre', 'tipo'])
+
+# Extensión -> formato, en el orden en que se ofrecen al usuario
+FORMATOS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.csv.gz': 'csv.gz',
+    '.csv.zst': 'csv.zst',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow'
+}
+
+DESCRIPCION_FORMATOS = {
+    'csv': "CSV (*.csv)",
+    'json': "JSON (*.json)",
+    'csv.gz': "CSV comprimido gzip (*.csv.gz)",
+    'csv.zst': "CSV comprimido zstd (*.csv.zst)",
+    'parquet': "Parquet (*.parquet)",
+    'arrow': "Arrow IPC (*.arrow)"
+}
+
+
+class ExportacionCancelada(Exception):
+    """El usuario canceló la exportación antes de terminar"""
+
+
+def formatos_disponibles():
+    """
+    Formatos que se pueden escribir con las librerías instaladas
+
+    Returns:
+        list: Nombres de formato (claves de DESCRIPCION_FORMATOS)
+    """
+    formatos = ['csv', 'json', 'csv.gz']
+    if zstandard is not None:
+        formatos.append('csv.zst')
+    if pyarrow is not None:
+        formatos += ['parquet', 'arrow']
+    return formatos
+
+
+def formato_de_ruta(ruta):
+    """
+    Deduce el formato por la extensión del archivo (CSV si no se reconoce)
+    """
+    nombre = ruta.lower()
+    for extension in sorted(FORMATOS, key=len, reverse=True):
+        if nombre.endswith(extension):
+            return FORMATOS[extension]
+    return 'csv'
+
+
+def quitar_extension(ruta):
+    """
+    Quita la extensión de exportación reconocida (si la tiene)
+    """
+    nombre = ruta.lower()
+    for extension in sorted(FORMATOS, key=len, reverse=True):
+        if nombre.endswith(extension):
+            return ruta[:-len(extension)]
+    return ruta
+
+
+def _a_entero(valor):
+    if valor is None or valor == '':
+        return None
+    try:
+        return int(valor)
+    except (ValueError, TypeError):
+        return None
+
+
+def _a_decimal(valor):
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, str):
+        valor = valor.replace('$', '').replace(',', '').strip()
+    try:
+        return float(valor)
+    except (ValueError, TypeError):
+        return None
+
+
+def _a_texto(valor):
+    return None if valor is None else str(valor)
+
+
+_CONVERSORES = {
+    'entero': _a_entero,
+    'decimal': _a_decimal,
+    'fecha': parsear_fecha,
+    'texto': _a_texto
+}
+
+
+def _normalizar_columnas(columnas):
+    # Se aceptan también encabezados simples (texto)
+    return [c if isinstance(c, Columna) else Columna(str(c), 'texto') for c in columnas]
+
+
+def _convertir(columnas, filas):
+    conversores = [_CONVERSORES[c.tipo] for c in columnas]
+    for fila in filas:
+        yield [conversor(valor) for conversor, valor in zip(conversores, fila)]
+
+
+def convertir_filas(columnas, filas):
+    """
+    Convierte las filas a los tipos de sus columnas (para escritores propios)
+
+    Args:
+        columnas: Lista de Columna
+        filas: Iterable de listas de valores
+
+    Returns:
+        generator: Filas con valores int/float/datetime/str o None
+    """
+    return _convertir(_normalizar_columnas(columnas), filas)
+
+
+
+def _por_bloques(filas, tamano_bloque, total, progreso, cancelado):
+    """
+    Agrupa las filas en bloques y reporta progreso/cancelación entre bloques
+    """
+    bloque = []
+    escritas = 0
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= tamano_bloque:
+            yield bloque
+            escritas += len(bloque)
+            bloque = []
+            if progreso:
+                progreso(escritas, total or 0)
+            if cancelado and cancelado():
+                raise ExportacionCancelada()
+    if bloque:
+        yield bloque
+
+
+def _abrir_texto(ruta, formato):
+    if formato == 'csv.gz':
+        return gzip.open(ruta, 'wt', newline='', encoding='utf-8')
+    if formato == 'csv.zst':
+        crudo = open(ruta, 'wb')
+        flujo = zstandard.ZstdCompressor().stream_writer(crudo, closefd=True)
+        return io.TextIOWrapper(flujo, newline='', encoding='utf-8')
+    return open(ruta, 'w', newline='', encoding='utf-8')
+
+
+def valor_csv(valor):
+    """
+    Representación de un valor convertido para CSV
+    """
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat(sep=' ')
+    return valor
+
+
+def _escribir_csv(archivo, columnas, bloques):
+    escritas = 0
+    bufer = io.StringIO()
+    writer = csv.writer(bufer)
+    writer.writerow([c.nombre for c in columnas])
+    for bloque in bloques:
+        for fila in bloque:
+            writer.writerow([valor_csv(v) for v in fila])
+        archivo.write(bufer.getvalue())
+        bufer.seek(0)
+        bufer.truncate()
+        escritas += len(bloque)
+    archivo.write(bufer.getvalue())
+    return escritas
+
+
+def valor_json(valor):
+    """
+    Representación de un valor convertido para JSON
+    """
+    return valor.isoformat() if hasattr(valor, 'isoformat') else valor
+
+
+def _escribir_json(archivo, columnas, bloques):
+    # Arreglo de objetos, escrito bloque a bloque
+    nombres = [c.nombre for c in columnas]
+    escritas = 0
+    archivo.write('[')
+    for bloque in bloques:
+        partes = []
+        for fila in bloque:
+            objeto = {nombre: valor_json(v) for nombre, v in zip(nombres, fila)}
+            partes.append(json.dumps(objeto, ensure_ascii=False))
+        archivo.write((',\n' if escritas else '\n') + ',\n'.join(partes))
+        escritas += len(bloque)
+    archivo.write('\n]\n')
+    return escritas
+
+
+def _escribir_texto(archivo, formato, columnas, bloques):
+    if formato == 'json':
+        return _escribir_json(archivo, columnas, bloques)
+    return _escribir_csv(archivo, columnas, bloques)
+
+
+def esquema_arrow(columnas):
+    """
+    Esquema de pyarrow equivalente a las columnas del reporte
+    """
+    tipos = {
+        'entero': pyarrow.int64(),
+        'decimal': pyarrow.float64(),
+        'fecha': pyarrow.timestamp('s'),
+        'texto': pyarrow.string()
+    }
+    return pyarrow.schema([(c.nombre, tipos[c.tipo]) for c in columnas])
+
+
+def _escribir_columnar(ruta, formato, columnas, bloques):
+    esquema = esquema_arrow(columnas)
+    if formato == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(ruta, esquema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_file(ruta, esquema)
+
+    escritas = 0
+    try:
+        for bloque in bloques:
+            # Filas -> columnas para construir el lote
+            datos = [list(valores) for valores in zip(*bloque)]
+            lote = pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(valores, type=campo.type) for valores, campo in zip(datos, esquema)],
+                schema=esquema
+            )
+            writer.write_batch(lote)
+            escritas += len(bloque)
+    finally:
+        writer.close()
+    return escritas
+
+
+def exportar(ruta, columnas, filas, formato=None, total=None, progreso=None,
+             cancelado=None, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Escribe filas tipadas al formato indicado, por bloques
+
+    Se escribe primero a un archivo temporal que reemplaza al destino solo al
+    terminar, para no dejar archivos a medias si falla o se cancela.
+
+    Args:
+        ruta: Archivo de destino ('-' para la salida estándar, solo CSV/JSON)
+        columnas: Lista de Columna (o de nombres, que se tratan como texto)
+        filas: Iterable (idealmente un generador) de listas de valores
+        formato: 'csv', 'json', 'csv.gz', 'csv.zst', 'parquet' o 'arrow'
+                 (por defecto se deduce de la extensión)
+        total: Número de filas esperado, si se conoce (para el progreso)
+        progreso: Callback progreso(escritas, total) tras cada bloque
+        cancelado: Función sin argumentos que devuelve True para abortar
+        tamano_bloque: Filas por bloque escrito
+
+    Returns:
+        int: Número de filas escritas (sin contar encabezados)
+
+    Raises:
+        ExportacionCancelada: Si cancelado() devolvió True
+        ValueError: Si el formato no está disponible
+    """
+    formato = formato or formato_de_ruta(ruta)
+    if formato not in formatos_disponibles():
+        raise ValueError(
+            f"El formato '{formato}' no está disponible "
+            f"(requiere {'pyarrow' if formato in ('parquet', 'arrow') else 'zstandard'})"
+        )
+
+    columnas = _normalizar_columnas(columnas)
+    bloques = _por_bloques(
+        _convertir(columnas, filas), tamano_bloque, total, progreso, cancelado
+    )
+
+    if ruta == '-':
+        if formato not in ('csv', 'json'):
+            raise ValueError("Solo CSV y JSON se pueden escribir a la salida estándar")
+        escritas = _escribir_texto(sys.stdout, formato, columnas, bloques)
+        sys.stdout.flush()
+        if progreso:
+            progreso(escritas, total or escritas)
+        return escritas
+
+    temporal = f"{ruta}.parcial"
+
+    try:
+        if formato in ('parquet', 'arrow'):
+            escritas = _escribir_columnar(temporal, formato, columnas, bloques)
+        else:
+            with _abrir_texto(temporal, formato) as archivo:
+                escritas = _escribir_texto(archivo, formato, columnas, bloques)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+    if progreso:
+        progreso(escritas, total or escritas)
+    return escritas
+
+
+def escribir_csv(ruta, encabezados, filas, total=None, progreso=None,
+                 cancelado=None, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Escribe filas a un CSV sin comprimir (atajo de exportar)
+    """
+    return exportar(
+        ruta, encabezados, filas, formato='csv', total=total, progreso=progreso,
+        cancelado=cancelado, tamano_bloque=tamano_bloque
+    )
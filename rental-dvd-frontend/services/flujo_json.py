@@ -0,0 +1,188 @@
+"""
+Lectura incremental de respuestas JSON
+
+Los reportes grandes llegan como un sobre con una lista de filas
+({"success": true, "summary": {...}, "data": [...]}). LectorArreglo recibe el
+cuerpo por bloques y entrega cada fila de esa lista en cuanto está completa,
+sin esperar al resto del cuerpo ni conservar el texto ya procesado; el resto
+del sobre queda en 'sobre'. Cada valor se decodifica con
+JSONDecoder.raw_decode (el analizador en C de la biblioteca estándar), así
+que el costo por fila es el mismo que el de json.loads.
+"""
+import codecs
+import json
+
+_ESPACIOS = ' \t\n\r'
+_CONTINUA_NUMERO = '.eE+-0123456789'
+
+
+class _Incompleto(Exception):
+    """Faltan bytes para seguir leyendo"""
+
+
+class LectorArreglo:
+    def __init__(self, campo):
+        """
+        Args:
+            campo: Clave del sobre que contiene la lista de filas ('data', 'rentals').
+                   Si el cuerpo es directamente una lista, se leen sus elementos.
+        """
+        self.campo = campo
+        self.sobre = {}
+        self._decodificador = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._texto = ''
+        self._pos = 0
+        self._estado = 'inicio'
+        self._clave = None
+        self._en_objeto = False
+        self._final = False
+
+    def alimentar(self, bloque):
+        """
+        Agrega un bloque del cuerpo
+
+        Args:
+            bloque: bytes recibidos
+
+        Returns:
+            list: Filas que quedaron completas con este bloque
+        """
+        self._texto = self._texto[self._pos:] + self._utf8.decode(bloque)
+        self._pos = 0
+        return list(self._avanzar())
+
+    def terminar(self):
+        """
+        Indica que el cuerpo terminó
+
+        Returns:
+            list: Últimas filas pendientes
+
+        Raises:
+            ValueError: Si el cuerpo no era JSON válido o quedó incompleto
+        """
+        self._final = True
+        self._texto = self._texto[self._pos:] + self._utf8.decode(b'', final=True)
+        self._pos = 0
+        filas = list(self._avanzar())
+        if self._estado != 'fin':
+            raise ValueError("La respuesta JSON terminó antes de tiempo")
+        return filas
+
+    def filas(self, bloques):
+        """
+        Genera las filas de un cuerpo que llega en bloques (iter_content)
+        """
+        for bloque in bloques:
+            yield from self.alimentar(bloque)
+        yield from self.terminar()
+
+    def _caracter(self):
+        """
+        Primer carácter no blanco desde la posición actual
+        """
+        texto = self._texto
+        while self._pos < len(texto) and texto[self._pos] in _ESPACIOS:
+            self._pos += 1
+        if self._pos == len(texto):
+            if self._final and self._estado != 'fin':
+                raise ValueError("La respuesta JSON terminó antes de tiempo")
+            raise _Incompleto()
+        return texto[self._pos]
+
+    def _valor(self):
+        """
+        Decodifica el valor que empieza en la posición actual
+        """
+        self._caracter()
+        try:
+            valor, fin = self._decodificador.raw_decode(self._texto, self._pos)
+        except json.JSONDecodeError:
+            if self._final:
+                raise
+            raise _Incompleto()
+        # Un número cortado por el bloque se lee solo hasta el corte: puede
+        # continuar en el siguiente con más dígitos, o tras el punto decimal
+        # o el exponente ('12.' + '5', '1e' + '3')
+        if not self._final and (fin == len(self._texto) or self._texto[fin] in _CONTINUA_NUMERO):
+            raise _Incompleto()
+        self._pos = fin
+        return valor
+
+    def _esperar(self, caracter):
+        if self._caracter() != caracter:
+            raise ValueError(f"Se esperaba '{caracter}' en la respuesta JSON")
+        self._pos += 1
+
+    def _tras_arreglo(self):
+        return 'separador' if self._en_objeto else 'fin'
+
+    def _avanzar(self):
+        try:
+            while True:
+                estado = self._estado
+                if estado == 'inicio':
+                    caracter = self._caracter()
+                    self._pos += 1
+                    if caracter == '{':
+                        self._en_objeto = True
+                        self._estado = 'clave'
+                    elif caracter == '[':
+                        self._estado = 'primero'
+                    else:
+                        raise ValueError("La respuesta no es un objeto ni una lista JSON")
+                elif estado == 'clave':
+                    if self._caracter() == '}':
+                        self._pos += 1
+                        self._estado = 'fin'
+                        continue
+                    inicio = self._pos
+                    clave = self._valor()
+                    try:
+                        self._esperar(':')
+                    except _Incompleto:
+                        self._pos = inicio
+                        raise
+                    self._clave = clave
+                    self._estado = 'valor'
+                elif estado == 'valor':
+                    if self._clave == self.campo and self._caracter() == '[':
+                        self._pos += 1
+                        self._estado = 'primero'
+                    else:
+                        self.sobre[self._clave] = self._valor()
+                        self._estado = 'separador'
+                elif estado == 'separador':
+                    caracter = self._caracter()
+                    self._pos += 1
+                    if caracter == ',':
+                        self._estado = 'clave'
+                    elif caracter == '}':
+                        self._estado = 'fin'
+                    else:
+                        raise ValueError("Se esperaba ',' o '}' en la respuesta JSON")
+                elif estado == 'primero':
+                    if self._caracter() == ']':
+                        self._pos += 1
+                        self._estado = self._tras_arreglo()
+                    else:
+                        self._estado = 'elemento'
+                elif estado == 'elemento':
+                    yield self._valor()
+                    self._estado = 'siguiente'
+                elif estado == 'siguiente':
+                    caracter = self._caracter()
+                    self._pos += 1
+                    if caracter == ',':
+                        self._estado = 'elemento'
+                    elif caracter == ']':
+                        self._estado = self._tras_arreglo()
+                    else:
+                        raise ValueError("Se esperaba ',' o ']' en la respuesta JSON")
+                else:
+                    # 'fin': lo que quede después del cierre se ignora
+                    self._pos = len(self._texto)
+                    return
+        except _Incompleto:
+            return
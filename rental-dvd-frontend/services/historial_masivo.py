@@ -0,0 +1,252 @@
+"""
+Exportación masiva del historial de rentas de todos los clientes
+
+Recorre los IDs de cliente, consulta /reports/customer-rentals/{id} con un
+pool de hilos acotado y un límite de peticiones por segundo, y escribe todo
+en un solo archivo (CSV o JSON Lines) a medida que llegan las respuestas.
+
+Para poder reanudar, tras escribir cada cliente se añade al archivo de
+checkpoint una línea "customer_id<TAB>bytes_escritos". Al reanudar se
+recorta la salida al último tamaño registrado (descartando un cliente a
+medio escribir) y se omiten los clientes ya completados.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from services.exportador import Columna, convertir_filas, valor_csv, valor_json
+from services.limitador import LimitadorTasa
+
+
+class EstadisticasLote:
+    """
+    Contadores de rendimiento de una exportación masiva
+    """
+
+    def __init__(self, total_clientes=0, omitidos=0):
+        self.total_clientes = total_clientes
+        self.omitidos = omitidos
+        self.clientes = 0
+        self.fallidos = []
+        self.filas = 0
+        self.bytes = 0
+        self.latencias = []
+        self.inicio = time.monotonic()
+        self._lock = threading.Lock()
+
+    def registrar_latencia(self, segundos):
+        with self._lock:
+            self.latencias.append(segundos)
+
+    @property
+    def transcurrido(self):
+        return time.monotonic() - self.inicio
+
+    def resumen(self):
+        """
+        Returns:
+            dict: Totales, tasas (clientes/s, filas/s, MB/s) y latencias p50/p95
+        """
+        segundos = max(self.transcurrido, 1e-9)
+        latencias = sorted(self.latencias)
+
+        def percentil(p):
+            if not latencias:
+                return 0.0
+            return latencias[min(len(latencias) - 1, int(p * len(latencias)))]
+
+        return {
+            'clientes': self.clientes,
+            'omitidos': self.omitidos,
+            'fallidos': len(self.fallidos),
+            'pendientes': self.total_clientes - self.omitidos - self.clientes - len(self.fallidos),
+            'filas': self.filas,
+            'bytes': self.bytes,
+            'segundos': round(segundos, 2),
+            'clientes_por_segundo': round(self.clientes / segundos, 2),
+            'filas_por_segundo': round(self.filas / segundos, 2),
+            'mb_por_segundo': round(self.bytes / segundos / (1024 * 1024), 3),
+            'latencia_p50_ms': round(percentil(0.50) * 1000, 1),
+            'latencia_p95_ms': round(percentil(0.95) * 1000, 1)
+        }
+
+
+def _leer_checkpoint(ruta):
+    """
+    Returns:
+        tuple: (set de IDs completados, bytes de salida válidos)
+    """
+    completados = set()
+    tamano = 0
+    if not ruta or not os.path.exists(ruta):
+        return completados, tamano
+
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            partes = linea.rstrip('\n').split('\t')
+            if len(partes) != 2:
+                # Línea incompleta por una interrupción: se ignora
+                continue
+            try:
+                completados.add(int(partes[0]))
+                tamano = max(tamano, int(partes[1]))
+            except ValueError:
+                continue
+    return completados, tamano
+
+
+class HistorialMasivo:
+    def __init__(self, controller, ruta_salida, ruta_checkpoint=None,
+                 concurrencia=8, peticiones_por_segundo=20):
+        """
+        Args:
+            controller: ReportesController usado para consultar cada cliente
+            ruta_salida: Archivo destino (.csv o .jsonl)
+            ruta_checkpoint: Archivo de checkpoint (por defecto salida + '.checkpoint')
+            concurrencia: Consultas simultáneas
+            peticiones_por_segundo: Límite de peticiones al backend (0 = sin límite)
+        """
+        self.controller = controller
+        self.ruta_salida = ruta_salida
+        self.ruta_checkpoint = ruta_checkpoint or f"{ruta_salida}.checkpoint"
+        self.concurrencia = max(1, concurrencia)
+        self.limitador = LimitadorTasa(peticiones_por_segundo)
+        self.formato = 'jsonl' if ruta_salida.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+        columnas, _ = controller.datos_exportacion_rentas_cliente([])
+        self.columnas = [Columna("ID Cliente", 'entero')] + columnas
+        self.estadisticas = None
+        self._detener = threading.Event()
+
+    def detener(self):
+        """
+        Pide terminar tras los clientes en curso (el checkpoint queda consistente)
+        """
+        self._detener.set()
+
+    def _consultar(self, customer_id):
+        self.limitador.adquirir()
+        inicio = time.monotonic()
+        exito, resultado = self.controller.obtener_rentas_cliente(customer_id)
+        self.estadisticas.registrar_latencia(time.monotonic() - inicio)
+        return exito, resultado
+
+    def _serializar(self, customer_id, rentas):
+        """
+        Convierte las rentas de un cliente al texto que se añade a la salida
+
+        Returns:
+            tuple: (texto, numero_filas)
+        """
+        _, filas = self.controller.datos_exportacion_rentas_cliente(rentas)
+        filas = convertir_filas(self.columnas, ([customer_id] + fila for fila in filas))
+
+        bufer = io.StringIO()
+        numero = 0
+        if self.formato == 'jsonl':
+            nombres = [c.nombre for c in self.columnas]
+            for fila in filas:
+                objeto = {nombre: valor_json(v) for nombre, v in zip(nombres, fila)}
+                bufer.write(json.dumps(objeto, ensure_ascii=False) + '\n')
+                numero += 1
+        else:
+            writer = csv.writer(bufer)
+            for fila in filas:
+                writer.writerow([valor_csv(v) for v in fila])
+                numero += 1
+        return bufer.getvalue(), numero
+
+    def _abrir_salida(self, tamano_valido):
+        """
+        Abre la salida para añadir, recortando lo escrito después del último checkpoint
+        """
+        if tamano_valido and os.path.exists(self.ruta_salida):
+            salida = open(self.ruta_salida, 'r+b')
+            salida.truncate(tamano_valido)
+            salida.seek(tamano_valido)
+            return salida
+
+        salida = open(self.ruta_salida, 'wb')
+        if self.formato == 'csv':
+            bufer = io.StringIO()
+            csv.writer(bufer).writerow([c.nombre for c in self.columnas])
+            salida.write(bufer.getvalue().encode('utf-8'))
+        # Un checkpoint de una corrida anterior ya no corresponde a este archivo
+        open(self.ruta_checkpoint, 'w').close()
+        return salida
+
+    def ejecutar(self, customer_ids, progreso=None, total=None):
+        """
+        Exporta el historial de los clientes indicados
+
+        Args:
+            customer_ids: IDs de cliente (lista, o iterable que se consume a
+                          medida que se lanzan las consultas)
+            progreso: Callback progreso(estadisticas) tras cada cliente escrito
+            total: Número de clientes, si customer_ids no es una lista
+
+        Returns:
+            EstadisticasLote: Estadísticas finales
+        """
+        completados, tamano_valido = _leer_checkpoint(self.ruta_checkpoint)
+        if not os.path.exists(self.ruta_salida):
+            completados, tamano_valido = set(), 0
+
+        self.estadisticas = EstadisticasLote(
+            total_clientes=total if total is not None else len(customer_ids)
+        )
+        self._detener.clear()
+
+        def pendientes_ids():
+            for customer_id in customer_ids:
+                if customer_id in completados:
+                    self.estadisticas.omitidos += 1
+                else:
+                    yield customer_id
+
+        with self._abrir_salida(tamano_valido) as salida, \
+                open(self.ruta_checkpoint, 'a', encoding='utf-8') as checkpoint, \
+                ThreadPoolExecutor(max_workers=self.concurrencia) as pool:
+            ids = pendientes_ids()
+            en_curso = {}
+
+            def lanzar():
+                if self._detener.is_set():
+                    return
+                for customer_id in ids:
+                    en_curso[pool.submit(self._consultar, customer_id)] = customer_id
+                    return
+
+            # Ventana acotada: como máximo el doble de consultas que hilos
+            for _ in range(self.concurrencia * 2):
+                lanzar()
+
+            while en_curso:
+                listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    customer_id = en_curso.pop(futuro)
+                    lanzar()
+
+                    exito, resultado = futuro.result()
+                    if not exito:
+                        # No entra al checkpoint: se reintenta al reanudar
+                        self.estadisticas.fallidos.append((customer_id, resultado))
+                        continue
+
+                    texto, numero = self._serializar(customer_id, resultado)
+                    datos = texto.encode('utf-8')
+                    salida.write(datos)
+                    salida.flush()
+                    checkpoint.write(f"{customer_id}\t{salida.tell()}\n")
+                    checkpoint.flush()
+
+                    self.estadisticas.clientes += 1
+                    self.estadisticas.filas += numero
+                    self.estadisticas.bytes += len(datos)
+                    if progreso:
+                        progreso(self.estadisticas)
+
+        return self.estadisticas
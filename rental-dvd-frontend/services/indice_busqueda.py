@@ -0,0 +1,225 @@
+"""
+Índice de búsqueda incremental para clientes y películas
+
+Combina un índice de prefijos (tokens ordenados, búsqueda binaria) con un
+índice de trigramas para tolerar errores de escritura. Se construye una vez
+con el catálogo y responde cada pulsación sin recorrer todos los elementos.
+
+El orden por relevancia se prepara al construir: los tokens y los textos
+completos se agrupan por la longitud del texto, así que recorriendo los
+grupos de menor a mayor las coincidencias salen ya ordenadas y una búsqueda
+solo toca los primeros 'limite' resultados.
+"""
+import bisect
+import heapq
+import unicodedata
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+
+def normalizar(texto):
+    """
+    Pasa a minúsculas y elimina acentos
+
+    Args:
+        texto: Texto a normalizar
+
+    Returns:
+        str: Texto normalizado
+    """
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _tokens(texto):
+    limpio = ''.join(c if c.isalnum() else ' ' for c in texto)
+    return limpio.split()
+
+
+def _trigramas(texto):
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceBusqueda:
+    # Listas de trigramas más largas que esto no se puntúan (trigramas tan
+    # comunes casi no distinguen), y entradas que se puntúan como máximo
+    MAX_POSTINGS_TRIGRAMA = 3000
+    MAX_ENTRADAS_TRIGRAMAS = 5000
+    # Coincidencias de prefijo descartadas por las otras palabras de la
+    # consulta que se revisan como máximo: una consulta de varias palabras
+    # poco selectiva ('a b') devuelve lo que encuentre dentro del tope
+    MAX_DESCARTES_PREFIJO = 300
+
+    def __init__(self):
+        self.etiquetas = {}
+        self._textos = {}
+        self._tokens_clave = {}
+        # Índice de prefijos: lista ordenada de (token, clave)
+        self._tokens = []
+        # Texto completo -> claves, y (longitud, lista ordenada) de textos y
+        # de tokens por longitud del texto, de menor a mayor
+        self._exactos = defaultdict(list)
+        self._textos_por_longitud = []
+        self._tokens_por_longitud = []
+        self._trigramas = defaultdict(list)
+
+    def __len__(self):
+        return len(self.etiquetas)
+
+    def construir(self, elementos):
+        """
+        Construye el índice desde cero
+
+        Args:
+            elementos: Iterable de (clave, etiqueta, textos) donde textos son
+                       los campos a indexar (nombre, email, título...)
+        """
+        self.etiquetas.clear()
+        self._textos.clear()
+        self._tokens_clave.clear()
+        self._exactos.clear()
+        self._trigramas.clear()
+        tokens = []
+        textos_por_longitud = defaultdict(list)
+        tokens_por_longitud = defaultdict(list)
+
+        for clave, etiqueta, textos in elementos:
+            texto = normalizar(' '.join(t for t in textos if t))
+            self.etiquetas[clave] = etiqueta
+            self._textos[clave] = texto
+            tokens_clave = set(_tokens(texto))
+            # ' tok1 tok2 ...' permite comprobar prefijos de palabra con una
+            # sola búsqueda de subcadena
+            self._tokens_clave[clave] = ' ' + ' '.join(tokens_clave)
+            self._exactos[texto].append(clave)
+            textos_por_longitud[len(texto)].append((texto, clave))
+            for token in tokens_clave:
+                tokens.append((token, clave))
+                tokens_por_longitud[len(texto)].append((token, clave))
+            for trigrama in _trigramas(texto):
+                self._trigramas[trigrama].append(clave)
+
+        tokens.sort(key=lambda par: par[0])
+        self._tokens = tokens
+        self._textos_por_longitud = [
+            (longitud, sorted(pares, key=lambda par: par[0]))
+            for longitud, pares in sorted(textos_por_longitud.items())
+        ]
+        self._tokens_por_longitud = [
+            (longitud, sorted(pares, key=lambda par: par[0]))
+            for longitud, pares in sorted(tokens_por_longitud.items())
+        ]
+
+    def _tamano_rango(self, prefijo):
+        inicio = bisect.bisect_left(self._tokens, (prefijo,))
+        fin = bisect.bisect_left(self._tokens, (prefijo + '\uffff',))
+        return fin - inicio
+
+    def _por_prefijo(self, grupos, prefijo, limite, resultado, otras=()):
+        """
+        Agrega a resultado, de texto más corto a más largo, las claves con
+        una entrada de los grupos que empieza con el prefijo (y con las otras
+        palabras de la consulta como prefijos de alguno de sus tokens)
+
+        Args:
+            grupos: Lista de (longitud del texto, lista ordenada de (texto o token, clave))
+        """
+        vistos = set(resultado)
+        descartes = 0
+        for longitud, pares in grupos:
+            if longitud < len(prefijo):
+                continue
+            i = bisect.bisect_left(pares, (prefijo,))
+            while i < len(pares) and pares[i][0].startswith(prefijo):
+                clave = pares[i][1]
+                i += 1
+                if clave in vistos:
+                    continue
+                vistos.add(clave)
+                if otras and not all(p in self._tokens_clave[clave] for p in otras):
+                    descartes += 1
+                    if descartes > self.MAX_DESCARTES_PREFIJO:
+                        return
+                    continue
+                resultado.append(clave)
+                if len(resultado) >= limite:
+                    return
+
+    def _por_trigramas(self, consulta, limite, excluir):
+        """
+        Claves más parecidas a la consulta según trigramas compartidos
+        """
+        trigramas = _trigramas(consulta)
+        listas = sorted(
+            (self._trigramas[t] for t in trigramas if t in self._trigramas),
+            key=len
+        )
+        coincidencias = Counter()
+        usadas = 0
+        entradas = 0
+        for postings in listas:
+            # De la más rara a la más común, con un tope de entradas puntuadas
+            if len(postings) > self.MAX_POSTINGS_TRIGRAMA or entradas + len(postings) > self.MAX_ENTRADAS_TRIGRAMAS:
+                break
+            usadas += 1
+            entradas += len(postings)
+            coincidencias.update(postings)
+
+        # Por trigramas compartidos y, a igual cuenta, del texto más corto al
+        # más largo; solo se ordenan los niveles de cuenta que hacen falta.
+        # Un solo trigrama en común no indica parecido.
+        minimo = max(2, usadas // 3)
+        if usadas < minimo:
+            return []
+        por_cuenta = sorted(coincidencias.items(), key=itemgetter(1), reverse=True)
+        resultado = []
+        i = 0
+        while i < len(por_cuenta) and len(resultado) < limite:
+            cuenta = por_cuenta[i][1]
+            if cuenta < minimo:
+                break
+            nivel = []
+            while i < len(por_cuenta) and por_cuenta[i][1] == cuenta:
+                if por_cuenta[i][0] not in excluir:
+                    nivel.append(por_cuenta[i][0])
+                i += 1
+            resultado += heapq.nsmallest(limite - len(resultado), nivel, key=lambda clave: len(self._textos[clave]))
+        return resultado
+
+    def buscar(self, consulta, limite=20):
+        """
+        Busca elementos que coincidan con la consulta, ordenados por relevancia
+
+        Primero los que son exactamente la consulta, luego los que empiezan
+        con ella, después los que tienen todas las palabras como prefijos de
+        sus tokens (cada grupo del texto más corto al más largo) y al final
+        los parecidos por trigramas (errores de escritura).
+
+        Args:
+            consulta: Texto escrito por el usuario
+            limite: Número máximo de resultados
+
+        Returns:
+            list: Claves de los elementos encontrados
+        """
+        consulta = normalizar(consulta).strip()
+        if not consulta:
+            return []
+
+        palabras = _tokens(consulta)
+        if not palabras:
+            return []
+
+        resultado = self._exactos.get(consulta, [])[:limite]
+        if len(resultado) < limite:
+            self._por_prefijo(self._textos_por_longitud, consulta, limite, resultado)
+        if len(resultado) < limite:
+            # Recorrer el rango de la palabra más selectiva y filtrar por las demás
+            principal = min(palabras, key=self._tamano_rango)
+            otras = [' ' + p for p in palabras if p is not principal]
+            self._por_prefijo(self._tokens_por_longitud, principal, limite, resultado, otras)
+
+        if len(resultado) < limite and len(consulta) >= 3:
+            resultado += self._por_trigramas(consulta, limite - len(resultado), set(resultado))
+        return resultado
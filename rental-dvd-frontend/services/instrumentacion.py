@@ -0,0 +1,416 @@
+"""
+Métricas de latencia y volumen de las llamadas al API
+
+Cada llamada de APIService registra, por endpoint, la duración de sus fases,
+los bytes recibidos (ya descomprimidos y tal como viajaron por la red, junto
+con la codificación negociada), el código de estado y los errores. Las mediciones van a
+uno o más sumideros:
+
+- memoria: histogramas acumulados consultables desde la aplicación
+- log: una línea por petición en el logger 'api'
+- prometheus: archivo de texto en formato de exposición de Prometheus
+
+Fases medidas (requests no separa la conexión del tiempo de servidor, así
+que 'servidor' incluye establecer la conexión cuando no se reutiliza):
+    espera          permiso del gobernador de peticiones
+    servidor        desde enviar la petición hasta recibir las cabeceras
+    descarga        lectura del cuerpo
+    decodificacion  JSON -> objetos de Python
+    primera_fila    (solo lecturas en flujo) desde pedir permiso hasta la primera fila
+    total           todo lo anterior
+
+En las lecturas en flujo la decodificación ocurre mientras se descarga, así
+que 'descarga' la incluye (y también el tiempo que el consumidor tarda con
+cada fila).
+"""
+import atexit
+import bisect
+import logging
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+from utils.config import (
+    INSTRUMENTACION_SUMIDEROS,
+    INSTRUMENTACION_ARCHIVO_PROMETHEUS,
+    INSTRUMENTACION_RESUMEN_AL_SALIR
+)
+
+FASES = ('espera', 'servidor', 'descarga', 'decodificacion', 'primera_fila', 'total')
+
+# Límites superiores de las cubetas de los histogramas (milisegundos)
+CUBETAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+logger = logging.getLogger('api')
+
+
+class Histograma:
+    """
+    Histograma de cubetas fijas (acumulable y barato de actualizar)
+    """
+
+    def __init__(self, cubetas=CUBETAS_MS):
+        self.cubetas = cubetas
+        self.conteos = [0] * (len(cubetas) + 1)
+        self.cantidad = 0
+        self.suma = 0.0
+        self.minimo = None
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.conteos[bisect.bisect_left(self.cubetas, valor)] += 1
+        self.cantidad += 1
+        self.suma += valor
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    @property
+    def promedio(self):
+        return self.suma / self.cantidad if self.cantidad else 0.0
+
+    def percentil(self, p):
+        """
+        Estimación del percentil p (0-1): interpolación lineal dentro de su
+        cubeta, con los extremos acotados por el mínimo y el máximo observados
+        """
+        if not self.cantidad:
+            return 0.0
+        objetivo = p * self.cantidad
+        acumulado = 0
+        for i, conteo in enumerate(self.conteos):
+            if conteo and acumulado + conteo >= objetivo:
+                inferior = max(self.cubetas[i - 1] if i else 0.0, self.minimo)
+                superior = min(self.cubetas[i], self.maximo) if i < len(self.cubetas) else self.maximo
+                return inferior + (superior - inferior) * (objetivo - acumulado) / conteo
+            acumulado += conteo
+        return self.maximo
+
+
+class MetricasEndpoint:
+    def __init__(self):
+        self.fases = {fase: Histograma() for fase in FASES}
+        self.bytes = Histograma(cubetas=(1024, 10240, 102400, 1048576, 10485760))
+        self.bytes_red = Histograma(cubetas=(1024, 10240, 102400, 1048576, 10485760))
+        self.codificaciones = Counter()
+        self.estados = Counter()
+        self.errores = Counter()
+        self.llamadas = 0
+
+
+class Medicion:
+    """
+    Resultado de una llamada: fases (ms), bytes, estado y error
+
+    'bytes' es el cuerpo descomprimido; 'bytes_red' lo leído del socket
+    (comprimido si el servidor aceptó alguna codificación).
+    """
+    __slots__ = ('endpoint', 'metodo', 'fases', 'bytes', 'bytes_red', 'codificacion', 'estado', 'error')
+
+    def __init__(self, endpoint, metodo):
+        self.endpoint = endpoint
+        self.metodo = metodo
+        self.fases = {}
+        self.bytes = 0
+        self.bytes_red = 0
+        self.codificacion = None
+        self.estado = None
+        self.error = None
+
+
+# Errores que indican un backend caído o saturado (no un error de negocio)
+ERRORES_BACKEND = ('ConnectionError', 'ConnectTimeout', 'ReadTimeout', 'Timeout')
+
+# Fallos de backend consecutivos a partir de los cuales se considera caído
+FALLOS_BACKEND_CAIDO = 3
+
+
+def _es_fallo_backend(medicion):
+    if medicion.error in ERRORES_BACKEND:
+        return True
+    return medicion.estado is not None and medicion.estado >= 500
+
+
+class SumideroMemoria:
+    """
+    Acumula histogramas por endpoint, la última medición y los fallos
+    consecutivos del backend
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.ultima = None
+        self.fallos_consecutivos = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, medicion):
+        with self._lock:
+            self.ultima = medicion
+            if _es_fallo_backend(medicion):
+                self.fallos_consecutivos += 1
+            elif medicion.error != 'limite':
+                self.fallos_consecutivos = 0
+            metricas = self.endpoints.get(medicion.endpoint)
+            if metricas is None:
+                metricas = self.endpoints[medicion.endpoint] = MetricasEndpoint()
+            metricas.llamadas += 1
+            for fase, ms in medicion.fases.items():
+                metricas.fases[fase].observar(ms)
+            if medicion.bytes:
+                metricas.bytes.observar(medicion.bytes)
+                metricas.bytes_red.observar(medicion.bytes_red or medicion.bytes)
+            if medicion.codificacion:
+                metricas.codificaciones[medicion.codificacion] += 1
+            if medicion.estado is not None:
+                metricas.estados[medicion.estado] += 1
+            if medicion.error:
+                metricas.errores[medicion.error] += 1
+
+    def resumen(self):
+        """
+        Returns:
+            dict: endpoint -> llamadas, errores, estados, bytes (descomprimidos y
+                  en la red, con la fracción ahorrada), codificaciones y
+                  p50/p95/max de cada fase
+        """
+        with self._lock:
+            resumen = {}
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                ahorro = 1 - metricas.bytes_red.suma / metricas.bytes.suma if metricas.bytes.suma else 0.0
+                resumen[endpoint] = {
+                    'llamadas': metricas.llamadas,
+                    'errores': dict(metricas.errores),
+                    'estados': dict(metricas.estados),
+                    'bytes_promedio': round(metricas.bytes.promedio),
+                    'bytes_red_promedio': round(metricas.bytes_red.promedio),
+                    'ahorro_compresion': round(ahorro, 3),
+                    'codificaciones': dict(metricas.codificaciones),
+                    'fases_ms': {
+                        fase: {
+                            'p50': round(histograma.percentil(0.50), 1),
+                            'p95': round(histograma.percentil(0.95), 1),
+                            'promedio': round(histograma.promedio, 1),
+                            'max': round(histograma.maximo, 1)
+                        }
+                        for fase, histograma in metricas.fases.items() if histograma.cantidad
+                    }
+                }
+            return resumen
+
+    def texto_prometheus(self):
+        """
+        Returns:
+            str: Métricas en formato de exposición de Prometheus
+        """
+        lineas = [
+            '# HELP dvd_api_fase_ms Duración de cada fase de las llamadas al API',
+            '# TYPE dvd_api_fase_ms histogram'
+        ]
+        with self._lock:
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                for fase, histograma in metricas.fases.items():
+                    etiquetas = f'endpoint="{endpoint}",fase="{fase}"'
+                    acumulado = 0
+                    for limite, conteo in zip(histograma.cubetas, histograma.conteos):
+                        acumulado += conteo
+                        lineas.append(f'dvd_api_fase_ms_bucket{{{etiquetas},le="{limite}"}} {acumulado}')
+                    lineas.append(f'dvd_api_fase_ms_bucket{{{etiquetas},le="+Inf"}} {histograma.cantidad}')
+                    lineas.append(f'dvd_api_fase_ms_sum{{{etiquetas}}} {histograma.suma:.3f}')
+                    lineas.append(f'dvd_api_fase_ms_count{{{etiquetas}}} {histograma.cantidad}')
+
+            lineas.append('# TYPE dvd_api_respuestas_total counter')
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                for estado, conteo in sorted(metricas.estados.items()):
+                    lineas.append(f'dvd_api_respuestas_total{{endpoint="{endpoint}",estado="{estado}"}} {conteo}')
+
+            lineas.append('# TYPE dvd_api_errores_total counter')
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                for error, conteo in sorted(metricas.errores.items()):
+                    lineas.append(f'dvd_api_errores_total{{endpoint="{endpoint}",error="{error}"}} {conteo}')
+
+            lineas.append('# TYPE dvd_api_bytes_recibidos_total counter')
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                lineas.append(f'dvd_api_bytes_recibidos_total{{endpoint="{endpoint}"}} {metricas.bytes.suma:.0f}')
+
+            lineas.append('# TYPE dvd_api_bytes_red_total counter')
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                lineas.append(f'dvd_api_bytes_red_total{{endpoint="{endpoint}"}} {metricas.bytes_red.suma:.0f}')
+
+            lineas.append('# TYPE dvd_api_codificacion_total counter')
+            for endpoint, metricas in sorted(self.endpoints.items()):
+                for codificacion, conteo in sorted(metricas.codificaciones.items()):
+                    lineas.append(
+                        f'dvd_api_codificacion_total{{endpoint="{endpoint}",codificacion="{codificacion}"}} {conteo}'
+                    )
+        return '\n'.join(lineas) + '\n'
+
+
+class SumideroLog:
+    """
+    Escribe una línea por petición en el logger 'api'
+    """
+
+    def registrar(self, medicion):
+        fases = ' '.join(f"{fase}={ms:.1f}ms" for fase, ms in medicion.fases.items())
+        logger.info(
+            "%s %s estado=%s bytes=%d red=%d(%s) %s%s",
+            medicion.metodo, medicion.endpoint, medicion.estado, medicion.bytes,
+            medicion.bytes_red, medicion.codificacion or '-', fases,
+            f" error={medicion.error}" if medicion.error else ""
+        )
+
+
+class SumideroPrometheus:
+    """
+    Vuelca los histogramas de memoria a un archivo de texto de Prometheus
+
+    El archivo se reescribe de forma atómica cada 'cada' registros y al
+    salir, para que lo lea el textfile collector de node_exporter.
+    """
+
+    def __init__(self, memoria, ruta, cada=100):
+        self.memoria = memoria
+        self.ruta = ruta
+        self.cada = cada
+        self._pendientes = 0
+        # Las peticiones llegan de varios hilos: un volcado a la vez
+        self._lock = threading.Lock()
+
+    def registrar(self, medicion):
+        with self._lock:
+            self._pendientes += 1
+            if self._pendientes < self.cada:
+                return
+            self._volcar()
+
+    def volcar(self):
+        with self._lock:
+            self._volcar()
+
+    def _volcar(self):
+        self._pendientes = 0
+        # Temporal propio de este volcado: otra instancia de la aplicación
+        # puede estar escribiendo el mismo archivo
+        with tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=os.path.dirname(os.path.abspath(self.ruta)),
+            prefix=os.path.basename(self.ruta) + '.', suffix='.tmp', delete=False
+        ) as archivo:
+            archivo.write(self.memoria.texto_prometheus())
+        try:
+            os.replace(archivo.name, self.ruta)
+        except OSError:
+            os.unlink(archivo.name)
+            raise
+
+
+class Instrumentacion:
+    """
+    Reparte las mediciones entre los sumideros configurados
+    """
+
+    def __init__(self, sumideros=('memoria',), archivo_prometheus=None):
+        self.activa = bool(sumideros)
+        self.memoria = SumideroMemoria()
+        self.sumideros = []
+        if 'memoria' in sumideros or 'prometheus' in sumideros:
+            self.sumideros.append(self.memoria)
+        if 'log' in sumideros:
+            self.sumideros.append(SumideroLog())
+        self.filas_renderizadas = 0
+        self.prometheus = None
+        if 'prometheus' in sumideros and archivo_prometheus:
+            self.prometheus = SumideroPrometheus(self.memoria, archivo_prometheus)
+            self.sumideros.append(self.prometheus)
+
+    def contar_filas(self, cantidad):
+        """
+        Suma filas dibujadas en las tablas de las vistas
+        """
+        self.filas_renderizadas += cantidad
+
+    def estado_backend(self):
+        """
+        Estado del backend según las últimas llamadas
+
+        Returns:
+            str: 'sin datos', 'disponible', 'degradado' o 'caído'
+        """
+        if self.memoria.ultima is None:
+            return 'sin datos'
+        fallos = self.memoria.fallos_consecutivos
+        if fallos >= FALLOS_BACKEND_CAIDO:
+            return 'caído'
+        return 'degradado' if fallos else 'disponible'
+
+    def agregar_sumidero(self, sumidero):
+        """
+        Añade un sumidero propio (cualquier objeto con registrar(medicion))
+        """
+        self.sumideros.append(sumidero)
+        self.activa = True
+
+    def registrar(self, medicion):
+        for sumidero in self.sumideros:
+            try:
+                sumidero.registrar(medicion)
+            except Exception as e:
+                # Las métricas nunca deben romper una llamada al API
+                logger.warning("Sumidero de métricas falló: %s", e)
+
+    def resumen_texto(self):
+        """
+        Returns:
+            str: Tabla legible con p50/p95 de la fase total por endpoint
+        """
+        resumen = self.memoria.resumen()
+        if not resumen:
+            return "Sin llamadas al API registradas"
+        lineas = [
+            f"{'Endpoint':<20}{'Llamadas':>9}{'Errores':>8}{'p50 ms':>9}{'p95 ms':>9}{'Máx ms':>10}"
+            f"{'Bytes':>10}{'Red':>10}{'Ahorro':>8}"
+        ]
+        for endpoint, datos in resumen.items():
+            total = datos['fases_ms'].get('total', {})
+            lineas.append(
+                f"{endpoint:<20}{datos['llamadas']:>9}{sum(datos['errores'].values()):>8}"
+                f"{total.get('p50', 0):>9}{total.get('p95', 0):>9}{total.get('max', 0):>10}"
+                f"{datos['bytes_promedio']:>10}{datos['bytes_red_promedio']:>10}"
+                f"{datos['ahorro_compresion']:>8.0%}"
+            )
+        return '\n'.join(lineas)
+
+    def al_salir(self):
+        """
+        Escribe el resumen y el último volcado de Prometheus
+        """
+        if self.prometheus:
+            try:
+                self.prometheus.volcar()
+            except OSError as e:
+                logger.warning("No se pudo escribir %s: %s", self.prometheus.ruta, e)
+        if self.memoria.endpoints:
+            print(f"\nLatencias del API\n{self.resumen_texto()}", file=sys.stderr)
+
+
+_instrumentacion = None
+_instrumentacion_lock = threading.Lock()
+
+
+def obtener_instrumentacion():
+    """
+    Devuelve la instrumentación compartida por todos los APIService
+
+    Returns:
+        Instrumentacion: Instancia única configurada según utils/config.py
+    """
+    global _instrumentacion
+    with _instrumentacion_lock:
+        if _instrumentacion is None:
+            _instrumentacion = Instrumentacion(
+                INSTRUMENTACION_SUMIDEROS, INSTRUMENTACION_ARCHIVO_PROMETHEUS
+            )
+            if INSTRUMENTACION_RESUMEN_AL_SALIR:
+                atexit.register(_instrumentacion.al_salir)
+        return _instrumentacion
@@ -0,0 +1,195 @@
+"""
+Control de la tasa de peticiones al backend
+"""
+import threading
+import time
+from contextlib import contextmanager
+from utils.ajustes import obtener_ajustes
+
+
+class LimitadorTasa:
+    """
+    Cubeta de fichas (token bucket) segura entre hilos
+
+    Se rellena a 'tasa' fichas por segundo hasta 'capacidad'; cada petición
+    consume una ficha y espera si no hay.
+    """
+
+    def __init__(self, tasa, capacidad=None):
+        """
+        Args:
+            tasa: Fichas por segundo (None o 0 = sin límite)
+            capacidad: Ráfaga máxima (por defecto, una ficha por segundo de tasa)
+        """
+        self.tasa = tasa
+        self.capacidad = capacidad or max(1, int(tasa or 1))
+        self._fichas = float(self.capacidad)
+        self._ultima = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _rellenar(self, ahora):
+        self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultima) * self.tasa)
+        self._ultima = ahora
+
+    def adquirir(self, timeout=None):
+        """
+        Consume una ficha, esperando a que haya una disponible
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            bool: True si se obtuvo la ficha, False si venció el timeout
+        """
+        if not self.tasa:
+            return True
+
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._rellenar(ahora)
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return True
+                espera = (1 - self._fichas) / self.tasa
+
+            if limite is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                espera = min(espera, restante)
+            time.sleep(espera)
+
+
+class LimiteExcedido(Exception):
+    """No se obtuvo permiso para una petición dentro del tiempo de espera"""
+
+
+class GobernadorPeticiones:
+    """
+    Limita tasa (fichas por segundo) y peticiones en vuelo, global y por grupo
+
+    Cada petición pide permiso a su grupo y al límite global. Con límites
+    por grupo cuya suma no llegue al global, un trabajo masivo de reportes
+    no puede ocupar los espacios que necesitan las mutaciones del mostrador.
+    """
+
+    def __init__(self, limites):
+        """
+        Args:
+            limites: dict grupo -> {'tasa': fichas/s, 'en_vuelo': máximo simultáneo};
+                     la clave 'global' aplica a todas las peticiones
+        """
+        self._lock = threading.Lock()
+        self._tasas = {}
+        self._semaforos = {}
+        self._maximos = {}
+        self._limites = {}
+        self.en_vuelo = {}
+        self.aplicar(limites)
+
+    def configurar(self, grupo, tasa=None, en_vuelo=None):
+        """
+        Cambia los límites de un grupo (afecta a las peticiones nuevas)
+        """
+        with self._lock:
+            self._tasas[grupo] = LimitadorTasa(tasa) if tasa else None
+            self._semaforos[grupo] = threading.BoundedSemaphore(en_vuelo) if en_vuelo else None
+            self._maximos[grupo] = en_vuelo
+            self._limites[grupo] = (tasa, en_vuelo)
+            self.en_vuelo.setdefault(grupo, 0)
+
+    def aplicar(self, limites):
+        """
+        Configura los grupos cuyos límites cambiaron (los demás conservan sus fichas)
+
+        Args:
+            limites: dict grupo -> {'tasa', 'en_vuelo'}, como LIMITES_PETICIONES
+        """
+        for grupo, limite in limites.items():
+            tasa, en_vuelo = limite.get('tasa'), limite.get('en_vuelo')
+            if self._limites.get(grupo) != (tasa, en_vuelo):
+                self.configurar(grupo, tasa, en_vuelo)
+
+    def _adquirir(self, grupo, limite):
+        restante = None if limite is None else max(0.0, limite - time.monotonic())
+        semaforo = self._semaforos.get(grupo)
+        if semaforo is not None:
+            if not semaforo.acquire(timeout=restante):
+                raise LimiteExcedido(f"Demasiadas peticiones simultáneas ({grupo})")
+
+        tasa = self._tasas.get(grupo)
+        if tasa is not None:
+            restante = None if limite is None else max(0.0, limite - time.monotonic())
+            if not tasa.adquirir(timeout=restante):
+                if semaforo is not None:
+                    semaforo.release()
+                raise LimiteExcedido(f"Límite de peticiones por segundo alcanzado ({grupo})")
+
+        with self._lock:
+            self.en_vuelo[grupo] = self.en_vuelo.get(grupo, 0) + 1
+        return semaforo
+
+    def _liberar(self, grupo, semaforo):
+        with self._lock:
+            self.en_vuelo[grupo] -= 1
+        if semaforo is not None:
+            semaforo.release()
+
+    @contextmanager
+    def permiso(self, grupo, timeout=None):
+        """
+        Bloque con permiso para hacer una petición del grupo
+
+        Args:
+            grupo: 'catalogos', 'reportes', 'mutaciones'...
+            timeout: Segundos máximos de espera por el permiso
+
+        Raises:
+            LimiteExcedido: Si no se obtuvo el permiso a tiempo
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        # Primero el grupo, así una petición en espera no ocupa un espacio global
+        semaforo_grupo = self._adquirir(grupo, limite)
+        try:
+            semaforo_global = self._adquirir('global', limite)
+        except LimiteExcedido:
+            self._liberar(grupo, semaforo_grupo)
+            raise
+        try:
+            yield
+        finally:
+            self._liberar('global', semaforo_global)
+            self._liberar(grupo, semaforo_grupo)
+
+    def estado(self):
+        """
+        Returns:
+            dict: grupo -> (en_vuelo, máximo o None)
+        """
+        with self._lock:
+            return {grupo: (self.en_vuelo.get(grupo, 0), self._maximos.get(grupo))
+                    for grupo in self._maximos}
+
+
+_gobernador = None
+_gobernador_lock = threading.Lock()
+
+
+def obtener_gobernador():
+    """
+    Devuelve el gobernador compartido por todos los APIService
+
+    Sigue a LIMITES_PETICIONES cuando se recargan los ajustes.
+
+    Returns:
+        GobernadorPeticiones: Instancia única configurada con LIMITES_PETICIONES
+    """
+    global _gobernador
+    with _gobernador_lock:
+        if _gobernador is None:
+            ajustes = obtener_ajustes()
+            _gobernador = GobernadorPeticiones(ajustes.LIMITES_PETICIONES)
+            ajustes.suscribir(['LIMITES_PETICIONES'], lambda a: _gobernador.aplicar(a.LIMITES_PETICIONES))
+        return _gobernador
@@ -0,0 +1,490 @@
+"""
+Motor de reportes local
+
+Calcula los reportes de DVDs más rentados y de ganancias por staff a partir
+de una copia local de las rentas y pagos, usando agregación por hash. Los
+resultados tienen la misma forma que las filas que devuelven los endpoints
+/reports/most-rented y /reports/staff-revenue, así que el controlador puede
+procesarlos igual que las respuestas del servidor.
+
+Además mantiene agregados incrementales (ver services/agregados.py) para que
+los reportes sin periodo se actualicen en proporción a los cambios.
+"""
+from datetime import datetime, date
+from services.agregados import AgregadosRentas
+from utils.fechas import parsear_fecha
+
+
+def _limite_periodo(valor, fin=False):
+    """
+    Normaliza un límite de periodo (desde/hasta)
+
+    Un 'hasta' dado solo como fecha incluye el día completo.
+    """
+    if valor is None or valor == '':
+        return None
+    es_solo_fecha = isinstance(valor, date) and not isinstance(valor, datetime)
+    if isinstance(valor, str) and len(valor.strip()) == 10:
+        es_solo_fecha = True
+    fecha = parsear_fecha(valor)
+    if fecha is None:
+        raise ValueError(f"Fecha inválida: {valor}")
+    if fin and es_solo_fecha:
+        fecha = fecha.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return fecha
+
+
+def _a_float(valor):
+    try:
+        return float(valor) if valor is not None else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class _RegistroRenta:
+    """
+    Renta tal como la guarda el motor: IDs, fechas parseadas y sus pagos
+    """
+    __slots__ = ('rental_id', 'film_id', 'customer_id', 'staff_id',
+                 'rental_date', 'return_date', 'pagos')
+
+    def __init__(self, rental_id, film_id, customer_id, staff_id,
+                 rental_date, return_date):
+        self.rental_id = rental_id
+        self.film_id = film_id
+        self.customer_id = customer_id
+        self.staff_id = staff_id
+        self.rental_date = rental_date
+        self.return_date = return_date
+        # payment_id -> (monto, fecha_pago)
+        self.pagos = {}
+
+
+class MotorReportes:
+    def __init__(self):
+        self.rentas = {}
+        self.peliculas = {}
+        self.staff = {}
+        self.agregados = AgregadosRentas()
+        self.ultima_sincronizacion = None
+
+    @property
+    def tiene_datos(self):
+        return bool(self.rentas)
+
+    # ==================== CARGA DE DATOS ====================
+
+    def limpiar(self):
+        """
+        Descarta todos los datos locales
+        """
+        self.rentas.clear()
+        self.peliculas.clear()
+        self.staff.clear()
+        self.agregados.limpiar()
+        self.ultima_sincronizacion = None
+
+    def reemplazar(self, otro):
+        """
+        Toma los datos de otro motor ya cargado, conservando esta instancia
+        (la comparte toda la aplicación)
+
+        Args:
+            otro: MotorReportes con los datos nuevos
+        """
+        self.rentas = otro.rentas
+        self.peliculas = otro.peliculas
+        self.staff = otro.staff
+        self.agregados = otro.agregados
+        self.ultima_sincronizacion = otro.ultima_sincronizacion
+
+    def cargar_peliculas(self, peliculas):
+        """
+        Carga el catálogo de películas (necesario para categoría y rating)
+
+        Args:
+            peliculas: Lista de diccionarios (o filas tipadas) de /films o de objetos DVD
+        """
+        for pelicula in peliculas:
+            if hasattr(pelicula, 'get'):
+                film_id = pelicula.get('film_id') or pelicula.get('id')
+                datos = {
+                    'film_id': film_id,
+                    'title': pelicula.get('title', ''),
+                    'rental_rate': pelicula.get('rental_rate'),
+                    'release_year': pelicula.get('release_year'),
+                    'rating': pelicula.get('rating'),
+                    'category': pelicula.get('category')
+                }
+            else:
+                film_id = pelicula.id
+                datos = {
+                    'film_id': film_id,
+                    'title': pelicula.title,
+                    'rental_rate': pelicula.rental_rate,
+                    'release_year': pelicula.release_year,
+                    'rating': pelicula.rating,
+                    'category': pelicula.category
+                }
+            if film_id is not None:
+                self.peliculas[film_id] = datos
+
+    def cargar_staff(self, staff):
+        """
+        Carga el catálogo de empleados (para incluir staff sin ventas)
+
+        Args:
+            staff: Lista de diccionarios (o filas tipadas) de /staff o de objetos Staff
+        """
+        for empleado in staff:
+            if hasattr(empleado, 'get'):
+                staff_id = empleado.get('staff_id') or empleado.get('id')
+                first_name = empleado.get('first_name', '')
+                last_name = empleado.get('last_name', '')
+                datos = {
+                    'staff_id': staff_id,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'staff_name': empleado.get('staff_name') or f"{first_name} {last_name}".strip(),
+                    'email': empleado.get('email', ''),
+                    'store_id': empleado.get('store_id')
+                }
+            else:
+                staff_id = empleado.id
+                datos = {
+                    'staff_id': staff_id,
+                    'first_name': empleado.first_name,
+                    'last_name': empleado.last_name,
+                    'staff_name': empleado.nombre,
+                    'email': empleado.email,
+                    'store_id': empleado.store_id
+                }
+            if staff_id is not None:
+                self.staff[staff_id] = datos
+
+    def cargar_filas(self, filas):
+        """
+        Incorpora filas con la forma de GET /rentals
+
+        Cada fila es una renta unida (LEFT JOIN) con uno de sus pagos, así que
+        una renta puede aparecer varias veces. Las filas repetidas se fusionan
+        por rental_id y payment_id.
+
+        Args:
+            filas: Iterable de diccionarios de /rentals
+
+        Returns:
+            int: Número de filas procesadas
+        """
+        procesadas = 0
+        for fila in filas:
+            rental_id = fila.get('rental_id')
+            if rental_id is None:
+                continue
+            procesadas += 1
+
+            payment_id = fila.get('payment_id')
+            return_date = parsear_fecha(fila.get('return_date'))
+            registro = self.rentas.get(rental_id)
+            if registro is None:
+                registro = _RegistroRenta(
+                    rental_id,
+                    fila.get('film_id'),
+                    fila.get('customer_id'),
+                    fila.get('staff_id'),
+                    parsear_fecha(fila.get('rental_date')),
+                    return_date
+                )
+                self.rentas[rental_id] = registro
+                self._agregar_pago(registro, payment_id, fila)
+                self.agregados.agregar(registro)
+            elif ((return_date and registro.return_date != return_date)
+                  or (payment_id is not None and payment_id not in registro.pagos)):
+                # Delta sobre una renta conocida: reemplazar su contribución
+                self.agregados.quitar(registro)
+                if return_date:
+                    registro.return_date = return_date
+                self._agregar_pago(registro, payment_id, fila)
+                self.agregados.agregar(registro)
+
+            # Completar catálogos mínimos con lo que trae la fila
+            film_id = fila.get('film_id')
+            if film_id is not None and film_id not in self.peliculas:
+                self.peliculas[film_id] = {
+                    'film_id': film_id,
+                    'title': fila.get('title', ''),
+                    'rental_rate': fila.get('rental_rate'),
+                    'release_year': None,
+                    'rating': None,
+                    'category': None
+                }
+            staff_id = fila.get('staff_id')
+            if staff_id is not None and staff_id not in self.staff:
+                staff_name = fila.get('staff_name') or ''
+                partes = staff_name.split(' ', 1)
+                self.staff[staff_id] = {
+                    'staff_id': staff_id,
+                    'first_name': partes[0] if partes else '',
+                    'last_name': partes[1] if len(partes) > 1 else '',
+                    'staff_name': staff_name,
+                    'email': '',
+                    'store_id': None
+                }
+
+        self.ultima_sincronizacion = datetime.now()
+        return procesadas
+
+    def _agregar_pago(self, registro, payment_id, fila):
+        if payment_id is None:
+            return
+        monto = _a_float(fila.get('payment_amount', fila.get('amount')))
+        fecha_pago = parsear_fecha(fila.get('payment_date')) or registro.rental_date
+        registro.pagos[payment_id] = (monto, fecha_pago)
+
+    # ==================== EVENTOS DE RENTAS ====================
+
+    def aplicar_creacion(self, datos):
+        """
+        Registra una renta recién creada (respuesta de POST /rentals)
+
+        Args:
+            datos: Campo 'data' de la respuesta
+
+        Returns:
+            bool: True si la renta se incorporó
+        """
+        rental_id = datos.get('rental_id')
+        if rental_id is None or rental_id in self.rentas:
+            return False
+
+        cliente = datos.get('customer') or {}
+        staff = datos.get('staff') or {}
+        registro = _RegistroRenta(
+            rental_id,
+            datos.get('film_id'),
+            datos.get('customer_id', cliente.get('customer_id')),
+            datos.get('staff_id', staff.get('staff_id')),
+            parsear_fecha(datos.get('rental_date')) or datetime.now(),
+            None
+        )
+        self.rentas[rental_id] = registro
+        if registro.film_id is not None and registro.film_id not in self.peliculas:
+            self.peliculas[registro.film_id] = {
+                'film_id': registro.film_id,
+                'title': datos.get('film_title', ''),
+                'rental_rate': datos.get('rental_rate'),
+                'release_year': None,
+                'rating': None,
+                'category': None
+            }
+        self.agregados.agregar(registro)
+        return True
+
+    def aplicar_devolucion(self, datos):
+        """
+        Registra una devolución y su pago (respuesta de PUT /rentals/:id/return)
+
+        Args:
+            datos: Campo 'data' de la respuesta
+
+        Returns:
+            bool: True si la renta era conocida y se actualizó
+        """
+        registro = self.rentas.get(datos.get('rental_id'))
+        if registro is None:
+            return False
+
+        self.agregados.quitar(registro)
+        registro.return_date = parsear_fecha(datos.get('return_date')) or datetime.now()
+        payment_id = datos.get('payment_id')
+        if payment_id is not None:
+            registro.pagos[payment_id] = (_a_float(datos.get('total_amount')), registro.return_date)
+        self.agregados.agregar(registro)
+        return True
+
+    def aplicar_cancelacion(self, datos):
+        """
+        Elimina una renta cancelada (respuesta de DELETE /rentals/:id)
+
+        Args:
+            datos: Campo 'data' de la respuesta
+
+        Returns:
+            bool: True si la renta era conocida y se eliminó
+        """
+        registro = self.rentas.pop(datos.get('rental_id'), None)
+        if registro is None:
+            return False
+        self.agregados.quitar(registro)
+        return True
+
+    # ==================== REPORTES ====================
+
+    def top_peliculas(self, n=10, categoria=None, rating=None, desde=None, hasta=None):
+        """
+        Calcula el ranking de películas más rentadas
+
+        Replica la semántica de /reports/most-rented: cada renta cuenta una
+        vez por cada pago asociado (o una vez si no tiene pagos).
+
+        Args:
+            n: Número de resultados (None para todas)
+            categoria: Filtrar por nombre de categoría (sin distinguir mayúsculas)
+            rating: Filtrar por clasificación (G, PG, R, ...)
+            desde: Fecha inicial del periodo (por fecha de renta)
+            hasta: Fecha final del periodo (por fecha de renta)
+
+        Returns:
+            list: Diccionarios con la forma de las filas del servidor.
+                  Sin periodo se usan los agregados y last_rental_date es None.
+        """
+        inicio = _limite_periodo(desde)
+        fin = _limite_periodo(hasta, fin=True)
+        categoria = categoria.lower() if categoria else None
+
+        # film_id -> [total, completadas, activas, ingresos, ultima_renta]
+        acumulados = {}
+        if inicio is None and fin is None:
+            # Sin periodo: leer los agregados incrementales (O(películas))
+            for film_id, (total, completadas, activas, ingresos) in self.agregados.por_pelicula.items():
+                if total > 0:
+                    acumulados[film_id] = [total, completadas, activas, ingresos, None]
+        registros = self.rentas.values() if (inicio or fin) else ()
+        for registro in registros:
+            fecha = registro.rental_date
+            if inicio and (fecha is None or fecha < inicio):
+                continue
+            if fin and (fecha is None or fecha > fin):
+                continue
+
+            filas = len(registro.pagos) or 1
+            acumulado = acumulados.get(registro.film_id)
+            if acumulado is None:
+                acumulado = [0, 0, 0, 0.0, None]
+                acumulados[registro.film_id] = acumulado
+            acumulado[0] += filas
+            if registro.return_date:
+                acumulado[1] += filas
+            else:
+                acumulado[2] += filas
+            for monto, _ in registro.pagos.values():
+                acumulado[3] += monto
+            if fecha and (acumulado[4] is None or fecha > acumulado[4]):
+                acumulado[4] = fecha
+
+        resultado = []
+        for film_id, (total, completadas, activas, ingresos, ultima) in acumulados.items():
+            pelicula = self.peliculas.get(film_id, {})
+            if categoria and (pelicula.get('category') or '').lower() != categoria:
+                continue
+            if rating and pelicula.get('rating') != rating:
+                continue
+            resultado.append({
+                'film_id': film_id,
+                'title': pelicula.get('title', ''),
+                'rental_rate': pelicula.get('rental_rate'),
+                'release_year': pelicula.get('release_year'),
+                'rating': pelicula.get('rating'),
+                'category': pelicula.get('category'),
+                'total_rentals': total,
+                'completed_rentals': completadas,
+                'active_rentals': activas,
+                'total_revenue': round(ingresos, 2),
+                'last_rental_date': ultima.isoformat() if ultima else None
+            })
+
+        resultado.sort(key=lambda f: (-f['total_rentals'], -f['total_revenue'], f['film_id']))
+        return resultado if n is None else resultado[:n]
+
+    def ganancias_staff(self, desde=None, hasta=None, staff_id=None):
+        """
+        Calcula las ganancias por miembro del staff en un periodo arbitrario
+
+        Replica /reports/staff-revenue. El periodo se aplica a la fecha de
+        pago; si las filas sincronizadas no la traen se usa la fecha de renta.
+
+        Args:
+            desde: Fecha inicial del periodo (opcional)
+            hasta: Fecha final del periodo (opcional)
+            staff_id: Limitar a un empleado (opcional)
+
+        Returns:
+            list: Diccionarios con la forma de las filas del servidor.
+                  Sin periodo se usan los agregados y las fechas de pago son None.
+        """
+        inicio = _limite_periodo(desde)
+        fin = _limite_periodo(hasta, fin=True)
+
+        # staff_id -> [rentas, pagos, ingresos, primer_pago, ultimo_pago]
+        acumulados = {sid: [0, 0, 0.0, None, None] for sid in self.staff}
+        if inicio is None and fin is None:
+            # Sin periodo: leer los agregados incrementales (O(staff))
+            for sid, (rentas, pagos, ingresos) in self.agregados.por_staff.items():
+                acumulados[sid] = [rentas, pagos, ingresos, None, None]
+        registros = self.rentas.values() if (inicio or fin) else ()
+        for registro in registros:
+            if staff_id is not None and registro.staff_id != staff_id:
+                continue
+            acumulado = acumulados.get(registro.staff_id)
+            if acumulado is None:
+                acumulado = [0, 0, 0.0, None, None]
+                acumulados[registro.staff_id] = acumulado
+
+            pagos_periodo = 0
+            for monto, fecha_pago in registro.pagos.values():
+                if inicio and fecha_pago and fecha_pago < inicio:
+                    continue
+                if fin and fecha_pago and fecha_pago > fin:
+                    continue
+                pagos_periodo += 1
+                acumulado[1] += 1
+                acumulado[2] += monto
+                if fecha_pago:
+                    if acumulado[3] is None or fecha_pago < acumulado[3]:
+                        acumulado[3] = fecha_pago
+                    if acumulado[4] is None or fecha_pago > acumulado[4]:
+                        acumulado[4] = fecha_pago
+
+            # Igual que el servidor: una renta sin pagos cuenta siempre,
+            # una con pagos solo si alguno cae dentro del periodo
+            if pagos_periodo or not registro.pagos:
+                acumulado[0] += 1
+
+        resultado = []
+        for sid, (rentas, pagos, ingresos, primero, ultimo) in acumulados.items():
+            if staff_id is not None and sid != staff_id:
+                continue
+            empleado = self.staff.get(sid, {})
+            resultado.append({
+                'staff_id': sid,
+                'first_name': empleado.get('first_name', ''),
+                'last_name': empleado.get('last_name', ''),
+                'staff_name': empleado.get('staff_name', ''),
+                'email': empleado.get('email', ''),
+                'store_id': empleado.get('store_id'),
+                'total_rentals': rentas,
+                'total_payments': pagos,
+                'total_revenue': round(ingresos, 2),
+                'average_payment': round(ingresos / pagos, 2) if pagos else 0.0,
+                'first_payment_date': primero.isoformat() if primero else None,
+                'last_payment_date': ultimo.isoformat() if ultimo else None
+            })
+
+        resultado.sort(key=lambda s: (-s['total_revenue'], s['staff_id']))
+        return resultado
+
+
+_motor = None
+
+
+def obtener_motor():
+    """
+    Devuelve el motor de reportes compartido por toda la aplicación
+
+    Returns:
+        MotorReportes: Instancia única del motor
+    """
+    global _motor
+    if _motor is None:
+        _motor = MotorReportes()
+    return _motor
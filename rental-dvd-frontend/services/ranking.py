@@ -0,0 +1,238 @@
+"""
+Ranking de DVDs más rentados con K ajustable
+
+Mantiene los conteos por película y un heap acotado con los K mejores según
+el filtro actual (categoría y rating). Cambiar K o el filtro no requiere una
+nueva petición al servidor, y los cambios de conteo se aplican en O(log K)
+cuando no hacen bajar a una película que ya está en el top: el heap guarda la
+posición de cada película para moverla en su lugar sin reconstruirlo.
+"""
+import heapq
+from collections import namedtuple
+
+EntradaRanking = namedtuple(
+    'EntradaRanking',
+    ['film_id', 'titulo', 'genero', 'rating', 'total_rentas', 'total_revenue']
+)
+
+
+def _a_int(valor):
+    try:
+        return int(valor)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _a_float(valor):
+    try:
+        return float(valor)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class RankingTopK:
+    def __init__(self, k=10):
+        self._k = max(1, int(k))
+        self._categoria = None
+        self._rating = None
+
+        # film_id -> EntradaRanking con los conteos más recientes
+        self.entradas = {}
+
+        # Heap mínimo de (clave, entrada) con las K mejores del filtro actual,
+        # y film_id -> posición en el heap
+        self._heap = []
+        self._posiciones = {}
+        self._sucio = True
+
+    # ==================== CONFIGURACIÓN ====================
+
+    @property
+    def k(self):
+        return self._k
+
+    @k.setter
+    def k(self, valor):
+        valor = max(1, int(valor))
+        if valor != self._k:
+            self._k = valor
+            self._sucio = True
+
+    def filtrar(self, categoria=None, rating=None):
+        """
+        Cambia el filtro del ranking
+
+        Args:
+            categoria: Nombre de categoría o None para todas
+            rating: Clasificación o None para todas
+        """
+        if categoria != self._categoria or rating != self._rating:
+            self._categoria = categoria
+            self._rating = rating
+            self._sucio = True
+
+    def categorias(self):
+        """
+        Returns:
+            list: Categorías presentes en los datos, ordenadas
+        """
+        return sorted({e.genero for e in self.entradas.values() if e.genero})
+
+    def ratings(self):
+        """
+        Returns:
+            list: Clasificaciones presentes en los datos, ordenadas
+        """
+        return sorted({e.rating for e in self.entradas.values() if e.rating})
+
+    # ==================== DATOS ====================
+
+    def cargar(self, filas):
+        """
+        Reemplaza los conteos con filas del reporte de más rentados
+
+        Args:
+            filas: Diccionarios procesados por ReportesController
+                   (titulo, genero, rating, total_rentas, film_id, total_revenue)
+        """
+        self.entradas.clear()
+        for fila in filas:
+            film_id = fila.get('film_id')
+            if film_id is None:
+                continue
+            self.entradas[film_id] = EntradaRanking(
+                film_id,
+                fila.get('titulo', fila.get('title', 'N/A')),
+                fila.get('genero', fila.get('category')) or 'N/A',
+                fila.get('rating'),
+                _a_int(fila.get('total_rentas', fila.get('total_rentals', 0))),
+                _a_float(fila.get('total_revenue', 0))
+            )
+        self._sucio = True
+
+    def actualizar(self, film_id, total_rentas, total_revenue, titulo=None, genero=None, rating=None):
+        """
+        Actualiza el conteo de una película y mantiene el top al día
+
+        Args:
+            film_id: ID de la película
+            total_rentas: Nuevo total de rentas
+            total_revenue: Nuevos ingresos totales
+            titulo, genero, rating: Datos de la película si es nueva
+        """
+        anterior = self.entradas.get(film_id)
+        entrada = EntradaRanking(
+            film_id,
+            titulo or (anterior.titulo if anterior else 'N/A'),
+            genero or (anterior.genero if anterior else 'N/A'),
+            rating or (anterior.rating if anterior else None),
+            int(total_rentas),
+            float(total_revenue)
+        )
+        self.entradas[film_id] = entrada
+        if self._sucio:
+            return
+
+        item = (self._clave(entrada), entrada)
+        if film_id in self._posiciones:
+            if not self._coincide(entrada) or item[0] < self._clave(anterior):
+                # Bajó una película del top: otra podría superarla
+                self._sucio = True
+            else:
+                # Subió: en un heap mínimo baja hacia las hojas
+                posicion = self._posiciones[film_id]
+                self._colocar(posicion, item)
+                self._bajar(posicion)
+        elif not self._coincide(entrada):
+            return
+        elif len(self._heap) < self._k:
+            self._heap.append(item)
+            self._colocar(len(self._heap) - 1, item)
+            self._subir(len(self._heap) - 1)
+        elif item[0] > self._heap[0][0]:
+            del self._posiciones[self._heap[0][1].film_id]
+            self._colocar(0, item)
+            self._bajar(0)
+
+    # ==================== HEAP CON POSICIONES ====================
+
+    def _colocar(self, posicion, item):
+        self._heap[posicion] = item
+        self._posiciones[item[1].film_id] = posicion
+
+    def _subir(self, posicion):
+        """
+        Mueve hacia la cima el item de 'posicion' mientras sea menor que su padre
+        """
+        item = self._heap[posicion]
+        while posicion > 0:
+            padre = (posicion - 1) // 2
+            if self._heap[padre][0] <= item[0]:
+                break
+            self._colocar(posicion, self._heap[padre])
+            posicion = padre
+        self._colocar(posicion, item)
+
+    def _bajar(self, posicion):
+        """
+        Mueve hacia las hojas el item de 'posicion' mientras sea mayor que algún hijo
+        """
+        heap = self._heap
+        item = heap[posicion]
+        while True:
+            hijo = 2 * posicion + 1
+            if hijo >= len(heap):
+                break
+            if hijo + 1 < len(heap) and heap[hijo + 1][0] < heap[hijo][0]:
+                hijo += 1
+            if item[0] <= heap[hijo][0]:
+                break
+            self._colocar(posicion, heap[hijo])
+            posicion = hijo
+        self._colocar(posicion, item)
+
+    # ==================== CONSULTA ====================
+
+    @staticmethod
+    def _clave(entrada):
+        # Mismo orden que el servidor: rentas y luego ingresos (desempate por ID)
+        return (entrada.total_rentas, entrada.total_revenue, -entrada.film_id)
+
+    def _coincide(self, entrada):
+        if self._categoria and (entrada.genero or '').lower() != self._categoria.lower():
+            return False
+        if self._rating and entrada.rating != self._rating:
+            return False
+        return entrada.total_rentas > 0
+
+    def _reconstruir(self):
+        candidatos = (e for e in self.entradas.values() if self._coincide(e))
+        mejores = heapq.nlargest(self._k, candidatos, key=self._clave)
+        self._heap = [(self._clave(e), e) for e in mejores]
+        heapq.heapify(self._heap)
+        self._posiciones = {item[1].film_id: i for i, item in enumerate(self._heap)}
+        self._sucio = False
+
+    def top(self):
+        """
+        Devuelve las K mejores películas del filtro actual, ordenadas
+
+        Returns:
+            list: Lista de EntradaRanking de mayor a menor
+        """
+        if self._sucio:
+            self._reconstruir()
+        return [entrada for _, entrada in sorted(self._heap, key=lambda item: item[0], reverse=True)]
+
+    def todas(self):
+        """
+        Devuelve todas las películas del filtro actual, ordenadas (para exportar)
+
+        Returns:
+            list: Lista de EntradaRanking de mayor a menor
+        """
+        return sorted(
+            (e for e in self.entradas.values() if self._coincide(e)),
+            key=self._clave,
+            reverse=True
+        )
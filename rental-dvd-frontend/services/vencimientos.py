@@ -0,0 +1,190 @@
+"""
+Agenda de vencimientos de las rentas activas
+
+Guarda las rentas sin devolver en un heap mínimo ordenado por el momento en
+que cruzan cada umbral de retraso, así que el próximo aviso se consulta en
+O(1) y agregar una renta cuesta O(log n). Quitar una renta devuelta o
+cancelada es O(1): sus entradas se quedan en el heap y se descartan al
+llegar a la cima, y el heap se reconstruye si las descartadas son mayoría.
+
+Los umbrales siguen a Renta.calcular_dias_retraso: una renta pasa a tener
+más de N días de retraso al empezar el día N+1 después de la fecha esperada.
+"""
+import heapq
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+AvisoVencimiento = namedtuple('AvisoVencimiento', ['rental_id', 'dias', 'momento', 'datos'])
+
+# Por debajo de este tamaño no vale la pena reconstruir el heap
+MINIMO_COMPACTACION = 64
+
+
+def fecha_esperada(valor):
+    """
+    Día de devolución esperado (a medianoche)
+
+    Args:
+        valor: datetime o texto que empieza con 'AAAA-MM-DD'
+
+    Returns:
+        datetime: None si no hay fecha o no se entiende
+    """
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return datetime(valor.year, valor.month, valor.day)
+    try:
+        return datetime.strptime(str(valor)[:10], '%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def momento_umbral(esperada, dias):
+    """
+    Returns:
+        datetime: Momento en que una renta con esa fecha esperada pasa a
+                  tener más de 'dias' días de retraso
+    """
+    return esperada + timedelta(days=dias + 1)
+
+
+class AgendaVencimientos:
+    """
+    Rentas activas ordenadas por su próximo umbral de retraso
+    """
+
+    def __init__(self, umbrales=(0, 7)):
+        """
+        Args:
+            umbrales: Días de retraso que generan aviso al superarse
+        """
+        self.umbrales = tuple(sorted(set(umbrales)))
+        # (momento, rental_id, dias, generacion)
+        self._heap = []
+        # rental_id -> [generacion, datos, avisos pendientes en el heap]
+        self._rentas = {}
+        self._generacion = 0
+        self._vivas = 0
+
+    def __len__(self):
+        """
+        Rentas con algún aviso pendiente
+        """
+        return len(self._rentas)
+
+    def __contains__(self, rental_id):
+        return rental_id in self._rentas
+
+    def _entradas(self, rental_id, esperada, ahora):
+        """
+        Entradas del heap de los umbrales que la renta aún no cruza
+        """
+        self._generacion += 1
+        return [
+            (momento_umbral(esperada, dias), rental_id, dias, self._generacion)
+            for dias in self.umbrales
+            if momento_umbral(esperada, dias) > ahora
+        ]
+
+    def cargar(self, rentas, ahora=None):
+        """
+        Reemplaza la agenda completa en O(n)
+
+        Los umbrales que una renta ya cruzó no se avisan: el reporte de no
+        devueltos ya los muestra.
+
+        Args:
+            rentas: Iterable de (rental_id, fecha esperada, datos)
+            ahora: Momento actual (por defecto datetime.now())
+        """
+        ahora = ahora or datetime.now()
+        self._heap = []
+        self._rentas = {}
+        for rental_id, esperada, datos in rentas:
+            esperada = fecha_esperada(esperada)
+            if esperada is None:
+                continue
+            entradas = self._entradas(rental_id, esperada, ahora)
+            if entradas:
+                self._heap.extend(entradas)
+                self._rentas[rental_id] = [self._generacion, datos, len(entradas)]
+        heapq.heapify(self._heap)
+        self._vivas = len(self._heap)
+
+    def agregar(self, rental_id, esperada, datos=None, ahora=None):
+        """
+        Agrega una renta (o la reemplaza si ya estaba) en O(log n)
+
+        Returns:
+            bool: True si le queda algún umbral por cruzar
+        """
+        self.quitar(rental_id)
+        esperada = fecha_esperada(esperada)
+        if esperada is None:
+            return False
+        entradas = self._entradas(rental_id, esperada, ahora or datetime.now())
+        if not entradas:
+            return False
+        for entrada in entradas:
+            heapq.heappush(self._heap, entrada)
+        self._rentas[rental_id] = [self._generacion, datos, len(entradas)]
+        self._vivas += len(entradas)
+        return True
+
+    def quitar(self, rental_id):
+        """
+        Quita una renta devuelta o cancelada en O(1) (amortizado)
+
+        Returns:
+            bool: True si estaba en la agenda
+        """
+        registro = self._rentas.pop(rental_id, None)
+        if registro is None:
+            return False
+        self._vivas -= registro[2]
+        if len(self._heap) > MINIMO_COMPACTACION and self._vivas < len(self._heap) // 2:
+            self._heap = [entrada for entrada in self._heap if self._viva(entrada)]
+            heapq.heapify(self._heap)
+        return True
+
+    def _viva(self, entrada):
+        registro = self._rentas.get(entrada[1])
+        return registro is not None and registro[0] == entrada[3]
+
+    def _limpiar_cima(self):
+        while self._heap and not self._viva(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def proximo(self):
+        """
+        Returns:
+            datetime: Momento del próximo aviso (None si no hay)
+        """
+        self._limpiar_cima()
+        return self._heap[0][0] if self._heap else None
+
+    def vencidos(self, ahora=None):
+        """
+        Saca los avisos cuyo momento ya llegó, en orden
+
+        Args:
+            ahora: Momento actual (por defecto datetime.now())
+
+        Returns:
+            list: AvisoVencimiento por cada umbral cruzado
+        """
+        ahora = ahora or datetime.now()
+        avisos = []
+        self._limpiar_cima()
+        while self._heap and self._heap[0][0] <= ahora:
+            momento, rental_id, dias, _ = heapq.heappop(self._heap)
+            registro = self._rentas[rental_id]
+            avisos.append(AvisoVencimiento(rental_id, dias, momento, registro[1]))
+            self._vivas -= 1
+            registro[2] -= 1
+            if not registro[2]:
+                # Ya cruzó todos los umbrales
+                del self._rentas[rental_id]
+            self._limpiar_cima()
+        return avisos
@@ -0,0 +1,370 @@
+"""
+Ajustes de la aplicación con sobrescrituras por archivo y entorno
+
+Los valores de fábrica son las constantes de utils/config.py. Encima se
+aplican, en este orden:
+
+1. El archivo TOML indicado en la variable DVD_AJUSTES, o ajustes.toml junto a
+   main.py si existe. Las claves son los nombres de config.py en minúsculas;
+   los ajustes que son dicts se escriben como tablas y se combinan con los de
+   fábrica, así que basta con poner lo que cambia:
+
+       request_timeout = 15
+       api_backends = ["http://10.0.0.5:3000", "http://10.0.0.6:3000"]
+
+       [timeouts_endpoint]
+       no_devueltos = 30
+
+       [limites_peticiones.reportes]
+       en_vuelo = 6
+
+2. Variables de entorno DVD_<NOMBRE> (DVD_REQUEST_TIMEOUT=15). Números,
+   booleanos y textos se escriben tal cual; las listas, separadas por comas
+   (DVD_COMPRESION_RESPUESTAS=gzip,br) o en JSON, y los dicts en JSON.
+
+Cada valor se valida contra el tipo del de fábrica. recargar() vuelve a leer
+archivo y entorno y avisa a los suscriptores de los nombres que cambiaron:
+límites de peticiones, réplicas y balanceo, timeouts, ENDPOINTS, tamaño del
+pool de conexiones y TTL de las cachés se aplican sin reiniciar; el resto
+se toma al iniciar la aplicación.
+
+python -m herramientas.verificar_ajustes comprueba que cada ajuste de config.py se pueda
+sobrescribir desde el entorno.
+"""
+import copy
+import json
+import logging
+import os
+import threading
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+logger = logging.getLogger(__name__)
+
+PREFIJO_ENTORNO = 'DVD_'
+VARIABLE_ARCHIVO = 'DVD_AJUSTES'
+ARCHIVO_POR_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ajustes.toml')
+
+# Ajustes que aceptan más de un tipo (además del de su valor de fábrica)
+TIPOS_ADICIONALES = {
+    'COMPRESION_RESPUESTAS': (list,),
+    'INSTRUMENTACION_ARCHIVO_PROMETHEUS': (str,)
+}
+
+_VERDADEROS = ('1', 'true', 'si', 'sí', 'yes', 'on')
+_FALSOS = ('0', 'false', 'no', 'off', '')
+
+
+class ErrorAjustes(ValueError):
+    """Un ajuste del archivo o del entorno no es válido"""
+
+
+def _tipo(valor):
+    # bool es subclase de int: se revisa primero
+    if isinstance(valor, bool):
+        return bool
+    if isinstance(valor, (int, float)):
+        return (int, float)
+    return type(valor)
+
+
+def _validar(ruta, valor, defecto, extra=()):
+    """
+    Comprueba 'valor' contra el tipo de 'defecto' y devuelve el valor final
+
+    Los dicts se combinan con el de fábrica clave por clave.
+    """
+    if defecto is None:
+        return valor
+    if isinstance(defecto, dict) and isinstance(valor, dict):
+        combinado = copy.deepcopy(defecto)
+        for clave, nuevo in valor.items():
+            if clave in defecto:
+                combinado[clave] = _validar(f"{ruta}.{clave}", nuevo, defecto[clave])
+            else:
+                combinado[clave] = nuevo
+        return combinado
+
+    esperado = _tipo(defecto)
+    tipos = (esperado if isinstance(esperado, tuple) else (esperado,)) + tuple(extra)
+    if isinstance(valor, bool) and bool not in tipos or not isinstance(valor, tipos):
+        nombres = ', '.join(tipo.__name__ for tipo in tipos)
+        raise ErrorAjustes(f"{ruta}: se esperaba {nombres}, llegó {type(valor).__name__} ({valor!r})")
+    if isinstance(valor, int) and not isinstance(valor, bool) and isinstance(defecto, float):
+        return float(valor)
+    return valor
+
+
+def _numero(texto, flotante=False):
+    texto = texto.strip()
+    return float(texto) if flotante or '.' in texto else int(texto)
+
+
+def _desde_texto(nombre, texto, defecto):
+    """
+    Convierte el texto de una variable de entorno al tipo del ajuste
+
+    Con más de un tipo posible (TIPOS_ADICIONALES) una coma indica lista;
+    sin ella queda el texto.
+    """
+    tipo = _tipo(defecto)
+    tipos = (tipo,) + TIPOS_ADICIONALES.get(nombre, ())
+    try:
+        if tipo is bool:
+            if texto.strip().lower() in _VERDADEROS:
+                return True
+            if texto.strip().lower() in _FALSOS:
+                return False
+            raise ValueError(texto)
+        if tipo == (int, float):
+            return _numero(texto, isinstance(defecto, float))
+        if texto.lstrip().startswith(('[', '{')):
+            return json.loads(texto)
+        if list in tipos and (',' in texto or str not in tipos):
+            elementos = [elemento.strip() for elemento in texto.split(',') if elemento.strip()]
+            if isinstance(defecto, list) and defecto and all(
+                    isinstance(valor, (int, float)) and not isinstance(valor, bool) for valor in defecto):
+                flotante = any(isinstance(valor, float) for valor in defecto)
+                return [_numero(elemento, flotante) for elemento in elementos]
+            return elementos
+        if str in tipos:
+            return texto
+        return json.loads(texto)
+    except ValueError:
+        raise ErrorAjustes(f"{PREFIJO_ENTORNO}{nombre}: valor no válido ({texto!r})")
+
+
+def _a_texto(valor):
+    """
+    Texto de variable de entorno que representa un valor (inverso de _desde_texto)
+    """
+    if isinstance(valor, bool):
+        return 'true' if valor else 'false'
+    if isinstance(valor, (int, float, str)):
+        return str(valor)
+    if isinstance(valor, list) and all(isinstance(elemento, (str, int, float)) and
+                                       not isinstance(elemento, bool) and ',' not in str(elemento)
+                                       for elemento in valor) and len(valor) > 1:
+        return ','.join(str(elemento) for elemento in valor)
+    return json.dumps(valor)
+
+
+def verificar_entorno(fabrica):
+    """
+    Comprueba que cada ajuste se pueda sobrescribir desde el entorno: su
+    valor de fábrica escrito como variable DVD_<NOMBRE> debe leerse igual, y
+    lo mismo un valor de cada tipo adicional que acepte
+
+    Args:
+        fabrica: dict nombre -> valor de fábrica
+
+    Returns:
+        list: Mensajes de los ajustes que no se leen bien (vacía si todo está bien)
+    """
+    problemas = []
+    for nombre, defecto in fabrica.items():
+        if not nombre.isupper() or nombre.startswith('_'):
+            continue
+        muestras = [] if defecto is None else [(_a_texto(defecto), defecto)]
+        for tipo in TIPOS_ADICIONALES.get(nombre, ()):
+            if tipo is str:
+                muestras.append(('valor de prueba', 'valor de prueba'))
+            elif tipo is list:
+                muestras.append(('uno,dos', ['uno', 'dos']))
+        for texto, esperado in muestras:
+            try:
+                ajustes = Ajustes({nombre: defecto}, archivo=os.devnull, entorno={PREFIJO_ENTORNO + nombre: texto})
+                leido = getattr(ajustes, nombre)
+            except ErrorAjustes as e:
+                problemas.append(str(e))
+                continue
+            if leido != esperado:
+                problemas.append(f"{PREFIJO_ENTORNO}{nombre}={texto!r}: se leyó {leido!r}, se esperaba {esperado!r}")
+    return problemas
+
+
+class Ajustes:
+    """
+    Valores vigentes de los ajustes, accesibles como atributos
+    (obtener_ajustes().REQUEST_TIMEOUT)
+    """
+
+    def __init__(self, fabrica, archivo=None, entorno=None):
+        """
+        Args:
+            fabrica: dict nombre -> valor de fábrica (constantes de config.py)
+            archivo: Ruta del TOML (por defecto DVD_AJUSTES o ajustes.toml)
+            entorno: Variables de entorno (por defecto os.environ)
+
+        Raises:
+            ErrorAjustes: Si el archivo o el entorno tienen valores no válidos
+        """
+        self._fabrica = {nombre: copy.deepcopy(valor) for nombre, valor in fabrica.items()
+                         if nombre.isupper() and not nombre.startswith('_')}
+        self._entorno = entorno
+        self._archivo = archivo
+        self._lock = threading.Lock()
+        self._suscriptores = {}
+        self._modificado = None
+        self._valores, self._modificado = self._leer()
+
+    def __getattr__(self, nombre):
+        try:
+            return self.__dict__['_valores'][nombre]
+        except KeyError:
+            raise AttributeError(nombre) from None
+
+    @property
+    def archivo(self):
+        entorno = os.environ if self._entorno is None else self._entorno
+        return self._archivo or entorno.get(VARIABLE_ARCHIVO) or ARCHIVO_POR_DEFECTO
+
+    def valores(self):
+        """
+        Returns:
+            dict: Copia de todos los valores vigentes
+        """
+        with self._lock:
+            return dict(self._valores)
+
+    def timeout(self, endpoint=None):
+        """
+        Segundos de timeout para un endpoint (TIMEOUTS_ENDPOINT o REQUEST_TIMEOUT)
+        """
+        return self._valores['TIMEOUTS_ENDPOINT'].get(endpoint, self._valores['REQUEST_TIMEOUT'])
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.archivo)
+        except OSError:
+            return None
+
+    def _leer_archivo(self):
+        ruta = self.archivo
+        if not os.path.exists(ruta):
+            return {}
+        if tomllib is None:
+            logger.warning("Se ignora %s: instala tomli para leer TOML en Python < 3.11", ruta)
+            return {}
+        try:
+            with open(ruta, 'rb') as archivo:
+                contenido = tomllib.load(archivo)
+        except (OSError, tomllib.TOMLDecodeError) as e:
+            raise ErrorAjustes(f"{ruta}: {e}")
+
+        resultado = {}
+        for clave, valor in contenido.items():
+            nombre = clave.upper()
+            if nombre not in self._fabrica:
+                raise ErrorAjustes(f"{ruta}: ajuste desconocido '{clave}'")
+            resultado[nombre] = valor
+        return resultado
+
+    def _leer(self):
+        """
+        Returns:
+            tuple: (valores vigentes, mtime del archivo leído)
+        """
+        modificado = self._mtime()
+        sobrescrituras = self._leer_archivo()
+        entorno = os.environ if self._entorno is None else self._entorno
+        for nombre, defecto in self._fabrica.items():
+            texto = entorno.get(PREFIJO_ENTORNO + nombre)
+            if texto is not None:
+                sobrescrituras[nombre] = _desde_texto(nombre, texto, defecto)
+
+        valores = copy.deepcopy(self._fabrica)
+        for nombre, valor in sobrescrituras.items():
+            valores[nombre] = _validar(nombre, valor, self._fabrica[nombre], TIPOS_ADICIONALES.get(nombre, ()))
+        return valores, modificado
+
+    def suscribir(self, nombres, funcion):
+        """
+        Llama a funcion(ajustes) cada vez que una recarga cambie alguno de los nombres
+
+        Suscribir dos veces la misma función no la duplica.
+        """
+        with self._lock:
+            self._suscriptores[funcion] = set(nombres)
+
+    def recargar(self):
+        """
+        Vuelve a leer archivo y entorno
+
+        Returns:
+            set: Nombres de los ajustes que cambiaron
+
+        Raises:
+            ErrorAjustes: Si hay valores no válidos (se conservan los vigentes)
+        """
+        valores, modificado = self._leer()
+        with self._lock:
+            cambiados = {nombre for nombre, valor in valores.items() if self._valores.get(nombre) != valor}
+            self._valores = valores
+            self._modificado = modificado
+            suscriptores = [funcion for funcion, nombres in self._suscriptores.items() if nombres & cambiados]
+
+        for funcion in suscriptores:
+            try:
+                funcion(self)
+            except Exception as e:
+                logger.warning("No se pudo aplicar el cambio de ajustes en %s: %s",
+                               getattr(funcion, '__qualname__', funcion), e)
+        if cambiados:
+            logger.info("Ajustes recargados: %s", ', '.join(sorted(cambiados)))
+        return cambiados
+
+    def recargar_si_cambio(self):
+        """
+        Recarga solo si el archivo cambió (o apareció o desapareció) desde la última lectura
+
+        Returns:
+            set: Nombres que cambiaron (vacío si no hubo recarga)
+        """
+        modificado = self._mtime()
+        if modificado == self._modificado:
+            return set()
+        # Un archivo con errores no se vuelve a intentar hasta que cambie de nuevo
+        self._modificado = modificado
+        return self.recargar()
+
+
+_ajustes = None
+
+
+def iniciar_ajustes(constantes):
+    """
+    Crea los ajustes compartidos (lo llama utils/config.py al importarse)
+
+    Las constantes de config.py quedan con los valores vigentes y se
+    actualizan en cada recarga, para el código que las lee como
+    config.NOMBRE.
+
+    Args:
+        constantes: globals() de utils/config.py (valores de fábrica)
+
+    Returns:
+        Ajustes: Instancia compartida
+    """
+    global _ajustes
+    if _ajustes is None:
+        _ajustes = Ajustes(constantes)
+        constantes.update(_ajustes.valores())
+        _ajustes.suscribir(_ajustes.valores(), lambda ajustes: constantes.update(ajustes.valores()))
+    return _ajustes
+
+
+def obtener_ajustes():
+    """
+    Devuelve los ajustes compartidos por toda la aplicación
+    """
+    if _ajustes is None:
+        import utils.config  # noqa: F401 - crea los ajustes al importarse
+    return _ajustes
+
@@ -5,12 +5,136 @@ Configuración de la aplicación
 # URL base del backend API
 API_BASE_URL = "http://localhost:3000"
 
-# Timeout para peticiones HTTP (en segundos)
+# Réplicas del API: las lecturas se reparten entre las sanas y las mutaciones
+# van a la primera sana (primaria). Vacía = solo API_BASE_URL, sin balanceo
+API_BACKENDS = []
+
+# Balanceo de lecturas: 'ewma' (latencia promedio por peticiones en vuelo) o
+# 'menos_pendientes'; fallos seguidos para sacar una réplica de la rotación
+BALANCEO_ESTRATEGIA = 'ewma'
+BALANCEO_EWMA_ALFA = 0.3
+BALANCEO_FALLOS_PARA_EXCLUIR = 2
+
+# Chequeo de salud de las réplicas en segundo plano (segundos)
+SALUD_INTERVALO_S = 5
+SALUD_RUTA = '/'
+SALUD_TIMEOUT = 2
+
+# Timeout para peticiones HTTP (en segundos), y por endpoint (clave de
+# ENDPOINTS -> segundos) para los que necesiten otro, p. ej. {'no_devueltos': 30}
 REQUEST_TIMEOUT = 10
+TIMEOUTS_ENDPOINT = {}
+
+# Pool de conexiones HTTP compartido: réplicas con pool propio y conexiones
+# abiertas por réplica (conviene que no sea menor que el en_vuelo global)
+POOL_REPLICAS = 4
+POOL_CONEXIONES_POR_REPLICA = 16
+
+# Tamaño de página al sincronizar rentas para los reportes locales, y al
+# recorrer los catálogos completos (películas, clientes)
+TAMANO_PAGINA_SINCRONIZACION = 5000
+TAMANO_PAGINA_CATALOGOS = 1000
+
+# Películas que se piden al servidor para armar el ranking con K ajustable
+LIMITE_RANKING_COMPLETO = 1000
+
+# Cachés de consultas (segundos de validez y tamaño máximo)
+CACHE_TTL_NO_DEVUELTOS = 30
+CACHE_TTL_RENTAS_CLIENTE = 60
+CACHE_MAX_CLIENTES = 200
+CACHE_TTL_GANANCIAS = 60
+
+# Refresco en segundo plano de los reportes (muestran lo último que tienen y
+# revalidan sin bloquear): intervalo por vista en milisegundos (0 = solo al
+# pulsar Actualizar o volver a la vista), edad mínima de los datos para
+# revalidar al volver a la vista o a la ventana, y edad a partir de la cual
+# el indicador los marca como viejos (segundos)
+REVALIDACION_NO_DEVUELTOS_MS = 30000
+REVALIDACION_GANANCIAS_MS = 60000
+REVALIDACION_EDAD_MINIMA_S = 10
+REVALIDACION_EDAD_VIEJA_S = 120
+
+# Avisos de cambios de rentas hechos en otras cajas (feed de eventos del API):
+# 'auto' escucha en flujo (SSE) y pasa a long-poll si el servidor no lo
+# ofrece; también 'sse', 'long_poll' o 'desactivado'. Espera de cada
+# long-poll, segundos sin recibir nada (ni latidos) para dar la conexión por
+# perdida y espera entre reconexiones, que se duplica hasta el máximo
+EVENTOS_MODO = 'auto'
+EVENTOS_ESPERA_LONG_POLL_S = 25
+EVENTOS_TIMEOUT_LECTURA_S = 45
+EVENTOS_REINTENTO_MIN_S = 1
+EVENTOS_REINTENTO_MAX_S = 60
+
+# Avisos de rentas que se atrasan: días de retraso que, al superarse, generan
+# un aviso (como los colores del reporte: más de 0, amarillo; más de 7, rojo)
+# y cada cuánto se vuelve a leer la lista de rentas activas para corregir lo
+# que no haya llegado por el feed de eventos (milisegundos, 0 = nunca)
+VENCIMIENTOS_UMBRALES_DIAS = [0, 7]
+VENCIMIENTOS_RESINCRONIZACION_MS = 300000
+
+# Espera tras la última tecla antes de buscar (milisegundos)
+RETRASO_BUSQUEDA_MS = 300
+
+# Filas que se acumulan antes de escribir al exportar (y reportar progreso)
+TAMANO_BLOQUE_EXPORTACION = 1000
+
+# Consultas simultáneas al recorrer todos los clientes desde la línea de comandos
+CONCURRENCIA_CLIENTES_CLI = 4
+
+# Exportación masiva del historial por cliente (hilos y peticiones por segundo)
+CONCURRENCIA_HISTORIAL_MASIVO = 8
+TASA_HISTORIAL_MASIVO = 20
+
+# Límites de peticiones al backend: fichas por segundo y peticiones en vuelo.
+# El pool de PostgreSQL del API es de 20 conexiones; la suma de los grupos de
+# catálogos y reportes queda por debajo del global para que las mutaciones
+# (crear, devolver, cancelar) siempre tengan espacio.
+LIMITES_PETICIONES = {
+    'global': {'tasa': 100, 'en_vuelo': 16},
+    'catalogos': {'tasa': 20, 'en_vuelo': 3},
+    'reportes': {'tasa': 50, 'en_vuelo': 9},
+    'mutaciones': {'tasa': 20, 'en_vuelo': 4}
+}
+
+# Métricas de las llamadas al API: sumideros ('memoria', 'log', 'prometheus'),
+# archivo para Prometheus (textfile collector) y resumen en stderr al salir
+INSTRUMENTACION_SUMIDEROS = ['memoria']
+INSTRUMENTACION_ARCHIVO_PROMETHEUS = None
+INSTRUMENTACION_RESUMEN_AL_SALIR = True
+
+# Trazas (spans) vista -> controlador -> servicio -> modelo -> render; se
+# activan en tiempo de ejecución desde el menú Herramientas
+TRAZAS_ACTIVAS = False
+TRAZAS_MAX_EVENTOS = 100000
+
+# Panel de rendimiento en la barra de estado (Herramientas > Panel de Rendimiento)
+PANEL_RENDIMIENTO_VISIBLE = False
+PANEL_RENDIMIENTO_INTERVALO_MS = 1000
+
+# Compresión que se pide al API (Accept-Encoding): 'auto' = todas las que
+# urllib3 sabe descomprimir (br y zstd requieren brotli/zstandard), o una lista
+# en orden de preferencia, p. ej. ['gzip'] (en el entorno, gzip,br); con []
+# se pide sin compresión
+COMPRESION_RESPUESTAS = 'auto'
+
+# Reportes grandes (no devueltos, rentas por cliente) leídos en flujo: bytes
+# leídos por bloque y filas máximas por lote que se agregan a la tabla
+TAMANO_BLOQUE_FLUJO = 65536
+FILAS_POR_LOTE_FLUJO = 500
+
+# Cada cuánto revisa la interfaz si cambió el archivo de ajustes (milisegundos)
+AJUSTES_INTERVALO_RECARGA_MS = 2000
+
+# Analizador JSON de las respuestas: 'auto' (orjson > msgspec > ujson > json)
+# o el nombre de uno. Con msgspec, la decodificación tipada entrega las filas
+# de los endpoints de listas como structs ya validados
+DECODIFICADOR_JSON = 'auto'
+DECODIFICACION_TIPADA = False
 
 # Endpoints del API
 ENDPOINTS = {
     # Gestión de Rentas
+    'rentas': '/rentals',                               # GET /rentals?limit=&offset=
     'crear_renta': '/rentals',                          # POST /rentals
     'devolver_renta': '/rentals/{id}/return',           # PUT /rentals/:rental_id/return
     'cancelar_renta': '/rentals/{id}',                  # DELETE /rentals/:rental_id
@@ -21,6 +145,11 @@ ENDPOINTS = {
     'no_devueltos': '/reports/unreturned-dvds',         # GET /reports/unreturned-dvds
     'mas_rentados': '/reports/most-rented',             # GET /reports/most-rented
     'ganancias_staff': '/reports/staff-revenue',        # GET /reports/staff-revenue
+    'ganancias_empleado': '/reports/staff-revenue/{id}',# GET /reports/staff-revenue/:staff_id
+    
+    # Feed de eventos de rentas
+    'eventos_rentas': '/events/rentals',                # GET /events/rentals (text/event-stream)
+    'eventos_rentas_poll': '/events/rentals/poll',      # GET /events/rentals/poll?after=&timeout=
     
     # Catálogos (TODAS SIN /api)
     'clientes': '/customers',                           # GET /customers
@@ -43,4 +172,9 @@ MESSAGES = {
     'success_cancelacion': 'Renta cancelada exitosamente',
     'error_general': 'Ocurrió un error. Por favor intenta de nuevo.',
     'confirm_cancelacion': '¿Estás seguro de cancelar esta renta?'
-}
\ No newline at end of file
+}
+
+# Sobrescrituras desde ajustes.toml y variables de entorno DVD_<NOMBRE>: las
+# constantes de arriba son los valores de fábrica (ver utils/ajustes.py)
+from utils.ajustes import iniciar_ajustes
+iniciar_ajustes(globals())
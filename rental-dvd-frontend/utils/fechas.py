@@ -0,0 +1,29 @@
+"""
+Fechas del API
+"""
+from datetime import datetime, date
+
+
+def parsear_fecha(valor):
+    """
+    Convierte una fecha del API (ISO 8601) a datetime sin zona horaria
+
+    Args:
+        valor: String ISO, date, datetime o None
+
+    Returns:
+        datetime: Fecha parseada o None si no se pudo interpretar
+    """
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor.replace(tzinfo=None)
+    if isinstance(valor, date):
+        return datetime(valor.year, valor.month, valor.day)
+    try:
+        return datetime.fromisoformat(str(valor).replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        try:
+            return datetime.strptime(str(valor)[:10], '%Y-%m-%d')
+        except ValueError:
+            return None
@@ -0,0 +1,156 @@
+"""
+Trazas de tiempo (spans) exportables al formato Chrome Trace
+
+Uso:
+    with span('render.tabla', 'vista', filas=len(rentas)):
+        ...
+
+    @trazar('controlador.no_devueltos', 'controlador')
+    def obtener_dvds_no_devueltos(self): ...
+
+Con las trazas desactivadas, span() devuelve un contexto vacío compartido y
+trazar() solo comprueba una bandera, así que el costo es despreciable. El
+archivo generado se abre en chrome://tracing o https://ui.perfetto.dev.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from utils.config import TRAZAS_ACTIVAS, TRAZAS_MAX_EVENTOS
+
+_activas = TRAZAS_ACTIVAS
+_eventos = deque(maxlen=TRAZAS_MAX_EVENTOS)
+_pid = os.getpid()
+_origen = time.perf_counter()
+
+
+class _SpanNulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def agregar(self, **args):
+        pass
+
+
+_NULO = _SpanNulo()
+
+
+class _Span:
+    __slots__ = ('nombre', 'categoria', 'args', 'inicio')
+
+    def __init__(self, nombre, categoria, args):
+        self.nombre = nombre
+        self.categoria = categoria
+        self.args = args
+
+    def agregar(self, **args):
+        """
+        Añade datos al span (se ven en el panel de detalles del visor)
+        """
+        self.args.update(args)
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        fin = time.perf_counter()
+        if tipo is not None:
+            self.args['error'] = tipo.__name__
+        _eventos.append({
+            'name': self.nombre,
+            'cat': self.categoria,
+            'ph': 'X',
+            'ts': (self.inicio - _origen) * 1e6,
+            'dur': (fin - self.inicio) * 1e6,
+            'pid': _pid,
+            'tid': threading.get_ident(),
+            'args': self.args
+        })
+        return False
+
+
+def activar(activas=True):
+    """
+    Activa o desactiva el registro de trazas en tiempo de ejecución
+    """
+    global _activas
+    _activas = activas
+
+
+def activas():
+    return _activas
+
+
+def span(nombre, categoria='app', **args):
+    """
+    Mide el bloque como un evento completo ('X') de Chrome Trace
+
+    Args:
+        nombre: Nombre del evento (ej. 'api.no_devueltos')
+        categoria: vista, controlador, servicio, modelo, render...
+        **args: Datos adicionales del evento
+
+    Returns:
+        Contexto; con las trazas desactivadas, un contexto vacío
+    """
+    if not _activas:
+        return _NULO
+    return _Span(nombre, categoria, args)
+
+
+def trazar(nombre, categoria='app'):
+    """
+    Decorador que envuelve la función en un span
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activas:
+                return funcion(*args, **kwargs)
+            with _Span(nombre, categoria, {}):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def eventos():
+    """
+    Returns:
+        list: Copia de los eventos registrados (los más antiguos se descartan
+              al llegar a TRAZAS_MAX_EVENTOS)
+    """
+    return list(_eventos)
+
+
+def limpiar():
+    _eventos.clear()
+
+
+def exportar_chrome(ruta):
+    """
+    Escribe los eventos en formato JSON de Chrome Trace
+
+    Args:
+        ruta: Archivo destino (.json)
+
+    Returns:
+        int: Número de eventos escritos
+    """
+    lista = eventos()
+    nombres_hilo = {hilo.ident: hilo.name for hilo in threading.enumerate()}
+    metadatos = [
+        {'name': 'thread_name', 'ph': 'M', 'pid': _pid, 'tid': tid,
+         'args': {'name': nombres_hilo.get(tid, str(tid))}}
+        for tid in {evento['tid'] for evento in lista}
+    ]
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'traceEvents': metadatos + lista, 'displayTimeUnit': 'ms'}, archivo, default=str)
+    return len(lista)
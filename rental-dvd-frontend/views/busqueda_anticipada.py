@@ -0,0 +1,101 @@
+"""
+Búsqueda mientras se escribe (type-ahead) para campos de ID
+"""
+from PyQt6.QtCore import QObject, QTimer
+from views.trabajador import ejecutar_en_segundo_plano
+from utils.config import RETRASO_BUSQUEDA_MS
+
+
+class BusquedaAnticipada(QObject):
+    """
+    Conecta un QLineEdit con una búsqueda local y una remota
+
+    - Espera a que el usuario deje de escribir (debounce).
+    - Responde desde la búsqueda local (caché/índice) cuando puede.
+    - Solo va a la red en los fallos, con una petición en vuelo como máximo;
+      si mientras tanto se escribe otra cosa, solo se lanza la última y la
+      respuesta de la petición superada se descarta.
+    """
+
+    def __init__(self, campo, buscar_local, buscar_remoto, al_resultado,
+                 retraso_ms=RETRASO_BUSQUEDA_MS, parent=None):
+        """
+        Args:
+            campo: QLineEdit a observar
+            buscar_local: f(texto) -> (respondido, resultado), sin red
+            buscar_remoto: f(texto) -> resultado, se ejecuta en segundo plano
+            al_resultado: Slot f(texto, resultado) llamado en el hilo de la interfaz
+            retraso_ms: Espera tras la última tecla
+        """
+        super().__init__(parent or campo)
+        self.campo = campo
+        self.buscar_local = buscar_local
+        self.buscar_remoto = buscar_remoto
+        self.al_resultado = al_resultado
+
+        self._generacion = 0
+        self._en_vuelo = False
+        self._pendiente = None
+        self._tareas = set()
+
+        self.temporizador = QTimer(self)
+        self.temporizador.setSingleShot(True)
+        self.temporizador.setInterval(retraso_ms)
+        self.temporizador.timeout.connect(self._buscar)
+        campo.textEdited.connect(self._al_escribir)
+
+    def _al_escribir(self, _texto):
+        # Cada tecla invalida cualquier respuesta anterior
+        self._generacion += 1
+        self.temporizador.start()
+
+    def _buscar(self):
+        texto = self.campo.text().strip()
+        if not texto:
+            return
+
+        respondido, resultado = self.buscar_local(texto)
+        if respondido:
+            self._pendiente = None
+            self.al_resultado(texto, resultado)
+            return
+
+        if self._en_vuelo:
+            # Se lanza al terminar la petición actual
+            self._pendiente = (self._generacion, texto)
+            return
+        self._lanzar(self._generacion, texto)
+
+    def _lanzar(self, generacion, texto):
+        self._en_vuelo = True
+
+        def terminado(resultado):
+            self._tareas.discard(tarea)
+            self._finalizar(generacion, texto, resultado)
+
+        def fallido(mensaje):
+            self._tareas.discard(tarea)
+            self._finalizar(generacion, texto, None)
+
+        # Las señales se conectan antes de iniciar la tarea: una respuesta
+        # inmediata (caché, validación) no debe perderse
+        tarea = ejecutar_en_segundo_plano(
+            self.buscar_remoto, texto, al_terminar=terminado, al_fallar=fallido
+        )
+        self._tareas.add(tarea)
+
+    def _finalizar(self, generacion, texto, resultado):
+        self._en_vuelo = False
+        if generacion == self._generacion:
+            self.al_resultado(texto, resultado)
+
+        if self._pendiente:
+            generacion_pendiente, texto_pendiente = self._pendiente
+            self._pendiente = None
+            if generacion_pendiente == self._generacion:
+                # La consulta pendiente quizá ya se responde con la caché recién cargada
+                respondido, resultado = self.buscar_local(texto_pendiente)
+                if respondido:
+                    self.al_resultado(texto_pendiente, resultado)
+                else:
+                    self._lanzar(generacion_pendiente, texto_pendiente)
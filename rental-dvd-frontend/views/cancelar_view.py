@@ -9,6 +9,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from controllers.renta_controller import RentaController
 from controllers.reportes_controller import ReportesController
+from views.busqueda_anticipada import BusquedaAnticipada
 
 class CancelarView(QWidget):
     def __init__(self, parent=None):
@@ -43,6 +44,14 @@ class CancelarView(QWidget):
         busqueda_layout.addWidget(QLabel("ID de Renta:"))
         busqueda_layout.addWidget(self.input_renta_id)
         
+        # Mostrar los detalles mientras se escribe el ID
+        self.busqueda = BusquedaAnticipada(
+            self.input_renta_id,
+            self.buscar_renta_local,
+            self.reportes_controller.buscar_renta_activa,
+            self.mostrar_busqueda
+        )
+        
         btn_buscar = QPushButton("🔍 Buscar")
         btn_buscar.clicked.connect(self.buscar_renta)
         busqueda_layout.addWidget(btn_buscar)
@@ -117,21 +126,14 @@ class CancelarView(QWidget):
             QMessageBox.warning(self, "Validación", "El ID debe ser un número válido")
             return
         
-        # Buscar la renta en las rentas activas
-        exito, resultado = self.reportes_controller.obtener_dvds_no_devueltos()
+        # Buscar la renta en las rentas activas (de la caché si está fresca)
+        exito, resultado = self.reportes_controller.buscar_renta_activa(renta_id)
         
         if not exito:
             QMessageBox.critical(self, "Error", f"No se pudo buscar la renta:\n{resultado}")
             return
         
-        # Buscar en los resultados
-        renta_encontrada = None
-        for renta in resultado:
-            if renta.id == renta_id:
-                renta_encontrada = renta
-                break
-        
-        if not renta_encontrada:
+        if not resultado:
             QMessageBox.warning(
                 self, 
                 "No encontrada", 
@@ -141,6 +143,41 @@ class CancelarView(QWidget):
             self.limpiar()
             return
         
+        self.mostrar_renta(resultado)
+    
+    def buscar_renta_local(self, texto):
+        """
+        Búsqueda sin red para el type-ahead
+        
+        Returns:
+            tuple: (respondido, resultado)
+        """
+        if not texto.isdigit():
+            return True, (True, None)
+        respondido, renta = self.reportes_controller.buscar_renta_activa_local(texto)
+        return respondido, (True, renta)
+    
+    def mostrar_busqueda(self, texto, resultado):
+        """
+        Muestra los detalles de la renta encontrada mientras se escribe (sin diálogos)
+        """
+        if resultado is None or not resultado[0]:
+            return
+        renta = resultado[1]
+        if renta:
+            self.mostrar_renta(renta)
+        else:
+            self.renta_actual = None
+            self.btn_cancelar.setEnabled(False)
+            self.text_detalles.setText(f"No hay una renta activa con ID {texto}")
+    
+    def mostrar_renta(self, renta_encontrada):
+        """
+        Muestra los detalles de una renta y habilita su cancelación
+        
+        Args:
+            renta_encontrada: Objeto Renta activa
+        """
         # Guardar renta actual
         self.renta_actual = renta_encontrada
         
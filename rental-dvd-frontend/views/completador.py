@@ -0,0 +1,87 @@
+"""
+Autocompletado de combos usando el índice de búsqueda
+"""
+from collections import Counter
+from PyQt6.QtWidgets import QComboBox, QCompleter
+from PyQt6.QtCore import Qt, QStringListModel
+from services.indice_busqueda import IndiceBusqueda
+
+# Resultados que se muestran en la lista desplegable
+MAX_SUGERENCIAS = 20
+
+
+class CompletadorCombo:
+    """
+    Convierte un QComboBox en un buscador con sugerencias ordenadas
+
+    El combo se vuelve editable; cada pulsación consulta el índice (no los
+    elementos del combo) y al elegir una sugerencia se selecciona el elemento
+    correspondiente del combo.
+    """
+
+    def __init__(self, combo):
+        self.combo = combo
+        self.indice = IndiceBusqueda()
+        self._fila_por_clave = {}
+        self._clave_por_etiqueta = {}
+
+        combo.setEditable(True)
+        combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+
+        self.modelo = QStringListModel()
+        self.completer = QCompleter(self.modelo, combo)
+        # El índice ya filtra y ordena; el completer solo muestra la lista
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.setMaxVisibleItems(MAX_SUGERENCIAS)
+        self.completer.activated[str].connect(self.seleccionar)
+        combo.setCompleter(self.completer)
+
+        combo.lineEdit().textEdited.connect(self.sugerir)
+
+    def indexar(self, elementos):
+        """
+        Construye el índice con los elementos ya cargados en el combo
+
+        Args:
+            elementos: Iterable de (clave, textos) donde clave es el dato del
+                       elemento en el combo (itemData) o su ID
+        """
+        self._fila_por_clave.clear()
+        for fila in range(self.combo.count()):
+            dato = self.combo.itemData(fila)
+            if dato is not None:
+                self._fila_por_clave[getattr(dato, 'id', dato)] = fila
+
+        self.indice.construir(
+            (clave, self.combo.itemText(self._fila_por_clave[clave]), textos)
+            for clave, textos in elementos
+            if clave in self._fila_por_clave
+        )
+
+    def sugerir(self, texto):
+        """
+        Actualiza la lista de sugerencias para el texto escrito
+        """
+        claves = self.indice.buscar(texto, MAX_SUGERENCIAS)
+        etiquetas = [self.indice.etiquetas[clave] for clave in claves]
+        # Dos clientes con el mismo nombre se distinguen por su ID, y cada
+        # sugerencia lleva a su propio elemento
+        repetidas = {etiqueta for etiqueta, veces in Counter(etiquetas).items() if veces > 1}
+        etiquetas = [
+            f"{etiqueta} (#{clave})" if etiqueta in repetidas else etiqueta
+            for etiqueta, clave in zip(etiquetas, claves)
+        ]
+        self._clave_por_etiqueta = dict(zip(etiquetas, claves))
+        self.modelo.setStringList(etiquetas)
+        if etiquetas:
+            self.completer.complete()
+
+    def seleccionar(self, etiqueta):
+        """
+        Selecciona en el combo el elemento de la sugerencia elegida
+        """
+        clave = self._clave_por_etiqueta.get(etiqueta)
+        fila = self._fila_por_clave.get(clave)
+        if fila is not None:
+            self.combo.setCurrentIndex(fila)
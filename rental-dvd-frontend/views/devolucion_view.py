@@ -9,6 +9,10 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from controllers.renta_controller import RentaController
 from controllers.reportes_controller import ReportesController
+from views.busqueda_anticipada import BusquedaAnticipada
+from views.tabla_incremental import TablaIncremental
+from views.eventos import obtener_puente_eventos
+from views.vencimientos import obtener_programador_vencimientos
 
 class DevolucionView(QWidget):
     def __init__(self, parent=None):
@@ -16,7 +20,11 @@ class DevolucionView(QWidget):
         self.controller = RentaController()
         self.reportes_controller = ReportesController()
         self.rentas_activas = []
+        # La tabla tiene todas las rentas activas (no una búsqueda por ID)
+        self.mostrando_todas = False
         self.init_ui()
+        obtener_puente_eventos().renta_cambiada.connect(self.al_cambiar_renta)
+        obtener_programador_vencimientos().renta_atrasada.connect(self.al_atrasarse_renta)
     
     def init_ui(self):
         """
@@ -38,6 +46,14 @@ class DevolucionView(QWidget):
         busqueda_layout.addWidget(QLabel("ID de Renta:"))
         busqueda_layout.addWidget(self.input_renta_id)
         
+        # Mostrar la renta mientras se escribe el ID
+        self.busqueda = BusquedaAnticipada(
+            self.input_renta_id,
+            self.buscar_renta_local,
+            self.reportes_controller.buscar_renta_activa,
+            self.mostrar_busqueda
+        )
+        
         btn_buscar = QPushButton("🔍 Buscar")
         btn_buscar.clicked.connect(self.buscar_renta)
         busqueda_layout.addWidget(btn_buscar)
@@ -59,6 +75,7 @@ class DevolucionView(QWidget):
         self.tabla_rentas.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.tabla_rentas.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.tabla_rentas.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_incremental = TablaIncremental(self.tabla_rentas, self.pintar_fila)
         layout.addWidget(self.tabla_rentas)
         
         # Botones de acción
@@ -89,23 +106,50 @@ class DevolucionView(QWidget):
             QMessageBox.warning(self, "Validación", "Por favor ingresa un ID de renta")
             return
         
-        # Cargar todas las rentas activas y filtrar
-        self.cargar_rentas_activas(filtrar_id=renta_id)
+        # Cargar todas las rentas activas (de la caché si está fresca) y filtrar
+        self.cargar_rentas_activas(filtrar_id=renta_id, usar_cache=True)
     
-    def cargar_rentas_activas(self, filtrar_id=None):
+    def buscar_renta_local(self, texto):
+        """
+        Búsqueda sin red para el type-ahead
+        
+        Returns:
+            tuple: (respondido, resultado)
+        """
+        if not texto.isdigit():
+            return True, (True, None)
+        respondido, renta = self.reportes_controller.buscar_renta_activa_local(texto)
+        return respondido, (True, renta)
+    
+    def mostrar_busqueda(self, texto, resultado):
+        """
+        Muestra en la tabla la renta encontrada mientras se escribe (sin diálogos)
+        """
+        if resultado is None:
+            return
+        exito, renta = resultado
+        if not exito:
+            return
+        self.rentas_activas = [renta] if renta else []
+        self.mostrando_todas = False
+        self.mostrar_rentas()
+    
+    def cargar_rentas_activas(self, filtrar_id=None, usar_cache=False):
         """
         Carga todas las rentas activas en la tabla
         
         Args:
             filtrar_id: Si se proporciona, filtra por este ID
+            usar_cache: Si es True, reutiliza la lista en caché si está fresca
         """
-        exito, resultado = self.reportes_controller.obtener_dvds_no_devueltos()
+        exito, resultado = self.reportes_controller.obtener_dvds_no_devueltos(usar_cache=usar_cache)
         
         if not exito:
             QMessageBox.critical(self, "Error", f"No se pudieron cargar las rentas:\n{resultado}")
             return
         
         self.rentas_activas = resultado
+        self.mostrando_todas = not filtrar_id
         
         # Filtrar si se especificó un ID
         if filtrar_id:
@@ -118,34 +162,69 @@ class DevolucionView(QWidget):
                 QMessageBox.warning(self, "Error", "El ID debe ser un número")
                 return
         
-        # Limpiar tabla
-        self.tabla_rentas.setRowCount(0)
-        
-        # Llenar tabla
-        for renta in self.rentas_activas:
-            row = self.tabla_rentas.rowCount()
-            self.tabla_rentas.insertRow(row)
-            
-            cliente_nombre = renta.cliente.nombre if renta.cliente else f"ID: {renta.customer_id}"
-            dvd_titulo = renta.dvd.titulo if renta.dvd else f"ID: {renta.dvd_id}"
-            dias_retraso = renta.calcular_dias_retraso()
-            
-            self.tabla_rentas.setItem(row, 0, QTableWidgetItem(str(renta.id)))
-            self.tabla_rentas.setItem(row, 1, QTableWidgetItem(cliente_nombre))
-            self.tabla_rentas.setItem(row, 2, QTableWidgetItem(dvd_titulo))
-            self.tabla_rentas.setItem(row, 3, QTableWidgetItem(renta.fecha_renta))
-            self.tabla_rentas.setItem(row, 4, QTableWidgetItem(renta.fecha_devolucion_esperada))
-            
-            # Colorear días de retraso
-            item_retraso = QTableWidgetItem(f"{dias_retraso} días" if dias_retraso > 0 else "A tiempo")
-            if dias_retraso > 0:
-                item_retraso.setBackground(Qt.GlobalColor.red)
-                item_retraso.setForeground(Qt.GlobalColor.white)
-            self.tabla_rentas.setItem(row, 5, item_retraso)
+        self.mostrar_rentas()
         
         if not self.rentas_activas:
             QMessageBox.information(self, "Sin Rentas", "No hay rentas activas en este momento")
     
+    def al_cambiar_renta(self, evento):
+        """
+        Quita de la tabla la renta que otra caja devolvió o canceló (ya no se
+        puede devolver aquí) y agrega las que se crean si se ven todas
+        """
+        if evento['tipo'] == 'reinicio':
+            # Se perdieron eventos: la tabla puede tener rentas que ya no
+            # están activas, así que se lee de nuevo lo que se estaba viendo
+            if self.mostrando_todas:
+                self.cargar_rentas_activas(usar_cache=False)
+            elif self.rentas_activas:
+                self.cargar_rentas_activas(filtrar_id=str(self.rentas_activas[0].id), usar_cache=False)
+            return
+        rental_id = evento['datos'].get('rental_id')
+        rentas = [renta for renta in self.rentas_activas if renta.id != rental_id]
+        if evento['renta'] is not None and self.mostrando_todas:
+            rentas.append(evento['renta'])
+        self.rentas_activas = rentas
+        self.mostrar_rentas()
+    
+    def al_atrasarse_renta(self, aviso):
+        """
+        Vuelve a calcular los días de retraso: solo se repintan las filas que cambiaron
+        """
+        self.mostrar_rentas()
+    
+    def _fila(self, renta):
+        """
+        Clave y valores de la fila de una renta
+        """
+        cliente_nombre = renta.cliente.nombre if renta.cliente else f"ID: {renta.customer_id}"
+        dvd_titulo = renta.dvd.titulo if renta.dvd else f"ID: {renta.dvd_id}"
+        return renta.id, (
+            str(renta.id), cliente_nombre, dvd_titulo,
+            renta.fecha_renta, renta.fecha_devolucion_esperada, renta.calcular_dias_retraso()
+        )
+    
+    def mostrar_rentas(self):
+        """
+        Deja en la tabla las rentas activas actuales, tocando solo las filas que cambiaron
+        """
+        self.tabla_incremental.mostrar(self._fila(renta) for renta in self.rentas_activas)
+    
+    def pintar_fila(self, row, valores):
+        """
+        Llena las celdas de una fila de la tabla
+        """
+        for columna, valor in enumerate(valores[:5]):
+            self.tabla_rentas.setItem(row, columna, QTableWidgetItem(valor))
+        
+        # Colorear días de retraso
+        dias_retraso = valores[5]
+        item_retraso = QTableWidgetItem(f"{dias_retraso} días" if dias_retraso > 0 else "A tiempo")
+        if dias_retraso > 0:
+            item_retraso.setBackground(Qt.GlobalColor.red)
+            item_retraso.setForeground(Qt.GlobalColor.white)
+        self.tabla_rentas.setItem(row, 5, item_retraso)
+    
     def procesar_devolucion(self):
         """
         Procesa la devolución de la renta seleccionada
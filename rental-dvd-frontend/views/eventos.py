@@ -0,0 +1,55 @@
+"""
+Cambios de rentas de otras cajas en la interfaz
+
+La suscripción (services/eventos.py) entrega los eventos en su propio hilo;
+PuenteEventos los pasa al hilo de la interfaz, los aplica a las cachés y a
+los reportes locales, y después avisa a las vistas con renta_cambiada para
+que corrijan solo las filas afectadas.
+"""
+from PyQt6.QtCore import QObject, pyqtSignal
+from controllers.reportes_controller import ReportesController
+from services.eventos import obtener_suscripcion
+
+
+class PuenteEventos(QObject):
+    # Evento ya aplicado a las cachés; en 'creada' trae además la Renta en 'renta'
+    renta_cambiada = pyqtSignal(dict)
+    # Emitida desde el hilo de la suscripción (la conexión la encola)
+    _recibido = pyqtSignal(dict)
+
+    def __init__(self, suscripcion=None):
+        """
+        Args:
+            suscripcion: SuscripcionEventos (por defecto la compartida)
+        """
+        super().__init__()
+        self.suscripcion = suscripcion or obtener_suscripcion()
+        self.reportes_controller = ReportesController()
+        self._recibido.connect(self._aplicar)
+        self.suscripcion.suscribir(self._recibido.emit)
+
+    def _aplicar(self, evento):
+        evento['renta'] = self.reportes_controller.aplicar_evento(evento)
+        self.renta_cambiada.emit(evento)
+
+    def iniciar(self):
+        self.suscripcion.iniciar()
+
+    def detener(self):
+        self.suscripcion.detener()
+
+
+_puente = None
+
+
+def obtener_puente_eventos():
+    """
+    Puente compartido (se crea en el hilo de la interfaz la primera vez)
+
+    Returns:
+        PuenteEventos: Instancia única
+    """
+    global _puente
+    if _puente is None:
+        _puente = PuenteEventos()
+    return _puente
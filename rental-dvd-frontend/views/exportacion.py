@@ -0,0 +1,83 @@
+"""
+Exportación de reportes en segundo plano con diálogo de progreso
+"""
+import threading
+from PyQt6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from PyQt6.QtCore import Qt, QThreadPool
+from services.exportador import (
+    exportar, formatos_disponibles, formato_de_ruta, quitar_extension, DESCRIPCION_FORMATOS
+)
+from views.trabajador import Trabajador
+
+
+def exportar_en_segundo_plano(vista, titulo, nombre_sugerido, columnas, filas, total=None):
+    """
+    Pide el archivo destino y formato y escribe el reporte fuera del hilo de la interfaz
+
+    Args:
+        vista: Widget que lanza la exportación (padre de los diálogos)
+        titulo: Título del diálogo de guardado
+        nombre_sugerido: Nombre de archivo propuesto (sin extensión)
+        columnas: Columnas tipadas del reporte
+        filas: Generador de filas construido con los datos del controlador
+        total: Número de filas esperado (None si no se conoce)
+
+    Returns:
+        bool: True si se lanzó la exportación
+    """
+    formatos = formatos_disponibles()
+    filtros = [DESCRIPCION_FORMATOS[f] for f in formatos]
+    archivo, filtro = QFileDialog.getSaveFileName(
+        vista, titulo, f"{nombre_sugerido}.csv", ";;".join(filtros)
+    )
+    if not archivo:
+        return False
+
+    # Manda el formato elegido en el filtro; se ajusta la extensión del archivo
+    formato = formato_de_ruta(archivo)
+    if filtro in filtros and formatos[filtros.index(filtro)] != formato:
+        formato = formatos[filtros.index(filtro)]
+        archivo = f"{quitar_extension(archivo)}.{formato}"
+
+    cancelar = threading.Event()
+
+    dialogo = QProgressDialog("Exportando...", "Cancelar", 0, total or 0, vista)
+    dialogo.setWindowTitle(titulo)
+    dialogo.setWindowModality(Qt.WindowModality.WindowModal)
+    dialogo.setMinimumDuration(500)
+    dialogo.canceled.connect(cancelar.set)
+
+    trabajador = Trabajador(
+        exportar, archivo, columnas, filas,
+        formato=formato, total=total, cancelado=cancelar.is_set, con_progreso=True
+    )
+
+    def avance(escritas, esperadas):
+        if esperadas:
+            dialogo.setMaximum(esperadas)
+            dialogo.setValue(min(escritas, esperadas))
+        dialogo.setLabelText(f"Exportando... {escritas} filas")
+
+    def terminado(escritas):
+        dialogo.reset()
+        vista._exportacion = None
+        QMessageBox.information(
+            vista, "Éxito", f"Reporte exportado a:\n{archivo}\n\nFilas: {escritas}"
+        )
+
+    def fallido(mensaje):
+        dialogo.reset()
+        vista._exportacion = None
+        if cancelar.is_set():
+            QMessageBox.information(vista, "Cancelado", "La exportación fue cancelada")
+        else:
+            QMessageBox.critical(vista, "Error", f"No se pudo exportar el archivo:\n{mensaje}")
+
+    trabajador.senales.progreso.connect(avance)
+    trabajador.senales.terminado.connect(terminado)
+    trabajador.senales.fallido.connect(fallido)
+
+    # Mantener viva la tarea (y sus señales) mientras se ejecuta
+    vista._exportacion = trabajador
+    QThreadPool.globalInstance().start(trabajador)
+    return True
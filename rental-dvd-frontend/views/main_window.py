@@ -4,11 +4,19 @@ Ventana principal de la aplicación
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QLabel, 
     QPushButton, QMenuBar, QMenu, QMessageBox,
-    QStackedWidget
+    QStackedWidget, QFileDialog, QApplication
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction, QFont
-from utils.config import APP_TITLE, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT
+from utils.config import (
+    APP_TITLE, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT, PANEL_RENDIMIENTO_VISIBLE,
+    AJUSTES_INTERVALO_RECARGA_MS
+)
+from utils import trazas
+from utils.ajustes import obtener_ajustes, ErrorAjustes
+from views.panel_rendimiento import PanelRendimiento
+from views.eventos import obtener_puente_eventos
+from views.vencimientos import obtener_programador_vencimientos
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -36,6 +44,27 @@ class MainWindow(QMainWindow):
         
         # Barra de estado
         self.statusBar().showMessage("Listo")
+        self.panel_rendimiento = PanelRendimiento(self)
+        self.statusBar().addPermanentWidget(self.panel_rendimiento)
+        self.panel_rendimiento.setVisible(PANEL_RENDIMIENTO_VISIBLE)
+        
+        # Recarga de ajustes al cambiar el archivo, sin reiniciar
+        self.ajustes = obtener_ajustes()
+        self.timer_ajustes = QTimer(self)
+        self.timer_ajustes.setInterval(AJUSTES_INTERVALO_RECARGA_MS)
+        self.timer_ajustes.timeout.connect(lambda: self.recargar_ajustes(solo_si_cambio=True))
+        self.timer_ajustes.start()
+        self.accion_panel.setChecked(PANEL_RENDIMIENTO_VISIBLE)
+        
+        # Cambios de rentas hechos en otras cajas
+        self.puente_eventos = obtener_puente_eventos()
+        self.puente_eventos.renta_cambiada.connect(self.avisar_cambio_renta)
+        self.puente_eventos.iniciar()
+        
+        # Avisos de rentas que se atrasan
+        self.programador_vencimientos = obtener_programador_vencimientos()
+        self.programador_vencimientos.renta_atrasada.connect(self.avisar_atraso)
+        self.programador_vencimientos.iniciar()
     
     def crear_pagina_inicio(self):
         """
@@ -140,6 +169,32 @@ class MainWindow(QMainWindow):
         accion_ganancias.triggered.connect(self.abrir_reporte_ganancias)
         menu_reportes.addAction(accion_ganancias)
         
+        # Menú Herramientas
+        menu_herramientas = menubar.addMenu("&Herramientas")
+        
+        self.accion_trazas = QAction("Registrar Trazas", self)
+        self.accion_trazas.setCheckable(True)
+        self.accion_trazas.setChecked(trazas.activas())
+        self.accion_trazas.toggled.connect(self.alternar_trazas)
+        menu_herramientas.addAction(self.accion_trazas)
+        
+        accion_exportar_trazas = QAction("Exportar Trazas...", self)
+        accion_exportar_trazas.triggered.connect(self.exportar_trazas)
+        menu_herramientas.addAction(accion_exportar_trazas)
+        
+        menu_herramientas.addSeparator()
+        
+        self.accion_panel = QAction("Panel de Rendimiento", self)
+        self.accion_panel.setCheckable(True)
+        self.accion_panel.setShortcut("Ctrl+Shift+P")
+        self.accion_panel.toggled.connect(self.alternar_panel_rendimiento)
+        menu_herramientas.addAction(self.accion_panel)
+        
+        accion_recargar_ajustes = QAction("Recargar Ajustes", self)
+        accion_recargar_ajustes.setShortcut("Ctrl+Shift+R")
+        accion_recargar_ajustes.triggered.connect(lambda: self.recargar_ajustes())
+        menu_herramientas.addAction(accion_recargar_ajustes)
+        
         # Menú Ayuda
         menu_ayuda = menubar.addMenu("&Ayuda")
         
@@ -307,6 +362,104 @@ class MainWindow(QMainWindow):
         self.stacked_widget.setCurrentWidget(reporte_view)
         self.statusBar().showMessage("Reporte: Ganancias por Staff")
     
+    def alternar_trazas(self, activas):
+        """
+        Activa o desactiva el registro de trazas
+        """
+        trazas.activar(activas)
+        self.statusBar().showMessage("Trazas activadas" if activas else "Trazas desactivadas")
+    
+    def alternar_panel_rendimiento(self, visible):
+        """
+        Muestra u oculta el panel de rendimiento de la barra de estado
+        """
+        self.panel_rendimiento.setVisible(visible)
+    
+    def recargar_ajustes(self, solo_si_cambio=False):
+        """
+        Vuelve a leer ajustes.toml y las variables DVD_* y aplica los cambios
+        
+        Args:
+            solo_si_cambio: Recargar solo si el archivo cambió (revisión periódica)
+        """
+        try:
+            if solo_si_cambio:
+                cambiados = self.ajustes.recargar_si_cambio()
+            else:
+                cambiados = self.ajustes.recargar()
+        except ErrorAjustes as e:
+            self.statusBar().showMessage(f"Ajustes no aplicados: {e}")
+            return
+        
+        if cambiados:
+            self.statusBar().showMessage(f"Ajustes aplicados: {', '.join(sorted(cambiados))}")
+        elif not solo_si_cambio:
+            self.statusBar().showMessage(f"Sin cambios en los ajustes ({self.ajustes.archivo})")
+    
+    def avisar_cambio_renta(self, evento):
+        """
+        Informa en la barra de estado cada cambio de rentas avisado por el API
+        (de esta caja o de otras)
+        """
+        if evento['tipo'] == 'reinicio':
+            self.statusBar().showMessage("Se perdieron avisos de cambios: los reportes se recargan", 5000)
+            return
+        acciones = {'creada': 'registrada', 'devuelta': 'devuelta', 'cancelada': 'cancelada'}
+        self.statusBar().showMessage(
+            f"Aviso: renta #{evento['datos'].get('rental_id')} {acciones[evento['tipo']]}", 5000
+        )
+    
+    def avisar_atraso(self, aviso):
+        """
+        Informa en la barra de estado que una renta acaba de superar un umbral de retraso
+        """
+        renta = aviso.datos
+        detalle = ""
+        if renta is not None:
+            cliente = renta.cliente.nombre if renta.cliente else f"cliente {renta.customer_id}"
+            titulo = renta.dvd.titulo if renta.dvd else f"DVD {renta.dvd_id}"
+            detalle = f" ({cliente}, {titulo})"
+        if aviso.dias == 0:
+            texto = f"⚠️ La renta #{aviso.rental_id}{detalle} ya está atrasada"
+        else:
+            texto = f"🔴 La renta #{aviso.rental_id}{detalle} lleva más de {aviso.dias} días de retraso"
+        self.statusBar().showMessage(texto, 10000)
+        QApplication.alert(self)
+    
+    def closeEvent(self, event):
+        self.puente_eventos.detener()
+        self.programador_vencimientos.detener()
+        super().closeEvent(event)
+    
+    def exportar_trazas(self):
+        """
+        Guarda las trazas registradas en formato Chrome Trace (JSON)
+        """
+        if not trazas.eventos():
+            QMessageBox.information(
+                self, "Sin Trazas",
+                "No hay trazas registradas. Activa Herramientas > Registrar Trazas y repite la operación."
+            )
+            return
+        
+        ruta, _ = QFileDialog.getSaveFileName(
+            self, "Exportar Trazas", "trazas.json", "Chrome Trace (*.json)"
+        )
+        if not ruta:
+            return
+        
+        try:
+            total = trazas.exportar_chrome(ruta)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudieron guardar las trazas:\n{e}")
+            return
+        
+        trazas.limpiar()
+        QMessageBox.information(
+            self, "Trazas Exportadas",
+            f"{total} eventos guardados en:\n{ruta}\n\nÁbrelo en chrome://tracing o ui.perfetto.dev"
+        )
+    
     def mostrar_acerca_de(self):
         """
         Muestra información acerca de la aplicación
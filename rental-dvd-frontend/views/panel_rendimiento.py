@@ -0,0 +1,137 @@
+"""
+Panel de rendimiento para la barra de estado
+"""
+import sys
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QTimer
+from services.instrumentacion import obtener_instrumentacion
+from services.limitador import obtener_gobernador
+from services.balanceador import obtener_balanceador
+from services.cache import caches_registradas
+from services.eventos import obtener_suscripcion
+from utils.config import PANEL_RENDIMIENTO_INTERVALO_MS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+COLORES_BACKEND = {
+    'disponible': '#2e7d32',
+    'degradado': '#f9a825',
+    'caído': '#c62828',
+    'sin datos': '#757575'
+}
+
+
+def memoria_proceso_mb():
+    """
+    Memoria residente del proceso
+
+    Returns:
+        tuple: (megabytes o None, es_pico) — sin psutil se usa el pico de
+               resource (Unix), que no baja al liberar memoria
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024), False
+    if resource is not None:
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS informa bytes; Linux, kilobytes
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return pico / divisor, True
+    return None, False
+
+
+class PanelRendimiento(QLabel):
+    """
+    Resumen en vivo: última latencia, peticiones en vuelo, aciertos de
+    caché, filas dibujadas, memoria y estado del backend
+
+    Solo consulta contadores ya existentes, así que refrescarlo es barato;
+    el temporizador se detiene mientras el panel está oculto.
+    """
+
+    def __init__(self, parent=None, intervalo_ms=PANEL_RENDIMIENTO_INTERVALO_MS):
+        super().__init__(parent)
+        self.instrumentacion = obtener_instrumentacion()
+        self.gobernador = obtener_gobernador()
+        self.balanceador = obtener_balanceador()
+        self.suscripcion = obtener_suscripcion()
+        self.timer = QTimer(self)
+        self.timer.setInterval(intervalo_ms)
+        self.timer.timeout.connect(self.actualizar)
+
+    def showEvent(self, event):
+        self.actualizar()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def datos(self):
+        """
+        Returns:
+            dict: Valores mostrados por el panel
+        """
+        ultima = self.instrumentacion.memoria.ultima
+        en_vuelo, maximo = self.gobernador.estado().get('global', (0, None))
+
+        aciertos = fallos = 0
+        for cache in caches_registradas().values():
+            aciertos += cache.aciertos
+            fallos += cache.fallos
+
+        memoria, es_pico = memoria_proceso_mb()
+        replicas = self.balanceador.estado()
+        return {
+            'latencia_ms': ultima.fases.get('total') if ultima else None,
+            'endpoint': ultima.endpoint if ultima else None,
+            'en_vuelo': en_vuelo,
+            'en_vuelo_max': maximo,
+            'tasa_cache': aciertos / (aciertos + fallos) if aciertos + fallos else None,
+            'filas': self.instrumentacion.filas_renderizadas,
+            'memoria_mb': memoria,
+            'memoria_pico': es_pico,
+            'backend': self.instrumentacion.estado_backend(),
+            'replicas_sanas': sum(1 for replica in replicas if replica['sano']),
+            'replicas': len(replicas),
+            'eventos': self.suscripcion.estado()
+        }
+
+    def actualizar(self):
+        """
+        Refresca el texto del panel
+        """
+        if not self.instrumentacion.activa:
+            self.setText("Métricas desactivadas (INSTRUMENTACION_SUMIDEROS)")
+            return
+
+        d = self.datos()
+        latencia = f"{d['latencia_ms']:.0f} ms ({d['endpoint']})" if d['latencia_ms'] is not None else "—"
+        en_vuelo = f"{d['en_vuelo']}/{d['en_vuelo_max']}" if d['en_vuelo_max'] else str(d['en_vuelo'])
+        cache = f"{d['tasa_cache']:.0%}" if d['tasa_cache'] is not None else "—"
+        if d['memoria_mb'] is None:
+            memoria = "—"
+        else:
+            memoria = f"{d['memoria_mb']:.0f} MB" + (" (pico)" if d['memoria_pico'] else "")
+        color = COLORES_BACKEND.get(d['backend'], '#757575')
+        replicas = f" ({d['replicas_sanas']}/{d['replicas']} réplicas)" if d['replicas'] > 1 else ""
+        eventos = d['eventos']
+        if eventos['modo'] == 'desactivado':
+            avisos = "desactivados"
+        else:
+            avisos = eventos['modo'] + ("" if eventos['conectado'] else " (sin conexión)")
+
+        self.setText(
+            f"Última: {latencia} | En vuelo: {en_vuelo} | Caché: {cache} | "
+            f"Filas: {d['filas']} | Memoria: {memoria} | "
+            f"Backend: <span style='color:{color}; font-weight:bold'>{d['backend']}</span>{replicas} | "
+            f"Eventos: {avisos}"
+        )
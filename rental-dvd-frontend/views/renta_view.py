@@ -8,6 +8,7 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 from controllers.renta_controller import RentaController
+from views.completador import CompletadorCombo
 
 class RentaView(QWidget):
     def __init__(self, parent=None):
@@ -31,14 +32,14 @@ class RentaView(QWidget):
         form_group = QGroupBox("Datos de la Renta")
         form_layout = QFormLayout()
         
-        # Cliente
+        # Cliente (editable: se puede buscar por nombre o email)
         self.combo_cliente = QComboBox()
-        self.combo_cliente.setEditable(False)
+        self.completador_cliente = CompletadorCombo(self.combo_cliente)
         form_layout.addRow("Cliente:", self.combo_cliente)
         
-        # DVD
+        # DVD (editable: se puede buscar por título o categoría)
         self.combo_dvd = QComboBox()
-        self.combo_dvd.setEditable(False)
+        self.completador_dvd = CompletadorCombo(self.combo_dvd)
         self.combo_dvd.currentIndexChanged.connect(self.actualizar_info_dvd)
         form_layout.addRow("DVD:", self.combo_dvd)
         
@@ -107,6 +108,9 @@ class RentaView(QWidget):
             self.combo_cliente.addItem("-- Seleccionar Cliente --", None)
             for cliente in resultado:
                 self.combo_cliente.addItem(str(cliente), cliente.id)
+            self.completador_cliente.indexar(
+                (cliente.id, [cliente.nombre, cliente.email]) for cliente in resultado
+            )
         else:
             QMessageBox.warning(self, "Error", f"No se pudieron cargar los clientes:\n{resultado}")
         
@@ -117,6 +121,9 @@ class RentaView(QWidget):
             self.combo_dvd.addItem("-- Seleccionar DVD --", None)
             for dvd in resultado:
                 self.combo_dvd.addItem(str(dvd), dvd)
+            self.completador_dvd.indexar(
+                (dvd.id, [dvd.title, dvd.category]) for dvd in resultado
+            )
         else:
             QMessageBox.warning(self, "Error", f"No se pudieron cargar los DVDs:\n{resultado}")
         
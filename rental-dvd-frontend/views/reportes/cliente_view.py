@@ -10,13 +10,25 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from controllers.reportes_controller import ReportesController
 from controllers.renta_controller import RentaController
+from views.completador import CompletadorCombo
+from views.busqueda_anticipada import BusquedaAnticipada
+from views.exportacion import exportar_en_segundo_plano
+from views.trabajador import ejecutar_en_segundo_plano
+from views.tabla_incremental import TablaIncremental
+from views.eventos import obtener_puente_eventos
 
 class ClienteReporteView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.reportes_controller = ReportesController()
         self.renta_controller = RentaController()
+        self.rentas_cliente = []
+        # Cliente cuyas rentas están en la tabla (volver a consultarlo solo aplica los cambios)
+        self.cliente_mostrado = None
+        self._consulta = 0
+        self._tareas = set()
         self.init_ui()
+        obtener_puente_eventos().renta_cambiada.connect(self.al_cambiar_renta)
         self.cargar_clientes()
     
     def init_ui(self):
@@ -36,6 +48,8 @@ class ClienteReporteView(QWidget):
         
         # Opción 1: Combo de clientes
         self.combo_cliente = QComboBox()
+        self.combo_cliente.setMinimumWidth(300)
+        self.completador_cliente = CompletadorCombo(self.combo_cliente)
         busqueda_layout.addWidget(QLabel("Cliente:"))
         busqueda_layout.addWidget(self.combo_cliente)
         
@@ -46,6 +60,14 @@ class ClienteReporteView(QWidget):
         busqueda_layout.addWidget(QLabel("ID:"))
         busqueda_layout.addWidget(self.input_cliente_id)
         
+        # Consultar mientras se escribe el ID
+        self.busqueda = BusquedaAnticipada(
+            self.input_cliente_id,
+            self.buscar_rentas_local,
+            lambda texto: self.reportes_controller.obtener_rentas_cliente(texto, usar_cache=True),
+            self.mostrar_busqueda
+        )
+        
         btn_consultar = QPushButton("🔍 Consultar")
         btn_consultar.setStyleSheet("background-color: #2196F3; color: white; padding: 8px;")
         btn_consultar.clicked.connect(self.consultar_rentas)
@@ -70,6 +92,7 @@ class ClienteReporteView(QWidget):
         self.tabla_rentas.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.tabla_rentas.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.tabla_rentas.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_incremental = TablaIncremental(self.tabla_rentas, self.pintar_fila)
         layout.addWidget(self.tabla_rentas)
         
         # Botones de acción
@@ -81,7 +104,7 @@ class ClienteReporteView(QWidget):
         
         botones_layout.addStretch()
         
-        btn_exportar = QPushButton("📄 Exportar a CSV")
+        btn_exportar = QPushButton("📄 Exportar")
         btn_exportar.clicked.connect(self.exportar_csv)
         botones_layout.addWidget(btn_exportar)
         
@@ -100,6 +123,9 @@ class ClienteReporteView(QWidget):
             self.combo_cliente.addItem("-- Seleccionar Cliente --", None)
             for cliente in resultado:
                 self.combo_cliente.addItem(f"{cliente.nombre} - {cliente.email}", cliente.id)
+            self.completador_cliente.indexar(
+                (cliente.id, [cliente.nombre, cliente.email]) for cliente in resultado
+            )
         else:
             QMessageBox.warning(self, "Error", f"No se pudieron cargar los clientes:\n{resultado}")
     
@@ -124,12 +150,118 @@ class ClienteReporteView(QWidget):
             QMessageBox.warning(self, "Validación", "Por favor selecciona o ingresa un cliente")
             return
         
-        # Consultar rentas
-        exito, resultado = self.reportes_controller.obtener_rentas_cliente(cliente_id)
+        self._consulta += 1
+        consulta = self._consulta
+        # Otro cliente: se consulta en flujo y las filas se agregan conforme
+        # llegan. El mismo: la tabla se conserva y al final solo cambia lo distinto
+        en_flujo = cliente_id != self.cliente_mostrado
+        if en_flujo:
+            self.rentas_cliente = []
+            self.cliente_mostrado = cliente_id
+            self.tabla_incremental.limpiar()
+            self.label_resumen.setText("Cargando...")
+        
+        def lote(rentas):
+            if consulta == self._consulta:
+                self.agregar_filas(rentas)
+                self.label_resumen.setText(f"Cargando... {len(self.tabla_incremental.filas)} rentas recibidas")
+        
+        def terminado(resultado):
+            self._tareas.discard(tarea)
+            if consulta != self._consulta:
+                return
+            exito, resultado = resultado
+            
+            if not exito:
+                self.rentas_cliente = []
+                self.cliente_mostrado = None
+                self.tabla_incremental.limpiar()
+                self.label_resumen.setText("Selecciona un cliente para ver sus rentas")
+                QMessageBox.critical(self, "Error", f"No se pudieron obtener las rentas:\n{resultado}")
+                return
+            
+            if en_flujo:
+                self.mostrar_rentas(resultado, agregadas=len(self.tabla_incremental.filas))
+            else:
+                self.mostrar_rentas(resultado)
+            
+            if not resultado:
+                QMessageBox.information(self, "Sin Rentas", "Este cliente no tiene rentas registradas")
+        
+        tarea = ejecutar_en_segundo_plano(
+            self.reportes_controller.obtener_rentas_cliente, cliente_id, usar_cache=True,
+            al_terminar=terminado,
+            al_fallar=lambda mensaje: terminado((False, mensaje)),
+            al_lote=lote if en_flujo else None
+        )
+        self._tareas.add(tarea)
+    
+    def al_cambiar_renta(self, evento):
+        """
+        Vuelve a pedir (en segundo plano) las rentas del cliente a la vista si
+        otra caja cambió una de ellas; solo se aplican las filas distintas
+        """
+        cliente_id = self.cliente_mostrado
+        if cliente_id is None:
+            return
+        if evento['tipo'] != 'reinicio' and evento['datos'].get('customer_id') != cliente_id:
+            return
+        
+        self._consulta += 1
+        consulta = self._consulta
+        
+        def terminado(resultado):
+            self._tareas.discard(tarea)
+            exito, resultado = resultado
+            # Si falla se quedan las filas anteriores; la próxima consulta las corrige
+            if consulta == self._consulta and exito:
+                self.mostrar_rentas(resultado)
         
-        if not exito:
-            QMessageBox.critical(self, "Error", f"No se pudieron obtener las rentas:\n{resultado}")
+        tarea = ejecutar_en_segundo_plano(
+            self.reportes_controller.obtener_rentas_cliente, cliente_id, usar_cache=True,
+            al_terminar=terminado,
+            al_fallar=lambda mensaje: terminado((False, mensaje))
+        )
+        self._tareas.add(tarea)
+    
+    def buscar_rentas_local(self, texto):
+        """
+        Búsqueda sin red para el type-ahead
+        
+        Returns:
+            tuple: (respondido, resultado)
+        """
+        if not texto.isdigit():
+            return True, None
+        rentas = self.reportes_controller.obtener_rentas_cliente_local(texto)
+        if rentas is None:
+            return False, None
+        return True, (True, rentas)
+    
+    def mostrar_busqueda(self, texto, resultado):
+        """
+        Muestra las rentas del cliente mientras se escribe (sin diálogos)
+        """
+        if resultado is None:
             return
+        exito, rentas = resultado
+        if exito:
+            # Una respuesta de la búsqueda anticipada reemplaza cualquier consulta en curso
+            self._consulta += 1
+            self.cliente_mostrado = int(texto)
+            self.mostrar_rentas(rentas)
+    
+    def mostrar_rentas(self, resultado, agregadas=None):
+        """
+        Llena el resumen y la tabla con las rentas de un cliente
+        
+        Args:
+            resultado: Lista de objetos Renta
+            agregadas: Filas de 'resultado' que ya están en la tabla (lectura
+                       en flujo); None para dejar en la tabla exactamente
+                       'resultado', tocando solo las filas que cambiaron
+        """
+        self.rentas_cliente = resultado
         
         # ✅ MEJORADO: Manejar conversión de tipos
         total_rentas = len(resultado)
@@ -150,116 +282,76 @@ class ClienteReporteView(QWidget):
         )
         
         # Llenar tabla
-        self.tabla_rentas.setRowCount(0)
+        if agregadas is None:
+            self.tabla_incremental.mostrar(self._fila(renta) for renta in resultado)
+        else:
+            self.agregar_filas(resultado[agregadas:])
+    
+    def agregar_filas(self, rentas):
+        """
+        Agrega rentas al final de la tabla
         
-        # ✅ CORRECCIÓN CRÍTICA: Procesar cada renta individualmente
-        for renta in resultado:
-            row = self.tabla_rentas.rowCount()
-            self.tabla_rentas.insertRow(row)
-            
-            # Columna 0: ID
-            item_id = QTableWidgetItem(str(renta.id))
-            
-            # Columna 1: DVD
-            dvd_titulo = renta.dvd.titulo if renta.dvd else (renta.title or f"ID: {renta.film_id}")
-            item_dvd = QTableWidgetItem(dvd_titulo)
-            
-            # ✅ Columna 2: Staff (CORREGIDO)
-            if renta.staff:
-                staff_nombre = renta.staff.nombre
-            elif renta.staff_name:
-                staff_nombre = renta.staff_name
-            elif renta.staff_id:
-                staff_nombre = f"ID: {renta.staff_id}"
-            else:
-                staff_nombre = "N/A"
-            item_staff = QTableWidgetItem(staff_nombre)
-            
-            # Columna 3: Fecha Renta
-            item_fecha_renta = QTableWidgetItem(str(renta.fecha_renta) if renta.fecha_renta else "N/A")
-            
-            # Columna 4: Fecha Devolución Esperada
-            fecha_esp = renta.fecha_devolucion_esperada if renta.fecha_devolucion_esperada else "N/A"
-            item_fecha_esp = QTableWidgetItem(str(fecha_esp))
-            
-            # Columna 5: Fecha Devolución Real
-            fecha_real = renta.fecha_devolucion_real if renta.fecha_devolucion_real else "Pendiente"
-            item_fecha_real = QTableWidgetItem(str(fecha_real))
-            
-            # Columna 6: Monto
-            try:
-                monto_valor = float(renta.monto) if renta.monto else 0.0
-            except (ValueError, TypeError):
-                monto_valor = 0.0
-            item_monto = QTableWidgetItem(f"${monto_valor:.2f}")
-            
-            # Columna 7: Estado
-            estado_texto = renta.estado.capitalize()
-            item_estado = QTableWidgetItem(estado_texto)
-            
-            # Columna 8: Retraso
-            if renta.estado == 'activa':
-                dias_retraso = renta.calcular_dias_retraso()
-                if dias_retraso > 0:
-                    item_retraso = QTableWidgetItem(f"{dias_retraso} días")
-                else:
-                    item_retraso = QTableWidgetItem("A tiempo")
-            else:
-                item_retraso = QTableWidgetItem("-")
-            
-            # Insertar items en la tabla
-            self.tabla_rentas.setItem(row, 0, item_id)
-            self.tabla_rentas.setItem(row, 1, item_dvd)
-            self.tabla_rentas.setItem(row, 2, item_staff)
-            self.tabla_rentas.setItem(row, 3, item_fecha_renta)
-            self.tabla_rentas.setItem(row, 4, item_fecha_esp)
-            self.tabla_rentas.setItem(row, 5, item_fecha_real)
-            self.tabla_rentas.setItem(row, 6, item_monto)
-            self.tabla_rentas.setItem(row, 7, item_estado)
-            self.tabla_rentas.setItem(row, 8, item_retraso)
-        
-        if not resultado:
-            QMessageBox.information(self, "Sin Rentas", "Este cliente no tiene rentas registradas")
+        Args:
+            rentas: Lista de objetos Renta
+        """
+        self.tabla_incremental.agregar(self._fila(renta) for renta in rentas)
+    
+    def _fila(self, renta):
+        """
+        Clave y valores de la fila de una renta
+        """
+        dvd_titulo = renta.dvd.titulo if renta.dvd else (renta.title or f"ID: {renta.film_id}")
+        
+        # ✅ Staff (CORREGIDO)
+        if renta.staff:
+            staff_nombre = renta.staff.nombre
+        elif renta.staff_name:
+            staff_nombre = renta.staff_name
+        elif renta.staff_id:
+            staff_nombre = f"ID: {renta.staff_id}"
+        else:
+            staff_nombre = "N/A"
+        
+        fecha_renta = str(renta.fecha_renta) if renta.fecha_renta else "N/A"
+        fecha_esp = renta.fecha_devolucion_esperada if renta.fecha_devolucion_esperada else "N/A"
+        fecha_real = renta.fecha_devolucion_real if renta.fecha_devolucion_real else "Pendiente"
+        
+        try:
+            monto_valor = float(renta.monto) if renta.monto else 0.0
+        except (ValueError, TypeError):
+            monto_valor = 0.0
+        
+        if renta.estado == 'activa':
+            dias_retraso = renta.calcular_dias_retraso()
+            retraso = f"{dias_retraso} días" if dias_retraso > 0 else "A tiempo"
+        else:
+            retraso = "-"
+        
+        return renta.id, (
+            str(renta.id), dvd_titulo, staff_nombre, fecha_renta, str(fecha_esp),
+            str(fecha_real), f"${monto_valor:.2f}", renta.estado.capitalize(), retraso
+        )
+    
+    def pintar_fila(self, row, valores):
+        """
+        Llena las celdas de una fila de la tabla
+        """
+        for columna, valor in enumerate(valores):
+            self.tabla_rentas.setItem(row, columna, QTableWidgetItem(valor))
     
     def exportar_csv(self):
         """
-        Exporta los datos de la tabla a CSV
+        Exporta las rentas del cliente desde los datos cargados (no desde la tabla)
         """
-        if self.tabla_rentas.rowCount() == 0:
+        if not self.rentas_cliente:
             QMessageBox.warning(self, "Sin Datos", "No hay datos para exportar")
             return
         
-        try:
-            from PyQt6.QtWidgets import QFileDialog
-            import csv
-            
-            archivo, _ = QFileDialog.getSaveFileName(
-                self,
-                "Guardar Reporte",
-                "reporte_cliente.csv",
-                "CSV Files (*.csv)"
-            )
-            
-            if archivo:
-                with open(archivo, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    
-                    headers = []
-                    for col in range(self.tabla_rentas.columnCount()):
-                        headers.append(self.tabla_rentas.horizontalHeaderItem(col).text())
-                    writer.writerow(headers)
-                    
-                    for row in range(self.tabla_rentas.rowCount()):
-                        row_data = []
-                        for col in range(self.tabla_rentas.columnCount()):
-                            item = self.tabla_rentas.item(row, col)
-                            row_data.append(item.text() if item else "")
-                        writer.writerow(row_data)
-                
-                QMessageBox.information(self, "Éxito", f"Reporte exportado a:\n{archivo}")
-        
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo exportar el archivo:\n{str(e)}")
+        columnas, filas = self.reportes_controller.datos_exportacion_rentas_cliente(self.rentas_cliente)
+        exportar_en_segundo_plano(
+            self, "Guardar Reporte", "reporte_cliente",
+            columnas, filas, total=len(self.rentas_cliente)
+        )
     
     def volver_inicio(self):
         """
@@ -3,17 +3,31 @@ Vista de reporte: Ganancias por Staff
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QMessageBox,
+    QLabel, QPushButton, QMessageBox, QCheckBox,
     QTableWidget, QTableWidgetItem, QHeaderView
 )
 from PyQt6.QtCore import Qt
 from controllers.reportes_controller import ReportesController
+from views.exportacion import exportar_en_segundo_plano
+from views.trabajador import ejecutar_en_segundo_plano
+from views.revalidacion import Revalidador
+from views.tabla_incremental import TablaIncremental
+from views.eventos import obtener_puente_eventos
+from utils.config import REVALIDACION_GANANCIAS_MS
 
 class GananciasReporteView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.reportes_controller = ReportesController()
+        # Versión de los agregados locales que se muestra (None = datos del servidor)
+        self.version_mostrada = None
+        self.ganancias = []
+        self._carga = None
+        self._consulta = 0
+        self._manual = False
         self.init_ui()
+        obtener_puente_eventos().renta_cambiada.connect(self.al_cambiar_renta)
+        self.mostrar_ultimo_resultado()
         self.cargar_reporte()
     
     def init_ui(self):
@@ -27,16 +41,32 @@ class GananciasReporteView(QWidget):
         titulo.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px;")
         layout.addWidget(titulo)
         
-        # Resumen
+        # Resumen e indicador de frescura
+        self.revalidador = Revalidador(self, self.revalidar, REVALIDACION_GANANCIAS_MS)
+        resumen_layout = QHBoxLayout()
         self.label_resumen = QLabel("Cargando...")
         self.label_resumen.setStyleSheet("padding: 10px; font-weight: bold;")
-        layout.addWidget(self.label_resumen)
+        resumen_layout.addWidget(self.label_resumen)
+        resumen_layout.addStretch()
+        resumen_layout.addWidget(self.revalidador.indicador)
+        layout.addLayout(resumen_layout)
         
         # Botón actualizar
         btn_actualizar = QPushButton("🔄 Actualizar Reporte")
         btn_actualizar.setStyleSheet("background-color: #2196F3; color: white; padding: 8px;")
         btn_actualizar.clicked.connect(self.cargar_reporte)
-        layout.addWidget(btn_actualizar)
+        
+        self.check_local = QCheckBox("Calcular con datos locales")
+        self.check_local.setToolTip(
+            "Sincroniza el historial una vez y actualiza el reporte con los "
+            "cambios registrados desde entonces"
+        )
+        self.check_local.toggled.connect(self.cambiar_fuente)
+        
+        actualizar_layout = QHBoxLayout()
+        actualizar_layout.addWidget(btn_actualizar)
+        actualizar_layout.addWidget(self.check_local)
+        layout.addLayout(actualizar_layout)
         
         # Tabla de ganancias
         self.tabla_ganancias = QTableWidget()
@@ -48,6 +78,7 @@ class GananciasReporteView(QWidget):
         self.tabla_ganancias.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.tabla_ganancias.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         layout.addWidget(self.tabla_ganancias)
+        self.tabla_incremental = TablaIncremental(self.tabla_ganancias, self.pintar_fila)
         
         # Botones de acción
         botones_layout = QHBoxLayout()
@@ -58,7 +89,7 @@ class GananciasReporteView(QWidget):
         
         botones_layout.addStretch()
         
-        btn_exportar = QPushButton("📄 Exportar a CSV")
+        btn_exportar = QPushButton("📄 Exportar")
         btn_exportar.clicked.connect(self.exportar_csv)
         botones_layout.addWidget(btn_exportar)
         
@@ -66,121 +97,180 @@ class GananciasReporteView(QWidget):
         
         self.setLayout(layout)
     
+    def mostrar_ultimo_resultado(self):
+        """
+        Muestra al instante las últimas ganancias del servidor guardadas en
+        caché, aunque estén vencidas
+        """
+        ganancias, edad = self.reportes_controller.ultimas_ganancias_staff()
+        if ganancias is None:
+            return
+        self.mostrar_ganancias(ganancias)
+        self.revalidador.terminar(True, edad=edad)
+    
     def cargar_reporte(self):
-            """
-            Carga el reporte de ganancias por staff
-            """
-            exito, resultado = self.reportes_controller.obtener_ganancias_staff()
-            
-            if not exito:
-                QMessageBox.critical(self, "Error", f"No se pudo cargar el reporte:\n{resultado}")
+        """
+        Carga el reporte de ganancias por staff (botón Actualizar)
+        """
+        self.revalidar(manual=True)
+    
+    def revalidar(self, manual=False):
+        """
+        Actualiza el reporte sin vaciar la tabla
+        
+        Con datos locales se recalcula aquí mismo, y solo si hubo cambios
+        desde el último refresco; los del servidor se piden en segundo plano.
+        
+        Args:
+            manual: La pidió el usuario (los errores se muestran en un diálogo;
+                    en las automáticas solo en el indicador)
+        """
+        if self.check_local.isChecked():
+            agregados = self.reportes_controller.motor.agregados
+            if self.version_mostrada == agregados.version:
+                # Ningún cambio desde el último refresco
+                self.revalidador.terminar(True)
                 return
+            self._manual = manual
+            self.revalidador.iniciar()
+            exito, resultado = self.reportes_controller.obtener_ganancias_staff_local()
+            self._carga_terminada(self._consulta, agregados.version, (exito, resultado))
+            return
+        
+        if self._carga is not None:
+            return
+        
+        self._manual = manual
+        self.revalidador.iniciar()
+        consulta = self._consulta
+        self._carga = ejecutar_en_segundo_plano(
+            self.reportes_controller.obtener_ganancias_staff,
+            al_terminar=lambda resultado: self._carga_terminada(consulta, None, resultado),
+            al_fallar=lambda mensaje: self._carga_terminada(consulta, None, (False, mensaje))
+        )
+    
+    def al_cambiar_renta(self, evento):
+        """
+        Cualquier renta creada, devuelta o cancelada en otra caja cambia los
+        totales: se revalida (con datos locales solo se recalcula)
+        """
+        self.revalidador.invalidar()
+    
+    def _carga_terminada(self, consulta, version, resultado):
+        """
+        Muestra el resultado de una carga (si sigue siendo de la fuente elegida)
+        """
+        if consulta != self._consulta:
+            # Se cambió de fuente mientras llegaba la respuesta
+            return
+        if version is None:
+            self._carga = None
+        
+        exito, resultado = resultado
+        self.revalidador.terminar(exito, error=None if exito else resultado)
+        
+        if not exito:
+            if self._manual or not self.ganancias:
+                QMessageBox.critical(self, "Error", f"No se pudo cargar el reporte:\n{resultado}")
+            return
+        
+        self.version_mostrada = version
+        self.mostrar_ganancias(resultado)
+        
+        if not resultado and self._manual:
+            QMessageBox.information(self, "Sin Datos", "No hay información de ganancias disponible")
+    
+    def mostrar_ganancias(self, resultado):
+        """
+        Actualiza el resumen y aplica a la tabla solo las filas que cambiaron
+        """
+        self.ganancias = resultado
+        
+        # Actualizar resumen
+        total_staff = len(resultado)
+        if total_staff > 0:
+            # ✅ CORRECCIÓN: Convertir a int/float para evitar error de tipos
+            try:
+                total_rentas = sum(int(item.get('total_rentas', 0)) for item in resultado)
+            except (ValueError, TypeError):
+                total_rentas = 0
             
-            # Actualizar resumen
-            total_staff = len(resultado)
-            if total_staff > 0:
-                # ✅ CORRECCIÓN: Convertir a int/float para evitar error de tipos
-                try:
-                    total_rentas = sum(int(item.get('total_rentas', 0)) for item in resultado)
-                except (ValueError, TypeError):
-                    total_rentas = 0
-                
-                try:
-                    total_ganancias = sum(float(item.get('ganancia_total', 0.0)) for item in resultado)
-                except (ValueError, TypeError):
-                    total_ganancias = 0.0
-                
-                self.label_resumen.setText(
-                    f"Total de Empleados: {total_staff} | "
-                    f"Total Rentas Gestionadas: {total_rentas} | "
-                    f"Ganancias Totales: ${total_ganancias:.2f}"
-                )
-            else:
-                self.label_resumen.setText("No hay datos disponibles")
-            
-            # Llenar tabla
-            self.tabla_ganancias.setRowCount(0)
-            
-            datos_tabla = self.reportes_controller.formatear_datos_tabla_ganancias(resultado)
+            try:
+                total_ganancias = sum(float(item.get('ganancia_total', 0.0)) for item in resultado)
+            except (ValueError, TypeError):
+                total_ganancias = 0.0
             
-            for datos_fila in datos_tabla:
-                row = self.tabla_ganancias.rowCount()
-                self.tabla_ganancias.insertRow(row)
-                
-                # Nombre del staff
-                self.tabla_ganancias.setItem(row, 0, QTableWidgetItem(str(datos_fila[0])))
-                
-                # Total de rentas
-                item_rentas = QTableWidgetItem(str(datos_fila[1]))
-                item_rentas.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.tabla_ganancias.setItem(row, 1, item_rentas)
-                
-                # Ganancia total
-                ganancia_texto = str(datos_fila[2])
-                item_ganancia = QTableWidgetItem(ganancia_texto)
-                item_ganancia.setTextAlignment(Qt.AlignmentFlag.AlignRight)
-                
-                # Colorear según ganancia
-                try:
-                    # Remover el símbolo $ y convertir a float
-                    ganancia_limpia = ganancia_texto.replace('$', '').strip()
-                    ganancia_valor = float(ganancia_limpia)
-                    
-                    if ganancia_valor >= 1000:
-                        item_ganancia.setBackground(Qt.GlobalColor.green)
-                        item_ganancia.setForeground(Qt.GlobalColor.white)
-                    elif ganancia_valor >= 500:
-                        item_ganancia.setBackground(Qt.GlobalColor.yellow)
-                except (ValueError, TypeError):
-                    # Si hay error en la conversión, simplemente no colorear
-                    pass
-                
-                self.tabla_ganancias.setItem(row, 2, item_ganancia)
+            self.label_resumen.setText(
+                f"Total de Empleados: {total_staff} | "
+                f"Total Rentas Gestionadas: {total_rentas} | "
+                f"Ganancias Totales: ${total_ganancias:.2f}"
+            )
+        else:
+            self.label_resumen.setText("No hay datos disponibles")
+        
+        # Llenar tabla (clave: staff_id)
+        datos_tabla = self.reportes_controller.formatear_datos_tabla_ganancias(resultado)
+        self.tabla_incremental.mostrar(
+            (item.get('staff_id', datos_fila[0]), tuple(datos_fila))
+            for item, datos_fila in zip(resultado, datos_tabla)
+        )
+    
+    def pintar_fila(self, row, datos_fila):
+        """
+        Llena las celdas de una fila de la tabla
+        """
+        # Nombre del staff
+        self.tabla_ganancias.setItem(row, 0, QTableWidgetItem(str(datos_fila[0])))
+        
+        # Total de rentas
+        item_rentas = QTableWidgetItem(str(datos_fila[1]))
+        item_rentas.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.tabla_ganancias.setItem(row, 1, item_rentas)
+        
+        # Ganancia total
+        ganancia_texto = str(datos_fila[2])
+        item_ganancia = QTableWidgetItem(ganancia_texto)
+        item_ganancia.setTextAlignment(Qt.AlignmentFlag.AlignRight)
+        
+        # Colorear según ganancia
+        try:
+            # Remover el símbolo $ y convertir a float
+            ganancia_limpia = ganancia_texto.replace('$', '').strip()
+            ganancia_valor = float(ganancia_limpia)
             
-            if not resultado:
-                QMessageBox.information(self, "Sin Datos", "No hay información de ganancias disponible")
+            if ganancia_valor >= 1000:
+                item_ganancia.setBackground(Qt.GlobalColor.green)
+                item_ganancia.setForeground(Qt.GlobalColor.white)
+            elif ganancia_valor >= 500:
+                item_ganancia.setBackground(Qt.GlobalColor.yellow)
+        except (ValueError, TypeError):
+            # Si hay error en la conversión, simplemente no colorear
+            pass
+        
+        self.tabla_ganancias.setItem(row, 2, item_ganancia)
+    
+    def cambiar_fuente(self):
+        """
+        Cambia entre datos del servidor y datos locales y recarga
+        """
+        self.version_mostrada = None
+        self._consulta += 1
+        self._carga = None
+        self.revalidar(manual=True)
     
     def exportar_csv(self):
         """
-        Exporta los datos de la tabla a CSV
+        Exporta el reporte desde los datos cargados (no desde la tabla)
         """
-        if self.tabla_ganancias.rowCount() == 0:
+        if not self.ganancias:
             QMessageBox.warning(self, "Sin Datos", "No hay datos para exportar")
             return
         
-        try:
-            from PyQt6.QtWidgets import QFileDialog
-            import csv
-            
-            archivo, _ = QFileDialog.getSaveFileName(
-                self,
-                "Guardar Reporte",
-                "reporte_ganancias_staff.csv",
-                "CSV Files (*.csv)"
-            )
-            
-            if archivo:
-                with open(archivo, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    
-                    # Escribir encabezados
-                    headers = []
-                    for col in range(self.tabla_ganancias.columnCount()):
-                        headers.append(self.tabla_ganancias.horizontalHeaderItem(col).text())
-                    writer.writerow(headers)
-                    
-                    # Escribir datos
-                    for row in range(self.tabla_ganancias.rowCount()):
-                        row_data = []
-                        for col in range(self.tabla_ganancias.columnCount()):
-                            item = self.tabla_ganancias.item(row, col)
-                            row_data.append(item.text() if item else "")
-                        writer.writerow(row_data)
-                
-                QMessageBox.information(self, "Éxito", f"Reporte exportado a:\n{archivo}")
-        
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo exportar el archivo:\n{str(e)}")
+        columnas, filas = self.reportes_controller.datos_exportacion_ganancias(self.ganancias)
+        exportar_en_segundo_plano(
+            self, "Guardar Reporte", "reporte_ganancias_staff",
+            columnas, filas, total=len(self.ganancias)
+        )
     
     def volver_inicio(self):
         """
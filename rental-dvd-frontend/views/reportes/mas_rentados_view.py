@@ -3,17 +3,27 @@ Vista de reporte: DVDs Más Rentados
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QPushButton, QMessageBox,
-    QTableWidget, QTableWidgetItem, QHeaderView
+    QLabel, QPushButton, QMessageBox, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView,
+    QSpinBox, QComboBox
 )
 from PyQt6.QtCore import Qt
 from controllers.reportes_controller import ReportesController
+from views.exportacion import exportar_en_segundo_plano
+from views.tabla_incremental import TablaIncremental
+from views.eventos import obtener_puente_eventos
+from services.ranking import RankingTopK
+from utils.config import LIMITE_RANKING_COMPLETO
 
 class MasRentadosReporteView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.reportes_controller = ReportesController()
+        # Versión de los agregados locales que se muestra (None = datos del servidor)
+        self.version_mostrada = None
+        self.ranking = RankingTopK(k=10)
         self.init_ui()
+        obtener_puente_eventos().renta_cambiada.connect(self.al_cambiar_renta)
         self.cargar_reporte()
     
     def init_ui(self):
@@ -36,7 +46,43 @@ class MasRentadosReporteView(QWidget):
         btn_actualizar = QPushButton("🔄 Actualizar Ranking")
         btn_actualizar.setStyleSheet("background-color: #2196F3; color: white; padding: 8px;")
         btn_actualizar.clicked.connect(self.cargar_reporte)
-        layout.addWidget(btn_actualizar)
+        
+        self.check_local = QCheckBox("Calcular con datos locales")
+        self.check_local.setToolTip(
+            "Sincroniza el historial una vez y actualiza el reporte con los "
+            "cambios registrados desde entonces"
+        )
+        self.check_local.toggled.connect(self.cambiar_fuente)
+        
+        actualizar_layout = QHBoxLayout()
+        actualizar_layout.addWidget(btn_actualizar)
+        actualizar_layout.addWidget(self.check_local)
+        layout.addLayout(actualizar_layout)
+        
+        # Filtros (se aplican sobre los datos ya cargados, sin nueva petición)
+        filtros_layout = QHBoxLayout()
+        
+        self.spin_k = QSpinBox()
+        self.spin_k.setRange(1, LIMITE_RANKING_COMPLETO)
+        self.spin_k.setValue(self.ranking.k)
+        self.spin_k.valueChanged.connect(self.aplicar_filtros)
+        filtros_layout.addWidget(QLabel("Mostrar top:"))
+        filtros_layout.addWidget(self.spin_k)
+        
+        self.combo_categoria = QComboBox()
+        self.combo_categoria.addItem("Todas", None)
+        self.combo_categoria.currentIndexChanged.connect(self.aplicar_filtros)
+        filtros_layout.addWidget(QLabel("Categoría:"))
+        filtros_layout.addWidget(self.combo_categoria)
+        
+        self.combo_rating = QComboBox()
+        self.combo_rating.addItem("Todos", None)
+        self.combo_rating.currentIndexChanged.connect(self.aplicar_filtros)
+        filtros_layout.addWidget(QLabel("Clasificación:"))
+        filtros_layout.addWidget(self.combo_rating)
+        
+        filtros_layout.addStretch()
+        layout.addLayout(filtros_layout)
         
         # Tabla de ranking
         self.tabla_ranking = QTableWidget()
@@ -47,6 +93,7 @@ class MasRentadosReporteView(QWidget):
         self.tabla_ranking.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.tabla_ranking.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.tabla_ranking.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabla_incremental = TablaIncremental(self.tabla_ranking, self.pintar_fila)
         layout.addWidget(self.tabla_ranking)
         
         # Botones de acción
@@ -58,7 +105,7 @@ class MasRentadosReporteView(QWidget):
         
         botones_layout.addStretch()
         
-        btn_exportar = QPushButton("📄 Exportar a CSV")
+        btn_exportar = QPushButton("📄 Exportar")
         btn_exportar.clicked.connect(self.exportar_csv)
         botones_layout.addWidget(btn_exportar)
         
@@ -67,110 +114,205 @@ class MasRentadosReporteView(QWidget):
         self.setLayout(layout)
     
     def cargar_reporte(self):
-            """
-            Carga el reporte de DVDs más rentados
-            """
-            exito, resultado = self.reportes_controller.obtener_dvds_mas_rentados()
-            
-            if not exito:
-                QMessageBox.critical(self, "Error", f"No se pudo cargar el reporte:\n{resultado}")
-                return
-            
-            # Actualizar resumen
-            total_dvds = len(resultado)
-            if total_dvds > 0:
-                # ✅ CORRECCIÓN: Convertir a int para evitar error de tipos
-                try:
-                    total_rentas = sum(int(item.get('total_rentas', 0)) for item in resultado)
-                except (ValueError, TypeError):
-                    total_rentas = 0
-                
-                self.label_resumen.setText(
-                    f"Total de DVDs: {total_dvds} | "
-                    f"Total de Rentas: {total_rentas}"
-                )
-            else:
-                self.label_resumen.setText("No hay datos disponibles")
-            
-            # Llenar tabla
-            self.tabla_ranking.setRowCount(0)
-            
-            datos_tabla = self.reportes_controller.formatear_datos_tabla_ranking(resultado)
-            
-            for posicion, datos_fila in enumerate(datos_tabla, start=1):
-                row = self.tabla_ranking.rowCount()
-                self.tabla_ranking.insertRow(row)
-                
-                # Posición
-                item_pos = QTableWidgetItem(str(posicion))
-                item_pos.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                
-                # Colorear top 3
-                if posicion == 1:
-                    item_pos.setBackground(Qt.GlobalColor.yellow)
-                    item_pos.setText(f"🥇 {posicion}")
-                elif posicion == 2:
-                    item_pos.setBackground(Qt.GlobalColor.lightGray)
-                    item_pos.setText(f"🥈 {posicion}")
-                elif posicion == 3:
-                    item_pos.setBackground(Qt.GlobalColor.darkYellow)
-                    item_pos.setText(f"🥉 {posicion}")
-                
-                self.tabla_ranking.setItem(row, 0, item_pos)
-                
-                # Datos del DVD
-                self.tabla_ranking.setItem(row, 1, QTableWidgetItem(str(datos_fila[0])))  # Título
-                self.tabla_ranking.setItem(row, 2, QTableWidgetItem(str(datos_fila[1])))  # Género
-                
-                # Total rentas
-                item_total = QTableWidgetItem(str(datos_fila[2]))
-                item_total.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.tabla_ranking.setItem(row, 3, item_total)
-            
-            if not resultado:
-                QMessageBox.information(self, "Sin Datos", "No hay información de rentas disponible")
+        """
+        Carga los conteos por película y muestra el ranking
+        """
+        if self.check_local.isChecked():
+            agregados = self.reportes_controller.motor.agregados
+            if self.version_mostrada is not None:
+                cambios = agregados.cambios_desde(self.version_mostrada)
+                if cambios is not None:
+                    # Aplicar solo las películas que cambiaron
+                    self.actualizar_conteos(cambios['peliculas'])
+                    self.version_mostrada = agregados.version
+                    self.mostrar_ranking()
+                    return
+            exito, resultado = self.reportes_controller.obtener_dvds_mas_rentados_local(limite=None)
+            version = agregados.version
+        else:
+            exito, resultado = self.reportes_controller.obtener_dvds_mas_rentados(
+                limite=LIMITE_RANKING_COMPLETO
+            )
+            version = None
+        
+        if not exito:
+            QMessageBox.critical(self, "Error", f"No se pudo cargar el reporte:\n{resultado}")
+            return
+        
+        self.version_mostrada = version
+        self.ranking.cargar(resultado)
+        self.poblar_filtros()
+        self.mostrar_ranking()
+        
+        if not resultado:
+            QMessageBox.information(self, "Sin Datos", "No hay información de rentas disponible")
+    
+    def actualizar_conteos(self, film_ids):
+        """
+        Lleva al ranking los conteos actuales de los agregados locales
+        
+        Args:
+            film_ids: IDs de las películas que cambiaron
+        """
+        motor = self.reportes_controller.motor
+        for film_id in film_ids:
+            total, _, _, ingresos = motor.agregados.totales_pelicula(film_id)
+            pelicula = motor.peliculas.get(film_id, {})
+            self.ranking.actualizar(
+                film_id, total, ingresos,
+                titulo=pelicula.get('title'),
+                genero=pelicula.get('category'),
+                rating=pelicula.get('rating')
+            )
+    
+    def al_cambiar_renta(self, evento):
+        """
+        Lleva al ranking a la vista una renta creada, devuelta o cancelada en otra caja
+        """
+        if self.check_local.isChecked():
+            if evento['tipo'] == 'reinicio':
+                # Los datos locales se descartaron: se recalcula al actualizar
+                self.version_mostrada = None
+            elif self.version_mostrada is not None:
+                self.cargar_reporte()
+            return
+        
+        datos = evento['datos']
+        entrada = self.ranking.entradas.get(datos.get('film_id'))
+        if entrada is None:
+            # Película fuera de las que se pidieron al servidor
+            return
+        total, ingresos = entrada.total_rentas, entrada.total_revenue
+        if evento['tipo'] == 'creada':
+            total += 1
+        elif evento['tipo'] == 'cancelada':
+            total -= 1
+        else:
+            ingresos += float(datos.get('total_amount') or 0)
+        self.ranking.actualizar(entrada.film_id, total, ingresos)
+        self.mostrar_ranking()
+    
+    def poblar_filtros(self):
+        """
+        Llena los combos de categoría y clasificación con los datos cargados
+        """
+        for combo, valores, etiqueta in (
+            (self.combo_categoria, self.ranking.categorias(), "Todas"),
+            (self.combo_rating, self.ranking.ratings(), "Todos")
+        ):
+            seleccion = combo.currentData()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(etiqueta, None)
+            for valor in valores:
+                combo.addItem(valor, valor)
+            indice = combo.findData(seleccion)
+            combo.setCurrentIndex(indice if indice >= 0 else 0)
+            combo.blockSignals(False)
+    
+    def aplicar_filtros(self):
+        """
+        Aplica K y los filtros al ranking sin volver a consultar el servidor
+        """
+        self.ranking.k = self.spin_k.value()
+        self.ranking.filtrar(
+            categoria=self.combo_categoria.currentData(),
+            rating=self.combo_rating.currentData()
+        )
+        self.mostrar_ranking()
+    
+    def mostrar_ranking(self):
+        """
+        Pinta en la tabla el top actual del ranking
+        """
+        entradas = self.ranking.top()
+        
+        # Actualizar resumen
+        if entradas:
+            total_rentas = sum(entrada.total_rentas for entrada in entradas)
+            self.label_resumen.setText(
+                f"Total de DVDs: {len(entradas)} | "
+                f"Total de Rentas: {total_rentas}"
+            )
+        else:
+            self.label_resumen.setText("No hay datos disponibles")
+        
+        # Llenar tabla: la posición va en los valores, así que subir o bajar
+        # en el ranking repinta solo las filas entre la posición vieja y la nueva
+        datos_tabla = self.reportes_controller.formatear_datos_tabla_ranking(entradas)
+        self.tabla_incremental.mostrar(
+            (entrada.film_id, (posicion, *datos_fila))
+            for posicion, (entrada, datos_fila) in enumerate(zip(entradas, datos_tabla), start=1)
+        )
+    
+    def pintar_fila(self, row, valores):
+        """
+        Llena las celdas de una fila de la tabla
+        """
+        posicion, titulo, genero, total_rentas = valores
+        
+        # Posición
+        item_pos = QTableWidgetItem(str(posicion))
+        item_pos.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        # Colorear top 3
+        if posicion == 1:
+            item_pos.setBackground(Qt.GlobalColor.yellow)
+            item_pos.setText(f"🥇 {posicion}")
+        elif posicion == 2:
+            item_pos.setBackground(Qt.GlobalColor.lightGray)
+            item_pos.setText(f"🥈 {posicion}")
+        elif posicion == 3:
+            item_pos.setBackground(Qt.GlobalColor.darkYellow)
+            item_pos.setText(f"🥉 {posicion}")
+        
+        self.tabla_ranking.setItem(row, 0, item_pos)
+        
+        # Datos del DVD
+        self.tabla_ranking.setItem(row, 1, QTableWidgetItem(str(titulo)))
+        self.tabla_ranking.setItem(row, 2, QTableWidgetItem(str(genero)))
+        
+        # Total rentas
+        item_total = QTableWidgetItem(str(total_rentas))
+        item_total.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.tabla_ranking.setItem(row, 3, item_total)
+    
+    def cambiar_fuente(self):
+        """
+        Cambia entre datos del servidor y datos locales y recarga
+        """
+        self.version_mostrada = None
+        self.cargar_reporte()
     
     def exportar_csv(self):
         """
-        Exporta los datos de la tabla a CSV
+        Exporta el ranking desde los datos cargados (no desde la tabla)
+        
+        Si hay más películas que las K mostradas, permite exportar el ranking
+        completo del filtro actual.
         """
-        if self.tabla_ranking.rowCount() == 0:
+        entradas = self.ranking.top()
+        if not entradas:
             QMessageBox.warning(self, "Sin Datos", "No hay datos para exportar")
             return
         
-        try:
-            from PyQt6.QtWidgets import QFileDialog
-            import csv
-            
-            archivo, _ = QFileDialog.getSaveFileName(
+        todas = self.ranking.todas()
+        if len(todas) > len(entradas):
+            respuesta = QMessageBox.question(
                 self,
-                "Guardar Ranking",
-                "ranking_dvds_mas_rentados.csv",
-                "CSV Files (*.csv)"
+                "Exportar Ranking",
+                f"¿Exportar el ranking completo ({len(todas)} DVDs)?\n\n"
+                f"Elige 'No' para exportar solo los {len(entradas)} mostrados.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
             )
-            
-            if archivo:
-                with open(archivo, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    
-                    # Escribir encabezados
-                    headers = []
-                    for col in range(self.tabla_ranking.columnCount()):
-                        headers.append(self.tabla_ranking.horizontalHeaderItem(col).text())
-                    writer.writerow(headers)
-                    
-                    # Escribir datos
-                    for row in range(self.tabla_ranking.rowCount()):
-                        row_data = []
-                        for col in range(self.tabla_ranking.columnCount()):
-                            item = self.tabla_ranking.item(row, col)
-                            row_data.append(item.text() if item else "")
-                        writer.writerow(row_data)
-                
-                QMessageBox.information(self, "Éxito", f"Ranking exportado a:\n{archivo}")
-        
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo exportar el archivo:\n{str(e)}")
+            if respuesta == QMessageBox.StandardButton.Yes:
+                entradas = todas
+        
+        columnas, filas = self.reportes_controller.datos_exportacion_ranking(entradas)
+        exportar_en_segundo_plano(
+            self, "Guardar Ranking", "ranking_dvds_mas_rentados",
+            columnas, filas, total=len(entradas)
+        )
     
     def volver_inicio(self):
         """
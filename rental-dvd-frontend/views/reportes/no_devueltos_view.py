@@ -8,12 +8,26 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 from controllers.reportes_controller import ReportesController
+from views.exportacion import exportar_en_segundo_plano
+from views.trabajador import ejecutar_en_segundo_plano
+from views.revalidacion import Revalidador
+from views.tabla_incremental import TablaIncremental
+from views.eventos import obtener_puente_eventos
+from views.vencimientos import obtener_programador_vencimientos
+from utils.config import REVALIDACION_NO_DEVUELTOS_MS
+from utils.trazas import span, trazar
 
 class NoDevueltosReporteView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.reportes_controller = ReportesController()
+        self.rentas = []
+        self._carga = None
+        self._manual = False
         self.init_ui()
+        obtener_puente_eventos().renta_cambiada.connect(self.al_cambiar_renta)
+        obtener_programador_vencimientos().renta_atrasada.connect(self.al_atrasarse_renta)
+        self.mostrar_ultimo_resultado()
         self.cargar_reporte()
     
     def init_ui(self):
@@ -27,10 +41,15 @@ class NoDevueltosReporteView(QWidget):
         titulo.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px;")
         layout.addWidget(titulo)
         
-        # Resumen
+        # Resumen e indicador de frescura
+        self.revalidador = Revalidador(self, self.revalidar, REVALIDACION_NO_DEVUELTOS_MS)
+        resumen_layout = QHBoxLayout()
         self.label_resumen = QLabel("Cargando...")
         self.label_resumen.setStyleSheet("padding: 10px; font-weight: bold;")
-        layout.addWidget(self.label_resumen)
+        resumen_layout.addWidget(self.label_resumen)
+        resumen_layout.addStretch()
+        resumen_layout.addWidget(self.revalidador.indicador)
+        layout.addLayout(resumen_layout)
         
         # Botón actualizar
         btn_actualizar = QPushButton("🔄 Actualizar Reporte")
@@ -49,6 +68,7 @@ class NoDevueltosReporteView(QWidget):
         self.tabla_rentas.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.tabla_rentas.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         layout.addWidget(self.tabla_rentas)
+        self.tabla_incremental = TablaIncremental(self.tabla_rentas, self.pintar_fila)
         
         # Botones de acción
         botones_layout = QHBoxLayout()
@@ -59,7 +79,7 @@ class NoDevueltosReporteView(QWidget):
         
         botones_layout.addStretch()
         
-        btn_exportar = QPushButton("📄 Exportar a CSV")
+        btn_exportar = QPushButton("📄 Exportar")
         btn_exportar.clicked.connect(self.exportar_csv)
         botones_layout.addWidget(btn_exportar)
         
@@ -67,99 +87,186 @@ class NoDevueltosReporteView(QWidget):
         
         self.setLayout(layout)
     
+    def mostrar_ultimo_resultado(self):
+        """
+        Muestra al instante la última lista guardada en caché, aunque esté
+        vencida; la revalidación la reemplaza al llegar la nueva
+        """
+        rentas, edad = self.reportes_controller.ultimo_no_devueltos()
+        if rentas is None:
+            return
+        self.mostrar_rentas(rentas)
+        self.revalidador.terminar(True, edad=edad)
+    
+    @trazar('vista.no_devueltos.cargar_reporte', 'vista')
     def cargar_reporte(self):
         """
-        Carga el reporte de DVDs no devueltos
+        Carga el reporte de DVDs no devueltos (botón Actualizar)
+        """
+        self.revalidar(manual=True)
+    
+    def revalidar(self, manual=False):
+        """
+        Pide el reporte fuera del hilo de la interfaz sin vaciar la tabla
+        
+        Con la tabla vacía la respuesta se lee en flujo y las filas se agregan
+        por lotes conforme llegan; con datos a la vista se espera la lista
+        completa y solo se aplican las filas que cambiaron.
+        
+        Args:
+            manual: La pidió el usuario (los errores se muestran en un diálogo;
+                    en las automáticas solo en el indicador)
+        """
+        if self._carga is not None:
+            return
+        
+        self._manual = manual
+        self.revalidador.iniciar()
+        if self.tabla_incremental.filas:
+            self._carga = ejecutar_en_segundo_plano(
+                self.reportes_controller.obtener_dvds_no_devueltos,
+                al_terminar=self._carga_terminada,
+                al_fallar=lambda mensaje: self._carga_terminada((False, mensaje))
+            )
+            return
+        
+        self.label_resumen.setText("Cargando...")
+        self._carga = ejecutar_en_segundo_plano(
+            self.reportes_controller.obtener_dvds_no_devueltos,
+            al_terminar=self._carga_terminada,
+            al_fallar=lambda mensaje: self._carga_terminada((False, mensaje)),
+            al_lote=self.agregar_filas
+        )
+    
+    def _carga_terminada(self, resultado):
+        """
+        Completa la tabla y el resumen cuando termina la lectura
         """
-        exito, resultado = self.reportes_controller.obtener_dvds_no_devueltos()
+        self._carga = None
+        exito, resultado = resultado
+        self.revalidador.terminar(exito, error=None if exito else resultado)
         
         if not exito:
-            QMessageBox.critical(self, "Error", f"No se pudo cargar el reporte:\n{resultado}")
+            if len(self.tabla_incremental.filas) != len(self.rentas):
+                # La lectura en flujo se cortó: no se deja una lista a medias
+                self.tabla_incremental.limpiar()
+            if not self.rentas:
+                self.label_resumen.setText("No se pudo cargar el reporte")
+            if self._manual or not self.rentas:
+                QMessageBox.critical(self, "Error", f"No se pudo cargar el reporte:\n{resultado}")
             return
         
-        # Actualizar resumen
-        total_no_devueltos = len(resultado)
-        con_retraso = sum(1 for r in resultado if r.calcular_dias_retraso() > 0)
+        self.mostrar_rentas(resultado)
+        
+        if not resultado and self._manual:
+            QMessageBox.information(self, "Sin Rentas", "¡Excelente! No hay DVDs pendientes de devolución")
+    
+    def al_cambiar_renta(self, evento):
+        """
+        Quita o agrega en la tabla la renta que otra caja devolvió, canceló o creó
+        """
+        if evento['tipo'] == 'reinicio' or self._carga is not None:
+            # Sin saber qué cambió, o con una carga que quizá ya no lo incluya
+            self.revalidador.invalidar()
+            return
+        if self.revalidador.actualizado is None:
+            return
         
-        self.label_resumen.setText(
-            f"Total DVDs No Devueltos: {total_no_devueltos} | "
-            f"Con Retraso: {con_retraso} | "
-            f"A Tiempo: {total_no_devueltos - con_retraso}"
+        rental_id = evento['datos'].get('rental_id')
+        rentas = [renta for renta in self.rentas if renta.id != rental_id]
+        if evento['renta'] is not None:
+            rentas.append(evento['renta'])
+        self.mostrar_rentas(rentas)
+    
+    def al_atrasarse_renta(self, aviso):
+        """
+        Vuelve a calcular los días de retraso: solo se repintan las filas que cambiaron
+        """
+        if self._carga is None and self.revalidador.actualizado is not None:
+            self.mostrar_rentas(self.rentas)
+    
+    def _fila(self, renta):
+        """
+        Clave y valores de la fila de una renta
+        """
+        cliente_nombre = renta.cliente.nombre if renta.cliente else f"ID: {renta.customer_id}"
+        dvd_titulo = renta.dvd.titulo if renta.dvd else f"ID: {renta.dvd_id}"
+        staff_nombre = renta.staff.nombre if renta.staff else f"ID: {renta.staff_id}"
+        return renta.id, (
+            str(renta.id), cliente_nombre, dvd_titulo, staff_nombre,
+            renta.fecha_renta, renta.fecha_devolucion_esperada, renta.calcular_dias_retraso()
         )
+    
+    def mostrar_rentas(self, rentas):
+        """
+        Deja en la tabla la lista completa, tocando solo las filas que cambiaron
         
-        # Llenar tabla
-        self.tabla_rentas.setRowCount(0)
+        Args:
+            rentas: Lista de objetos Renta
+        """
+        self.rentas = rentas
+        filas = [self._fila(renta) for renta in rentas]
+        self.tabla_incremental.mostrar(filas)
         
-        for renta in resultado:
-            row = self.tabla_rentas.rowCount()
-            self.tabla_rentas.insertRow(row)
-            
-            cliente_nombre = renta.cliente.nombre if renta.cliente else f"ID: {renta.customer_id}"
-            dvd_titulo = renta.dvd.titulo if renta.dvd else f"ID: {renta.dvd_id}"
-            staff_nombre = renta.staff.nombre if renta.staff else f"ID: {renta.staff_id}"
-            dias_retraso = renta.calcular_dias_retraso()
-            
-            self.tabla_rentas.setItem(row, 0, QTableWidgetItem(str(renta.id)))
-            self.tabla_rentas.setItem(row, 1, QTableWidgetItem(cliente_nombre))
-            self.tabla_rentas.setItem(row, 2, QTableWidgetItem(dvd_titulo))
-            self.tabla_rentas.setItem(row, 3, QTableWidgetItem(staff_nombre))
-            self.tabla_rentas.setItem(row, 4, QTableWidgetItem(renta.fecha_renta))
-            self.tabla_rentas.setItem(row, 5, QTableWidgetItem(renta.fecha_devolucion_esperada))
-            
-            # Colorear días de retraso
-            item_retraso = QTableWidgetItem(f"{dias_retraso} días" if dias_retraso > 0 else "A tiempo")
-            if dias_retraso > 7:
-                item_retraso.setBackground(Qt.GlobalColor.red)
-                item_retraso.setForeground(Qt.GlobalColor.white)
-            elif dias_retraso > 0:
-                item_retraso.setBackground(Qt.GlobalColor.yellow)
-            else:
-                item_retraso.setBackground(Qt.GlobalColor.green)
+        # Actualizar resumen
+        with span('vista.resumen', 'vista'):
+            total_no_devueltos = len(filas)
+            con_retraso = sum(1 for _, valores in filas if valores[6] > 0)
             
-            self.tabla_rentas.setItem(row, 6, item_retraso)
+            self.label_resumen.setText(
+                f"Total DVDs No Devueltos: {total_no_devueltos} | "
+                f"Con Retraso: {con_retraso} | "
+                f"A Tiempo: {total_no_devueltos - con_retraso}"
+            )
+    
+    def agregar_filas(self, rentas):
+        """
+        Agrega un lote de rentas al final de la tabla (primera carga en flujo)
         
-        if not resultado:
-            QMessageBox.information(self, "Sin Rentas", "¡Excelente! No hay DVDs pendientes de devolución")
+        Args:
+            rentas: Lista de objetos Renta
+        """
+        if not rentas:
+            return
+        
+        self.tabla_incremental.agregar(self._fila(renta) for renta in rentas)
+        
+        if self._carga is not None:
+            self.label_resumen.setText(f"Cargando... {len(self.tabla_incremental.filas)} rentas recibidas")
+    
+    def pintar_fila(self, row, valores):
+        """
+        Llena las celdas de una fila de la tabla
+        """
+        for columna, valor in enumerate(valores[:6]):
+            self.tabla_rentas.setItem(row, columna, QTableWidgetItem(valor))
+        
+        # Colorear días de retraso
+        dias_retraso = valores[6]
+        item_retraso = QTableWidgetItem(f"{dias_retraso} días" if dias_retraso > 0 else "A tiempo")
+        if dias_retraso > 7:
+            item_retraso.setBackground(Qt.GlobalColor.red)
+            item_retraso.setForeground(Qt.GlobalColor.white)
+        elif dias_retraso > 0:
+            item_retraso.setBackground(Qt.GlobalColor.yellow)
+        else:
+            item_retraso.setBackground(Qt.GlobalColor.green)
+        
+        self.tabla_rentas.setItem(row, 6, item_retraso)
     
     def exportar_csv(self):
         """
-        Exporta los datos de la tabla a CSV
+        Exporta el reporte desde los datos cargados (no desde la tabla)
         """
-        if self.tabla_rentas.rowCount() == 0:
+        if not self.rentas:
             QMessageBox.warning(self, "Sin Datos", "No hay datos para exportar")
             return
         
-        try:
-            from PyQt6.QtWidgets import QFileDialog
-            import csv
-            
-            archivo, _ = QFileDialog.getSaveFileName(
-                self,
-                "Guardar Reporte",
-                "reporte_no_devueltos.csv",
-                "CSV Files (*.csv)"
-            )
-            
-            if archivo:
-                with open(archivo, 'w', newline='', encoding='utf-8') as f:
-                    writer = csv.writer(f)
-                    
-                    headers = []
-                    for col in range(self.tabla_rentas.columnCount()):
-                        headers.append(self.tabla_rentas.horizontalHeaderItem(col).text())
-                    writer.writerow(headers)
-                    
-                    for row in range(self.tabla_rentas.rowCount()):
-                        row_data = []
-                        for col in range(self.tabla_rentas.columnCount()):
-                            item = self.tabla_rentas.item(row, col)
-                            row_data.append(item.text() if item else "")
-                        writer.writerow(row_data)
-                
-                QMessageBox.information(self, "Éxito", f"Reporte exportado a:\n{archivo}")
-        
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"No se pudo exportar el archivo:\n{str(e)}")
+        columnas, filas = self.reportes_controller.datos_exportacion_no_devueltos(self.rentas)
+        exportar_en_segundo_plano(
+            self, "Guardar Reporte", "reporte_no_devueltos",
+            columnas, filas, total=len(self.rentas)
+        )
     
     def volver_inicio(self):
         """
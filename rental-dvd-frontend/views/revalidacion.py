@@ -0,0 +1,197 @@
+"""
+Refresco en segundo plano de las vistas de reportes
+
+La vista muestra de inmediato lo último que tiene (o lo que quedó en caché)
+y pide datos nuevos sin bloquear (stale-while-revalidate): cada cierto
+intervalo mientras está visible, y al volver a ella o a la ventana si los
+datos tienen más de REVALIDACION_EDAD_MINIMA_S segundos. El indicador de
+frescura dice de cuándo son los datos a la vista.
+"""
+import time
+from PyQt6.QtCore import QObject, QTimer, QEvent
+from PyQt6.QtWidgets import QLabel
+from utils.config import REVALIDACION_EDAD_MINIMA_S, REVALIDACION_EDAD_VIEJA_S
+
+COLORES_FRESCURA = {
+    'fresco': '#2e7d32',
+    'viejo': '#f9a825',
+    'error': '#c62828',
+    'actualizando': '#1565c0',
+    'sin datos': '#757575'
+}
+
+
+def formatear_edad(segundos):
+    """
+    '12 s', '3 min', '2 h'
+    """
+    if segundos < 60:
+        return f"{segundos:.0f} s"
+    if segundos < 3600:
+        return f"{segundos // 60:.0f} min"
+    return f"{segundos // 3600:.0f} h"
+
+
+class Revalidador(QObject):
+    """
+    Decide cuándo refrescar una vista y lleva la cuenta de la frescura
+
+    La vista hace la carga: Revalidador llama a refrescar() cuando toca, y la
+    vista avisa con iniciar() y terminar() al empezar y acabar cada carga
+    (también las que pide el usuario).
+    """
+
+    def __init__(self, vista, refrescar, intervalo_ms):
+        """
+        Args:
+            vista: QWidget que se refresca (solo mientras está visible)
+            refrescar: Función sin argumentos que lanza la revalidación
+            intervalo_ms: Milisegundos entre revalidaciones (0 = sin temporizador)
+        """
+        super().__init__(vista)
+        self.vista = vista
+        self.refrescar = refrescar
+        self.intervalo_ms = intervalo_ms
+        self.actualizado = None
+        self.en_curso = False
+        self.error = None
+        self.invalidado = False
+        self._ventana = None
+
+        self.indicador = QLabel()
+        self.indicador.setStyleSheet("padding: 0 10px;")
+        self.timer = QTimer(self)
+        self.timer.setInterval(intervalo_ms or 0)
+        self.timer.timeout.connect(self._al_vencer)
+        # Solo repinta la edad del indicador
+        self.reloj = QTimer(self)
+        self.reloj.setInterval(1000)
+        self.reloj.timeout.connect(self.pintar)
+
+        vista.installEventFilter(self)
+        self.pintar()
+
+    def edad(self):
+        """
+        Returns:
+            float: Segundos desde que se obtuvieron los datos a la vista (None si no hay)
+        """
+        if self.actualizado is None:
+            return None
+        return time.monotonic() - self.actualizado
+
+    def vencido(self):
+        edad = self.edad()
+        return self.invalidado or edad is None or edad >= REVALIDACION_EDAD_MINIMA_S
+
+    def invalidar(self):
+        """
+        Los datos a la vista ya no son válidos (p. ej. otra caja cambió una
+        renta): se revalida ahora si la vista está visible, o al volver a ella
+        """
+        if self.actualizado is None:
+            return
+        self.invalidado = True
+        if self.vista.isVisible():
+            self._pedir()
+
+    def iniciar(self):
+        """
+        La vista empezó a cargar datos
+        """
+        self.en_curso = True
+        # Lo que cambie a partir de ahora puede no venir en esta carga
+        self.invalidado = False
+        self.pintar()
+
+    def terminar(self, exito, error=None, edad=0.0):
+        """
+        La vista terminó de cargar
+
+        Args:
+            exito: True si se mostraron datos nuevos
+            error: Mensaje si falló (los datos anteriores siguen a la vista)
+            edad: Segundos que ya tenían los datos mostrados (p. ej. de la caché)
+        """
+        self.en_curso = False
+        if exito:
+            self.actualizado = time.monotonic() - edad
+            self.error = None
+        else:
+            self.error = error
+        # El intervalo cuenta desde la última carga, también si la pidió el usuario
+        if self.intervalo_ms and self.vista.isVisible():
+            self.timer.start()
+        if self.invalidado and self.vista.isVisible():
+            # Hubo cambios durante la carga: se pide otra cuando la vista termine
+            QTimer.singleShot(0, self._pedir)
+        self.pintar()
+
+    def _pedir(self):
+        if not self.en_curso:
+            self.refrescar()
+
+    def _al_vencer(self):
+        if self.vista.isVisible():
+            self._pedir()
+
+    def _al_mostrar(self):
+        ventana = self.vista.window()
+        if ventana is not self.vista and ventana is not self._ventana:
+            if self._ventana is not None:
+                self._ventana.removeEventFilter(self)
+            self._ventana = ventana
+            ventana.installEventFilter(self)
+        if self.intervalo_ms:
+            self.timer.start()
+        self.reloj.start()
+        self.pintar()
+        if self.actualizado is not None and self.vencido():
+            self._pedir()
+
+    def eventFilter(self, objeto, evento):
+        tipo = evento.type()
+        if objeto is self.vista:
+            if tipo == QEvent.Type.Show:
+                self._al_mostrar()
+            elif tipo == QEvent.Type.Hide:
+                self.timer.stop()
+                self.reloj.stop()
+        elif (objeto is self._ventana and tipo == QEvent.Type.WindowActivate
+              and self.vista.isVisible() and self.actualizado is not None and self.vencido()):
+            self._pedir()
+        return False
+
+    def estado(self):
+        """
+        Returns:
+            str: 'actualizando', 'error', 'fresco', 'viejo' o 'sin datos'
+        """
+        if self.en_curso:
+            return 'actualizando'
+        if self.error is not None:
+            return 'error'
+        edad = self.edad()
+        if edad is None:
+            return 'sin datos'
+        return 'viejo' if edad >= REVALIDACION_EDAD_VIEJA_S else 'fresco'
+
+    def pintar(self):
+        """
+        Refresca el texto del indicador de frescura
+        """
+        estado = self.estado()
+        edad = self.edad()
+        hace = f"hace {formatear_edad(edad)}" if edad is not None else ""
+        if estado == 'actualizando':
+            texto = f"⟳ Actualizando... (datos de {hace})" if hace else "⟳ Actualizando..."
+        elif estado == 'error':
+            texto = f"⚠ Sin actualizar, datos de {hace}: {self.error}" if hace else f"⚠ {self.error}"
+        elif estado == 'sin datos':
+            texto = "Sin datos"
+        elif estado == 'viejo':
+            texto = f"● Datos de {hace}"
+        else:
+            texto = f"● Actualizado {hace}"
+        self.indicador.setText(texto)
+        self.indicador.setStyleSheet(f"padding: 0 10px; color: {COLORES_FRESCURA[estado]};")
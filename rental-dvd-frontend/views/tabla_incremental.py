@@ -0,0 +1,207 @@
+"""
+Actualización incremental de tablas
+
+En vez de vaciar la tabla y volver a llenarla en cada refresco, se comparan
+las filas mostradas con las nuevas por su clave (rental_id, staff_id...) y
+solo se insertan, actualizan o eliminan las que cambiaron, así que el costo
+de un refresco depende de los cambios y no del tamaño del reporte. La
+selección y la posición de desplazamiento se conservan por clave, así que
+un refresco no le cambia al usuario la fila que tenía seleccionada ni lo
+regresa al inicio de la tabla.
+"""
+from bisect import bisect_left
+from PyQt6.QtCore import QItemSelection, QItemSelectionModel
+from services.instrumentacion import obtener_instrumentacion
+from utils.trazas import span
+
+
+def diferencias(anteriores, nuevas):
+    """
+    Operaciones que convierten una lista de filas en otra
+
+    Args:
+        anteriores: Lista de (clave, valores) mostrada, en orden
+        nuevas: Lista de (clave, valores) a mostrar, en orden; las claves no
+                se repiten y los valores se comparan con ==
+
+    Returns:
+        list: Tuplas ('eliminar', fila), ('insertar', fila, valores) y
+              ('actualizar', fila, valores). Los índices son válidos
+              aplicando las operaciones en orden.
+    """
+    operaciones = []
+    valores_actuales = dict(anteriores)
+    estables = _estables([clave for clave, _ in anteriores], [clave for clave, _ in nuevas])
+
+    # Primero lo que ya no está o cambió de posición, de abajo hacia arriba
+    # para no mover índices. Las filas que se quedan conservan el orden nuevo.
+    actuales = [clave for clave, _ in anteriores]
+    for fila in range(len(actuales) - 1, -1, -1):
+        if actuales[fila] not in estables:
+            operaciones.append(('eliminar', fila))
+            del actuales[fila]
+
+    for fila, (clave, valores) in enumerate(nuevas):
+        if fila < len(actuales) and actuales[fila] == clave:
+            if valores_actuales[clave] != valores:
+                operaciones.append(('actualizar', fila, valores))
+            continue
+        operaciones.append(('insertar', fila, valores))
+        actuales.insert(fila, clave)
+    return operaciones
+
+
+def _estables(anteriores, nuevas):
+    """
+    Claves que pueden quedarse donde están: la subsecuencia creciente más
+    larga de sus posiciones anteriores en el orden nuevo, así que mover una
+    fila cuesta dos operaciones y no desplaza a todas las demás
+    """
+    posicion = {clave: indice for indice, clave in enumerate(anteriores)}
+    secuencia = [clave for clave in nuevas if clave in posicion]
+    # finales[k]: menor posición final de una subsecuencia de largo k+1, y
+    # colas[k] el índice en secuencia donde termina
+    finales = []
+    colas = []
+    previo = [None] * len(secuencia)
+    for i, clave in enumerate(secuencia):
+        k = bisect_left(finales, posicion[clave])
+        if k > 0:
+            previo[i] = colas[k - 1]
+        if k == len(finales):
+            finales.append(posicion[clave])
+            colas.append(i)
+        else:
+            finales[k] = posicion[clave]
+            colas[k] = i
+    estables = set()
+    i = colas[-1] if colas else None
+    while i is not None:
+        estables.add(secuencia[i])
+        i = previo[i]
+    return estables
+
+
+class TablaIncremental:
+    """
+    Mantiene un QTableWidget al día con una lista de filas con clave
+    """
+
+    def __init__(self, tabla, pintar):
+        """
+        Args:
+            tabla: QTableWidget
+            pintar: Función pintar(fila, valores) que llena las celdas de una
+                    fila ya existente de la tabla
+        """
+        self.tabla = tabla
+        self.pintar = pintar
+        self.filas = []
+
+    def mostrar(self, nuevas):
+        """
+        Deja en la tabla exactamente las filas indicadas
+
+        Args:
+            nuevas: Lista de (clave, valores) en el orden de la tabla
+
+        Returns:
+            list: Operaciones aplicadas (ver diferencias)
+        """
+        nuevas = list(nuevas)
+        operaciones = diferencias(self.filas, nuevas)
+        if not operaciones:
+            self.filas = nuevas
+            return operaciones
+        vista = self._guardar_vista()
+        self.aplicar(operaciones)
+        self.filas = nuevas
+        self._restaurar_vista(*vista)
+        return operaciones
+
+    def agregar(self, nuevas):
+        """
+        Agrega filas al final (carga en flujo: las claves aún no están en la tabla)
+        """
+        inicio = len(self.filas)
+        nuevas = list(nuevas)
+        self.filas.extend(nuevas)
+        self.aplicar([('insertar', inicio + i, valores) for i, (_, valores) in enumerate(nuevas)])
+
+    def clave_fila(self, fila):
+        """
+        Returns:
+            Clave de la fila indicada de la tabla (None si no hay)
+        """
+        if 0 <= fila < len(self.filas):
+            return self.filas[fila][0]
+        return None
+
+    def _guardar_vista(self):
+        """
+        Claves seleccionadas, clave de la fila actual y fila ancla del desplazamiento
+        """
+        seleccion = self.tabla.selectionModel()
+        filas = {indice.row() for indice in seleccion.selectedIndexes()}
+        seleccionadas = [self.clave_fila(fila) for fila in sorted(filas)]
+        actual = self.clave_fila(self.tabla.currentRow())
+        # Solo se ancla si el usuario se desplazó; arriba del todo se ven las filas nuevas
+        ancla = None
+        if self.tabla.verticalScrollBar().value() > 0:
+            superior = self.tabla.rowAt(0)
+            ancla = self.clave_fila(superior), self.tabla.rowViewportPosition(superior)
+        return seleccionadas, actual, ancla
+
+    def _restaurar_vista(self, seleccionadas, actual, ancla):
+        posiciones = {clave: fila for fila, (clave, _) in enumerate(self.filas)}
+        modelo = self.tabla.model()
+        ultima_columna = modelo.columnCount() - 1
+        seleccion = self.tabla.selectionModel()
+
+        if seleccionadas or actual is not None:
+            nueva = QItemSelection()
+            for clave in seleccionadas:
+                fila = posiciones.get(clave)
+                if fila is not None:
+                    nueva.select(modelo.index(fila, 0), modelo.index(fila, ultima_columna))
+            if actual in posiciones:
+                columna = max(self.tabla.currentColumn(), 0)
+                seleccion.setCurrentIndex(
+                    modelo.index(posiciones[actual], columna),
+                    QItemSelectionModel.SelectionFlag.NoUpdate
+                )
+            seleccion.select(nueva, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+
+        if ancla is not None and ancla[0] in posiciones:
+            clave, desplazamiento = ancla
+            # El rango de la barra se recalcula al pintar; se actualiza antes de moverla
+            self.tabla.updateGeometries()
+            barra = self.tabla.verticalScrollBar()
+            fila = posiciones[clave]
+            if self.tabla.verticalScrollMode() == self.tabla.ScrollMode.ScrollPerItem:
+                barra.setValue(fila)
+            else:
+                barra.setValue(barra.value() + self.tabla.rowViewportPosition(fila) - desplazamiento)
+
+    def limpiar(self):
+        self.filas = []
+        self.tabla.setRowCount(0)
+
+    def aplicar(self, operaciones):
+        if not operaciones:
+            return
+        pintadas = sum(1 for operacion in operaciones if operacion[0] != 'eliminar')
+        with span('render.tabla', 'render', filas=pintadas, operaciones=len(operaciones)):
+            obtener_instrumentacion().contar_filas(pintadas)
+            self.tabla.setUpdatesEnabled(False)
+            try:
+                for operacion in operaciones:
+                    tipo, fila = operacion[0], operacion[1]
+                    if tipo == 'eliminar':
+                        self.tabla.removeRow(fila)
+                        continue
+                    if tipo == 'insertar':
+                        self.tabla.insertRow(fila)
+                    self.pintar(fila, operacion[2])
+            finally:
+                self.tabla.setUpdatesEnabled(True)
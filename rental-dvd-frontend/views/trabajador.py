@@ -0,0 +1,75 @@
+"""
+Ejecución de tareas en segundo plano para las vistas
+"""
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class _SenalesTrabajador(QObject):
+    terminado = pyqtSignal(object)
+    fallido = pyqtSignal(str)
+    progreso = pyqtSignal(int, int)
+    lote = pyqtSignal(object)
+
+
+class Trabajador(QRunnable):
+    """
+    Ejecuta una función en el pool de hilos de Qt y emite el resultado
+
+    Las señales se entregan en el hilo de la interfaz, así que los slots
+    conectados pueden tocar widgets directamente.
+    """
+
+    def __init__(self, funcion, *args, con_progreso=False, con_lotes=False, **kwargs):
+        """
+        Args:
+            funcion: Función a ejecutar
+            *args, **kwargs: Argumentos de la función
+            con_progreso: Si es True, la función recibe un callback
+                          progreso(hechos, total) como argumento 'progreso'
+            con_lotes: Si es True, la función recibe un callback al_lote(lista)
+                       como argumento 'al_lote' (resultados parciales)
+        """
+        super().__init__()
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = _SenalesTrabajador()
+        if con_progreso:
+            self.kwargs['progreso'] = self.senales.progreso.emit
+        if con_lotes:
+            self.kwargs['al_lote'] = self.senales.lote.emit
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            self.senales.fallido.emit(str(e))
+        else:
+            self.senales.terminado.emit(resultado)
+
+
+def ejecutar_en_segundo_plano(funcion, *args, al_terminar=None, al_fallar=None, al_lote=None, **kwargs):
+    """
+    Lanza una función en el pool global de hilos
+
+    Args:
+        funcion: Función a ejecutar
+        al_terminar: Slot que recibe el resultado
+        al_fallar: Slot que recibe el mensaje de error
+        al_lote: Slot que recibe cada lote parcial; la función recibe el
+                 callback correspondiente como argumento 'al_lote'
+
+    Returns:
+        Trabajador: La tarea lanzada. Ya está corriendo: los slots de
+                    resultado van en al_terminar/al_fallar, que se conectan
+                    antes de iniciarla
+    """
+    trabajador = Trabajador(funcion, *args, con_lotes=al_lote is not None, **kwargs)
+    if al_lote:
+        trabajador.senales.lote.connect(al_lote)
+    if al_terminar:
+        trabajador.senales.terminado.connect(al_terminar)
+    if al_fallar:
+        trabajador.senales.fallido.connect(al_fallar)
+    QThreadPool.globalInstance().start(trabajador)
+    return trabajador
@@ -0,0 +1,140 @@
+"""
+Avisos de rentas que se atrasan
+
+ProgramadorVencimientos lleva la agenda de services/vencimientos.py con las
+rentas activas y arma un solo temporizador para el próximo umbral, así que
+el aviso llega en el momento en que la renta se atrasa (o pasa de 7 días)
+sin recorrer la lista ni abrir el reporte. La agenda se llena con la lista
+de rentas activas y se mantiene con el feed de eventos de rentas; si el
+feed no está disponible, la resincronización periódica corrige las
+devoluciones y cancelaciones que no llegaron.
+"""
+import logging
+from datetime import datetime
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+from controllers.reportes_controller import ReportesController
+from services.vencimientos import AgendaVencimientos
+from views.eventos import obtener_puente_eventos
+from views.trabajador import ejecutar_en_segundo_plano
+from utils.config import VENCIMIENTOS_UMBRALES_DIAS, VENCIMIENTOS_RESINCRONIZACION_MS
+
+# QTimer no admite esperas de semanas; además así se corrige un cambio de
+# hora del sistema o una suspensión del equipo
+ESPERA_MAXIMA_MS = 3600 * 1000
+
+logger = logging.getLogger(__name__)
+
+
+class ProgramadorVencimientos(QObject):
+    # AvisoVencimiento de una renta que acaba de superar un umbral de retraso
+    renta_atrasada = pyqtSignal(object)
+
+    def __init__(self, umbrales=None, resincronizacion_ms=VENCIMIENTOS_RESINCRONIZACION_MS):
+        """
+        Args:
+            umbrales: Días de retraso que generan aviso (por defecto VENCIMIENTOS_UMBRALES_DIAS)
+            resincronizacion_ms: Milisegundos entre lecturas completas (0 = solo al iniciar)
+        """
+        super().__init__()
+        self.agenda = AgendaVencimientos(umbrales or VENCIMIENTOS_UMBRALES_DIAS)
+        self.reportes_controller = ReportesController()
+        self._carga = None
+        # Eventos llegados mientras se leía la lista: se aplican encima
+        self._pendientes = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._al_vencer)
+        self.timer_sincronizacion = QTimer(self)
+        self.timer_sincronizacion.setInterval(resincronizacion_ms)
+        self.timer_sincronizacion.timeout.connect(self.sincronizar)
+
+        obtener_puente_eventos().renta_cambiada.connect(self.al_cambiar_renta)
+
+    def iniciar(self):
+        self.sincronizar()
+        if self.timer_sincronizacion.interval():
+            self.timer_sincronizacion.start()
+
+    def detener(self):
+        self.timer.stop()
+        self.timer_sincronizacion.stop()
+
+    def sincronizar(self):
+        """
+        Lee las rentas activas en segundo plano y rehace la agenda
+        """
+        if self._carga is not None:
+            return
+        self._pendientes = []
+        self._carga = ejecutar_en_segundo_plano(
+            self.reportes_controller.obtener_dvds_no_devueltos, usar_cache=True,
+            al_terminar=self._sincronizada,
+            al_fallar=lambda mensaje: self._sincronizada((False, mensaje))
+        )
+
+    def _sincronizada(self, resultado):
+        self._carga = None
+        exito, rentas = resultado
+        if not exito:
+            # La agenda anterior sigue valiendo; se reintenta en la próxima resincronización
+            logger.warning("No se pudo leer la lista de rentas activas: %s", rentas)
+            return
+        self.agenda.cargar((renta.id, renta.fecha_devolucion_esperada, renta) for renta in rentas)
+        for evento in self._pendientes:
+            self._aplicar(evento)
+        self._pendientes = []
+        self.programar()
+
+    def al_cambiar_renta(self, evento):
+        """
+        Agrega a la agenda la renta creada o quita la devuelta o cancelada
+        """
+        if evento['tipo'] == 'reinicio':
+            # Se perdieron eventos: la caché ya se descartó y se lee de nuevo
+            self.sincronizar()
+            return
+        if self._carga is not None:
+            self._pendientes.append(evento)
+        self._aplicar(evento)
+        self.programar()
+
+    def _aplicar(self, evento):
+        renta = evento['renta']
+        if renta is not None:
+            self.agenda.agregar(renta.id, renta.fecha_devolucion_esperada, renta)
+        else:
+            self.agenda.quitar(evento['datos'].get('rental_id'))
+
+    def programar(self):
+        """
+        Arma el temporizador para el próximo aviso de la agenda
+        """
+        proximo = self.agenda.proximo()
+        if proximo is None:
+            self.timer.stop()
+            return
+        espera_ms = (proximo - datetime.now()).total_seconds() * 1000
+        self.timer.start(int(min(max(espera_ms, 0), ESPERA_MAXIMA_MS)))
+
+    def _al_vencer(self):
+        for aviso in self.agenda.vencidos():
+            self.renta_atrasada.emit(aviso)
+        self.programar()
+
+
+_programador = None
+
+
+def obtener_programador_vencimientos():
+    """
+    Programador compartido (se crea en el hilo de la interfaz la primera vez)
+
+    Returns:
+        ProgramadorVencimientos: Instancia única
+    """
+    global _programador
+    if _programador is None:
+        _programador = ProgramadorVencimientos()
+    return _programador